@@ -0,0 +1,402 @@
+"""
+Admission control — keep tail latency predictable under bursts.
+
+Without it every request of a burst hits Gemini at once, runs into rate
+limits and fails late inside the graph. Requests now pass three gates:
+
+1. Token buckets (per user + global) — over the rate → rejected at once
+2. Concurrency slots per worker — when all busy, request waits in a
+   bounded FIFO queue; client gets SSE `queued` events (position, ETA).
+   Queue full or wait too long → rejected
+3. Per-model LLM semaphores — at most N concurrent calls per model,
+   a call that can't get a slot in time fails instead of piling up
+
+Rejections raise Overloaded; API turns it into a clean SSE error event
+(code + retry_after) instead of a late Gemini 429.
+
+Usage:
+    ticket = get_admission().check(user_id)          # may raise Overloaded
+    async for event in ticket.wait():                 # queued events
+        yield event
+    try:
+        ...run graph...
+    finally:
+        ticket.release()
+
+    with llm_slot(model):                             # in agents
+        client.models.generate_content(...)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import AsyncIterator
+
+import config
+from agent.logging import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Request shed by admission control."""
+
+    def __init__(self, code: str, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.code = code  # rate_limited, queue_full, queue_timeout, model_busy
+        self.retry_after = retry_after
+
+    def to_event(self) -> dict:
+        """SSE error event for client."""
+        event = {"type": "error", "code": self.code, "message": str(self)}
+        if self.retry_after is not None:
+            event["retry_after"] = round(self.retry_after, 1)
+        return event
+
+
+# =============================================================================
+# Token buckets
+# =============================================================================
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/sec, up to `burst` stored."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 = available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+# =============================================================================
+# Admission queue
+# =============================================================================
+
+class Ticket:
+    """One admitted (or queued) request. Release exactly once."""
+
+    def __init__(self, controller: AdmissionController, user_id: str):
+        self.controller = controller
+        self.user_id = user_id
+        self.created = time.monotonic()
+        self.started: float | None = None
+        self._ready: asyncio.Event | None = None
+        self._released = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.started is not None
+
+    async def wait(self) -> AsyncIterator[dict]:
+        """Wait for a slot, yielding `queued` events. Raises Overloaded."""
+        if self.admitted:
+            return
+        controller = self.controller
+        deadline = self.created + controller.queue_timeout
+
+        while not self.admitted:
+            position = controller.position(self)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                controller._abandon(self)
+                metrics.ADMISSIONS.inc(result="queue_timeout")
+                raise Overloaded(
+                    "queue_timeout",
+                    "Server is busy, please try again in a moment",
+                    retry_after=controller.eta(1),
+                )
+            # Repeated every update_interval — also keeps proxies from closing idle stream
+            yield {
+                "type": "queued",
+                "position": position,
+                "eta_seconds": round(controller.eta(position), 1),
+            }
+            try:
+                await asyncio.wait_for(
+                    self._ready.wait(),
+                    timeout=min(remaining, controller.update_interval),
+                )
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                controller._abandon(self)
+                raise
+
+        metrics.ADMISSION_WAIT.observe(self.started - self.created)
+
+    def release(self):
+        """Free the slot (no-op if never admitted or already released)."""
+        if self._released:
+            return
+        self._released = True
+        if self.admitted:
+            self.controller._release(self)
+        else:
+            self.controller._abandon(self)
+
+
+class AdmissionController:
+    """
+    Per-worker admission: token buckets + slots + bounded FIFO queue.
+
+    Runs on the event loop (api.py) — queue state is guarded by a lock only
+    so that stats can be read from other threads.
+
+    Args:
+        max_concurrent: Requests running the graph at once
+        max_queue: Requests allowed to wait for a slot
+        queue_timeout: Max seconds in queue before shedding
+        user_rate/user_burst: Per-user token bucket (requests/sec, burst)
+        global_rate/global_burst: Worker-wide token bucket
+        update_interval: Seconds between repeated `queued` events
+    """
+
+    # Per-user buckets kept at most (full buckets are dropped first)
+    MAX_USERS = 10_000
+
+    def __init__(
+        self,
+        max_concurrent: int = config.ADMISSION_MAX_CONCURRENT,
+        max_queue: int = config.ADMISSION_MAX_QUEUE,
+        queue_timeout: float = config.ADMISSION_QUEUE_TIMEOUT,
+        user_rate: float = config.ADMISSION_USER_RATE,
+        user_burst: float = config.ADMISSION_USER_BURST,
+        global_rate: float = config.ADMISSION_GLOBAL_RATE,
+        global_burst: float = config.ADMISSION_GLOBAL_BURST,
+        update_interval: float = config.ADMISSION_QUEUE_UPDATE_INTERVAL,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.update_interval = update_interval
+
+        self._global = TokenBucket(global_rate, global_burst)
+        self._users: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._queue: deque[Ticket] = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+        # EWMA of request duration — for queue ETA
+        self._avg_duration = config.ADMISSION_INITIAL_DURATION
+
+    def check(self, user_id: str) -> Ticket:
+        """
+        Rate-limit and enqueue request.
+
+        Returns:
+            Ticket — admitted right away or queued (see Ticket.wait)
+
+        Raises:
+            Overloaded: rate_limited or queue_full
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._user_bucket(user_id, now)
+            user_wait = bucket.wait_time(now)
+            global_wait = self._global.wait_time(now)
+            if user_wait or global_wait:
+                metrics.ADMISSIONS.inc(result="rate_limited")
+                raise Overloaded(
+                    "rate_limited",
+                    "Too many requests, please slow down",
+                    retry_after=max(user_wait, global_wait),
+                )
+
+            ticket = Ticket(self, user_id)
+            if self._running < self.max_concurrent and not self._queue:
+                self._running += 1
+                ticket.started = now
+                result = "admitted"
+            elif len(self._queue) < self.max_queue:
+                ticket._ready = asyncio.Event()
+                self._queue.append(ticket)
+                result = "queued"
+            else:
+                metrics.ADMISSIONS.inc(result="queue_full")
+                raise Overloaded(
+                    "queue_full",
+                    "Server is busy, please try again in a moment",
+                    retry_after=self.eta(len(self._queue) + 1),
+                )
+
+            # Rejected requests don't spend tokens
+            bucket.take()
+            self._global.take()
+            self._update_gauges()
+        metrics.ADMISSIONS.inc(result=result)
+        return ticket
+
+    def _user_bucket(self, user_id: str, now: float) -> TokenBucket:
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            if len(self._users) >= self.MAX_USERS:
+                self._prune(now)
+            bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst)
+        self._users.move_to_end(user_id)
+        return bucket
+
+    def _prune(self, now: float):
+        """Drop full buckets (same as new), else least recently used."""
+        for user_id in [u for u, b in self._users.items() if b.is_full(now)]:
+            del self._users[user_id]
+        while len(self._users) >= self.MAX_USERS:
+            self._users.popitem(last=False)
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based queue position (0 = admitted)."""
+        with self._lock:
+            try:
+                return self._queue.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def eta(self, position: int) -> float:
+        """Estimated seconds until a request at `position` starts."""
+        waves = math.ceil(position / max(1, self.max_concurrent))
+        return waves * self._avg_duration
+
+    def _release(self, ticket: Ticket):
+        duration = time.monotonic() - ticket.started
+        with self._lock:
+            self._avg_duration += 0.2 * (duration - self._avg_duration)
+            self._running -= 1
+            self._admit_next()
+            self._update_gauges()
+
+    def _abandon(self, ticket: Ticket):
+        """Queued request gave up (timeout, client disconnect)."""
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            elif ticket.admitted:
+                # Admitted while giving up — pass the slot on
+                self._running -= 1
+                self._admit_next()
+            ticket._released = True
+            self._update_gauges()
+
+    def _admit_next(self):
+        while self._queue and self._running < self.max_concurrent:
+            ticket = self._queue.popleft()
+            self._running += 1
+            ticket.started = time.monotonic()
+            ticket._ready.set()
+
+    def _update_gauges(self):
+        metrics.ADMISSION_RUNNING.set(self._running)
+        metrics.ADMISSION_QUEUED.set(len(self._queue))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": len(self._queue),
+                "users": len(self._users),
+                "avg_duration": round(self._avg_duration, 2),
+            }
+
+
+# =============================================================================
+# Per-model LLM concurrency
+# =============================================================================
+
+class ModelLimiter:
+    """Bounded semaphore per model; limits from config.LLM_MAX_CONCURRENCY."""
+
+    def __init__(
+        self,
+        limits: dict[str, int] | None = None,
+        default: int = config.LLM_DEFAULT_CONCURRENCY,
+        timeout: float = config.LLM_SLOT_TIMEOUT,
+    ):
+        self.limits = config.LLM_MAX_CONCURRENCY if limits is None else limits
+        self.default = default
+        self.timeout = timeout
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, model: str) -> threading.BoundedSemaphore:
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.get(model)
+                if semaphore is None:
+                    limit = self.limits.get(model, self.default)
+                    semaphore = self._semaphores[model] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+    @contextmanager
+    def slot(self, model: str):
+        """Hold one concurrent call slot of model. Raises Overloaded on timeout."""
+        semaphore = self._semaphore(model)
+        if not semaphore.acquire(timeout=self.timeout):
+            metrics.ADMISSIONS.inc(result="model_busy")
+            raise Overloaded(
+                "model_busy",
+                "Model is overloaded, please try again in a moment",
+                retry_after=self.timeout,
+            )
+        metrics.LLM_IN_FLIGHT.inc(model=model)
+        try:
+            yield
+        finally:
+            metrics.LLM_IN_FLIGHT.dec(model=model)
+            semaphore.release()
+
+
+# Singletons
+_admission: AdmissionController | None = None
+_model_limiter: ModelLimiter | None = None
+_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionController:
+    """Get singleton admission controller (thread-safe)."""
+    global _admission
+    if _admission is None:
+        with _lock:
+            if _admission is None:
+                _admission = AdmissionController()
+    return _admission
+
+
+def get_model_limiter() -> ModelLimiter:
+    """Get singleton per-model limiter (thread-safe)."""
+    global _model_limiter
+    if _model_limiter is None:
+        with _lock:
+            if _model_limiter is None:
+                _model_limiter = ModelLimiter()
+    return _model_limiter
+
+
+def llm_slot(model: str):
+    """Context manager: one concurrent LLM call to model."""
+    return get_model_limiter().slot(model)
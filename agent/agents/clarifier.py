@@ -17,6 +17,9 @@ from google.genai import types
 
 import config
 from agent.types import ClarificationOutput, Usage
+from agent.admission import llm_slot
+from agent.logging import metrics
+from agent.memory.prompt_cache import get_prompt_assembler
 from agent.prompts.clarification import SYSTEM_PROMPT, USER_PROMPT
 
 logger = logging.getLogger(__name__)
@@ -78,20 +81,32 @@ class Clarifier:
             memory_context=memory_context or "None",
         )
 
-        # Call LLM
-        response = self.client.models.generate_content(
+        assembler = get_prompt_assembler()
+        prompt = assembler.assemble(
+            key="clarifier",
+            build=lambda: SYSTEM_PROMPT,
+            dynamic=user_prompt,
             model=self.model,
-            contents=f"{SYSTEM_PROMPT}\n\n{user_prompt}",
-            config=types.GenerateContentConfig(
-                temperature=0.3,  # Slight creativity for natural phrasing
-                response_mime_type="application/json",
-                response_schema=ClarificationOutput,
-            ),
         )
 
+        # Call LLM
+        with llm_slot(self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt.contents,
+                config=types.GenerateContentConfig(
+                    temperature=0.3,  # Slight creativity for natural phrasing
+                    response_mime_type="application/json",
+                    response_schema=ClarificationOutput,
+                    cached_content=prompt.cached_content,
+                ),
+            )
+
         # Parse response
         output = ClarificationOutput.model_validate_json(response.text)
         usage = Usage.from_response(response)
+        assembler.record_usage(prompt, usage)
+        metrics.observe_llm_usage("clarifier", self.model, usage)
 
         logger.info(f"Clarifier: formatted question for lang={lang}")
 
@@ -3,6 +3,19 @@ Executor — runs ExecutionPlan against data.
 
 Flow: ExecutionPlan → load data → enrich → filter (by semantics) → operation → result
 
+Data stays in Arrow from DuckDB through enrich and filters: enrich appends
+columns without copying OHLCV, filters AND into one selection mask, and the
+selected rows are materialized once — converted to pandas only for
+operations that need a DataFrame.
+
+Each stage is timed (agent/data/profiling.py); per-stage durations, row
+counts and bytes are attached to the result as "timings".
+
+Loaded periods are checked against the bar coverage index (data/coverage.py,
+one lookup per request): trading days with partial data are reported as
+result["coverage"] and, with COVERAGE_EXCLUDE_PARTIAL, dropped from daily
+and coarser bars.
+
 Uses rules from agent/rules/ for:
 - Filter semantics (where/condition/event)
 - Metric column mapping
@@ -10,15 +23,24 @@ Uses rules from agent/rules/ for:
 """
 
 import logging
+from contextvars import ContextVar
 from datetime import date, timedelta
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 logger = logging.getLogger(__name__)
 
-from agent.data import get_bars, enrich
+import config
+from agent.data import get_bars_arrow, enrich_arrow
+from agent.data.profiling import stage, stage_timer
 from agent.operations import OPERATIONS
+from agent.operations._utils import to_native
 from agent.agents.planner import ExecutionPlan, DataRequest
+from data.coverage import partial_days
+from data.database import pin_database
 from agent.rules import (
     parse_filters,
     split_filters_by_semantic,
@@ -27,12 +49,16 @@ from agent.rules import (
 )
 
 
+# Partial trading days met by the running plan (see _check_coverage)
+_partial: ContextVar[set | None] = ContextVar("partial_days", default=None)
+
+
 # =============================================================================
 # Main API
 # =============================================================================
 
 def execute_plan(plan: ExecutionPlan, symbol: str = "NQ") -> dict:
-    """Execute plan and return result."""
+    """Execute plan and return result (with per-stage "timings")."""
     executors = {
         "single": _execute_single,
         "multi_period": _execute_multi_period,
@@ -44,7 +70,21 @@ def execute_plan(plan: ExecutionPlan, symbol: str = "NQ") -> dict:
     if not executor:
         return {"error": f"Unknown mode: {plan.mode}"}
 
-    return executor(plan, symbol)
+    # One database generation for the whole plan (data/database.py)
+    partial = set()
+    token = _partial.set(partial)
+    try:
+        with stage_timer() as timer, pin_database():
+            result = to_native(executor(plan, symbol))
+    finally:
+        _partial.reset(token)
+    if partial:
+        result["coverage"] = {
+            "partial_days": [d.isoformat() for d in sorted(partial)],
+            "excluded": config.COVERAGE_EXCLUDE_PARTIAL,
+        }
+    result["timings"] = timer.to_dict()
+    return result
 
 
 # =============================================================================
@@ -72,7 +112,7 @@ def _execute_single(plan: ExecutionPlan, symbol: str) -> dict:
     if event_filters:
         params["event_filters"] = event_filters
 
-    result = op(df, plan.metrics[0], params)
+    result = _run_operation(op, df, plan.metrics[0], params)
     result["period"] = {"start": req.period[0], "end": req.period[1]}
     result["filters"] = req.filters
 
@@ -88,23 +128,9 @@ def _execute_multi_period(plan: ExecutionPlan, symbol: str) -> dict:
     periods = []
 
     for req in plan.requests:
-        df, _, _ = _load_data_with_semantics(req, plan.operation, symbol)
+        table, _, _ = _load_table_with_semantics(req, plan.operation, symbol)
         periods.append({"start": req.period[0], "end": req.period[1]})
-
-        if df.empty:
-            rows.append({"group": req.label, "avg": None, "count": 0})
-            continue
-
-        if col not in df.columns:
-            rows.append({"group": req.label, "avg": None, "count": 0, "error": f"No column {col}"})
-            continue
-
-        rows.append({
-            "group": req.label,
-            "avg": round(df[col].mean(), 3),
-            "count": len(df),
-            "std": round(df[col].std(), 3) if len(df) > 1 else 0,
-        })
+        rows.append(_group_stats(table, col, req.label))
 
     summary = _summarize_comparison(rows)
     return {"rows": rows, "summary": summary, "periods": periods}
@@ -118,22 +144,8 @@ def _execute_multi_filter(plan: ExecutionPlan, symbol: str) -> dict:
     rows = []
 
     for req in plan.requests:
-        df, _, _ = _load_data_with_semantics(req, plan.operation, symbol)
-
-        if df.empty:
-            rows.append({"group": req.label, "avg": None, "count": 0})
-            continue
-
-        if col not in df.columns:
-            rows.append({"group": req.label, "avg": None, "count": 0, "error": f"No column {col}"})
-            continue
-
-        rows.append({
-            "group": req.label,
-            "avg": round(df[col].mean(), 3),
-            "count": len(df),
-            "std": round(df[col].std(), 3) if len(df) > 1 else 0,
-        })
+        table, _, _ = _load_table_with_semantics(req, plan.operation, symbol)
+        rows.append(_group_stats(table, col, req.label))
 
     summary = _summarize_comparison(rows)
     req = plan.requests[0]
@@ -157,12 +169,42 @@ def _execute_multi_metric(plan: ExecutionPlan, symbol: str) -> dict:
         return {"error": f"Unknown operation: {plan.operation}"}
 
     params = {**plan.params, "metrics": plan.metrics}
-    result = op(df, plan.metrics[0], params)
+    result = _run_operation(op, df, plan.metrics[0], params)
     result["period"] = {"start": req.period[0], "end": req.period[1]}
 
     return result
 
 
+def _group_stats(table: pa.Table, col: str, label: str) -> dict:
+    """avg/count/std of one column for comparison modes (no pandas needed)."""
+    if table.num_rows == 0:
+        return {"group": label, "avg": None, "count": 0}
+
+    if col not in table.column_names:
+        return {"group": label, "avg": None, "count": 0, "error": f"No column {col}"}
+
+    values = table.column(col)
+    count = table.num_rows
+    return {
+        "group": label,
+        "avg": _round(pc.mean(values).as_py()),
+        "count": count,
+        "std": _round(pc.stddev(values, ddof=1).as_py()) if count > 1 else 0,
+    }
+
+
+def _round(value: float | None) -> float:
+    return round(value, 3) if value is not None else float("nan")
+
+
+def _run_operation(op, df: pd.DataFrame, metric: str, params: dict) -> dict:
+    """Run operation as timed "operation" stage (includes nested df_to_rows)."""
+    with stage("operation", rows_in=len(df)) as s:
+        result = op(df, metric, params)
+        s.done(rows=len(result.get("rows") or []))
+    return result
+
+
 # =============================================================================
 # Data Loading with Semantic Filter Handling
 # =============================================================================
@@ -172,6 +214,22 @@ def _load_data_with_semantics(
     operation: str,
     symbol: str
 ) -> tuple[pd.DataFrame, list[dict], list[dict]]:
+    """_load_table_with_semantics, converted to pandas for operations."""
+    table, condition_filters, event_filters = _load_table_with_semantics(req, operation, symbol)
+
+    with stage("to_pandas", rows_in=table.num_rows) as s:
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        s.done(df)
+    del table
+
+    return df, condition_filters, event_filters
+
+
+def _load_table_with_semantics(
+    req: DataRequest,
+    operation: str,
+    symbol: str
+) -> tuple[pa.Table, list[dict], list[dict]]:
     """
     Load data and apply filters based on semantics.
 
@@ -181,193 +239,260 @@ def _load_data_with_semantics(
         - consecutive: passed to params (needs special logic to find last day of streak)
         - comparison/pattern: applied as WHERE (same result, avoids code duplication)
 
-    Returns: (df, condition_filters, event_filters)
+    Returns: (table, condition_filters, event_filters)
     """
     period = f"{req.period[0]}:{req.period[1]}"
-    df = get_bars(symbol, period, timeframe=req.timeframe)
+    table = get_bars_arrow(symbol, period, timeframe=req.timeframe)
 
-    if df.empty:
-        return df, [], []
+    if table.num_rows == 0:
+        return table, [], []
 
-    df = enrich(df)
+    table = _check_coverage(table, req, symbol)
 
-    # Scan for patterns on daily data (adds is_* columns)
-    if req.timeframe == "1D" and {"open", "high", "low", "close"}.issubset(df.columns):
+    with stage("enrich", rows_in=table.num_rows) as s:
+        table = enrich_arrow(table)
+        s.done(table)
+
+    # Scan for patterns on daily and coarser bars (1D, 1W, 1M, session bars;
+    # adds is_* columns). They are small — the scanner works on pandas.
+    if "date" in table.column_names and {"open", "high", "low", "close"}.issubset(table.column_names):
         from agent.patterns import scan_patterns_df
-        df = scan_patterns_df(df)
+        with stage("scan_patterns", rows_in=table.num_rows) as s:
+            table = pa.Table.from_pandas(scan_patterns_df(table.to_pandas()), preserve_index=False)
+            s.done(table)
+
+    selection = _Selection(table)
 
     # Apply session filter if specified (from Planner)
     if req.session:
-        df = _apply_session_filter(df, req.session, symbol)
+        with stage("session_filter", rows_in=len(selection)) as s:
+            if "time" in table.column_names:
+                selection.where(_session_mask(table.column("time"), req.session, symbol))
+            s.done(rows=len(selection))
 
     # Parse and split filters by semantics
     all_condition_filters = []
     all_event_filters = []
 
-    for filter_str in req.filters:
-        parsed = parse_filters(filter_str)
-        where_filters, condition_filters, event_filters = split_filters_by_semantic(parsed, operation)
+    with stage("filters", rows_in=len(selection)) as s:
+        for filter_str in req.filters:
+            parsed = parse_filters(filter_str)
+            where_filters, condition_filters, event_filters = split_filters_by_semantic(parsed, operation)
 
-        # Always apply WHERE filters
-        df = _apply_where_filters(df, where_filters, symbol)
+            # Always apply WHERE filters
+            _apply_where_filters(selection, where_filters, symbol)
 
-        # Condition filters: for requires_full_data ops, pass to params
-        if requires_full_data(operation):
-            all_condition_filters.extend(condition_filters)
-        else:
-            df = _apply_where_filters(df, condition_filters, symbol)
-
-        # Event filters: consecutive needs special handling, others apply as WHERE
-        for ef in event_filters:
-            if ef.get("type") == "consecutive":
-                # Consecutive requires special logic in operation (find streaks → last day)
-                all_event_filters.append(ef)
+            # Condition filters: for requires_full_data ops, pass to params
+            if requires_full_data(operation):
+                all_condition_filters.extend(condition_filters)
             else:
-                # comparison, pattern — apply as WHERE (same result, no code duplication)
-                df = _apply_where_filters(df, [ef], symbol)
+                _apply_where_filters(selection, condition_filters, symbol)
 
-    return df, all_condition_filters, all_event_filters
+            # Event filters: consecutive needs special handling, others apply as WHERE
+            for ef in event_filters:
+                if ef.get("type") == "consecutive":
+                    # Consecutive requires special logic in operation (find streaks → last day)
+                    all_event_filters.append(ef)
+                else:
+                    # comparison, pattern — apply as WHERE (same result, no code duplication)
+                    _apply_where_filters(selection, [ef], symbol)
 
+        table = selection.materialize()
+        s.done(table)
+
+    return table, all_condition_filters, all_event_filters
+
+
+def _check_coverage(table: pa.Table, req: DataRequest, symbol: str) -> pa.Table:
+    """
+    Record partial trading days of req.period for result["coverage"]; with
+    COVERAGE_EXCLUDE_PARTIAL drop them from per-day bars (1D, sessions).
+    Intraday bars and 1W/1M (date = first day of period) are only reported.
+    """
+    with stage("coverage", rows_in=table.num_rows) as s:
+        partial = partial_days(symbol, req.period[0], req.period[1])
+        if partial:
+            collected = _partial.get()
+            if collected is not None:
+                collected.update(partial)
+            per_day = "date" in table.column_names and req.timeframe not in ("1W", "1M")
+            if config.COVERAGE_EXCLUDE_PARTIAL and per_day:
+                dates = table.column("date").cast(pa.date32())
+                table = table.filter(pc.invert(pc.is_in(dates, value_set=pa.array(partial, pa.date32()))))
+        s.done(rows=table.num_rows)
+    return table
+
+
+class _Selection:
+    """
+    Rows of an Arrow table selected by a boolean mask.
+
+    Filters AND their masks into the selection instead of copying the table;
+    materialize() takes the selected rows once. Filters that depend on row
+    order (consecutive) materialize first and continue on the result.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.mask: pa.ChunkedArray | None = None
+
+    def __len__(self) -> int:
+        if self.mask is None:
+            return self.table.num_rows
+        return pc.sum(self.mask).as_py() or 0
+
+    def where(self, mask):
+        """AND mask into selection (nulls = not selected, like NaN compares in pandas)."""
+        if mask is None:
+            return
+        mask = pc.fill_null(mask, False)
+        self.mask = mask if self.mask is None else pc.and_(self.mask, mask)
+
+    def materialize(self) -> pa.Table:
+        if self.mask is not None:
+            self.table = self.table.filter(self.mask)
+            self.mask = None
+        return self.table
 
-def _apply_where_filters(df: pd.DataFrame, filters: list[dict], symbol: str) -> pd.DataFrame:
-    """Apply WHERE filters to DataFrame."""
-    if df.empty or not filters:
-        return df
+
+def _apply_where_filters(selection: _Selection, filters: list[dict], symbol: str):
+    """Apply WHERE filters to selection."""
+    if selection.table.num_rows == 0 or not filters:
+        return
 
     for f in filters:
         filter_type = f.get("type")
 
         if filter_type == "categorical":
-            df = _apply_categorical(df, f, symbol)
+            selection.where(_categorical_mask(selection.table, f, symbol))
 
         elif filter_type == "comparison":
-            df = _apply_comparison(df, f)
+            selection.where(_comparison_mask(selection.table, f))
 
         elif filter_type == "consecutive":
-            df = _apply_consecutive(df, f)
+            table = selection.materialize()
+            selection.where(_consecutive_mask(table, f))
 
         elif filter_type == "time":
-            df = _apply_time(df, f)
+            selection.where(_time_mask(selection.table, f))
 
         elif filter_type == "pattern":
-            df = _apply_pattern(df, f)
+            selection.where(_pattern_mask(selection.table, f))
+
+
+_COMPARE = {
+    ">": pc.greater,
+    "<": pc.less,
+    ">=": pc.greater_equal,
+    "<=": pc.less_equal,
+    "=": pc.equal,
+}
 
-    return df.reset_index(drop=True)
 
+def _compare(column: pa.ChunkedArray, op: str, value):
+    """column <op> value. Dictionary columns (compact time) compare the
+    dictionary once and map codes, without decoding every row."""
+    compare = _COMPARE[op]
+    if not pa.types.is_dictionary(column.type):
+        return compare(column, value)
+    return pa.chunked_array(
+        [pc.take(compare(chunk.dictionary, value), chunk.indices) for chunk in column.chunks],
+        type=pa.bool_(),
+    )
 
-def _apply_categorical(df: pd.DataFrame, f: dict, symbol: str) -> pd.DataFrame:
-    """Apply categorical filter (weekday, session, event)."""
+
+def _categorical_mask(table: pa.Table, f: dict, symbol: str):
+    """Categorical filter (weekday, session, event)."""
     if f.get("weekday"):
         weekday_map = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4}
         weekday_num = weekday_map.get(f["weekday"])
-        if weekday_num is not None and "weekday" in df.columns:
-            df = df[df["weekday"] == weekday_num]
+        if weekday_num is not None and "weekday" in table.column_names:
+            return pc.equal(table.column("weekday"), weekday_num)
 
     elif f.get("session"):
-        df = _apply_session_filter(df, f["session"], symbol)
+        if "time" in table.column_names:
+            return _session_mask(table.column("time"), f["session"], symbol)
 
     elif f.get("event"):
         # Event filtering (fomc, opex, cpi) not yet implemented
         logger.warning(f"Event filter not implemented: {f.get('event')}")
 
-    return df
+    return None
 
 
-def _apply_comparison(df: pd.DataFrame, f: dict) -> pd.DataFrame:
-    """Apply comparison filter (change > 0, etc.)."""
+def _comparison_mask(table: pa.Table, f: dict):
+    """Comparison filter (change > 0, etc.)."""
     col = f.get("metric")
     op = f.get("op")
-    value = f.get("value")
 
-    if col not in df.columns:
-        return df
+    if col not in table.column_names or op not in _COMPARE:
+        return None
 
-    series = df[col]
-    ops = {
-        ">": series > value,
-        "<": series < value,
-        ">=": series >= value,
-        "<=": series <= value,
-        "=": series == value,
-    }
-
-    if op in ops:
-        df = df[ops[op]]
+    return _compare(table.column(col), op, f.get("value"))
 
-    return df
 
-
-def _apply_consecutive(df: pd.DataFrame, f: dict) -> pd.DataFrame:
-    """Apply consecutive filter (consecutive red >= 2)."""
-    if "is_green" not in df.columns:
-        return df
+def _consecutive_mask(table: pa.Table, f: dict):
+    """Consecutive filter (consecutive red >= 2) — runs over table's row order."""
+    if "is_green" not in table.column_names:
+        return None
 
     color = f.get("color")
     op = f.get("op", ">=")
     length = f.get("length", 1)
 
-    mask = df["is_green"] if color == "green" else ~df["is_green"]
+    is_green = table.column("is_green").to_numpy()
+    mask = is_green if color == "green" else ~is_green
 
-    df = df.copy()
-    df["_sid"] = (mask != mask.shift()).cumsum()
-    lengths = df.groupby("_sid").transform("size")
+    # Run id per row → run length per row
+    starts = np.ones(len(mask), dtype=bool)
+    starts[1:] = mask[1:] != mask[:-1]
+    run_id = np.cumsum(starts) - 1
+    lengths = np.bincount(run_id)[run_id]
 
     if op == ">=":
-        df = df[mask & (lengths >= length)]
-    elif op == ">":
-        df = df[mask & (lengths > length)]
-    elif op == "=":
-        df = df[mask & (lengths == length)]
+        return pa.array(mask & (lengths >= length))
+    if op == ">":
+        return pa.array(mask & (lengths > length))
+    if op == "=":
+        return pa.array(mask & (lengths == length))
+    return None
 
-    return df.drop(columns=["_sid"])
-
-
-def _apply_time(df: pd.DataFrame, f: dict) -> pd.DataFrame:
-    """Apply time filter (time >= 09:30)."""
-    if "time" not in df.columns:
-        return df
 
+def _time_mask(table: pa.Table, f: dict):
+    """Time filter (time >= 09:30)."""
     op = f.get("op")
-    value = f.get("value")
+    if "time" not in table.column_names or op not in (">=", "<=", ">", "<"):
+        return None
 
-    ops = {
-        ">=": df["time"] >= value,
-        "<=": df["time"] <= value,
-        ">": df["time"] > value,
-        "<": df["time"] < value,
-    }
+    return _compare(table.column("time"), op, f.get("value"))
 
-    if op in ops:
-        df = df[ops[op]]
 
-    return df
-
-
-def _apply_pattern(df: pd.DataFrame, f: dict) -> pd.DataFrame:
-    """Apply pattern filter (inside_day, doji, hammer, etc.)."""
+def _pattern_mask(table: pa.Table, f: dict):
+    """Pattern filter (inside_day, doji, hammer, etc.)."""
     pattern = f.get("pattern")
+    columns = table.column_names
 
     # Legacy patterns (computed in enrich)
-    if pattern == "green" and "is_green" in df.columns:
-        return df[df["is_green"]]
-    if pattern == "red" and "is_green" in df.columns:
-        return df[~df["is_green"]]
-    if pattern in ("gap_fill", "gap_filled") and "gap_filled" in df.columns:
-        return df[df["gap_filled"]]
+    if pattern == "green" and "is_green" in columns:
+        return table.column("is_green")
+    if pattern == "red" and "is_green" in columns:
+        return pc.invert(table.column("is_green"))
+    if pattern in ("gap_fill", "gap_filled") and "gap_filled" in columns:
+        return table.column("gap_filled")
 
     # Scanner patterns (is_* columns from scan_patterns)
     col = f"is_{pattern}"
-    if col in df.columns:
-        return df[df[col] == 1]
+    if col in columns:
+        return pc.equal(table.column(col), 1)
 
     # Pattern not scanned (wrong timeframe or unknown pattern)
     logger.warning(f"Pattern column '{col}' not found — check timeframe is 1D")
-    return df
+    return None
 
 
-def _apply_session_filter(df: pd.DataFrame, session: str, symbol: str) -> pd.DataFrame:
+def _session_mask(time, session: str, symbol: str):
     """
-    Filter by trading session (MORNING, RTH, OVERNIGHT, etc.).
+    Session mask over "HH:MM" time values (None = unknown session).
 
     Handles cross-midnight sessions correctly:
     - RTH (09:30-17:00): time >= 09:30 AND time < 17:00
@@ -377,20 +502,25 @@ def _apply_session_filter(df: pd.DataFrame, session: str, symbol: str) -> pd.Dat
 
     times = get_session_times(symbol, session)
     if not times:
-        return df
+        return None
 
     start_time, end_time = times
 
-    if "time" not in df.columns:
-        return df
-
     # Cross-midnight session: start_time > end_time (e.g., 18:00 > 09:30)
     if start_time > end_time:
-        df = df[(df["time"] >= start_time) | (df["time"] < end_time)]
-    else:
-        df = df[(df["time"] >= start_time) & (df["time"] < end_time)]
+        return pc.or_(_compare(time, ">=", start_time), _compare(time, "<", end_time))
+    return pc.and_(_compare(time, ">=", start_time), _compare(time, "<", end_time))
 
-    return df
+
+def _apply_session_filter(df: pd.DataFrame, session: str, symbol: str) -> pd.DataFrame:
+    """Filter DataFrame by trading session (MORNING, RTH, OVERNIGHT, etc.)."""
+    if "time" not in df.columns:
+        return df
+
+    mask = _session_mask(pa.chunked_array([pa.array(df["time"])]), session, symbol)
+    if mask is None:
+        return df
+    return df[pc.fill_null(mask, False).to_numpy(zero_copy_only=False)]
 
 
 def _empty_result(req: DataRequest, error: str) -> dict:
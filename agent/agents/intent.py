@@ -24,6 +24,9 @@ from pydantic import BaseModel, Field
 
 import config
 from agent.types import Usage
+from agent.admission import llm_slot
+from agent.logging import metrics
+from agent.memory.prompt_cache import get_prompt_assembler
 from agent.prompts.intent import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 
 
@@ -74,20 +77,30 @@ class IntentClassifier:
         Returns:
             IntentResult with intent and optional topic
         """
-        user_prompt = USER_PROMPT_TEMPLATE.format(question=question)
-
-        response = self.client.models.generate_content(
+        assembler = get_prompt_assembler()
+        prompt = assembler.assemble(
+            key="intent",
+            build=lambda: SYSTEM_PROMPT,
+            dynamic=USER_PROMPT_TEMPLATE.format(question=question),
             model=self.model,
-            contents=f"{SYSTEM_PROMPT}\n\n{user_prompt}",
-            config=types.GenerateContentConfig(
-                temperature=0,
-                response_mime_type="application/json",
-                response_schema=IntentOutput,
-            ),
         )
 
+        with llm_slot(self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt.contents,
+                config=types.GenerateContentConfig(
+                    temperature=0,
+                    response_mime_type="application/json",
+                    response_schema=IntentOutput,
+                    cached_content=prompt.cached_content,
+                ),
+            )
+
         output = IntentOutput.model_validate_json(response.text)
         usage = Usage.from_response(response)
+        assembler.record_usage(prompt, usage)
+        metrics.observe_llm_usage("intent", self.model, usage)
 
         return IntentResult(
             intent=output.intent,
@@ -14,7 +14,10 @@ from google.genai import types
 
 import config
 from agent.types import Usage, ParserOutput, Step
+from agent.admission import llm_slot
+from agent.logging import metrics
 from agent.prompts.semantic_parser.rap import get_rap
+from agent.memory.prompt_cache import get_prompt_assembler
 from agent.validation_tracking import (
     ValidatorChange,
     start_tracking,
@@ -43,30 +46,52 @@ class Parser:
     Converts natural language to structured steps with operations.
     """
 
+    TOP_K = 5  # RAP chunks per prompt
+    INSTRUMENT = "NQ"
+
     def __init__(self, model: str | None = None):
         self.client = genai.Client(api_key=config.GOOGLE_API_KEY)
         self.model = model or config.GEMINI_LITE_MODEL
 
-    def parse(self, question: str) -> ParseResult:
-        """Parse question into steps."""
-
-        # Build prompt with relevant chunks via RAP
+    def parse(
+        self,
+        question: str,
+        retrieved: list[tuple[str, float]] | None = None,
+    ) -> ParseResult:
+        """
+        Parse question into steps.
+
+        Args:
+            question: Query to parse (expanded_query from Understander)
+            retrieved: Prefetched RAP results (chunk_id, score) — skips retrieval
+        """
+
+        # Static prefix (base + market config) is cached,
+        # relevant chunks via RAP + question are sent per request
         rap = get_rap()
-        base_prompt, chunk_ids = rap.build(question, top_k=5)
+        chunk_ids = rap.retrieve(question, top_k=self.TOP_K, results=retrieved)
         logger.info(f"Using chunks: {chunk_ids}")
 
-        prompt = f"{base_prompt}\n\nQuestion: {question}"
-
-        response = self.client.models.generate_content(
+        assembler = get_prompt_assembler()
+        prompt = assembler.assemble(
+            key=f"parser:{self.INSTRUMENT}",
+            build=lambda: rap.build_static(self.INSTRUMENT),
+            dynamic=f"{rap.build_examples(chunk_ids)}\n\nQuestion: {question}",
             model=self.model,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0,
-                response_mime_type="application/json",
-                response_schema=ParserOutput,
-            ),
         )
 
+        with llm_slot(self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt.contents,
+                config=types.GenerateContentConfig(
+                    temperature=0,
+                    response_mime_type="application/json",
+                    response_schema=ParserOutput,
+                    cached_content=prompt.cached_content,
+                ),
+            )
+
         # Extract thoughts and response
         thoughts = None
         response_text = None
@@ -119,6 +144,8 @@ class Parser:
                 logger.debug(f"Response was: {response_text}")
 
         usage = Usage.from_response(response)
+        assembler.record_usage(prompt, usage)
+        metrics.observe_llm_usage("parser", self.model, usage)
 
         return ParseResult(
             steps=steps,
@@ -43,6 +43,8 @@ from agent.prompts.presenter import (
 from agent.utils.formatting import format_summary
 from agent.config.market.instruments import get_instrument
 from agent.types import Usage
+from agent.admission import llm_slot
+from agent.logging import metrics
 
 
 # =============================================================================
@@ -303,16 +305,19 @@ class Presenter:
     ) -> str:
         """Call LLM and track usage. Returns text, updates self._usage."""
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens,
-                ),
-            )
+            with llm_slot(self.model):
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_output_tokens,
+                    ),
+                )
             # Track usage
-            self._usage = self._usage + Usage.from_response(response)
+            usage = Usage.from_response(response)
+            self._usage = self._usage + usage
+            metrics.observe_llm_usage("presenter", self.model, usage)
             return response.text.strip()
         except Exception:
             return fallback
@@ -22,6 +22,9 @@ from google.genai import types
 
 import config
 from agent.types import Usage
+from agent.admission import llm_slot
+from agent.logging import metrics
+from agent.memory.prompt_cache import get_prompt_assembler
 from agent.prompts.responder import SYSTEM_PROMPT, USER_PROMPT, MEMORY_SECTION
 
 
@@ -71,22 +74,33 @@ class Responder:
         Returns:
             ResponderResult with text and usage
         """
-        # Build prompts
-        system = SYSTEM_PROMPT.format(symbol=self.symbol)
+        # Build prompts (system prompt is static per symbol)
         memory_section = MEMORY_SECTION.format(memory_context=memory_context) if memory_context else ""
         user = USER_PROMPT.format(question=question, lang=lang, memory_section=memory_section)
 
-        # Call LLM
-        response = self.client.models.generate_content(
+        assembler = get_prompt_assembler()
+        prompt = assembler.assemble(
+            key=f"responder:{self.symbol}",
+            build=lambda: SYSTEM_PROMPT.format(symbol=self.symbol),
+            dynamic=user,
             model=self.model,
-            contents=f"{system}\n\n{user}",
-            config=types.GenerateContentConfig(
-                temperature=0.7,  # Slightly creative for natural responses
-                max_output_tokens=150,
-            ),
         )
 
+        # Call LLM
+        with llm_slot(self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt.contents,
+                config=types.GenerateContentConfig(
+                    temperature=0.7,  # Slightly creative for natural responses
+                    max_output_tokens=150,
+                    cached_content=prompt.cached_content,
+                ),
+            )
+
         usage = Usage.from_response(response)
+        assembler.record_usage(prompt, usage)
+        metrics.observe_llm_usage("responder", self.model, usage)
         return ResponderResult(text=response.text.strip(), usage=usage)
 
 
@@ -18,6 +18,9 @@ from pydantic import BaseModel, Field
 
 import config
 from agent.types import Usage
+from agent.admission import llm_slot
+from agent.logging import metrics
+from agent.memory.prompt_cache import get_prompt_assembler
 from agent.config.market.instruments import get_instrument
 from agent.config.market.events import get_event_types_for_instrument
 from agent.config.patterns import CANDLE_PATTERNS, PRICE_PATTERNS
@@ -166,19 +169,28 @@ Price: {', '.join(price)}
 - formation: when high/low forms during day
 </available_operations>"""
 
-    def _build_prompt(
-        self,
-        question: str,
-        instrument: str = "NQ",
-        lang: str = "en",
-        needs_title: bool = False,
-    ) -> str:
-        """Build full prompt with context."""
+    def _build_static_prompt(self, instrument: str = "NQ") -> str:
+        """Build static prefix: base prompt + config contexts (same for every request)."""
         base = self._load_base_prompt()
         instrument_ctx = self._build_instrument_context(instrument)
         patterns_ctx = self._build_patterns_context()
         operations_ctx = self._build_operations_context()
 
+        return f"""{base}
+
+{instrument_ctx}
+
+{patterns_ctx}
+
+{operations_ctx}"""
+
+    def _build_dynamic_prompt(
+        self,
+        question: str,
+        lang: str = "en",
+        needs_title: bool = False,
+    ) -> str:
+        """Build per-request suffix: title instruction, language, question."""
         title_instruction = ""
         if needs_title:
             title_instruction = """
@@ -194,14 +206,7 @@ Examples:
 - "what happens after red days" → "After red days"
 """
 
-        return f"""{base}
-
-{instrument_ctx}
-
-{patterns_ctx}
-
-{operations_ctx}
-{title_instruction}
+        return f"""{title_instruction}
 <user_language>
 {lang}
 </user_language>
@@ -210,6 +215,18 @@ Examples:
 {question}
 </user_question>"""
 
+    def _build_prompt(
+        self,
+        question: str,
+        instrument: str = "NQ",
+        lang: str = "en",
+        needs_title: bool = False,
+    ) -> str:
+        """Build full prompt with context (static prefix + dynamic suffix)."""
+        static = self._build_static_prompt(instrument)
+        dynamic = self._build_dynamic_prompt(question, lang, needs_title)
+        return f"{static}\n{dynamic}"
+
     def understand(
         self,
         question: str,
@@ -229,21 +246,31 @@ Examples:
         Returns:
             UnderstanderResult with goal, expanded_query or need_clarification
         """
-        prompt = self._build_prompt(question, instrument, lang, needs_title)
-
-        response = self.client.models.generate_content(
+        assembler = get_prompt_assembler()
+        prompt = assembler.assemble(
+            key=f"understander:{instrument}",
+            build=lambda: self._build_static_prompt(instrument),
+            dynamic=self._build_dynamic_prompt(question, lang, needs_title),
             model=self.model,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0,
-                response_mime_type="application/json",
-                response_schema=UnderstanderOutput,
-            ),
         )
 
+        with llm_slot(self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt.contents,
+                config=types.GenerateContentConfig(
+                    temperature=0,
+                    response_mime_type="application/json",
+                    response_schema=UnderstanderOutput,
+                    cached_content=prompt.cached_content,
+                ),
+            )
+
         # Parse response
         output = UnderstanderOutput.model_validate_json(response.text)
         usage = Usage.from_response(response)
+        assembler.record_usage(prompt, usage)
+        metrics.observe_llm_usage("understander", self.model, usage)
 
         logger.info(
             f"Understander: intent={output.intent}, "
@@ -22,6 +22,7 @@ from agent.config.market.instruments import (
 from agent.config.market.holidays import (
     get_holiday_date,
     get_holidays_for_year,
+    get_closures,
     get_day_type,
     get_close_time,
     is_trading_day,
@@ -53,6 +54,7 @@ __all__ = [
     # Holidays
     "get_holiday_date",
     "get_holidays_for_year",
+    "get_closures",
     "get_day_type",
     "get_close_time",
     "is_trading_day",
@@ -204,6 +204,32 @@ def get_holidays_for_year(symbol: str, year: int) -> dict[str, list[date]]:
     return result
 
 
+def get_closures(symbol: str, start: date, end: date) -> tuple[list[date], dict[date, str]]:
+    """
+    Holidays in [start, end) for building bars in SQL.
+
+    Returns:
+        (full close dates, {early close date: close time "HH:MM"})
+    """
+    instrument = get_instrument(symbol)
+    if not instrument:
+        return [], {}
+
+    holidays = instrument.get("holidays", {})
+    closed: list[date] = []
+    early: dict[date, str] = {}
+    for year in range(start.year, end.year + 1):
+        for rule in holidays.get("full_close", []):
+            d = get_holiday_date(rule, year)
+            if d and start <= d < end:
+                closed.append(d)
+        for rule, close_time in holidays.get("early_close", {}).items():
+            d = get_holiday_date(rule, year)
+            if d and start <= d < end:
+                early[d] = close_time
+    return sorted(closed), dict(sorted(early.items()))
+
+
 # =============================================================================
 # Day Type Detection
 # =============================================================================
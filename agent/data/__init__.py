@@ -6,6 +6,9 @@
 Основные функции:
     get_bars(symbol, period, timeframe) — OHLCV бары любого таймфрейма
     enrich(df) — добавляет вычисляемые поля
+    get_bars_arrow / enrich_arrow — то же на Arrow-таблицах (без pandas)
+    get_bars_multi(symbols, period, timeframe) — несколько символов одним
+        запросом, выровненные по дате (long или wide)
 
 Example:
     from agent.data import get_bars, enrich
@@ -17,12 +20,12 @@ Timeframes:
     "1m"  — минутки (сырые данные)
     "1H"  — часовые
     "1D"  — дневные (с учётом trading day)
-    "1W"  — недельные
-    "1M"  — месячные
-    "RTH" — по сессии (из конфига инструмента)
+    "1W"  — недельные (торговые дни, date = понедельник)
+    "1M"  — месячные (date = 1-е число)
+    "RTH" — по сессии (из конфига инструмента, любая: ETH, OVERNIGHT...)
 """
 
-from agent.data.bars import get_bars
-from agent.data.enrich import enrich
+from agent.data.bars import get_bars, get_bars_arrow, get_bars_multi, get_bars_multi_arrow
+from agent.data.enrich import enrich, enrich_arrow
 
-__all__ = ["get_bars", "enrich"]
+__all__ = ["get_bars", "get_bars_arrow", "get_bars_multi", "get_bars_multi_arrow", "enrich", "enrich_arrow"]
@@ -4,23 +4,56 @@ Get OHLCV bars at specified timeframe.
 Supported timeframes:
   - 1m, 5m, 15m, 30m (minute bars)
   - 1H, 4H (hour bars)
-  - 1D (daily bars)
+  - 1D (daily bars, trading day boundaries)
+  - 1W, 1M (weekly/monthly bars of trading days; date = first day)
+  - session name, e.g. "RTH", "OVERNIGHT" (one bar per trading date over the
+    instrument's session, early closes applied)
 
-Weekly/monthly aggregation is done via 'group' parameter in operations, not here.
+Everything is aggregated inside DuckDB — "RTH for 10 years" returns ~2,500
+rows, not the minute bars. get_bars_multi loads several symbols (each with
+its own trading day, sessions and holidays) in one query, aligned by date.
+
+Minute bars come from the configured storage backend (data/storage.py):
+DuckDB table or partitioned Parquet.
+
+With SNAPSHOT_ENABLED, 1m bars are sliced from the symbol's memory-mapped
+snapshot (data/snapshot.py) without a query or a copy; other timeframes and
+symbols without a snapshot go to DuckDB.
+
+Results come out of DuckDB as Arrow tables (get_bars_arrow) — the executor
+keeps them in Arrow through enrich and filters; get_bars converts to pandas.
+
+compact=True (default: BARS_COMPACT) returns a smaller in-memory schema:
+prices snapped to the instrument tick grid and stored as float32 (exact for
+tick sizes like 0.25 below 2^24 ticks), volume as uint32. See compact_sql.
 """
 
+from datetime import date, timedelta
+
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 import config
-from agent.config.market.instruments import get_trading_day_boundaries
-from agent.config.market.holidays import is_trading_day
+from data.database import get_connection
+from data.storage import bars_relation
+from agent.data.profiling import stage
+from agent.logging import metrics
+from agent.config.market.instruments import (
+    get_instrument,
+    get_session_times,
+    get_trading_day_boundaries,
+    list_sessions,
+)
+from agent.config.market.holidays import get_closures
 
 
 def get_bars(
     symbol: str,
     period: str,
     timeframe: str = "1D",
+    compact: bool | None = None,
 ) -> pd.DataFrame:
     """
     Get OHLCV bars at specified timeframe.
@@ -28,43 +61,165 @@ def get_bars(
     Args:
         symbol: Instrument symbol (e.g., "NQ")
         period: Period string ("2024", "2020-2025", "all")
-        timeframe: "1m", "5m", "15m", "30m", "1H", "4H", "1D"
+        timeframe: "1m", "5m", "15m", "30m", "1H", "4H", "1D", "1W", "1M"
+            or a session of the instrument ("RTH", "ETH", "OVERNIGHT"...)
+        compact: float32 prices / uint32 volume (None = config.BARS_COMPACT)
 
     Returns:
         DataFrame with: date/timestamp, open, high, low, close, volume
     """
+    return get_bars_arrow(symbol, period, timeframe, compact).to_pandas()
+
+
+def get_bars_arrow(
+    symbol: str,
+    period: str,
+    timeframe: str = "1D",
+    compact: bool | None = None,
+) -> pa.Table:
+    """Same as get_bars, as an Arrow table (no pandas conversion)."""
     start_date, end_date = _parse_period(period)
+    if compact is None:
+        compact = config.BARS_COMPACT
 
     if timeframe == "1m":
-        return _get_minute_bars(symbol, start_date, end_date, 1)
+        snapshot = _get_snapshot(symbol)
+        if snapshot is not None:
+            return _get_snapshot_bars(snapshot, start_date, end_date, compact)
 
-    if timeframe in ("5m", "15m", "30m"):
-        minutes = int(timeframe.replace("m", ""))
-        return _get_minute_bars(symbol, start_date, end_date, minutes)
+    sql, params = _bars_sql(symbol, timeframe, start_date, end_date)
+    return _query(compact_sql(sql, symbol) if compact else sql, params)
 
-    if timeframe in ("1H", "4H"):
-        hours = int(timeframe.replace("H", ""))
-        return _get_hour_bars(symbol, start_date, end_date, hours)
 
-    if timeframe == "1D":
-        return _get_daily_bars(symbol, start_date, end_date)
+def get_bars_multi(
+    symbols: list[str],
+    period: str,
+    timeframe: str = "1D",
+    wide: bool = False,
+    how: str = "inner",
+    compact: bool | None = None,
+) -> pd.DataFrame:
+    """
+    Bars of several symbols in one DuckDB query, aligned by date/timestamp.
 
-    raise ValueError(f"Unknown timeframe: {timeframe}. Use: 1m, 5m, 15m, 30m, 1H, 4H, 1D")
+    Each symbol is aggregated with its own trading-day boundaries, sessions
+    and holidays (same SQL as get_bars), the per-symbol queries are combined
+    with UNION ALL and aligned inside DuckDB.
+
+    Args:
+        symbols: Instrument symbols (["NQ", "ES"])
+        period, timeframe, compact: as in get_bars
+        wide: One row per date — columns "NQ_close", "ES_close"... instead
+            of long rows (symbol, date, open, ...)
+        how: "inner" — only dates/timestamps every symbol has bars for
+            (calendar intersection); "outer" — all (wide: missing → NaN)
+
+    Returns:
+        DataFrame sorted by date/timestamp (long: then by symbol order)
+    """
+    return get_bars_multi_arrow(symbols, period, timeframe, wide, how, compact).to_pandas()
+
+
+def get_bars_multi_arrow(
+    symbols: list[str],
+    period: str,
+    timeframe: str = "1D",
+    wide: bool = False,
+    how: str = "inner",
+    compact: bool | None = None,
+) -> pa.Table:
+    """Same as get_bars_multi, as an Arrow table."""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if not symbols:
+        raise ValueError("No symbols")
+    if how not in ("inner", "outer"):
+        raise ValueError(f"Unknown how: {how}. Use: inner, outer")
+    start_date, end_date = _parse_period(period)
+    if compact is None:
+        compact = config.BARS_COMPACT
+
+    parts, params = [], []
+    for order, symbol in enumerate(symbols):
+        sql, symbol_params = _bars_sql(symbol, timeframe, start_date, end_date)
+        sql = compact_sql(sql, symbol) if compact else sql
+        parts.append(f"SELECT ? AS symbol, {order} AS symbol_order, * FROM ({sql})")
+        params += [symbol, *symbol_params]
+
+    key = _bars_key(timeframe)
+    # Calendar intersection: keep keys that every symbol has a bar for
+    intersect = f"QUALIFY COUNT(*) OVER (PARTITION BY {key}) = {len(symbols)}" if how == "inner" else ""
+    sql = f"""
+        SELECT * EXCLUDE (symbol_order)
+        FROM ({" UNION ALL BY NAME ".join(parts)})
+        {intersect}
+        ORDER BY {key}, symbol_order
+    """
+    table = _query(sql, params)
+    return _pivot(table, key, symbols) if wide else table
+
+
+def compact_sql(sql: str, symbol: str) -> str:
+    """
+    Wrap a bars query so DuckDB returns the compact schema directly.
+
+    - open/high/low/close: rounded to the instrument's tick_size, FLOAT
+      (float32). Tick multiples that are binary fractions (0.25, 0.5, 1) are
+      exact up to 2^24 ticks (NQ: 4,194,304 points); other ticks are within
+      float32 precision (relative 6e-8)
+    - volume: UINTEGER (uint32; a bar above 4.29B contracts is an error)
+    """
+    tick = (get_instrument(symbol) or {}).get("tick_size")
+
+    def price(column: str) -> str:
+        value = f"round({column} / {float(tick)!r}) * {float(tick)!r}" if tick else column
+        return f"CAST({value} AS FLOAT) AS {column}"
+
+    prices = ", ".join(price(c) for c in ("open", "high", "low", "close"))
+    return f"SELECT * REPLACE ({prices}, CAST(volume AS UINTEGER) AS volume) FROM ({sql})"
 
 
 # =============================================================================
 # Internal functions
 # =============================================================================
 
-def _get_minute_bars(symbol: str, start: str, end: str, minutes: int) -> pd.DataFrame:
-    """Get minute bars (1m, 5m, 15m, 30m)."""
+def _bars_sql(symbol: str, timeframe: str, start: str, end: str) -> tuple[str, list]:
+    """SQL (and its parameters) of symbol's bars at timeframe."""
+    if timeframe in ("1m", "5m", "15m", "30m"):
+        return _minute_sql(symbol, start, end, int(timeframe.replace("m", "")))
+
+    if timeframe in ("1H", "4H"):
+        return _hour_sql(symbol, start, end, int(timeframe.replace("H", "")))
+
+    if timeframe == "1D":
+        return _daily_sql(symbol, start, end)
+
+    if timeframe in ("1W", "1M"):
+        unit = "week" if timeframe == "1W" else "month"
+        return _period_sql(symbol, start, end, unit)
+
+    session_times = get_session_times(symbol, timeframe)
+    if session_times:
+        return _session_sql(symbol, start, end, session_times)
+
+    sessions = ", ".join(list_sessions(symbol))
+    raise ValueError(
+        f"Unknown timeframe: {timeframe}. Use: 1m, 5m, 15m, 30m, 1H, 4H, 1D, 1W, 1M"
+        + (f" or a session ({sessions})" if sessions else "")
+    )
+
+
+def _bars_key(timeframe: str) -> str:
+    """Key column of bars at timeframe: timestamp (intraday) or date."""
+    return "timestamp" if timeframe in ("1m", "5m", "15m", "30m", "1H", "4H") else "date"
+
+
+def _minute_sql(symbol: str, start: str, end: str, minutes: int) -> tuple[str, list]:
+    """Minute bars (1m, 5m, 15m, 30m)."""
+    source, params = bars_relation(symbol, start, end)
     if minutes == 1:
-        sql = """
+        sql = f"""
             SELECT timestamp, open, high, low, close, volume
-            FROM ohlcv_1min
-            WHERE symbol = ?
-              AND timestamp >= ?
-              AND timestamp < ?
+            FROM {source}
             ORDER BY timestamp
         """
     else:
@@ -75,19 +230,38 @@ def _get_minute_bars(symbol: str, start: str, end: str, minutes: int) -> pd.Data
                 MAX(high) AS high,
                 MIN(low) AS low,
                 LAST(close ORDER BY timestamp) AS close,
-                SUM(volume) AS volume
-            FROM ohlcv_1min
-            WHERE symbol = ?
-              AND timestamp >= ?
-              AND timestamp < ?
+                SUM(volume)::DOUBLE AS volume
+            FROM {source}
             GROUP BY 1
             ORDER BY 1
         """
-    return _query(sql, [symbol, start, end])
+    return sql, params
+
+
+def _get_snapshot(symbol: str):
+    """Current snapshot of symbol, None if snapshots are off or not built."""
+    if not config.SNAPSHOT_ENABLED:
+        return None
+    from data.snapshot import get_snapshot
+    return get_snapshot(symbol)
+
+
+def _get_snapshot_bars(snapshot, start: str, end: str, compact: bool = False) -> pa.Table:
+    """1m bars sliced from a memory-mapped snapshot (zero-copy unless compact)."""
+    with stage("snapshot") as s:
+        table = snapshot.bars(start, end)
+        if compact:
+            con = duckdb.connect()
+            con.register("bars", table)
+            table = con.execute(compact_sql("SELECT * FROM bars", snapshot.symbol)).to_arrow_table()
+            con.close()
+        s.done(table)
+    return table
 
 
-def _get_hour_bars(symbol: str, start: str, end: str, hours: int) -> pd.DataFrame:
-    """Get hour bars (1H, 4H)."""
+def _hour_sql(symbol: str, start: str, end: str, hours: int) -> tuple[str, list]:
+    """Hour bars (1H, 4H)."""
+    source, params = bars_relation(symbol, start, end)
     sql = f"""
         SELECT
             TIME_BUCKET(INTERVAL '{hours} hours', timestamp) AS timestamp,
@@ -95,80 +269,165 @@ def _get_hour_bars(symbol: str, start: str, end: str, hours: int) -> pd.DataFram
             MAX(high) AS high,
             MIN(low) AS low,
             LAST(close ORDER BY timestamp) AS close,
-            SUM(volume) AS volume
-        FROM ohlcv_1min
-        WHERE symbol = ?
-          AND timestamp >= ?
-          AND timestamp < ?
+            SUM(volume)::DOUBLE AS volume
+        FROM {source}
         GROUP BY 1
         ORDER BY 1
     """
-    return _query(sql, [symbol, start, end])
+    return sql, params
 
 
-def _get_daily_bars(symbol: str, start: str, end: str) -> pd.DataFrame:
-    """Get daily bars with trading day boundaries."""
+def _trading_date_sql(symbol: str) -> str:
+    """SQL expression: trading date of a bar (futures: evening bars → next day)."""
     boundaries = get_trading_day_boundaries(symbol)
-
-    if boundaries:
-        # Futures: trading day starts previous evening (e.g., 18:00)
-        start_hour = int(boundaries[0].split(":")[0])
-        sql = f"""
-            SELECT
-                CASE
-                    WHEN EXTRACT(HOUR FROM timestamp) >= {start_hour}
-                    THEN CAST(timestamp AS DATE) + INTERVAL '1 day'
-                    ELSE CAST(timestamp AS DATE)
-                END AS date,
-                FIRST(open ORDER BY timestamp) AS open,
-                MAX(high) AS high,
-                MIN(low) AS low,
-                LAST(close ORDER BY timestamp) AS close,
-                SUM(volume) AS volume
-            FROM ohlcv_1min
-            WHERE symbol = ?
-              AND timestamp >= ?
-              AND timestamp < ?
-            GROUP BY 1
-            ORDER BY 1
-        """
-    else:
+    if not boundaries:
         # Stocks: simple calendar day
-        sql = """
+        return "CAST(timestamp AS DATE)"
+    # Futures: trading day starts previous evening (e.g., 18:00)
+    start_hour = int(boundaries[0].split(":")[0])
+    return f"""CAST(CASE
+        WHEN EXTRACT(HOUR FROM timestamp) >= {start_hour}
+        THEN CAST(timestamp AS DATE) + INTERVAL '1 day'
+        ELSE CAST(timestamp AS DATE)
+    END AS DATE)"""
+
+
+def _daily_sql(symbol: str, start: str, end: str) -> tuple[str, list]:
+    """Daily bars with trading day boundaries (weekends and holidays dropped)."""
+    source, params = bars_relation(symbol, start, end)
+    closed, _ = _closures(symbol, start, end)
+    sql = f"""
+        SELECT *
+        FROM (
             SELECT
-                CAST(timestamp AS DATE) AS date,
+                {_trading_date_sql(symbol)} AS date,
                 FIRST(open ORDER BY timestamp) AS open,
                 MAX(high) AS high,
                 MIN(low) AS low,
                 LAST(close ORDER BY timestamp) AS close,
-                SUM(volume) AS volume
-            FROM ohlcv_1min
-            WHERE symbol = ?
-              AND timestamp >= ?
-              AND timestamp < ?
+                SUM(volume)::DOUBLE AS volume
+            FROM {source}
             GROUP BY 1
-            ORDER BY 1
-        """
+        )
+        WHERE {_trading_days_sql("date")}
+        ORDER BY date
+    """
+    return sql, [*params, closed]
 
-    df = _query(sql, [symbol, start, end])
-    if df.empty:
-        return df
 
-    # Filter out holidays/weekends
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-    df = df[df["date"].apply(lambda d: is_trading_day(symbol, d))]
-    return df.reset_index(drop=True)
+def _period_sql(symbol: str, start: str, end: str, unit: str) -> tuple[str, list]:
+    """
+    Weekly/monthly bars from trading-date daily bars (unit: "week" | "month").
 
+    date is the first day of the week (Monday) or month.
+    """
+    daily, params = _daily_sql(symbol, start, end)
+    sql = f"""
+        SELECT
+            CAST(date_trunc('{unit}', date) AS DATE) AS date,
+            FIRST(open ORDER BY date) AS open,
+            MAX(high) AS high,
+            MIN(low) AS low,
+            LAST(close ORDER BY date) AS close,
+            SUM(volume)::DOUBLE AS volume
+        FROM ({daily})
+        GROUP BY 1
+        ORDER BY 1
+    """
+    return sql, params
 
-def _query(sql: str, params: list | None = None) -> pd.DataFrame:
-    """Execute SQL query with optional parameters."""
-    con = duckdb.connect(config.DATABASE_PATH, read_only=True)
-    if params:
-        df = con.execute(sql, params).fetchdf()
+
+def _session_sql(symbol: str, start: str, end: str, times: tuple[str, str]) -> tuple[str, list]:
+    """
+    One bar per trading date for session (start, end) times of
+    INSTRUMENTS[symbol]["sessions"].
+
+    - cross-midnight sessions (OVERNIGHT 18:00-09:30) belong to the trading
+      date of their morning part, like 1D
+    - early closes (holidays.early_close) cut the session at the close time;
+      the previous evening's part of the trading day is not affected
+    - full-close holidays and weekends are dropped
+    """
+    session_start, session_end = times
+    source, params = bars_relation(symbol, start, end)
+    closed, early = _closures(symbol, start, end)
+
+    if session_start < session_end:
+        in_session = f"t >= TIME '{session_start}' AND t < TIME '{session_end}'"
     else:
-        df = con.execute(sql).fetchdf()
-    con.close()
-    return df
+        in_session = f"(t >= TIME '{session_start}' OR t < TIME '{session_end}')"
+
+    sql = f"""
+        WITH bars AS (
+            SELECT *, {_trading_date_sql(symbol)} AS date, CAST(timestamp AS TIME) AS t
+            FROM {source}
+        ),
+        early AS (
+            SELECT unnest(?::DATE[]) AS date, unnest(?::TIME[]) AS close_time
+        )
+        SELECT
+            bars.date AS date,
+            FIRST(open ORDER BY timestamp) AS open,
+            MAX(high) AS high,
+            MIN(low) AS low,
+            LAST(close ORDER BY timestamp) AS close,
+            SUM(volume)::DOUBLE AS volume
+        FROM bars
+        LEFT JOIN early ON early.date = bars.date
+        WHERE {in_session}
+            AND {_trading_days_sql("bars.date")}
+            AND (early.close_time IS NULL
+                 OR CAST(timestamp AS DATE) < bars.date
+                 OR t < early.close_time)
+        GROUP BY 1
+        ORDER BY 1
+    """
+    return sql, [*params, list(early), list(early.values()), closed]
+
+
+def _closures(symbol: str, start: str, end: str) -> tuple[list[date], dict[date, str]]:
+    """
+    get_closures for the trading dates of bars in [start, end) — evening
+    bars before end belong to trading date end, so end is included.
+    """
+    return get_closures(symbol, date.fromisoformat(start), date.fromisoformat(end) + timedelta(days=1))
+
+
+def _trading_days_sql(column: str) -> str:
+    """SQL condition: weekday and not a full-close holiday (dates as one ? param)."""
+    # NOT IN (subquery) is a hash anti-join; list_contains would be pushed down
+    # and scan the whole holiday list for every minute bar
+    return f"isodow({column}) <= 5 AND {column} NOT IN (SELECT unnest(?::DATE[]))"
+
+
+def _pivot(table: pa.Table, key: str, symbols: list[str]) -> pa.Table:
+    """Long multi-symbol bars → one row per key, columns "<symbol>_<field>"."""
+    keys = pc.unique(table.column(key)).sort()
+    columns = {key: keys}
+    for symbol in symbols:
+        rows = table.filter(pc.equal(table.column("symbol"), symbol))
+        # Rows and keys are both sorted, one row per key: the i-th present
+        # key is row i, missing keys take null
+        present = pc.is_in(keys, value_set=rows.column(key))
+        slots = pc.cumulative_sum(pc.cast(present, pa.int64()))
+        take = pc.if_else(present, pc.subtract(slots, 1), pa.scalar(None, pa.int64()))
+        for field in ("open", "high", "low", "close", "volume"):
+            columns[f"{symbol}_{field}"] = rows.column(field).take(take)
+    return pa.table(columns)
+
+
+def _query(sql: str, params: list | None = None) -> pa.Table:
+    """Execute SQL query with optional parameters."""
+    with stage("duckdb") as s:
+        con = get_connection(read_only=True)
+        if params:
+            table = con.execute(sql, params).to_arrow_table()
+        else:
+            table = con.execute(sql).to_arrow_table()
+        con.close()
+        s.done(table)
+    metrics.DUCKDB_SECONDS.observe(s.ms / 1000)
+    return table
 
 
 def _parse_period(period: str) -> tuple[str, str]:
@@ -3,12 +3,23 @@ Enrich OHLCV data with computed columns.
 
 Input:  Raw OHLCV (date/timestamp, open, high, low, close, volume)
 Output: Same + computed columns for filtering and operations
+
+enrich_arrow works on an Arrow table: computed columns are appended, the
+OHLCV buffers are shared with the input (no copy). enrich is the pandas
+wrapper around it.
+
+Compact bars (float32 prices, see get_bars(compact=True)) get a compact
+enrichment: float32 metrics, int8 weekday/month, int16 year, and time as an
+ordered categorical over the 1440 "HH:MM" values (int16 codes) instead of a
+string per row. Float32 metrics match float64 to ~1e-6 relative.
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 
-def enrich(df: pd.DataFrame) -> pd.DataFrame:
+def enrich(df: pd.DataFrame, compact: bool | None = None) -> pd.DataFrame:
     """
     Add computed columns to OHLCV DataFrame.
 
@@ -23,53 +34,108 @@ def enrich(df: pd.DataFrame) -> pd.DataFrame:
         time        - "09:30" (minute data only)
         prev_change - previous day's change
         next_change - next day's change
+
+    compact: compact column types (None = compact if prices are float32)
     """
     if df.empty:
         return df
 
-    df = df.copy()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return enrich_arrow(table, compact).to_pandas()
+
+
+def enrich_arrow(table: pa.Table, compact: bool | None = None) -> pa.Table:
+    """Add the enrich() columns to an Arrow table (input columns not copied)."""
+    if table.num_rows == 0:
+        return table
+
+    if compact is None:
+        compact = table.schema.field("close").type == pa.float32()
+
+    open_, high, low, close = (table.column(c) for c in ("open", "high", "low", "close"))
+    # Percentages in float even for integer prices (pc.divide on ints truncates)
+    pct_type = pa.float32() if compact else pa.float64()
 
     # Change: intraday return
-    df["change"] = (df["close"] - df["open"]) / df["open"] * 100
+    change = _pct(pc.subtract(close, open_), open_, pct_type)
+    table = table.append_column("change", change)
 
     # Range: intraday range in points
-    df["range"] = df["high"] - df["low"]
+    table = table.append_column("range", pc.subtract(high, low))
 
     # Gap: overnight gap (needs previous close)
-    df["gap"] = (df["open"] - df["close"].shift(1)) / df["close"].shift(1) * 100
+    prev_close = _shift(close, 1)
+    gap = _pct(pc.subtract(open_, prev_close), prev_close, pct_type)
+    table = table.append_column("gap", gap)
 
     # Color
-    df["is_green"] = df["change"] > 0
+    table = table.append_column("is_green", pc.fill_null(pc.greater(close, open_), False))
 
     # Gap filled: price returned to prev_close during the day
-    prev_close = df["close"].shift(1)
-    gap_up_filled = (df["gap"] > 0) & (df["low"] <= prev_close)
-    gap_down_filled = (df["gap"] < 0) & (df["high"] >= prev_close)
-    df["gap_filled"] = gap_up_filled | gap_down_filled
+    gap_up_filled = pc.and_(pc.greater(gap, 0), pc.less_equal(low, prev_close))
+    gap_down_filled = pc.and_(pc.less(gap, 0), pc.greater_equal(high, prev_close))
+    table = table.append_column(
+        "gap_filled", pc.fill_null(pc.or_(gap_up_filled, gap_down_filled), False)
+    )
 
     # For around operation
-    df["prev_change"] = df["change"].shift(1)
-    df["next_change"] = df["change"].shift(-1)
+    table = table.append_column("prev_change", _shift(change, 1))
+    table = table.append_column("next_change", _shift(change, -1))
 
     # Date components
-    date_col = _get_date_column(df)
+    date_col = _get_date_column(table.column_names)
     if date_col:
-        dates = pd.to_datetime(df[date_col])
-        df["weekday"] = dates.dt.dayofweek
-        df["month"] = dates.dt.month
-        df["year"] = dates.dt.year
+        dates = table.column(date_col)
+        types = _COMPACT_DATE_TYPES if compact else _DATE_TYPES
+        for name, component in (("weekday", pc.day_of_week), ("month", pc.month), ("year", pc.year)):
+            table = table.append_column(name, pc.cast(component(dates), types[name]))
 
         # Time (for minute data)
         if date_col == "timestamp":
-            df["time"] = dates.dt.strftime("%H:%M")
+            time = _time_of_day(dates) if compact else pc.strftime(dates, format="%H:%M")
+            table = table.append_column("time", time)
+
+    return table
+
+
+_DATE_TYPES = {"weekday": pa.int32(), "month": pa.int32(), "year": pa.int32()}
+_COMPACT_DATE_TYPES = {"weekday": pa.int8(), "month": pa.int8(), "year": pa.int16()}
+
+# Dictionary of time values: code = minute of day
+_TIMES = pa.array([f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)])
+
+
+def _time_of_day(timestamps: pa.ChunkedArray) -> pa.ChunkedArray:
+    """"HH:MM" as ordered dictionary (int16 minute of day → _TIMES)."""
+    minutes = pc.add(pc.multiply(pc.hour(timestamps), 60), pc.minute(timestamps))
+    codes = pc.cast(minutes, pa.int16())
+    return pa.chunked_array(
+        [pa.DictionaryArray.from_arrays(chunk, _TIMES, ordered=True) for chunk in codes.chunks],
+        type=pa.dictionary(pa.int16(), pa.string(), ordered=True),
+    )
+
+
+def _pct(numerator, denominator, type_: pa.DataType):
+    """numerator / denominator * 100 in type_ (nulls where either side is null)."""
+    ratio = pc.divide(pc.cast(numerator, type_), pc.cast(denominator, type_))
+    return pc.multiply(ratio, pa.scalar(100, type_))
+
 
-    return df
+def _shift(column: pa.ChunkedArray, periods: int) -> pa.ChunkedArray:
+    """Like pandas shift: nulls at the edge + zero-copy slice of column."""
+    n = min(abs(periods), len(column))
+    nulls = pa.nulls(n, type=column.type)
+    if periods > 0:
+        chunks = [nulls] + column.slice(0, len(column) - n).chunks
+    else:
+        chunks = column.slice(n).chunks + [nulls]
+    return pa.chunked_array(chunks, type=column.type)
 
 
-def _get_date_column(df: pd.DataFrame) -> str | None:
+def _get_date_column(columns: list[str]) -> str | None:
     """Find date/timestamp column."""
-    if "timestamp" in df.columns:
+    if "timestamp" in columns:
         return "timestamp"
-    if "date" in df.columns:
+    if "date" in columns:
         return "date"
     return None
@@ -0,0 +1,202 @@
+"""
+Per-stage timing for executor plans + opt-in sampled profiling.
+
+Stages are recorded into the timer active in the current context, so deep
+functions (DuckDB query in bars.py, df_to_rows in operations) record
+themselves without passing a timer around. Outside of a timer, stage()
+only measures handle.ms.
+
+Example:
+    with stage_timer() as timer:
+        with stage("duckdb") as s:
+            df = con.execute(sql).fetchdf()
+            s.done(df)
+    timer.to_dict()
+    # {"total_ms": 12.3, "stages": [{"stage": "duckdb", "ms": 11.9, "rows_out": 252, ...}]}
+
+Profiling (cProfile + tracemalloc) is sampled per request by
+EXECUTOR_PROFILE_RATE — both have real overhead, keep the rate low.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import pandas as pd
+
+
+def frame_bytes(df) -> int:
+    """Shallow in-memory size of DataFrame (object columns count pointers only) or Arrow table."""
+    if not isinstance(df, pd.DataFrame):
+        return int(df.nbytes)
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+@dataclass
+class StageStats:
+    """Aggregated stats for one stage name within a plan."""
+    stage: str
+    calls: int = 0
+    ms: float = 0.0  # inclusive
+    self_ms: float = 0.0  # excluding nested stages (e.g. operation minus df_to_rows)
+    rows_in: int | None = None
+    rows_out: int | None = None
+    bytes: int | None = None
+
+    def to_dict(self) -> dict:
+        d = {
+            "stage": self.stage,
+            "calls": self.calls,
+            "ms": round(self.ms, 2),
+            "self_ms": round(self.self_ms, 2),
+        }
+        for key in ("rows_in", "rows_out", "bytes"):
+            value = getattr(self, key)
+            if value is not None:
+                d[key] = value
+        return d
+
+
+class Stage:
+    """Handle for running stage — set rows/bytes before it ends."""
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.bytes: int | None = None
+        self.child_ms = 0.0
+        self.ms = 0.0  # set when stage ends
+
+    def done(self, df=None, rows: int | None = None):
+        """Record output size (DataFrame or Arrow table → rows + bytes, or explicit row count)."""
+        if df is not None:
+            self.rows_out = len(df)
+            self.bytes = frame_bytes(df)
+        elif rows is not None:
+            self.rows_out = rows
+
+
+class StageTimer:
+    """Collects stage stats for one plan execution (in first-seen order)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.stages: dict[str, StageStats] = {}
+        self._stack: list[Stage] = []
+
+    def record(self, stage: Stage, ms: float):
+        stats = self.stages.setdefault(stage.name, StageStats(stage.name))
+        stats.calls += 1
+        stats.ms += ms
+        stats.self_ms += ms - stage.child_ms
+        for key in ("rows_in", "rows_out", "bytes"):
+            value = getattr(stage, key)
+            if value is not None:
+                setattr(stats, key, (getattr(stats, key) or 0) + value)
+
+    def to_dict(self) -> dict:
+        end = self.finished or time.perf_counter()
+        return {
+            "total_ms": round((end - self.started) * 1000, 2),
+            "stages": [s.to_dict() for s in self.stages.values()],
+        }
+
+
+_timer: ContextVar[StageTimer | None] = ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def stage_timer() -> Iterator[StageTimer]:
+    """Activate new StageTimer for the current context."""
+    timer = StageTimer()
+    token = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        timer.finished = time.perf_counter()
+        _timer.reset(token)
+
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None) -> Iterator[Stage]:
+    """Time a stage (handle.ms), recorded in the active timer if any."""
+    handle = Stage(name, rows_in)
+    timer = _timer.get()
+    if timer is not None:
+        timer._stack.append(handle)
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        handle.ms = (time.perf_counter() - start) * 1000
+        if timer is not None:
+            timer._stack.pop()
+            if timer._stack:
+                timer._stack[-1].child_ms += handle.ms
+            timer.record(handle, handle.ms)
+
+
+# =============================================================================
+# Sampled profiling
+# =============================================================================
+
+@dataclass
+class ProfileCapture:
+    """cProfile/tracemalloc report for one request (empty if not sampled)."""
+    sampled: bool = False
+    report: dict = field(default_factory=dict)
+
+
+_tracemalloc_lock = threading.Lock()
+
+
+@contextmanager
+def maybe_profile(rate: float, top: int = 15) -> Iterator[ProfileCapture]:
+    """
+    Profile the block with probability `rate`.
+
+    cProfile covers the current thread only. tracemalloc is process-wide,
+    so only one sampled request traces allocations at a time.
+    """
+    capture = ProfileCapture(sampled=rate > 0 and random.random() < rate)
+    if not capture.sampled:
+        yield capture
+        return
+
+    profiler = cProfile.Profile()
+    own_tracemalloc = not tracemalloc.is_tracing() and _tracemalloc_lock.acquire(blocking=False)
+    if own_tracemalloc:
+        tracemalloc.start()
+
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        capture.report["cprofile"] = out.getvalue()
+
+        if own_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _tracemalloc_lock.release()
+            capture.report["peak_memory_bytes"] = peak
+            capture.report["top_allocations"] = [
+                {"where": str(s.traceback[0]), "bytes": s.size, "count": s.count}
+                for s in snapshot.statistics("lineno")[:top]
+            ]
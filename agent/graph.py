@@ -4,11 +4,16 @@ LangGraph for trading assistant.
 Flow: Question → Intent → Understander → Parser → Planner → Executor → Presenter → END
 """
 
+import functools
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Literal
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
 
+import config
+
 from agent.state import AgentState, get_current_question
 from agent.types import Usage, Step
 from agent.agents.intent import IntentClassifier
@@ -17,9 +22,18 @@ from agent.agents.clarifier import Clarifier
 from agent.agents.parser import Parser
 from agent.agents.planner import plan_step, ExecutionPlan
 from agent.agents.executor import execute_plan
+from agent.data.profiling import maybe_profile
 from agent.agents.presenter import Presenter
 from agent.agents.responder import Responder
+from agent.logging import metrics
 from agent.logging.supabase import log_trace_step_sync
+from agent.singleflight import PARSER_FLIGHTS, EXECUTOR_FLIGHTS, flight_key, normalize_query
+from agent.speculative import (
+    start_speculation,
+    take_understander,
+    take_retrieval,
+    discard_speculation,
+)
 
 
 def _strip_pattern_columns(results: list[dict]) -> list[dict]:
@@ -70,6 +84,15 @@ def classify_intent(state: AgentState) -> dict:
     start_time = time.time()
     question = get_current_question(state)
 
+    # Speculative: start Understander on raw question while Intent runs.
+    # Clarification continuations build their own context — never speculate.
+    if not state.get("awaiting_clarification"):
+        start_speculation(
+            request_id=state.get("request_id"),
+            question=question,
+            needs_title=state.get("needs_title", False),
+        )
+
     classifier = IntentClassifier()
     result = classifier.classify(question)
 
@@ -150,8 +173,23 @@ def understand_question(state: AgentState) -> dict:
         question = state.get("internal_query", get_current_question(state))
         updated_history = None
 
-    understander = Understander()
-    result = understander.understand(question, lang=lang, needs_title=needs_title)
+    # Use speculative result if Intent confirmed it (data, same lang, small drift)
+    run, speculation = None, None
+    if not awaiting_clarification:
+        run, speculation = take_understander(
+            request_id=state.get("request_id"),
+            intent=state.get("intent"),
+            lang=lang,
+            internal_query=question,
+            needs_title=needs_title,
+        )
+
+    if run is not None:
+        question = run.question
+        result = run.understander_result()
+    else:
+        understander = Understander()
+        result = understander.understand(question, lang=lang, needs_title=needs_title)
 
     # Aggregate usage
     prev_usage = state.get("usage") or {}
@@ -167,6 +205,7 @@ def understand_question(state: AgentState) -> dict:
         "acknowledge": result.acknowledge,
         "need_clarification": result.need_clarification.model_dump() if result.need_clarification else None,
         "suggested_title": result.suggested_title,
+        "speculation": speculation.to_dict() if speculation else None,
         "usage": total.model_dump(),
     }
 
@@ -216,6 +255,7 @@ def understand_question(state: AgentState) -> dict:
                 "acknowledge": result.acknowledge,
                 "suggested_title": result.suggested_title,
                 "need_clarification": result.need_clarification.model_dump() if result.need_clarification else None,
+                "speculation": speculation.to_dict() if speculation else None,
             },
             usage=result.usage.model_dump(),
             duration_ms=duration_ms,
@@ -321,8 +361,18 @@ def parse_question(state: AgentState) -> dict:
     # Use expanded_query from Understander, fallback to internal_query
     question = state.get("expanded_query") or state.get("internal_query", get_current_question(state))
 
+    # Prefetched RAP chunks from speculative run (None if query drifted)
+    retrieved = take_retrieval(state.get("request_id"), question)
+
+    # Identical concurrent questions share one LLM parse (expanded_query is
+    # self-contained — no chat/user context in the key or the output)
     parser = Parser()
-    result = parser.parse(question)
+    result, coalesced = PARSER_FLIGHTS.do(
+        flight_key(parser.model, parser.INSTRUMENT, normalize_query(question)),
+        lambda: parser.parse(question, retrieved=retrieved),
+    )
+    if coalesced:
+        result.usage = Usage()  # Tokens were spent (and counted) by the leader request
 
     # Aggregate usage
     prev_usage = state.get("usage") or {}
@@ -358,6 +408,8 @@ def parse_question(state: AgentState) -> dict:
             input_data={
                 "question": question,
                 "chunks_used": result.chunk_ids,
+                "speculative_retrieval": retrieved is not None,
+                "coalesced": coalesced,
             },
             output_data={
                 "raw_output": result.raw_output,
@@ -437,12 +489,57 @@ def plan_execution(state: AgentState) -> dict:
 
 
 def execute_query(state: AgentState) -> dict:
-    """Execute plans."""
+    """Execute plans (sampled requests also get a cProfile/tracemalloc report in trace)."""
     start_time = time.time()
     plans_dict = state.get("execution_plan", [])
     steps_dict = state.get("parsed_query", [])
 
+    with maybe_profile(config.EXECUTOR_PROFILE_RATE, config.EXECUTOR_PROFILE_TOP) as profile:
+        results, coalesced = _execute_plans(plans_dict, steps_dict)
+
+    # Prepare output
+    output = {
+        "data": results,
+    }
+
+    # Log trace step
+    step_number = (state.get("step_number") or 0) + 1
+    request_id = state.get("request_id")
+    user_id = state.get("user_id")
+
+    if request_id and user_id:
+        duration_ms = int((time.time() - start_time) * 1000)
+        output_data = {"data": _strip_pattern_columns(results)}
+        if profile.sampled:
+            output_data["profile"] = profile.report
+        if coalesced:
+            output_data["coalesced_steps"] = coalesced
+        log_trace_step_sync(
+            request_id=request_id,
+            user_id=user_id,
+            step_number=step_number,
+            agent_name="executor",
+            input_data={"execution_plan": plans_dict},
+            output_data=output_data,
+            usage=None,  # No LLM usage
+            duration_ms=duration_ms,
+        )
+
+    output["step_number"] = step_number
+    return output
+
+
+def _execute_plans(plans_dict: list[dict], steps_dict: list[dict]) -> tuple[list[dict], list[str]]:
+    """
+    Rebuild ExecutionPlans from state and run them (results carry "timings").
+
+    Identical plans running concurrently in other requests are shared.
+
+    Returns:
+        (results, step_ids served by another request's in-flight execution)
+    """
     results = []
+    coalesced = []
 
     for plan_dict, step_dict in zip(plans_dict, steps_dict):
         # Reconstruct ExecutionPlan
@@ -464,35 +561,81 @@ def execute_query(state: AgentState) -> dict:
             metrics=plan_dict.get("metrics", []),
         )
 
-        result = execute_plan(plan)
+        result, shared = EXECUTOR_FLIGHTS.do(
+            flight_key({k: v for k, v in plan_dict.items() if k != "step_id"}),
+            lambda: execute_plan(plan),
+        )
         result["step_id"] = step_dict.get("id", "?")
+        if shared:
+            coalesced.append(result["step_id"])
         results.append(result)
 
-    # Prepare output
-    output = {
-        "data": results,
+    return results, coalesced
+
+
+def _get_stream_writer():
+    """LangGraph custom stream writer (no-op when called outside graph)."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def _present_one(result: dict, question: str, lang: str, context_compacted: bool):
+    """Present single executor result (own Presenter — it tracks usage per call)."""
+    presenter_data = {
+        "result": {
+            "rows": result.get("rows", []),
+            "summary": result.get("summary", {}),
+        },
+        "row_count": len(result.get("rows", [])),
     }
+    return Presenter().present(
+        data=presenter_data,
+        question=question,
+        lang=lang,
+        context_compacted=context_compacted,
+    )
 
-    # Log trace step
-    step_number = (state.get("step_number") or 0) + 1
-    request_id = state.get("request_id")
-    user_id = state.get("user_id")
 
-    if request_id and user_id:
-        duration_ms = int((time.time() - start_time) * 1000)
-        log_trace_step_sync(
-            request_id=request_id,
-            user_id=user_id,
-            step_number=step_number,
-            agent_name="executor",
-            input_data={"execution_plan": plans_dict},
-            output_data={"data": _strip_pattern_columns(results)},
-            usage=None,  # No LLM usage
-            duration_ms=duration_ms,
-        )
+def _present_concurrently(
+    data: list[dict],
+    question: str,
+    lang: str,
+    context_compacted: bool,
+) -> list:
+    """
+    Present all results in parallel, return responses in step order.
 
-    output["step_number"] = step_number
-    return output
+    Each finished result is emitted as custom stream event
+    (presenter_partial) so one slow LLM call doesn't hold back the rest.
+    """
+    if len(data) == 1:
+        return [_present_one(data[0], question, lang, context_compacted)]
+
+    writer = _get_stream_writer()
+    responses = [None] * len(data)
+    workers = min(len(data), config.PRESENTER_MAX_WORKERS)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="presenter") as pool:
+        futures = {
+            pool.submit(_present_one, result, question, lang, context_compacted): i
+            for i, result in enumerate(data)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            response = future.result()
+            responses[i] = response
+            writer({
+                "type": "presenter_partial",
+                "index": i,
+                "step_id": data[i].get("step_id"),
+                "title": response.title,
+                "content": response.summary,
+                "row_count": response.row_count,
+            })
+
+    return responses
 
 
 def present_response(state: AgentState) -> dict:
@@ -526,29 +669,11 @@ def present_response(state: AgentState) -> dict:
         output["step_number"] = step_number
         return output
 
-    presenter = Presenter()
+    # Present results concurrently, stream each one as soon as it's ready
+    responses = _present_concurrently(data, question, lang, context_compacted)
 
-    # Present each result
-    responses = []
     total_usage = Usage()
-    for i, result in enumerate(data):
-        # Build data dict for presenter
-        presenter_data = {
-            "result": {
-                "rows": result.get("rows", []),
-                "summary": result.get("summary", {}),
-            },
-            "row_count": len(result.get("rows", [])),
-        }
-
-        response = presenter.present(
-            data=presenter_data,
-            question=question,
-            lang=lang,
-            context_compacted=context_compacted,
-        )
-
-        responses.append(response)
+    for response in responses:
         if hasattr(response, "usage") and response.usage:
             total_usage = total_usage + response.usage
 
@@ -615,6 +740,9 @@ def respond_to_user(state: AgentState) -> dict:
     lang = state.get("lang", "en")
     memory_context = state.get("memory_context")
 
+    # Speculative Understander (if started) is wasted on this route
+    speculation = discard_speculation(state.get("request_id"), reason="intent")
+
     responder = Responder()
     result = responder.respond(question=question, lang=lang, memory_context=memory_context)
 
@@ -626,6 +754,7 @@ def respond_to_user(state: AgentState) -> dict:
     # Prepare output
     output = {
         "response": result.text,
+        "speculation": speculation.to_dict() if speculation else None,
         "usage": total.model_dump(),
     }
 
@@ -664,6 +793,15 @@ def handle_end(state: AgentState) -> dict:
     return {}
 
 
+def _timed(node: str, fn):
+    """Wrap node to observe its latency in agent_node_duration_seconds."""
+    @functools.wraps(fn)
+    def wrapper(state: AgentState) -> dict:
+        with metrics.NODE_SECONDS.time(node=node):
+            return fn(state)
+    return wrapper
+
+
 def build_graph() -> StateGraph:
     """Build graph with simple clarification handling.
 
@@ -675,15 +813,15 @@ def build_graph() -> StateGraph:
     """
     graph = StateGraph(AgentState)
 
-    graph.add_node("intent", classify_intent)
-    graph.add_node("understander", understand_question)
-    graph.add_node("parser", parse_question)
-    graph.add_node("planner", plan_execution)
-    graph.add_node("executor", execute_query)
-    graph.add_node("presenter", present_response)
-    graph.add_node("clarify", handle_clarification)
-    graph.add_node("responder", respond_to_user)
-    graph.add_node("end", handle_end)
+    graph.add_node("intent", _timed("intent", classify_intent))
+    graph.add_node("understander", _timed("understander", understand_question))
+    graph.add_node("parser", _timed("parser", parse_question))
+    graph.add_node("planner", _timed("planner", plan_execution))
+    graph.add_node("executor", _timed("executor", execute_query))
+    graph.add_node("presenter", _timed("presenter", present_response))
+    graph.add_node("clarify", _timed("clarify", handle_clarification))
+    graph.add_node("responder", _timed("responder", respond_to_user))
+    graph.add_node("end", _timed("end", handle_end))
 
     graph.add_edge(START, "intent")
     graph.add_conditional_edges(
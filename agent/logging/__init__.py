@@ -5,3 +5,4 @@ from agent.logging.supabase import (
     complete_chat_log,
     log_trace_step,
 )
+from agent.logging.trace_writer import TraceWriter, get_trace_writer, shutdown_trace_writer
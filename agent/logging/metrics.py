@@ -0,0 +1,467 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Metrics live in process memory (no network, no Supabase) and are exposed
+on GET /metrics. Counters, gauges and histograms, with labels.
+
+Multiple uvicorn workers: each worker periodically writes its snapshot to
+METRICS_DIR (metrics-<pid>-<start_ms>.json). /metrics in any worker
+merges all snapshots:
+- counters and histograms are summed over all files (including exited
+  workers — totals never go backwards while the file is kept)
+- gauges are summed over live workers only (file updated recently)
+Files not updated for METRICS_STALE_AFTER seconds are deleted.
+
+Usage:
+    from agent.logging import metrics
+
+    metrics.NODE_SECONDS.observe(0.42, node="parser")
+    metrics.observe_llm_usage("parser", model, usage)
+    with metrics.SSE_IN_FLIGHT.track():
+        ...
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# =============================================================================
+# Metric types
+# =============================================================================
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+        if not self.labels:
+            self._values[()] = self._zero()  # unlabeled metrics are exported from start
+
+    def _zero(self):
+        return 0.0
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[list(key), _copy(value)] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.help, "labels": list(self.labels), "samples": samples}
+
+
+def _copy(value):
+    return dict(value, buckets=list(value["buckets"])) if isinstance(value, dict) else value
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. in-flight streams)."""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Increment for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (stores per-bucket counts, renders cumulative)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _zero(self):
+        return {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = len(self.buckets)  # +Inf
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._zero()
+            state["buckets"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        snap = super().snapshot()
+        snap["buckets"] = list(self.buckets)
+        return snap
+
+
+# =============================================================================
+# Registry
+# =============================================================================
+
+class MetricsRegistry:
+    """Named metrics of one process."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, tuple(labels), **kwargs)
+            elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with different type/labels")
+            return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels=()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}
+
+
+def merge_snapshots(snapshots: list[tuple[dict, bool]]) -> dict:
+    """
+    Merge per-worker snapshots.
+
+    Args:
+        snapshots: (snapshot, is_live) pairs — gauges of dead workers are skipped
+    """
+    merged: dict[str, dict] = {}
+    for snapshot, live in snapshots:
+        for name, metric in snapshot.items():
+            if metric["kind"] == "gauge" and not live:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            if metric.get("buckets") != target.get("buckets"):
+                logger.warning(f"Skipping {name} snapshot with different buckets")
+                continue
+            samples = target["samples"]
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if metric["kind"] == "histogram":
+                    current = samples.get(key)
+                    if current is None:
+                        samples[key] = _copy(value)
+                    else:
+                        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                else:
+                    samples[key] = samples.get(key, 0.0) + value
+
+    for metric in merged.values():
+        metric["samples"] = [[list(k), v] for k, v in metric["samples"].items()]
+    return merged
+
+
+def render(snapshot: dict) -> str:
+    """Render snapshot in Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for labels, value in sorted(metric["samples"], key=lambda s: s[0]):
+            pairs = list(zip(metric["labels"], labels))
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                continue
+            cumulative = 0
+            bounds = [*metric["buckets"], math.inf]
+            for bound, count in zip(bounds, value["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(pairs + [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(pairs)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+# =============================================================================
+# Multi-worker sync
+# =============================================================================
+
+class MetricsSync:
+    """
+    Writes this worker's snapshot to a shared directory and merges all of them.
+
+    Args:
+        registry: Registry of this process
+        directory: Shared directory (same for all workers of the app)
+        interval: Seconds between background writes
+        stale_after: Delete snapshot files not updated for this long
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        directory: str | Path,
+        interval: float = 1.0,
+        stale_after: float = 86400.0,
+    ):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.stale_after = stale_after
+        self.path = self.directory / f"metrics-{os.getpid()}-{int(time.time() * 1000)}.json"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Atomically replace this worker's snapshot file."""
+        data = {"pid": os.getpid(), "written_at": time.time(), "metrics": self.registry.snapshot()}
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    def collect(self) -> dict:
+        """Merged snapshot of all workers (own snapshot is refreshed first)."""
+        self.write()
+        now = time.time()
+        live_window = max(3 * self.interval, 5.0)
+        snapshots = []
+        for path in self.directory.glob("metrics-*.json"):
+            try:
+                age = now - path.stat().st_mtime
+                if age > self.stale_after:
+                    path.unlink(missing_ok=True)
+                    continue
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # replaced or removed meanwhile
+            snapshots.append((data["metrics"], path == self.path or age <= live_window))
+        return merge_snapshots(snapshots)
+
+    def stop(self):
+        """Stop background writes and leave final snapshot (counters stay in totals)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self.write()
+
+
+# =============================================================================
+# Application metrics
+# =============================================================================
+
+REGISTRY = MetricsRegistry()
+
+NODE_SECONDS = REGISTRY.histogram(
+    "agent_node_duration_seconds", "Graph node latency", ["node"],
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM calls", ["agent", "model"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens (kind: input, output, thinking, cached)", ["agent", "model", "kind"],
+)
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "LLM cost in USD (agent/pricing.py)", ["agent", "model"],
+)
+DUCKDB_SECONDS = REGISTRY.histogram(
+    "duckdb_query_duration_seconds", "DuckDB query time (connect + execute + fetch)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups (result: hit, miss)", ["cache", "result"],
+)
+ADMISSIONS = REGISTRY.counter(
+    "admission_total",
+    "Admission decisions (result: admitted, queued, rate_limited, queue_full, queue_timeout, model_busy)",
+    ["result"],
+)
+ADMISSION_RUNNING = REGISTRY.gauge(
+    "admission_running", "Requests holding an admission slot",
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "admission_queued", "Requests waiting for an admission slot",
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "admission_wait_seconds", "Time queued requests waited for a slot",
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_requests_in_flight", "LLM calls holding a per-model slot", ["model"],
+)
+COALESCED_CALLS = REGISTRY.counter(
+    "coalesced_calls_total", "Calls served by an identical in-flight call (singleflight)", ["flight"],
+)
+SSE_IN_FLIGHT = REGISTRY.gauge(
+    "sse_streams_in_flight", "Chat SSE streams currently open",
+)
+SSE_STREAMS = REGISTRY.counter(
+    "sse_streams_total", "Chat SSE streams finished (status: ok, error, disconnected, shed)", ["status"],
+)
+
+SPECULATIONS = REGISTRY.counter(
+    "speculation_total", "Speculative Understander decisions (result: committed, discarded)", ["result"],
+)
+SPECULATION_WASTED_TOKENS = REGISTRY.counter(
+    "speculation_wasted_tokens_total", "Tokens of discarded speculative calls (counted when the call finishes)",
+)
+SPECULATION_WASTED_COST = REGISTRY.counter(
+    "speculation_wasted_cost_usd_total", "Cost of discarded speculative calls (counted when the call finishes)",
+)
+
+
+def observe_llm_usage(agent: str, model: str | None, usage) -> None:
+    """Count tokens and cost of one LLM call."""
+    from agent.pricing import calculate_cost
+
+    model = model or "unknown"
+    LLM_REQUESTS.inc(agent=agent, model=model)
+    for kind in ("input", "output", "thinking", "cached"):
+        LLM_TOKENS.inc(getattr(usage, f"{kind}_tokens"), agent=agent, model=model, kind=kind)
+    LLM_COST.inc(
+        calculate_cost(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            thinking_tokens=usage.thinking_tokens,
+            cached_tokens=usage.cached_tokens,
+            model=model,
+        ),
+        agent=agent,
+        model=model,
+    )
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# Singleton sync (started by the API app)
+_sync: MetricsSync | None = None
+_sync_lock = threading.Lock()
+
+
+def start_metrics_sync() -> MetricsSync | None:
+    """Start writing snapshots to METRICS_DIR (None if disabled or not writable)."""
+    global _sync
+    if not config.METRICS_DIR:
+        return None
+    with _sync_lock:
+        if _sync is None:
+            try:
+                _sync = MetricsSync(
+                    REGISTRY,
+                    config.METRICS_DIR,
+                    interval=config.METRICS_SYNC_INTERVAL,
+                    stale_after=config.METRICS_STALE_AFTER,
+                )
+                _sync.start()
+            except OSError as e:
+                logger.warning(f"Metrics sync unavailable, serving this worker only: {e}")
+    return _sync
+
+
+def stop_metrics_sync():
+    global _sync
+    with _sync_lock:
+        if _sync is not None:
+            _sync.stop()
+            _sync = None
+
+
+def render_metrics() -> str:
+    """Prometheus text for all workers (or this worker if sync is off)."""
+    sync = _sync
+    snapshot = sync.collect() if sync is not None else REGISTRY.snapshot()
+    return render(snapshot)
@@ -5,15 +5,19 @@ Logs to two tables:
 - chat_logs: Complete request summary (question, response, usage)
 
 Both async and sync versions provided for different contexts.
+Trace steps and chat_logs writes are queued, written to local store
+(trace_store.py) and shipped in background in order (trace_writer.py), so
+requests don't wait for Supabase and a chat_logs row is always written
+before the traces that reference it.
 """
 
 import json
 import logging
 from datetime import datetime
 from typing import Any
-from supabase import create_client
 
 import config
+from agent.logging.trace_store import OP_KEY
 
 logger = logging.getLogger(__name__)
 
@@ -41,10 +45,44 @@ def get_supabase():
     if _supabase is None and config.SUPABASE_URL:
         with _supabase_lock:
             if _supabase is None and config.SUPABASE_URL:
+                from supabase import create_client  # lazy: heavy import (httpx, postgrest)
                 _supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
     return _supabase
 
 
+def _enqueue(row: dict):
+    """Queue row for the background writer (see trace_writer.py)."""
+    if not config.SUPABASE_URL:
+        return
+
+    from agent.logging.trace_writer import get_trace_writer
+
+    get_trace_writer().enqueue(row)
+
+
+def _enqueue_trace(
+    request_id: str,
+    user_id: str,
+    step_number: int,
+    agent_name: str,
+    input_data: dict | None,
+    output_data: dict | None,
+    usage: dict | None,
+    duration_ms: int,
+):
+    """Queue request_traces row for background batched insert (see trace_writer.py)."""
+    _enqueue({
+        "request_id": request_id,
+        "user_id": user_id,
+        "step_number": step_number,
+        "agent_name": agent_name,
+        "input_data": input_data,
+        "output_data": output_data,
+        "usage": usage,
+        "duration_ms": duration_ms,
+    })
+
+
 async def init_chat_log(
     request_id: str,
     user_id: str,
@@ -57,20 +95,7 @@ async def init_chat_log(
     This allows request_traces to reference the request_id via FK.
     Response and stats will be updated at the end via complete_chat_log.
     """
-    supabase = get_supabase()
-    if not supabase:
-        return
-
-    try:
-        supabase.table("chat_logs").insert({
-            "request_id": request_id,
-            "user_id": user_id,
-            "chat_id": chat_id,
-            "question": question,
-            "response": None,  # Will be updated at completion
-        }).execute()
-    except Exception as e:
-        print(f"Failed to init chat log: {e}")
+    init_chat_log_sync(request_id, user_id, chat_id, question)
 
 
 async def log_trace_step(
@@ -92,27 +117,16 @@ async def log_trace_step(
         usage: Token usage dict {input_tokens, output_tokens, thinking_tokens, cached_tokens}
         duration_ms: Step execution time
     """
-    supabase = get_supabase()
-    if not supabase:
-        return
-
-    try:
-        serializable_input = make_json_serializable(input_data)
-        serializable_output = make_json_serializable(output_data)
-        serializable_usage = make_json_serializable(usage)
-
-        supabase.table("request_traces").insert({
-            "request_id": request_id,
-            "user_id": user_id,
-            "step_number": step_number,
-            "agent_name": agent_name,
-            "input_data": serializable_input,
-            "output_data": serializable_output,
-            "usage": serializable_usage,
-            "duration_ms": duration_ms,
-        }).execute()
-    except Exception as e:
-        print(f"Failed to log trace step: {e}")
+    _enqueue_trace(
+        request_id=request_id,
+        user_id=user_id,
+        step_number=step_number,
+        agent_name=agent_name,
+        input_data=input_data,
+        output_data=output_data,
+        usage=usage,
+        duration_ms=duration_ms,
+    )
 
 
 async def complete_chat_log(
@@ -137,37 +151,7 @@ async def complete_chat_log(
                 "total": {"input_tokens", "output_tokens", "thinking_tokens", "cached_tokens", "cost_usd"}
             }
     """
-    supabase = get_supabase()
-    if not supabase:
-        return
-
-    try:
-        # Truncate response if too long
-        if response and len(response) > 10000:
-            response = response[:10000] + "... [truncated]"
-
-        supabase.table("chat_logs").update({
-            "response": response,
-            "route": route,
-            "agents_used": agents_used or [],
-            "duration_ms": duration_ms,
-            "usage": usage,
-        }).eq("request_id", request_id).execute()
-
-        # Update chat_sessions stats if chat_id provided
-        if chat_id and usage:
-            total = usage.get("total", {})
-            await update_chat_session_stats(
-                chat_id=chat_id,
-                input_tokens=total.get("input_tokens", 0),
-                output_tokens=total.get("output_tokens", 0),
-                thinking_tokens=total.get("thinking_tokens", 0),
-                cached_tokens=total.get("cached_tokens", 0),
-                cost_usd=total.get("cost_usd", 0),
-            )
-
-    except Exception as e:
-        print(f"Failed to complete chat log: {e}")
+    complete_chat_log_sync(request_id, chat_id, response, route, agents_used, duration_ms, usage)
 
 
 async def update_chat_session_stats(
@@ -237,27 +221,16 @@ def log_trace_step_sync(
     duration_ms: int = 0,
 ):
     """Synchronous version of log_trace_step."""
-    supabase = get_supabase()
-    if not supabase:
-        return
-
-    try:
-        serializable_input = make_json_serializable(input_data)
-        serializable_output = make_json_serializable(output_data)
-        serializable_usage = make_json_serializable(usage)
-
-        supabase.table("request_traces").insert({
-            "request_id": request_id,
-            "user_id": user_id,
-            "step_number": step_number,
-            "agent_name": agent_name,
-            "input_data": serializable_input,
-            "output_data": serializable_output,
-            "usage": serializable_usage,
-            "duration_ms": duration_ms,
-        }).execute()
-    except Exception as e:
-        print(f"Failed to log trace step: {e}")
+    _enqueue_trace(
+        request_id=request_id,
+        user_id=user_id,
+        step_number=step_number,
+        agent_name=agent_name,
+        input_data=input_data,
+        output_data=output_data,
+        usage=usage,
+        duration_ms=duration_ms,
+    )
 
 
 def init_chat_log_sync(
@@ -266,22 +239,15 @@ def init_chat_log_sync(
     chat_id: str | None,
     question: str,
 ):
-    """Synchronous version - create initial chat_log entry."""
-    supabase = get_supabase()
-    if not supabase:
-        return
-
-    try:
-        print(f"[SUPABASE] init_chat_log: chat_id={chat_id}, request_id={request_id}")
-        supabase.table("chat_logs").insert({
-            "request_id": request_id,
-            "user_id": user_id,
-            "chat_id": chat_id,
-            "question": question,
-            "response": None,
-        }).execute()
-    except Exception as e:
-        print(f"Failed to init chat log: {e}")
+    """Synchronous version - queue initial chat_log entry (written before its traces)."""
+    _enqueue({
+        OP_KEY: "chat_log_init",
+        "request_id": request_id,
+        "user_id": user_id,
+        "chat_id": chat_id,
+        "question": question,
+        "response": None,
+    })
 
 
 def complete_chat_log_sync(
@@ -293,38 +259,57 @@ def complete_chat_log_sync(
     duration_ms: int = 0,
     usage: dict | None = None,
 ):
-    """Synchronous version - complete chat_log entry."""
+    """Synchronous version - queue chat_log completion."""
+    # Truncate response if too long
+    if response and len(response) > 10000:
+        response = response[:10000] + "... [truncated]"
+
+    _enqueue({
+        OP_KEY: "chat_log_complete",
+        "request_id": request_id,
+        "chat_id": chat_id,
+        "response": response,
+        "route": route,
+        "agents_used": agents_used or [],
+        "duration_ms": duration_ms,
+        "usage": usage,
+    })
+
+
+def write_chat_log(row: dict):
+    """
+    Apply queued chat_logs write (init_chat_log_sync / complete_chat_log_sync)
+    to Supabase. Raises on failure — the trace store keeps it for replay.
+    """
     supabase = get_supabase()
     if not supabase:
-        return
+        raise RuntimeError("Supabase is not configured")
 
-    try:
-        # Truncate response if too long
-        if response and len(response) > 10000:
-            response = response[:10000] + "... [truncated]"
-
-        supabase.table("chat_logs").update({
-            "response": response,
-            "route": route,
-            "agents_used": agents_used or [],
-            "duration_ms": duration_ms,
-            "usage": usage,
-        }).eq("request_id", request_id).execute()
-
-        # Update chat_sessions stats if chat_id provided
-        if chat_id and usage:
-            total = usage.get("total", {})
-            _update_chat_session_stats_sync(
-                chat_id=chat_id,
-                input_tokens=total.get("input_tokens", 0),
-                output_tokens=total.get("output_tokens", 0),
-                thinking_tokens=total.get("thinking_tokens", 0),
-                cached_tokens=total.get("cached_tokens", 0),
-                cost_usd=total.get("cost_usd", 0),
-            )
+    fields = {k: v for k, v in row.items() if k != OP_KEY}
 
-    except Exception as e:
-        print(f"Failed to complete chat log: {e}")
+    if row[OP_KEY] == "chat_log_init":
+        print(f"[SUPABASE] init_chat_log: chat_id={row['chat_id']}, request_id={row['request_id']}")
+        # Replay after a partial failure may repeat the insert
+        supabase.table("chat_logs").upsert(
+            fields, on_conflict="request_id", ignore_duplicates=True
+        ).execute()
+        return
+
+    request_id, chat_id = fields.pop("request_id"), fields.pop("chat_id")
+    supabase.table("chat_logs").update(fields).eq("request_id", request_id).execute()
+
+    # Update chat_sessions stats if chat_id provided
+    usage = fields.get("usage")
+    if chat_id and usage:
+        total = usage.get("total", {})
+        _update_chat_session_stats_sync(
+            chat_id=chat_id,
+            input_tokens=total.get("input_tokens", 0),
+            output_tokens=total.get("output_tokens", 0),
+            thinking_tokens=total.get("thinking_tokens", 0),
+            cached_tokens=total.get("cached_tokens", 0),
+            cost_usd=total.get("cost_usd", 0),
+        )
 
 
 def _update_chat_session_stats_sync(
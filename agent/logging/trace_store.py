@@ -0,0 +1,394 @@
+"""Local durable store for request_traces and chat_logs writes.
+
+Every trace batch is appended to a local JSONL segment first, then shipped
+to Supabase. If Supabase is slow or down, rows stay on disk and are shipped
+later (in order) — the request never waits on the failing call.
+
+chat_logs insert/complete are stored in the same stream (rows with OP_KEY),
+so on replay a request's chat_logs row is written before its traces (FK).
+They are shipped one per insert call; trace rows in bulk.
+
+Rows the server rejects for good (insert raises RejectedRows: constraint
+violation, bad data) are moved to quarantine.jsonl instead of being retried
+forever — one bad row doesn't block the rows behind it.
+
+Layout (TRACE_LOCAL_DIR, default logs/traces/):
+    traces-<start_ms>-<pid>.jsonl      active segment (one per process, flock'ed)
+    traces-<start_ms>-<pid>.jsonl.gz   rotated segment (size-based, compressed)
+    traces-<start_ms>-<pid>.cursor     number of rows already shipped
+    quarantine.jsonl                   rejected rows with the error
+
+Segments from other (dead) processes are picked up by any process — an
+exclusive flock on the segment makes sure only one ships it.
+
+Large executor payloads are bounded by TRACE_ROWS_POLICY before writing:
+- "compress": rows above TRACE_ROWS_INLINE_MAX are gzip+base64 packed into rows_gz
+- "truncate": rows are cut to TRACE_ROWS_INLINE_MAX
+Either way rows beyond TRACE_ROWS_MAX are dropped (rows_total keeps the real count).
+
+Replay manually:
+    python -m agent.logging.trace_store
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows — single-process dev only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_RE = re.compile(r"^(traces-\d+-\d+)\.jsonl(\.gz)?$")
+QUARANTINE = "quarantine.jsonl"
+
+# Row key marking a chat_logs write ("chat_log_init" / "chat_log_complete")
+OP_KEY = "_op"
+
+
+class RejectedRows(Exception):
+    """Raised by insert when the server will never accept the rows (4xx, FK violation)."""
+
+
+# =============================================================================
+# Payload policy
+# =============================================================================
+
+def apply_rows_policy(
+    data,
+    policy: str = "compress",
+    inline_max: int = 100,
+    rows_max: int = 5000,
+):
+    """
+    Bound size of result rows inside trace payload.
+
+    Walks dicts/lists; every dict with a "rows" list longer than inline_max
+    is compressed or truncated. Returns new structure, input is not modified.
+    """
+    if isinstance(data, list):
+        return [apply_rows_policy(v, policy, inline_max, rows_max) for v in data]
+    if not isinstance(data, dict):
+        return data
+
+    out = {k: apply_rows_policy(v, policy, inline_max, rows_max) for k, v in data.items() if k != "rows"}
+    rows = data.get("rows")
+    if "rows" not in data:
+        return out
+    if not isinstance(rows, list) or len(rows) <= inline_max or policy == "keep":
+        out["rows"] = rows
+        return out
+
+    total = len(rows)
+    out.setdefault("row_count", total)
+    out["rows_total"] = total
+    if policy == "compress":
+        kept = rows[:rows_max]
+        packed = gzip.compress(json.dumps(kept, default=str).encode())
+        out["rows"] = []
+        out["rows_gz"] = base64.b64encode(packed).decode("ascii")
+        out["rows_truncated"] = total > len(kept)
+    else:
+        out["rows"] = rows[:inline_max]
+        out["rows_truncated"] = True
+    return out
+
+
+def expand_rows(result: dict) -> list[dict]:
+    """Get rows from trace result (inline or packed by apply_rows_policy)."""
+    packed = result.get("rows_gz")
+    if packed:
+        return json.loads(gzip.decompress(base64.b64decode(packed)))
+    return result.get("rows", [])
+
+
+# =============================================================================
+# Store
+# =============================================================================
+
+def next_chunk(rows: list[dict], start: int, batch_size: int) -> list[dict]:
+    """Rows for one insert call: a chat_logs write alone, else up to batch_size trace rows."""
+    if rows[start].get(OP_KEY):
+        return rows[start:start + 1]
+    end = start + 1
+    while end < len(rows) and end - start < batch_size and not rows[end].get(OP_KEY):
+        end += 1
+    return rows[start:end]
+
+
+def _try_lock(fh) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class TraceStore:
+    """
+    Append-only segmented JSONL store with shipping cursor.
+
+    Not thread-safe by itself — used from TraceWriter's flusher thread
+    (and the replay CLI). A lock guards against accidental concurrent use.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        max_total_bytes: int = 512 * 1024 * 1024,
+        retry_interval: float = 30.0,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._fh = None
+        self._stem: str | None = None
+        self._size = 0
+        self._lines = 0
+        self._shipped = 0  # rows of active segment already shipped
+        self._unshipped: list[dict] = []  # in-memory copy of active segment's tail
+        self._retry_at = 0.0
+
+        self.appended = 0
+        self.shipped = 0
+        self.ship_failures = 0
+        self.dropped_segments = 0
+        self.quarantined = 0
+
+    # -------------------------------------------------------------------------
+    # Write
+    # -------------------------------------------------------------------------
+
+    def append(self, rows: list[dict]):
+        """Append rows to active segment (rotates by size)."""
+        with self._lock:
+            if self._fh is None:
+                self._open_segment()
+            data = "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+            self._fh.write(data)
+            self._fh.flush()
+            self._size += len(data)
+            self._lines += len(rows)
+            self._unshipped.extend(rows)
+            self.appended += len(rows)
+
+            if self._size >= self.segment_max_bytes:
+                self._rotate()
+
+    def _open_segment(self):
+        self._stem = f"traces-{int(time.time() * 1000)}-{os.getpid()}"
+        self._fh = open(self.directory / f"{self._stem}.jsonl", "ab")
+        _try_lock(self._fh)
+        self._size = self._lines = self._shipped = 0
+        self._unshipped = []
+
+    def _rotate(self):
+        """Close active segment: delete if fully shipped, else compress."""
+        if self._fh is None:
+            return
+        path = self.directory / f"{self._stem}.jsonl"
+        if self._shipped >= self._lines:
+            path.unlink(missing_ok=True)
+            self._cursor_path(self._stem).unlink(missing_ok=True)
+        else:
+            self._write_cursor(self._stem, self._shipped)
+            # Compress while still holding the lock — nobody ships the plain file meanwhile
+            with open(path, "rb") as src, gzip.open(self.directory / f"{self._stem}.jsonl.gz", "wb") as dst:
+                dst.write(src.read())
+            path.unlink()
+        self._fh.close()
+        self._fh = None
+        self._stem = None
+        self._unshipped = []
+        self._enforce_retention()
+
+    def close(self):
+        """Close active segment (unshipped rows stay on disk for replay)."""
+        with self._lock:
+            self._rotate()
+
+    # -------------------------------------------------------------------------
+    # Ship
+    # -------------------------------------------------------------------------
+
+    def ship(self, insert: Callable[[list[dict]], None], batch_size: int = 500, force: bool = False) -> int:
+        """
+        Ship unshipped rows to Supabase, oldest segments first.
+
+        On failure stops and backs off for retry_interval (unless force).
+        Rejected rows are quarantined and shipping goes on.
+
+        Returns:
+            Number of rows shipped
+        """
+        with self._lock:
+            if not force and time.time() < self._retry_at:
+                return 0
+            shipped = 0
+            try:
+                shipped += self._ship_segments(insert, batch_size)
+                shipped += self._ship_active(insert, batch_size)
+            except Exception as e:
+                self.ship_failures += 1
+                self._retry_at = time.time() + self.retry_interval
+                logger.warning(f"Trace shipping failed, kept locally (retry in {self.retry_interval:.0f}s): {e}")
+            self.shipped += shipped
+            return shipped
+
+    def _ship_active(self, insert, batch_size: int) -> int:
+        shipped = 0
+        while self._unshipped:
+            chunk = next_chunk(self._unshipped, 0, batch_size)
+            shipped += self._ship_chunk(insert, chunk)
+            del self._unshipped[:len(chunk)]
+            self._shipped += len(chunk)
+            self._write_cursor(self._stem, self._shipped)
+        return shipped
+
+    def _ship_segments(self, insert, batch_size: int) -> int:
+        """Ship closed segments and segments left by dead processes."""
+        shipped = 0
+        for path in sorted(self.directory.iterdir()):
+            match = SEGMENT_RE.match(path.name)
+            if not match or match.group(1) == self._stem:
+                continue
+            stem = match.group(1)
+            try:
+                fh = open(path, "rb")
+            except FileNotFoundError:
+                continue  # shipped by another process meanwhile
+            with fh:
+                if not _try_lock(fh):
+                    continue  # active in another process, or being shipped
+                if not path.exists():
+                    continue
+                rows = self._read_rows(path, fh)
+                cursor = self._read_cursor(stem)
+                while cursor < len(rows):
+                    chunk = next_chunk(rows, cursor, batch_size)
+                    shipped += self._ship_chunk(insert, chunk)
+                    cursor += len(chunk)
+                    self._write_cursor(stem, cursor)
+                path.unlink(missing_ok=True)
+                self._cursor_path(stem).unlink(missing_ok=True)
+        return shipped
+
+    def _ship_chunk(self, insert, chunk: list[dict]) -> int:
+        """Insert chunk, quarantining rejected rows. Returns rows delivered."""
+        try:
+            insert(chunk)
+            return len(chunk)
+        except RejectedRows as e:
+            if len(chunk) == 1:
+                self._quarantine(chunk[0], e)
+                return 0
+        # One bad row fails the whole bulk insert — find it row by row
+        return sum(self._ship_chunk(insert, [row]) for row in chunk)
+
+    def _quarantine(self, row: dict, error: Exception):
+        entry = {"row": row, "error": str(error), "quarantined_at": time.time()}
+        with open(self.directory / QUARANTINE, "a") as fh:
+            fh.write(json.dumps(entry, default=str) + "\n")
+        self.quarantined += 1
+        logger.warning(f"Trace row rejected by Supabase, quarantined: {error}")
+
+    @staticmethod
+    def _read_rows(path: Path, fh) -> list[dict]:
+        raw = gzip.decompress(fh.read()) if path.suffix == ".gz" else fh.read()
+        rows = []
+        for line in raw.splitlines():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping corrupt trace line in {path.name}")  # torn write on crash
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Cursor & retention
+    # -------------------------------------------------------------------------
+
+    def _cursor_path(self, stem: str) -> Path:
+        return self.directory / f"{stem}.cursor"
+
+    def _read_cursor(self, stem: str) -> int:
+        try:
+            return int(self._cursor_path(stem).read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_cursor(self, stem: str, value: int):
+        tmp = self._cursor_path(stem).with_suffix(".cursor.tmp")
+        tmp.write_text(str(value))
+        os.replace(tmp, self._cursor_path(stem))
+
+    def _enforce_retention(self):
+        """Drop oldest rotated segments when local store exceeds max_total_bytes."""
+        segments = sorted(
+            p for p in self.directory.iterdir()
+            if SEGMENT_RE.match(p.name) and p.suffix == ".gz"
+        )
+        total = sum(p.stat().st_size for p in segments)
+        while segments and total > self.max_total_bytes:
+            oldest = segments.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+            self._cursor_path(SEGMENT_RE.match(oldest.name).group(1)).unlink(missing_ok=True)
+            self.dropped_segments += 1
+            logger.warning(f"Trace store over limit, dropped unshipped segment {oldest.name}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "appended": self.appended,
+                "shipped": self.shipped,
+                "pending_active": len(self._unshipped),
+                "ship_failures": self.ship_failures,
+                "dropped_segments": self.dropped_segments,
+                "quarantined": self.quarantined,
+            }
+
+
+def open_trace_store() -> TraceStore | None:
+    """Open configured local store, None if disabled or not writable."""
+    if not config.TRACE_LOCAL_STORE:
+        return None
+    try:
+        return TraceStore(
+            config.TRACE_LOCAL_DIR,
+            segment_max_bytes=config.TRACE_SEGMENT_MAX_BYTES,
+            max_total_bytes=config.TRACE_LOCAL_MAX_BYTES,
+            retry_interval=config.TRACE_REPLAY_INTERVAL,
+        )
+    except Exception as e:
+        logger.warning(f"Local trace store unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Replay all local segments to Supabase
+    from agent.logging.trace_writer import ship_rows
+
+    logging.basicConfig(level=logging.INFO)
+    store = TraceStore(config.TRACE_LOCAL_DIR)
+    count = store.ship(ship_rows, force=True)
+    print(f"Shipped {count} trace rows, failures: {store.ship_failures}, quarantined: {store.quarantined}")
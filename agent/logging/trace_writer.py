@@ -0,0 +1,371 @@
+"""Background batched writer for request_traces (and chat_logs writes).
+
+Graph nodes enqueue trace rows and move on; a daemon thread serializes
+them, appends them to the local trace store (trace_store.py) and ships
+to Supabase in bulk. chat_logs insert/complete go through the same queue
+(rows with OP_KEY), so they are never blocked on Supabase either and reach
+it before / after the request's traces. Node latency no longer depends on Supabase
+round-trip time, and traces survive Supabase outages.
+
+Queue is bounded. When it's full, TRACE_DROP_POLICY decides:
+- "drop_oldest": evict the oldest queued trace row (default — newest traces are most useful)
+- "drop_newest": drop the row being enqueued
+- "block": wait up to TRACE_ENQUEUE_TIMEOUT, then drop the new row
+chat_logs writes are never dropped or evicted (the request's traces
+reference its chat_logs row), they are queued even past the bound.
+
+Usage:
+    writer = get_trace_writer()
+    writer.enqueue({"request_id": ..., "agent_name": ..., ...})
+    ...
+    writer.close()  # on shutdown: flush what's queued
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable
+
+import config
+from agent.logging.trace_store import (
+    OP_KEY,
+    RejectedRows,
+    TraceStore,
+    apply_rows_policy,
+    next_chunk,
+    open_trace_store,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns serialized in flusher thread (may contain DataFrames rows, Timestamps, etc.)
+JSON_COLUMNS = ("input_data", "output_data", "usage")
+
+# Errors Supabase returns the same way on every retry: SQLSTATE data exception (22),
+# integrity violation (23, e.g. missing chat_logs parent), undefined column /
+# syntax (42), PostgREST request errors (PGRST1xx/2xx)
+_REJECTED_CODE = re.compile(r"^(22|23|42)[0-9A-Z]{3}$|^PGRST[12]\d\d$")
+
+
+class _TraceQueue(queue.Queue):
+    """Bounded FIFO where chat_logs writes (OP_KEY rows) always fit and are never evicted."""
+
+    def put_op(self, row: dict):
+        """Append row regardless of maxsize."""
+        with self.mutex:
+            self._put(row)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def evict_oldest_trace(self) -> bool:
+        """Remove the oldest trace row (caller calls task_done). False if none queued."""
+        with self.mutex:
+            for i, row in enumerate(self.queue):
+                if not row.get(OP_KEY):
+                    del self.queue[i]
+                    self.not_full.notify()
+                    return True
+        return False
+
+
+class TraceWriter:
+    """
+    Bounded queue + background flusher for request_traces rows.
+
+    Args:
+        insert: Bulk insert function (list of rows) — raises on failure
+        store: Local durable store — rows go there first, then shipped
+            with insert (None: insert directly, with retries)
+        max_queue: Queue capacity (rows)
+        batch_size: Max rows per insert
+        flush_interval: Max seconds a row waits before flush
+        drop_policy: "drop_oldest", "drop_newest" or "block"
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[list[dict]], None],
+        store: TraceStore | None = None,
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        drop_policy: str = "drop_oldest",
+        enqueue_timeout: float = 0.05,
+        max_retries: int = 2,
+        replay_interval: float = 30.0,
+    ):
+        self._insert = insert
+        self.store = store
+        self.replay_interval = replay_interval
+        self._next_replay = 0.0
+        self._queue = _TraceQueue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.stored = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    # -------------------------------------------------------------------------
+    # Producer side (graph nodes)
+    # -------------------------------------------------------------------------
+
+    def enqueue(self, row: dict) -> bool:
+        """
+        Add trace row to queue (never blocks longer than enqueue_timeout).
+
+        Returns:
+            True if queued, False if dropped
+        """
+        if self._stop.is_set():
+            self._count("dropped")
+            return False
+
+        if row.get(OP_KEY):
+            self._queue.put_op(row)
+            self._count("enqueued")
+            return True
+
+        try:
+            if self.drop_policy == "block":
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.drop_policy != "drop_oldest":
+                self._count("dropped")
+                logger.warning("Trace queue full, dropping new trace row")
+                return False
+            if self._queue.evict_oldest_trace():
+                self._queue.task_done()
+                self._count("dropped")
+                logger.warning("Trace queue full, dropped oldest trace row")
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self._count("dropped")
+                return False
+
+        self._count("enqueued")
+        return True
+
+    # -------------------------------------------------------------------------
+    # Consumer side (flusher thread)
+    # -------------------------------------------------------------------------
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            elif self.store is not None and time.monotonic() >= self._next_replay:
+                # Idle — ship backlog (previous runs, dead workers, outages)
+                self._next_replay = time.monotonic() + self.replay_interval
+                self._ship()
+
+    def _take_batch(self) -> list[dict]:
+        """Collect up to batch_size rows, waiting at most flush_interval after the first."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                # Shutting down — take what's already queued without waiting
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _write(self, batch: list[dict]):
+        from agent.logging.supabase import make_json_serializable
+
+        try:
+            rows = [self._prepare(row, make_json_serializable) for row in batch]
+
+            if self.store is not None:
+                self.store.append(rows)
+                self._count("stored", len(rows))
+                self._ship()
+                return
+
+            start = 0
+            while start < len(rows):
+                chunk = next_chunk(rows, start, self.batch_size)
+                self._insert_with_retries(chunk)
+                start += len(chunk)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _insert_with_retries(self, rows: list[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._insert(rows)
+                self._count("written", len(rows))
+                self._count("batches")
+                return
+            except Exception as e:
+                if attempt == self.max_retries or isinstance(e, RejectedRows):
+                    self._count("failed", len(rows))
+                    logger.error(f"Failed to write {len(rows)} trace rows: {e}")
+                    return
+                time.sleep(0.2 * (2 ** attempt))
+
+    @staticmethod
+    def _prepare(row: dict, serialize: Callable) -> dict:
+        """Serialize JSON columns and bound executor rows in output_data."""
+        prepared = {k: serialize(v) if k in JSON_COLUMNS else v for k, v in row.items()}
+        if prepared.get("output_data"):
+            prepared["output_data"] = apply_rows_policy(
+                prepared["output_data"],
+                policy=config.TRACE_ROWS_POLICY,
+                inline_max=config.TRACE_ROWS_INLINE_MAX,
+                rows_max=config.TRACE_ROWS_MAX,
+            )
+        return prepared
+
+    def _ship(self):
+        """Ship locally stored rows (store handles backoff on failure)."""
+        try:
+            self._count("written", self.store.ship(self._insert, batch_size=self.batch_size))
+        except Exception as e:
+            logger.error(f"Trace shipping error: {e}")
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written (or failed)."""
+        deadline = time.monotonic() + timeout
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Stop accepting rows and flush the queue (call on shutdown)."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive() or not self._queue.empty():
+            logger.warning(f"Trace writer closed with {self._queue.qsize()} rows unwritten")
+        if self.store is not None and not self._thread.is_alive():
+            # Unshipped rows stay on disk — next process replays them
+            self.store.close()
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "stored": self.stored,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+            }
+        if self.store is not None:
+            stats["store"] = self.store.get_stats()
+        return stats
+
+
+def _insert_request_traces(rows: list[dict]):
+    """Bulk insert rows into Supabase request_traces."""
+    from agent.logging.supabase import get_supabase
+
+    supabase = get_supabase()
+    if not supabase:
+        raise RuntimeError("Supabase is not configured")
+    supabase.table("request_traces").insert(rows).execute()
+
+
+def ship_rows(rows: list[dict]):
+    """
+    Write rows to Supabase: a chat_logs write (shipped alone, see trace_store)
+    or request_traces in bulk.
+
+    Raises:
+        RejectedRows: Supabase refused the rows for good (retrying won't help)
+    """
+    from agent.logging.supabase import write_chat_log
+
+    try:
+        if rows[0].get(OP_KEY):
+            for row in rows:
+                write_chat_log(row)
+        else:
+            _insert_request_traces(rows)
+    except Exception as e:
+        code = str(getattr(e, "code", "") or "")
+        if _REJECTED_CODE.match(code):
+            raise RejectedRows(f"{code}: {getattr(e, 'message', None) or e}") from e
+        raise
+
+
+# Singleton
+_writer: TraceWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_trace_writer() -> TraceWriter:
+    """Get singleton TraceWriter (thread-safe, flushed at interpreter exit)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TraceWriter(
+                    insert=ship_rows,
+                    store=open_trace_store(),
+                    max_queue=config.TRACE_QUEUE_SIZE,
+                    batch_size=config.TRACE_BATCH_SIZE,
+                    flush_interval=config.TRACE_FLUSH_INTERVAL,
+                    drop_policy=config.TRACE_DROP_POLICY,
+                    enqueue_timeout=config.TRACE_ENQUEUE_TIMEOUT,
+                    replay_interval=config.TRACE_REPLAY_INTERVAL,
+                )
+                atexit.register(_writer.close, config.TRACE_SHUTDOWN_TIMEOUT)
+    return _writer
+
+
+def shutdown_trace_writer():
+    """Flush and stop trace writer if it was started."""
+    if _writer is not None:
+        _writer.close(config.TRACE_SHUTDOWN_TIMEOUT)
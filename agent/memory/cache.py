@@ -4,6 +4,13 @@ Explicit Gemini Context Caching.
 Caches static prompts (system instructions) to reduce costs.
 Minimum 1024 tokens for Flash, 4096 for Pro.
 
+Cache names are shared across uvicorn workers (and restarts) through
+CacheRegistry — a SQLite table next to the DuckDB file.
+
+Creating a cache is a Gemini round trip: it runs without the manager lock,
+single-flight per cache key (CACHE_FLIGHTS), so a slow or failing create
+only delays callers of that key — prompts with ready caches go on.
+
 Usage:
     cache_manager = get_cache_manager()
 
@@ -25,15 +32,22 @@ Usage:
 from __future__ import annotations
 
 import logging
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 
 from google import genai
 from google.genai import types
 
 import config
+from agent.memory.cache_registry import CacheRegistry
+from agent.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# One in-flight create per cache key within the process
+CACHE_FLIGHTS = SingleFlight("gemini_cache")
+
 
 class CacheManager:
     """
@@ -42,19 +56,48 @@ class CacheManager:
     Features:
     - Creates caches on demand
     - Tracks cache expiration
-    - Reuses existing caches
-    - Auto-refreshes before expiry
+    - Reuses existing caches (across workers via shared CacheRegistry)
+    - Auto-refreshes before expiry (background thread extends TTL of used caches)
+    - Cleans up orphaned caches (created by us, missing from registry)
+    - Caches are per model (Gemini caches can't be shared across models)
+    - Backs off after failed creation (too few tokens, quota, etc.)
     """
 
     # Minimum tokens for explicit caching
     MIN_TOKENS_FLASH = 1024
     MIN_TOKENS_PRO = 4096
 
-    def __init__(self, model: str | None = None):
+    # Don't retry failed cache creation for this long
+    RETRY_AFTER = timedelta(minutes=10)
+
+    # Prefix for display_name — marks caches owned by this app (orphan cleanup)
+    DISPLAY_PREFIX = "trading-agent:"
+
+    # Don't treat fresh caches as orphans (may be mid-registration in another worker)
+    ORPHAN_MIN_AGE = timedelta(minutes=10)
+
+    # Update registry last_used_at at most this often per cache
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, model: str | None = None, registry: CacheRegistry | None = None):
         self.client = genai.Client(api_key=config.GOOGLE_API_KEY)
         # Use configured model (caching works with preview models too)
         self.model = model or config.GEMINI_LITE_MODEL
-        self._caches: dict[str, dict] = {}  # key -> {name, expires_at}
+        self.registry = registry if registry is not None else self._open_registry()
+        self._caches: dict[str, dict] = {}  # key -> {name, expires_at, touched_at}
+        self._failed: dict[str, datetime] = {}  # key -> when creation failed
+        self._lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _open_registry() -> CacheRegistry | None:
+        """Open shared registry, None if unavailable (process-local caching only)."""
+        try:
+            return CacheRegistry(config.CACHE_REGISTRY_PATH, wait_timeout=config.CACHE_CREATE_WAIT)
+        except Exception as e:
+            logger.warning(f"Cache registry unavailable, using process-local caches: {e}")
+            return None
 
     def get_or_create(
         self,
@@ -62,6 +105,7 @@ class CacheManager:
         content: str,
         ttl_seconds: int = 3600,
         system_instruction: bool = True,
+        model: str | None = None,
     ) -> str | None:
         """
         Get existing cache or create new one.
@@ -71,60 +115,130 @@ class CacheManager:
             content: Content to cache (system prompt)
             ttl_seconds: Time to live in seconds (default 1 hour)
             system_instruction: If True, cache as system_instruction
+            model: Model the cache is created for (default: self.model)
 
         Returns:
             Cache name to use in requests, or None if caching failed
         """
-        # Check if we have valid cache
-        if key in self._caches:
-            cache_info = self._caches[key]
-            # Refresh if expiring soon (5 min buffer)
-            if cache_info["expires_at"] > datetime.now(timezone.utc) + timedelta(minutes=5):
-                logger.debug(f"Using existing cache: {key}")
-                return cache_info["name"]
-            else:
-                logger.info(f"Cache expiring soon, refreshing: {key}")
-                self._delete_cache(cache_info["name"])
+        model = model or self.model
+        cache_key = f"{model}:{key}"
 
-        # Create new cache
-        return self._create_cache(key, content, ttl_seconds, system_instruction)
+        # Lock only for the lookup — no network calls under it
+        with self._lock:
+            cache_info = self._caches.get(cache_key)
+            if cache_info is not None:
+                # Refresh if expiring soon (5 min buffer)
+                if cache_info["expires_at"] <= datetime.now(timezone.utc) + timedelta(minutes=5):
+                    logger.info(f"Cache expiring soon, refreshing: {cache_key}")
+                    del self._caches[cache_key]
+                    cache_info = None
 
-    def _create_cache(
+            # Recently failed — don't pay creation latency on every request
+            failed_at = self._failed.get(cache_key)
+            if cache_info is None and failed_at and datetime.now(timezone.utc) - failed_at < self.RETRY_AFTER:
+                return None
+
+        if cache_info is not None:
+            logger.debug(f"Using existing cache: {cache_key}")
+            self._touch(cache_key, cache_info)
+            return cache_info["name"]
+
+        # Reuse cache created by another worker, or create new one
+        name, _ = CACHE_FLIGHTS.do(
+            f"{id(self)}:{cache_key}",
+            lambda: self._create_or_reuse(cache_key, content, ttl_seconds, system_instruction, model),
+        )
+
+        if name and self.registry is not None:
+            self._ensure_refresher()
+        return name
+
+    def _create_or_reuse(
         self,
         key: str,
         content: str,
         ttl_seconds: int,
         system_instruction: bool,
+        model: str,
     ) -> str | None:
-        """Create new cache."""
+        """Get cache from shared registry or create it (atomic across workers)."""
         try:
-            cache_config = types.CreateCachedContentConfig(
-                display_name=key,
-                ttl=f"{ttl_seconds}s",
-            )
-
-            if system_instruction:
-                cache_config.system_instruction = content
+            if self.registry is not None:
+                entry = self.registry.create_or_reuse(
+                    key,
+                    create=lambda: self._create_cache(key, content, ttl_seconds, system_instruction, model),
+                    ttl_seconds=ttl_seconds,
+                    model=model,
+                )
+                if entry is None:
+                    # Another worker is still creating it — inline prompt this time
+                    return None
+                name, expires_at = entry.name, entry.expires_at
             else:
-                cache_config.contents = [content]
-
-            cache = self.client.caches.create(
-                model=self.model,
-                config=cache_config,
-            )
+                name, expires_at = self._create_cache(key, content, ttl_seconds, system_instruction, model)
+        except Exception as e:
+            with self._lock:
+                self._failed[key] = datetime.now(timezone.utc)
+            logger.warning(f"Failed to create cache {key}: {e}")
+            return None
 
-            # Store cache info
+        # Store cache info
+        with self._lock:
             self._caches[key] = {
-                "name": cache.name,
-                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+                "name": name,
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+                "touched_at": time.time(),
             }
+            self._failed.pop(key, None)
+        return name
 
-            logger.info(f"Created cache: {key} -> {cache.name}")
-            return cache.name
+    def _create_cache(
+        self,
+        key: str,
+        content: str,
+        ttl_seconds: int,
+        system_instruction: bool,
+        model: str,
+    ) -> tuple[str, float]:
+        """
+        Create new cache.
+
+        Returns:
+            (cache name, expires_at epoch seconds)
 
+        Raises:
+            Exception from Gemini API if creation failed
+        """
+        cache_config = types.CreateCachedContentConfig(
+            display_name=f"{self.DISPLAY_PREFIX}{key}"[:128],
+            ttl=f"{ttl_seconds}s",
+        )
+
+        if system_instruction:
+            cache_config.system_instruction = content
+        else:
+            cache_config.contents = [content]
+
+        cache = self.client.caches.create(
+            model=model,
+            config=cache_config,
+        )
+
+        logger.info(f"Created cache: {key} -> {cache.name}")
+        return cache.name, time.time() + ttl_seconds
+
+    def _touch(self, key: str, cache_info: dict):
+        """Mark cache as used in registry (throttled) so refresher keeps it alive."""
+        if self.registry is None:
+            return
+        now = time.time()
+        if now - cache_info.get("touched_at", 0) < self.TOUCH_INTERVAL:
+            return
+        cache_info["touched_at"] = now
+        try:
+            self.registry.touch(key)
         except Exception as e:
-            logger.warning(f"Failed to create cache {key}: {e}")
-            return None
+            logger.debug(f"Failed to touch cache {key}: {e}")
 
     def _delete_cache(self, cache_name: str):
         """Delete cache by name."""
@@ -134,17 +248,126 @@ class CacheManager:
         except Exception as e:
             logger.warning(f"Failed to delete cache {cache_name}: {e}")
 
+    # -------------------------------------------------------------------------
+    # Background refresh and cleanup
+    # -------------------------------------------------------------------------
+
+    def refresh_expiring(self) -> int:
+        """
+        Extend TTL of caches that expire soon and were used recently.
+
+        Returns:
+            Number of refreshed caches
+        """
+        if self.registry is None:
+            return 0
+
+        now = time.time()
+        refreshed = 0
+        for entry in self.registry.due_for_refresh(
+            within=config.CACHE_REFRESH_BEFORE,
+            used_since=now - config.CACHE_REFRESH_BEFORE - config.CACHE_REFRESH_INTERVAL,
+        ):
+            try:
+                self.client.caches.update(
+                    name=entry.name,
+                    config=types.UpdateCachedContentConfig(ttl=f"{entry.ttl_seconds}s"),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to refresh cache {entry.key}: {e}")
+                continue
+
+            expires_at = time.time() + entry.ttl_seconds
+            if self.registry.extend(entry.key, entry.name, expires_at):
+                refreshed += 1
+                with self._lock:
+                    if entry.key in self._caches:
+                        self._caches[entry.key]["expires_at"] = datetime.fromtimestamp(expires_at, timezone.utc)
+                logger.debug(f"Refreshed cache: {entry.key}")
+
+        return refreshed
+
+    def cleanup_orphans(self) -> int:
+        """
+        Drop expired registry rows and delete our caches missing from registry.
+
+        Orphans appear when a worker dies between creating a cache and
+        registering it, or when the registry file is reset.
+
+        Returns:
+            Number of deleted remote caches
+        """
+        if self.registry is None:
+            return 0
+
+        self.registry.purge_expired()
+        known = self.registry.names()
+        cutoff = datetime.now(timezone.utc) - self.ORPHAN_MIN_AGE
+
+        deleted = 0
+        try:
+            for cache in self.client.caches.list():
+                display_name = getattr(cache, "display_name", None) or ""
+                if not display_name.startswith(self.DISPLAY_PREFIX) or cache.name in known:
+                    continue
+                created = getattr(cache, "create_time", None)
+                if created is not None and created > cutoff:
+                    continue
+                self._delete_cache(cache.name)
+                deleted += 1
+        except Exception as e:
+            logger.warning(f"Failed to list caches for cleanup: {e}")
+
+        if deleted:
+            logger.info(f"Deleted {deleted} orphaned caches")
+        return deleted
+
+    def _ensure_refresher(self):
+        """Start background refresh thread once."""
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop,
+                name="gemini-cache-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        last_cleanup = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.time() - last_cleanup >= config.CACHE_CLEANUP_INTERVAL:
+                    self.cleanup_orphans()
+                    last_cleanup = time.time()
+                self.refresh_expiring()
+            except Exception as e:
+                logger.warning(f"Cache refresh failed: {e}")
+            self._stop.wait(config.CACHE_REFRESH_INTERVAL)
+
+    def stop(self):
+        """Stop background refresh thread."""
+        self._stop.set()
+
     def clear_all(self):
         """Clear all managed caches."""
-        for key, cache_info in self._caches.items():
+        with self._lock:
+            caches = dict(self._caches)
+            self._caches.clear()
+            self._failed.clear()
+        for key, cache_info in caches.items():
             self._delete_cache(cache_info["name"])
-        self._caches.clear()
+            if self.registry is not None:
+                self.registry.delete(key)
         logger.info("Cleared all caches")
 
     def get_stats(self) -> dict:
         """Get cache statistics."""
         now = datetime.now(timezone.utc)
-        return {
+        stats = {
             "total_caches": len(self._caches),
             "caches": {
                 cache_key: {
@@ -154,15 +377,23 @@ class CacheManager:
                 for cache_key, info in self._caches.items()
             },
         }
+        if self.registry is not None:
+            stats["registry_caches"] = len(self.registry.all())
+        return stats
 
 
 # Singleton instance
 _cache_manager: CacheManager | None = None
 
 
+_cache_manager_lock = threading.Lock()
+
+
 def get_cache_manager() -> CacheManager:
-    """Get singleton CacheManager instance."""
+    """Get singleton CacheManager instance (thread-safe)."""
     global _cache_manager
     if _cache_manager is None:
-        _cache_manager = CacheManager()
+        with _cache_manager_lock:
+            if _cache_manager is None:
+                _cache_manager = CacheManager()
     return _cache_manager
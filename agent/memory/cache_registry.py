@@ -0,0 +1,323 @@
+"""
+Shared registry of Gemini cached contents.
+
+CacheManager keeps caches in process memory, so every uvicorn worker (and
+every restart) would create its own duplicate cached contents. The registry
+is a small SQLite table next to the DuckDB file, shared by all workers:
+
+    key (model:prompt:content_hash) -> cache name, expires_at, last_used_at
+
+Create-or-reuse claims the key in a short IMMEDIATE transaction (SQLite
+file lock), creates the cache with no lock held and registers it: only one
+worker creates a cache for a given key, others poll and reuse it for at
+most wait_timeout — then they go on without a cache (inline prompt) rather
+than stall the request on a slow create. A slow create never blocks other
+keys; claims of dead workers are taken over after claim_timeout.
+
+Usage:
+    registry = CacheRegistry("data/gemini_caches.sqlite")
+    name = registry.create_or_reuse(key, create=lambda: (name, expires_at))
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gemini_caches (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    ttl_seconds INTEGER NOT NULL,
+    last_used_at REAL NOT NULL,
+    owner_pid INTEGER
+)
+"""
+
+# Keys whose cache is being created (one row per in-flight create)
+CLAIMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gemini_cache_claims (
+    key TEXT PRIMARY KEY,
+    owner_pid INTEGER,
+    claimed_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class CacheEntry:
+    """Registry row."""
+    key: str
+    name: str
+    model: str | None
+    created_at: float
+    expires_at: float
+    ttl_seconds: int
+    last_used_at: float
+
+    @property
+    def expires_in(self) -> float:
+        """Seconds until expiry (negative if expired)."""
+        return self.expires_at - time.time()
+
+
+class CacheRegistry:
+    """
+    Cross-process registry: content key -> Gemini cache name + expiry.
+
+    Each call opens its own short-lived connection, so the registry is
+    safe to use from any thread.
+    """
+
+    # Seconds between checks while another worker creates the same key
+    POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        path: str | Path,
+        busy_timeout: float = 30.0,
+        claim_timeout: float = 120.0,
+        wait_timeout: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self.claim_timeout = claim_timeout
+        self.wait_timeout = wait_timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.execute(CLAIMS_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive write transaction (blocks other workers' writers)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _entry(row: sqlite3.Row | None) -> CacheEntry | None:
+        if row is None:
+            return None
+        return CacheEntry(
+            key=row["key"],
+            name=row["name"],
+            model=row["model"],
+            created_at=row["created_at"],
+            expires_at=row["expires_at"],
+            ttl_seconds=row["ttl_seconds"],
+            last_used_at=row["last_used_at"],
+        )
+
+    # -------------------------------------------------------------------------
+    # Read / write
+    # -------------------------------------------------------------------------
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Get entry by key (may be expired)."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM gemini_caches WHERE key = ?", (key,)).fetchone()
+            return self._entry(row)
+        finally:
+            conn.close()
+
+    def create_or_reuse(
+        self,
+        key: str,
+        create: Callable[[], tuple[str, float]],
+        ttl_seconds: int,
+        model: str | None = None,
+        min_remaining: float = 300,
+    ) -> CacheEntry | None:
+        """
+        Reuse a valid cache for key, or create it atomically.
+
+        Args:
+            key: Content key (model:prompt:content_hash)
+            create: Creates cache, returns (name, expires_at epoch seconds).
+                Called with the key claimed, no lock held — at most one
+                worker creates a cache for the key, others wait for it
+                (up to wait_timeout).
+            ttl_seconds: TTL the cache was created with (reused on refresh)
+            model: Model name (for cleanup/stats)
+            min_remaining: Entries expiring sooner than this are replaced
+
+        Returns:
+            CacheEntry for the cache to use, None if another worker is still
+            creating it after wait_timeout
+
+        Raises:
+            Whatever create() raises (nothing is registered then)
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._write_lock() as conn:
+                now = time.time()
+                row = conn.execute("SELECT * FROM gemini_caches WHERE key = ?", (key,)).fetchone()
+                entry = self._entry(row)
+                if entry and entry.expires_at > now + min_remaining:
+                    conn.execute("UPDATE gemini_caches SET last_used_at = ? WHERE key = ?", (now, key))
+                    entry.last_used_at = now
+                    return entry
+
+                claim = conn.execute(
+                    "SELECT claimed_at FROM gemini_cache_claims WHERE key = ?", (key,)
+                ).fetchone()
+                claimed = claim is None or now - claim["claimed_at"] > self.claim_timeout
+                if claimed:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO gemini_cache_claims (key, owner_pid, claimed_at) VALUES (?, ?, ?)",
+                        (key, os.getpid(), now),
+                    )
+            if claimed:
+                break
+            # Another worker is creating it — wait for its entry (or failure)
+            if time.monotonic() >= deadline:
+                logger.debug(f"Cache {key} still being created by another worker, going without")
+                return None
+            time.sleep(self.POLL_INTERVAL)
+
+        stale = entry.name if entry else None
+        try:
+            name, expires_at = create()
+        except BaseException:
+            self._release(key)
+            raise
+
+        now = time.time()
+        with self._write_lock() as conn:
+            conn.execute(
+                """
+                INSERT INTO gemini_caches
+                    (key, name, model, created_at, expires_at, ttl_seconds, last_used_at, owner_pid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    name = excluded.name,
+                    model = excluded.model,
+                    created_at = excluded.created_at,
+                    expires_at = excluded.expires_at,
+                    ttl_seconds = excluded.ttl_seconds,
+                    last_used_at = excluded.last_used_at,
+                    owner_pid = excluded.owner_pid
+                """,
+                (key, name, model, now, expires_at, ttl_seconds, now, os.getpid()),
+            )
+            conn.execute("DELETE FROM gemini_cache_claims WHERE key = ?", (key,))
+        if stale and stale != name:
+            logger.debug(f"Replaced stale cache {stale} for {key}")
+        return CacheEntry(key, name, model, now, expires_at, ttl_seconds, now)
+
+    def _release(self, key: str):
+        """Drop this worker's claim on key (create failed)."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM gemini_cache_claims WHERE key = ? AND owner_pid = ?", (key, os.getpid()))
+        finally:
+            conn.close()
+
+    def touch(self, key: str):
+        """Mark entry as used (keeps it eligible for background refresh)."""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE gemini_caches SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        finally:
+            conn.close()
+
+    def extend(self, key: str, name: str, expires_at: float) -> bool:
+        """Update expiry after TTL refresh (only if key still points to name)."""
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE gemini_caches SET expires_at = ? WHERE key = ? AND name = ?",
+                (expires_at, key, name),
+            )
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
+    def delete(self, key: str):
+        """Remove entry by key."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM gemini_caches WHERE key = ?", (key,))
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+
+    def due_for_refresh(self, within: float, used_since: float) -> list[CacheEntry]:
+        """
+        Entries expiring within `within` seconds that were used recently.
+
+        Unused entries are left to expire on their own.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT * FROM gemini_caches
+                WHERE expires_at > ? AND expires_at <= ? AND last_used_at >= ?
+                """,
+                (now, now + within, used_since),
+            ).fetchall()
+            return [self._entry(r) for r in rows]
+        finally:
+            conn.close()
+
+    def purge_expired(self) -> list[CacheEntry]:
+        """Remove expired entries, return them."""
+        now = time.time()
+        with self._write_lock() as conn:
+            rows = conn.execute(
+                "SELECT * FROM gemini_caches WHERE expires_at <= ?", (now,)
+            ).fetchall()
+            conn.execute("DELETE FROM gemini_caches WHERE expires_at <= ?", (now,))
+            return [self._entry(r) for r in rows]
+
+    def names(self) -> set[str]:
+        """All registered cache names."""
+        conn = self._connect()
+        try:
+            return {r["name"] for r in conn.execute("SELECT name FROM gemini_caches")}
+        finally:
+            conn.close()
+
+    def all(self) -> list[CacheEntry]:
+        """All entries (for stats)."""
+        conn = self._connect()
+        try:
+            return [self._entry(r) for r in conn.execute("SELECT * FROM gemini_caches")]
+        finally:
+            conn.close()
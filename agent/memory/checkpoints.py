@@ -0,0 +1,136 @@
+"""
+Per-chat LangGraph checkpoints — clarification state without Supabase lookups.
+
+api.get_clarification_state used to query chat_logs and then request_traces
+on every message. Now the end state of each request is saved into a
+LangGraph SqliteSaver thread (thread_id = chat_id) and read back locally:
+
+- clarification flow: awaiting_clarification, original_question, history
+- last parsed_query and execution_plan (follow-ups, debugging)
+- last results WITHOUT rows (summary, row_count) — checkpoints stay small
+
+Only the latest checkpoint per chat is kept. The SQLite file lives next to
+the DuckDB file and is shared by all uvicorn workers (WAL mode).
+
+The graph itself is not compiled with the checkpointer: nodes expect a fresh
+state per request (no carried-over response/data, no growing message list).
+
+Usage:
+    checkpoints = get_chat_checkpoints()
+    checkpoints.save(chat_id, final_state)
+    state = checkpoints.load(chat_id, user_id)  # None if chat has no checkpoint
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# State fields persisted per chat (everything else is per-request)
+CHECKPOINT_FIELDS = (
+    "user_id",
+    "request_id",
+    "route",
+    "lang",
+    "awaiting_clarification",
+    "original_question",
+    "clarification_history",
+    "parsed_query",
+    "execution_plan",
+)
+
+
+def strip_rows(results: list[dict] | None) -> list[dict]:
+    """Executor results without rows (row_count kept)."""
+    stripped = []
+    for result in results or []:
+        entry = {k: v for k, v in result.items() if k not in ("rows", "timings")}
+        entry["row_count"] = len(result.get("rows") or [])
+        stripped.append(entry)
+    return stripped
+
+
+class ChatCheckpoints:
+    """
+    Latest state per chat in a LangGraph SqliteSaver.
+
+    Args:
+        path: SQLite file (None = in-memory, tests)
+    """
+
+    def __init__(self, path: str | Path | None = config.CHECKPOINTS_PATH):
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        if path is None:
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+        else:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+        self.saver = SqliteSaver(conn)
+        self.saver.setup()
+
+    @staticmethod
+    def _config(chat_id: str) -> dict:
+        return {"configurable": {"thread_id": chat_id, "checkpoint_ns": ""}}
+
+    def save(self, chat_id: str, state: dict) -> dict:
+        """
+        Replace chat's checkpoint with bounded subset of final request state.
+
+        Returns:
+            Saved channel values
+        """
+        from langgraph.checkpoint.base import empty_checkpoint
+
+        values = {k: state.get(k) for k in CHECKPOINT_FIELDS}
+        values["data"] = strip_rows(state.get("data"))
+
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = values
+        checkpoint["channel_versions"] = {k: 1 for k in values}
+
+        # One checkpoint per chat: drop history, then write the new one
+        self.saver.delete_thread(chat_id)
+        self.saver.put(
+            self._config(chat_id),
+            checkpoint,
+            {"source": "update", "step": -1, "request_id": state.get("request_id")},
+            checkpoint["channel_versions"],
+        )
+        return values
+
+    def load(self, chat_id: str, user_id: str | None = None) -> dict | None:
+        """Latest saved state of chat (None if never saved or saved by another user)."""
+        checkpoint = self.saver.get_tuple(self._config(chat_id))
+        if checkpoint is None:
+            return None
+        values = dict(checkpoint.checkpoint["channel_values"])
+        if user_id is not None and values.get("user_id") != user_id:
+            return None
+        return values
+
+    def delete(self, chat_id: str):
+        self.saver.delete_thread(chat_id)
+
+
+# Singleton
+_checkpoints: ChatCheckpoints | None = None
+_checkpoints_lock = threading.Lock()
+
+
+def get_chat_checkpoints() -> ChatCheckpoints:
+    """Get singleton per-chat checkpoint store (thread-safe)."""
+    global _checkpoints
+    if _checkpoints is None:
+        with _checkpoints_lock:
+            if _checkpoints is None:
+                _checkpoints = ChatCheckpoints()
+    return _checkpoints
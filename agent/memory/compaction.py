@@ -0,0 +1,141 @@
+"""
+Background compaction of conversation memory.
+
+Summarizing old messages takes one or two LLM calls — too slow for the
+request path. MemoryManager appends messages without compacting and
+submits the chat here; a worker thread summarizes and swaps the result in.
+
+- Jobs are deduplicated per chat: a chat is queued at most once
+- Summaries are built from a snapshot and applied only if memory didn't
+  change meanwhile (ConversationMemory.revision) — else re-planned
+- Requests keep reading the last consistent memory until the swap
+
+Usage:
+    compactor = MemoryCompactor(on_applied=persist)
+    compactor.submit(memory)
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Callable
+
+from agent.memory.conversation import ConversationMemory
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCompactor:
+    """
+    Job queue + worker threads for ConversationMemory compaction.
+
+    Args:
+        on_applied: Called with memory after each applied compaction (persist)
+        workers: Worker threads (LLM calls run in parallel across chats)
+        max_attempts: Re-plans per job when memory changed during summarization
+    """
+
+    def __init__(
+        self,
+        on_applied: Callable[[ConversationMemory], None] | None = None,
+        workers: int = 1,
+        max_attempts: int = 3,
+    ):
+        self.on_applied = on_applied
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue[ConversationMemory] = queue.Queue()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.applied = 0
+        self.conflicts = 0
+        self.failed = 0
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"memory-compactor-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def _key(memory: ConversationMemory):
+        return memory.chat_id or id(memory)
+
+    def submit(self, memory: ConversationMemory) -> bool:
+        """
+        Queue compaction for chat (no-op if already queued or running).
+
+        Returns:
+            True if queued, False if deduplicated
+        """
+        key = self._key(memory)
+        with self._lock:
+            if key in self._pending:
+                self.deduplicated += 1
+                return False
+            self._pending.add(key)
+            self.submitted += 1
+        self._queue.put(memory)
+        return True
+
+    def _run(self):
+        while True:
+            memory = self._queue.get()
+            try:
+                self._compact(memory)
+            except Exception as e:
+                self._count("failed")
+                logger.error(f"Memory compaction failed for chat {memory.chat_id}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(self._key(memory))
+                self._queue.task_done()
+
+            # Messages appended after the last check were deduplicated — pick them up
+            if memory.needs_compaction():
+                self.submit(memory)
+
+    def _compact(self, memory: ConversationMemory):
+        """Compact chunk by chunk until memory is under the limit."""
+        attempts = 0
+        while memory.needs_compaction() and attempts < self.max_attempts:
+            plan = memory.plan_compaction()
+            if plan is None:
+                return
+            summaries = memory.build_compaction(plan)
+            if summaries is None:
+                return
+            if not memory.apply_compaction(plan, summaries):
+                attempts += 1
+                self._count("conflicts")
+                continue
+            attempts = 0
+            self._count("applied")
+            if self.on_applied is not None:
+                self.on_applied(memory)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until queued jobs are done."""
+        done = self._queue.all_tasks_done
+        with done:
+            return done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "applied": self.applied,
+                "conflicts": self.conflicts,
+                "failed": self.failed,
+            }
@@ -19,13 +19,14 @@ Usage:
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass, field
 from datetime import datetime
 
-from google import genai
-from google.genai import types
-
 import config
+from agent.admission import llm_slot
+from agent.logging import metrics
+from agent.types import Usage
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +48,14 @@ class Message:
     db_id: int | None = None  # chat_logs.id if from DB
 
 
+@dataclass
+class CompactionPlan:
+    """Snapshot of memory taken for compaction (see plan_compaction)."""
+    revision: int
+    chunk: list[Message]
+    summaries: list[dict]
+
+
 @dataclass
 class ConversationMemory:
     """
@@ -78,13 +87,19 @@ class ConversationMemory:
     key_facts: list[str] = field(default_factory=list)
 
     # Internal
-    _client: genai.Client | None = field(default=None, repr=False)
+    _client: object | None = field(default=None, repr=False)  # genai.Client
     _supabase: object | None = field(default=None, repr=False)
     _loaded: bool = field(default=False, repr=False)
     _last_db_id: int | None = field(default=None, repr=False)  # Last chat_logs.id we've seen
+    memory_version: int | None = field(default=None, repr=False)  # chat_sessions.memory_version at load
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    # Incremented on every non-append change (compaction, clear) — optimistic check
+    revision: int = field(default=0, repr=False)
 
     def __post_init__(self):
         if self._client is None:
+            from google import genai  # lazy: slow import, preloaded by warm-up
             self._client = genai.Client(api_key=config.GOOGLE_API_KEY)
 
     def _get_supabase(self):
@@ -117,12 +132,13 @@ class ConversationMemory:
         try:
             # 1. Load summaries and key_facts from chat_sessions
             session_result = supabase.table("chat_sessions") \
-                .select("memory") \
+                .select("memory, memory_version") \
                 .eq("id", self.chat_id) \
                 .execute()
 
             if session_result.data:
                 memory_data = session_result.data[0].get("memory") or {}
+                self.memory_version = session_result.data[0].get("memory_version")
                 self.summaries = memory_data.get("summaries", [])
                 self.key_facts = memory_data.get("key_facts", [])
 
@@ -194,12 +210,13 @@ class ConversationMemory:
         try:
             # Same logic as async but synchronous
             session_result = supabase.table("chat_sessions") \
-                .select("memory") \
+                .select("memory, memory_version") \
                 .eq("id", self.chat_id) \
                 .execute()
 
             if session_result.data:
                 memory_data = session_result.data[0].get("memory") or {}
+                self.memory_version = session_result.data[0].get("memory_version")
                 self.summaries = memory_data.get("summaries", [])
                 self.key_facts = memory_data.get("key_facts", [])
                 if self.summaries:
@@ -283,23 +300,25 @@ class ConversationMemory:
     # MESSAGE MANAGEMENT
     # =========================================================================
 
-    def add_message(self, role: str, content: str, db_id: int | None = None):
+    def add_message(self, role: str, content: str, db_id: int | None = None, compact: bool = True):
         """
         Add message to memory.
 
         Note: Messages are persisted to chat_logs by the API layer,
         not here. This just updates in-memory state.
 
-        Automatically compacts when recent exceeds limit.
+        Compacts inline when recent exceeds limit, unless compact=False
+        (MemoryManager compacts in background instead).
         """
-        self.recent.append(Message(role=role, content=content, db_id=db_id))
+        with self._lock:
+            self.recent.append(Message(role=role, content=content, db_id=db_id))
 
-        # Track last db_id for summarization boundary
-        if db_id and (self._last_db_id is None or db_id > self._last_db_id):
-            self._last_db_id = db_id
+            # Track last db_id for summarization boundary
+            if db_id and (self._last_db_id is None or db_id > self._last_db_id):
+                self._last_db_id = db_id
 
         # Compact if needed
-        if len(self.recent) > self.recent_limit + self.summary_chunk_size:
+        if compact and self.needs_compaction():
             self._compact()
 
     def add_key_fact(self, fact: str):
@@ -319,23 +338,29 @@ class ConversationMemory:
         Get formatted context for LLM prompt.
 
         Returns string with key facts, summaries, and recent messages.
+        Taken under lock — consistent even while compaction is applied.
         """
+        with self._lock:
+            key_facts = list(self.key_facts)
+            summaries = list(self.summaries)
+            recent = list(self.recent)
+
         parts = []
 
         # Key facts (most important, always include)
-        if self.key_facts:
-            facts = "\n".join(f"- {fact}" for fact in self.key_facts[-5:])
+        if key_facts:
+            facts = "\n".join(f"- {fact}" for fact in key_facts[-5:])
             parts.append(f"<key_facts>\n{facts}\n</key_facts>")
 
         # Summaries (compressed history)
-        if self.summaries:
-            recent_summaries = self.summaries[-self.max_summaries:]
+        if summaries:
+            recent_summaries = summaries[-self.max_summaries:]
             summary_text = "\n".join(s["content"] for s in recent_summaries)
             parts.append(f"<history_summary>\n{summary_text}\n</history_summary>")
 
         # Recent messages (full detail)
-        if self.recent:
-            messages = self._format_messages(self.recent[-self.recent_limit:])
+        if recent:
+            messages = self._format_messages(recent[-self.recent_limit:])
             parts.append(f"<recent_messages>\n{messages}\n</recent_messages>")
 
         return "\n\n".join(parts)
@@ -349,57 +374,97 @@ class ConversationMemory:
 
     def clear(self):
         """Clear all memory (in-memory only, doesn't affect DB)."""
-        self.recent.clear()
-        self.summaries.clear()
-        self.key_facts.clear()
-        self._last_db_id = None
+        with self._lock:
+            self.recent.clear()
+            self.summaries.clear()
+            self.key_facts.clear()
+            self._last_db_id = None
+            self.revision += 1
 
     # =========================================================================
     # COMPACTION (Summarization)
     # =========================================================================
 
-    def _compact(self):
-        """Compress oldest messages into summary."""
-        if len(self.recent) <= self.recent_limit:
-            return
+    def needs_compaction(self) -> bool:
+        """True when recent has a full chunk above the limit."""
+        return len(self.recent) > self.recent_limit + self.summary_chunk_size
+
+    def plan_compaction(self) -> CompactionPlan | None:
+        """
+        Snapshot what to compact (cheap, under lock).
 
-        # Take oldest chunk for summarization
-        chunk = self.recent[:self.summary_chunk_size]
-        self.recent = self.recent[self.summary_chunk_size:]
+        The slow part (LLM summaries) runs on the plan outside the lock,
+        then apply_compaction() swaps the result in if nothing changed.
+        """
+        with self._lock:
+            if len(self.recent) <= self.recent_limit:
+                return None
+            return CompactionPlan(
+                revision=self.revision,
+                chunk=list(self.recent[:self.summary_chunk_size]),
+                summaries=list(self.summaries),
+            )
 
+    def build_compaction(self, plan: CompactionPlan) -> list[dict] | None:
+        """Summarize plan chunk (slow, LLM) — returns new summaries list."""
         # Get the last db_id in chunk for tracking
         chunk_last_id = None
-        for msg in reversed(chunk):
+        for msg in reversed(plan.chunk):
             if msg.db_id:
                 chunk_last_id = msg.db_id
                 break
 
         # Generate summary
-        summary_text = self._summarize_chunk(chunk)
-        if summary_text:
-            self.summaries.append({
-                "content": summary_text,
-                "up_to_id": chunk_last_id,
-            })
-
-            # Limit summaries
-            if len(self.summaries) > self.max_summaries * 2:
-                # Merge old summaries
-                old_summaries = self.summaries[:-self.max_summaries]
-                self.summaries = self.summaries[-self.max_summaries:]
-                merged = self._merge_summaries([s["content"] for s in old_summaries])
-                if merged:
-                    # Keep the oldest up_to_id for the merged summary
-                    self.summaries.insert(0, {
-                        "content": merged,
-                        "up_to_id": old_summaries[-1].get("up_to_id"),
-                    })
+        summary_text = self._summarize_chunk(plan.chunk)
+        if not summary_text:
+            return None
+
+        summaries = plan.summaries + [{
+            "content": summary_text,
+            "up_to_id": chunk_last_id,
+        }]
+
+        # Limit summaries
+        if len(summaries) > self.max_summaries * 2:
+            # Merge old summaries
+            old_summaries = summaries[:-self.max_summaries]
+            summaries = summaries[-self.max_summaries:]
+            merged = self._merge_summaries([s["content"] for s in old_summaries])
+            if merged:
+                # Keep the oldest up_to_id for the merged summary
+                summaries.insert(0, {
+                    "content": merged,
+                    "up_to_id": old_summaries[-1].get("up_to_id"),
+                })
+        return summaries
+
+    def apply_compaction(self, plan: CompactionPlan, summaries: list[dict]) -> bool:
+        """
+        Swap in compacted state atomically (optimistic check on revision).
 
+        Returns False if memory changed since plan (reload, clear, other
+        compaction) — result is discarded. Appends don't conflict.
+        """
+        with self._lock:
+            head = self.recent[:len(plan.chunk)]
+            if self.revision != plan.revision or any(a is not b for a, b in zip(head, plan.chunk)):
+                return False
+            self.recent = self.recent[len(plan.chunk):]
+            self.summaries = summaries
+            self.revision += 1
+        logger.debug(f"Compacted {len(plan.chunk)} messages into summary")
+        return True
+
+    def _compact(self):
+        """Compress oldest messages into summary (inline, blocks caller)."""
+        plan = self.plan_compaction()
+        if plan is None:
+            return
+        summaries = self.build_compaction(plan)
+        if summaries is not None and self.apply_compaction(plan, summaries):
             # Save to DB
             self.save_memory_state_sync()
 
-        logger.debug(f"Compacted {len(chunk)} messages into summary")
-
     def _summarize_chunk(self, messages: list[Message]) -> str | None:
         """Generate summary for message chunk."""
         if not messages:
@@ -416,15 +481,19 @@ Conversation:
 
 Summary:"""
 
+        from google.genai import types
+
         try:
-            response = self._client.models.generate_content(
-                model=config.GEMINI_LITE_MODEL,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.3,
-                    max_output_tokens=100,
-                ),
-            )
+            with llm_slot(config.GEMINI_LITE_MODEL):
+                response = self._client.models.generate_content(
+                    model=config.GEMINI_LITE_MODEL,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        temperature=0.3,
+                        max_output_tokens=100,
+                    ),
+                )
+            metrics.observe_llm_usage("memory", config.GEMINI_LITE_MODEL, Usage.from_response(response))
             return response.text.strip()
         except Exception as e:
             logger.warning(f"Failed to summarize: {e}")
@@ -446,15 +515,19 @@ Summaries:
 
 Combined summary:"""
 
+        from google.genai import types
+
         try:
-            response = self._client.models.generate_content(
-                model=config.GEMINI_LITE_MODEL,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.3,
-                    max_output_tokens=150,
-                ),
-            )
+            with llm_slot(config.GEMINI_LITE_MODEL):
+                response = self._client.models.generate_content(
+                    model=config.GEMINI_LITE_MODEL,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        temperature=0.3,
+                        max_output_tokens=150,
+                    ),
+                )
+            metrics.observe_llm_usage("memory", config.GEMINI_LITE_MODEL, Usage.from_response(response))
             return response.text.strip()
         except Exception as e:
             logger.warning(f"Failed to merge summaries: {e}")
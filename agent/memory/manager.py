@@ -0,0 +1,297 @@
+"""
+Per-chat ConversationMemory cache with TTL and write-through.
+
+Follow-up messages in a chat reuse the in-process memory instead of
+loading chat_sessions.memory + chat_logs from Supabase on every request.
+
+Consistency across workers — chat_sessions.memory_version:
+- every persisted change bumps the version (bump_memory_version RPC)
+- the API reads the version together with the chat session row it already
+  fetches, and passes it here; a cached copy with another version is stale
+  and gets reloaded
+- callers that don't know the version rely on TTL only
+
+Writes: new messages are appended to the cached memory immediately and
+persisted in a background thread (memory JSON + version bump in one RPC).
+Compaction (LLM summaries) runs in MemoryCompactor, off the request path.
+Every write is conditional on the memory_version we know (loaded with the
+memory): on conflict an appended exchange is re-applied to freshly loaded
+memory and written once more; a stale compaction result is dropped.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import config
+from agent.logging import metrics
+from agent.memory.compaction import MemoryCompactor
+from agent.memory.conversation import ConversationMemory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    memory: ConversationMemory
+    version: int | None
+    expires_at: float
+
+
+class MemoryManager:
+    """
+    Singleton manager for conversation memories.
+
+    Stores ConversationMemory per chat_id (LRU, TTL, version-checked).
+    Automatically loads from Supabase when memory is missing or stale.
+
+    Usage:
+        manager = get_memory_manager()
+        memory = manager.get_or_create(chat_id="xxx", user_id="yyy", version=3)
+        ...
+        manager.append_exchange(memory, question, response)
+    """
+
+    def __init__(
+        self,
+        ttl: float = config.MEMORY_CACHE_TTL,
+        max_chats: int = config.MEMORY_CACHE_MAX_CHATS,
+    ):
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # Single thread keeps persistence of one chat in order
+        self._persist_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-persist")
+        self.compactor = MemoryCompactor(
+            on_applied=self._on_compacted,
+            workers=config.MEMORY_COMPACTION_WORKERS,
+        )
+        self.hits = 0
+        self.misses = 0
+
+    # =========================================================================
+    # READ
+    # =========================================================================
+
+    def get_or_create(
+        self,
+        chat_id: str,
+        user_id: str | None = None,
+        load_from_db: bool = True,
+        version: int | None = None,
+    ) -> ConversationMemory:
+        """
+        Get cached memory or load it.
+
+        Args:
+            chat_id: Chat session ID (UUID)
+            user_id: User ID for DB queries
+            load_from_db: Whether to load history from Supabase on miss
+            version: Current chat_sessions.memory_version (None: unknown, trust TTL)
+
+        Returns:
+            ConversationMemory instance (shared by requests of this chat)
+        """
+        memory = self.get(chat_id, version)
+        if memory is not None:
+            return memory
+
+        memory = ConversationMemory(chat_id=chat_id, user_id=user_id)
+        if load_from_db and chat_id and not memory.load_sync():
+            # No Supabase or load failed — serve empty memory, don't cache it as truth
+            return memory
+
+        self._put(chat_id, memory, version if version is not None else memory.memory_version)
+        return memory
+
+    def get(self, chat_id: str, version: int | None = None) -> ConversationMemory | None:
+        """Get memory if cached, fresh and at `version` (doesn't load from DB)."""
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None and (
+                time.monotonic() >= entry.expires_at
+                or (version is not None and entry.version is not None and version != entry.version)
+            ):
+                del self._entries[chat_id]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(chat_id)
+        metrics.record_cache_lookup("conversation_memory", hit=entry is not None)
+        return entry.memory if entry else None
+
+    def _put(self, chat_id: str, memory: ConversationMemory, version: int | None):
+        with self._lock:
+            self._entries[chat_id] = _Entry(memory, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(chat_id)
+            while len(self._entries) > self.max_chats:
+                self._entries.popitem(last=False)
+
+    # =========================================================================
+    # WRITE
+    # =========================================================================
+
+    def append_exchange(self, memory: ConversationMemory, question: str, response: str):
+        """
+        Append question/response to memory and persist in background.
+
+        chat_logs row is written by the request itself; here the memory JSON
+        is saved and memory_version bumped so other workers drop their copy.
+        Compaction, if needed, is queued — never run inline.
+        """
+        memory.add_message("user", question, compact=False)
+        memory.add_message("assistant", response, compact=False)
+
+        entry = self._entry_of(memory)
+        if entry is not None:
+            with self._lock:
+                entry.expires_at = time.monotonic() + self.ttl
+            if memory._get_supabase() is not None:
+                self._persist_pool.submit(self._persist, entry, (question, response))
+
+        if memory.needs_compaction():
+            self.compactor.submit(memory)
+
+    def _entry_of(self, memory: ConversationMemory) -> _Entry | None:
+        """Cache entry holding this memory object (None if detached/replaced)."""
+        with self._lock:
+            entry = self._entries.get(memory.chat_id) if memory.chat_id else None
+        return entry if entry is not None and entry.memory is memory else None
+
+    def _on_compacted(self, memory: ConversationMemory):
+        """Compaction applied — persist with optimistic version check."""
+        entry = self._entry_of(memory)
+        if entry is not None and memory._get_supabase() is not None:
+            self._persist_pool.submit(self._persist, entry)
+
+    def _persist(self, entry: _Entry, exchange: tuple[str, str] | None = None):
+        """
+        Save memory JSON and bump memory_version atomically, only if DB still
+        has the version this worker knows.
+
+        On conflict another worker changed the chat meanwhile. An appended
+        exchange (question, response) is re-applied to freshly loaded memory,
+        which replaces our copy and is written once more with its version;
+        otherwise (compaction, failed retry) our copy is dropped and reloaded
+        on the next request.
+        """
+        chat_id = entry.memory.chat_id
+        try:
+            new_version = self._bump(entry.memory, entry.version)
+            if new_version is None and exchange is not None:
+                fresh = self._reload_with(entry.memory, *exchange)
+                if fresh is not None:
+                    fresh_version = self._bump(fresh, fresh.memory_version)
+                    if fresh_version is not None:
+                        with self._lock:
+                            if self._entries.get(chat_id) is entry:
+                                self._entries[chat_id] = _Entry(fresh, fresh_version, time.monotonic() + self.ttl)
+                        return
+        except Exception as e:
+            logger.warning(f"Failed to persist memory for chat {chat_id}: {e}")
+            return
+
+        with self._lock:
+            if self._entries.get(chat_id) is not entry:
+                return
+            if new_version is not None:
+                entry.version = new_version
+            else:
+                logger.info(f"Memory of chat {chat_id} changed by another worker, dropping cached copy")
+                del self._entries[chat_id]
+
+    @staticmethod
+    def _bump(memory: ConversationMemory, version: int | None) -> int | None:
+        """bump_memory_version RPC: new version, None on version conflict (raises on errors)."""
+        with memory._lock:
+            memory_data = {"summaries": list(memory.summaries), "key_facts": list(memory.key_facts)}
+        params = {"p_chat_id": memory.chat_id, "p_memory": memory_data}
+        if version is not None:
+            params["p_expected_version"] = version
+        result = memory._get_supabase().rpc("bump_memory_version", params).execute()
+        return result.data if isinstance(result.data, int) else None
+
+    @staticmethod
+    def _reload_with(memory: ConversationMemory, question: str, response: str) -> ConversationMemory | None:
+        """Current memory from DB with the exchange on top (None if load failed)."""
+        fresh = ConversationMemory(chat_id=memory.chat_id, user_id=memory.user_id)
+        fresh._supabase = memory._get_supabase()
+        if not fresh.load_sync():
+            return None
+        # chat_logs row of the exchange may already be loaded
+        if [m.content for m in fresh.recent[-2:]] != [question, response]:
+            fresh.add_message("user", question, compact=False)
+            fresh.add_message("assistant", response, compact=False)
+        return fresh
+
+    def flush(self, timeout: float = 5.0):
+        """Wait for queued compaction and persistence (tests, shutdown)."""
+        self.compactor.flush(timeout)
+        self._persist_pool.submit(lambda: None).result(timeout=timeout)
+
+    # =========================================================================
+    # MANAGEMENT
+    # =========================================================================
+
+    def clear(self, chat_id: str):
+        """Clear memory for chat (in-memory only)."""
+        memory = self.get(chat_id)
+        if memory is not None:
+            memory.clear()
+
+    def delete(self, chat_id: str):
+        """Delete memory from cache."""
+        with self._lock:
+            self._entries.pop(chat_id, None)
+
+    def list_sessions(self) -> list[str]:
+        """List all cached chat IDs."""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def save_all(self):
+        """Save all cached memories to DB."""
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            if entry.memory.chat_id:
+                entry.memory.save_memory_state_sync()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {"chats": len(self._entries), "hits": self.hits, "misses": self.misses}
+        stats["compaction"] = self.compactor.get_stats()
+        return stats
+
+
+# Singleton
+_memory_manager: MemoryManager | None = None
+_memory_manager_lock = threading.Lock()
+
+
+def get_memory_manager() -> MemoryManager:
+    """Get singleton memory manager (thread-safe)."""
+    global _memory_manager
+    if _memory_manager is None:
+        with _memory_manager_lock:
+            if _memory_manager is None:
+                _memory_manager = MemoryManager()
+    return _memory_manager
+
+
+def shutdown_memory_manager():
+    """Finish queued memory persistence if manager was started."""
+    if _memory_manager is not None:
+        try:
+            _memory_manager.flush()
+        except Exception as e:
+            logger.warning(f"Memory persistence not finished on shutdown: {e}")
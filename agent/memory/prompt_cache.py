@@ -0,0 +1,218 @@
+"""
+Prompt assembly with static prefix caching.
+
+Every agent prompt is split into:
+- static prefix: base prompt + market config contexts (same for every request)
+- dynamic suffix: question, language, retrieved examples, memory
+
+Static prefixes are built once per config hash (not on every request) and,
+when long enough, registered as explicit Gemini cached contents via
+CacheManager. Requests then send only the dynamic suffix.
+Short prefixes (below Gemini minimum) are sent inline, but as an identical
+leading block so implicit caching can still hit.
+
+Usage:
+    assembler = get_prompt_assembler()
+    prompt = assembler.assemble("understander:NQ", build_static, dynamic, model)
+    response = client.models.generate_content(
+        model=model,
+        contents=prompt.contents,
+        config=types.GenerateContentConfig(cached_content=prompt.cached_content),
+    )
+    assembler.record_usage(prompt, Usage.from_response(response))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+from agent.logging import metrics
+from agent.memory.cache import CacheManager, get_cache_manager
+from agent.pricing import calculate_cache_savings
+from agent.types import Usage
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+
+# Explicit caches live this long (refreshed by CacheManager before expiry)
+STATIC_CACHE_TTL = 3600
+
+
+@lru_cache(maxsize=1)
+def config_hash() -> str:
+    """
+    Hash of everything static prompt fragments are built from.
+
+    Market config and prompt files don't change while the process runs,
+    so this is computed once. A deploy with new config gets new caches.
+    """
+    from agent.config.market.instruments import INSTRUMENTS
+    from agent.config.market.holidays import HOLIDAY_NAMES
+    from agent.config.patterns import CANDLE_PATTERNS, PRICE_PATTERNS
+
+    h = hashlib.sha256()
+    for obj in (INSTRUMENTS, HOLIDAY_NAMES, CANDLE_PATTERNS, PRICE_PATTERNS):
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    for path in sorted(PROMPTS_DIR.rglob("*")):
+        if path.suffix in (".md", ".py"):
+            h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) — enough to decide on caching."""
+    return len(text) // 4
+
+
+@dataclass
+class AssembledPrompt:
+    """Prompt ready to send: contents + optional cached prefix."""
+    key: str
+    contents: str
+    cached_content: str | None = None
+    static_tokens: int = 0  # estimated tokens in static prefix
+
+
+@dataclass
+class PromptCacheStats:
+    """Per-prompt cache counters."""
+    requests: int = 0
+    cached_requests: int = 0  # sent with explicit cached_content
+    input_tokens: int = 0
+    cached_tokens: int = 0  # reported by Gemini (explicit + implicit)
+    savings_usd: float = 0.0
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cached_requests": self.cached_requests,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": round(self.cached_ratio, 3),
+            "savings_usd": self.savings_usd,
+        }
+
+
+class PromptAssembler:
+    """
+    Builds static prompt prefixes once and reuses them across requests.
+
+    Thread-safe: agents run concurrently in graph worker threads.
+    """
+
+    def __init__(self, cache_manager: CacheManager | None = None):
+        self._cache_manager = cache_manager
+        self._fragments: dict[tuple[str, str], str] = {}  # (key, config_hash) -> text
+        self._stats: dict[str, PromptCacheStats] = {}
+        self._models: dict[str, str] = {}  # key -> model (for savings)
+        self._lock = threading.Lock()
+
+    @property
+    def cache_manager(self) -> CacheManager:
+        if self._cache_manager is None:
+            self._cache_manager = get_cache_manager()
+        return self._cache_manager
+
+    def static(self, key: str, build: Callable[[], str]) -> str:
+        """Get static fragment, building it once per config hash."""
+        fragment_key = (key, config_hash())
+        fragment = self._fragments.get(fragment_key)
+        if fragment is None:
+            fragment = build()
+            with self._lock:
+                fragment = self._fragments.setdefault(fragment_key, fragment)
+        return fragment
+
+    def assemble(
+        self,
+        key: str,
+        build: Callable[[], str],
+        dynamic: str,
+        model: str,
+    ) -> AssembledPrompt:
+        """
+        Assemble prompt from static prefix and dynamic suffix.
+
+        Args:
+            key: Prompt identifier, unique per static content (e.g. "parser:NQ")
+            build: Builds static prefix (called once per config hash)
+            dynamic: Per-request suffix
+            model: Model the request goes to (caches are per model)
+
+        Returns:
+            AssembledPrompt — contents is only the dynamic part if the
+            prefix is served from explicit cache
+        """
+        static = self.static(key, build)
+        static_tokens = estimate_tokens(static)
+        self._models[key] = model
+
+        cached_content = None
+        if static_tokens >= CacheManager.MIN_TOKENS_FLASH:
+            content_hash = hashlib.sha256(static.encode()).hexdigest()[:12]
+            try:
+                cached_content = self.cache_manager.get_or_create(
+                    key=f"{key}:{content_hash}",
+                    content=static,
+                    ttl_seconds=STATIC_CACHE_TTL,
+                    model=model,
+                )
+            except Exception as e:
+                logger.warning(f"Prompt cache unavailable for {key}: {e}")
+            metrics.record_cache_lookup("gemini_context", hit=cached_content is not None)
+
+        if cached_content:
+            contents = dynamic
+        else:
+            contents = f"{static}\n\n{dynamic}"
+
+        return AssembledPrompt(
+            key=key,
+            contents=contents,
+            cached_content=cached_content,
+            static_tokens=static_tokens,
+        )
+
+    def record_usage(self, prompt: AssembledPrompt, usage: Usage):
+        """Account response usage for prompt (cached-token ratio, savings)."""
+        savings = calculate_cache_savings(usage.cached_tokens, self._models.get(prompt.key))
+        with self._lock:
+            stats = self._stats.setdefault(prompt.key, PromptCacheStats())
+            stats.requests += 1
+            if prompt.cached_content:
+                stats.cached_requests += 1
+            stats.input_tokens += usage.input_tokens
+            stats.cached_tokens += usage.cached_tokens
+            stats.savings_usd += savings
+
+    def get_stats(self) -> dict:
+        """Cache stats per prompt key."""
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self._stats.items()}
+
+
+# Singleton
+_assembler: PromptAssembler | None = None
+_assembler_lock = threading.Lock()
+
+
+def get_prompt_assembler() -> PromptAssembler:
+    """Get singleton PromptAssembler (thread-safe)."""
+    global _assembler
+    if _assembler is None:
+        with _assembler_lock:
+            if _assembler is None:
+                _assembler = PromptAssembler()
+    return _assembler
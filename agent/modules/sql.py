@@ -19,7 +19,7 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Any, Literal
 
-import config
+from data.database import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -315,7 +315,7 @@ def fetch(
     sql_query = f"granularity={granularity}, symbol={symbol}, period={period_start}..{period_end}"
 
     try:
-        with duckdb.connect(config.DATABASE_PATH, read_only=True) as conn:
+        with get_connection(read_only=True) as conn:
             df = conn.execute(template, [symbol, period_start, period_end]).df()
 
             # Convert timestamps/dates to strings for JSON serialization
@@ -363,7 +363,18 @@ def get_data_range(symbol: str = "NQ") -> dict[str, Any] | None:
             "trading_days": 252
         }
     """
+    # Coverage index (data/coverage.py): one row per trading day, not per bar
     sql = """
+        SELECT
+            symbol,
+            MIN(first_bar)::date as start_date,
+            MAX(last_bar)::date as end_date,
+            COUNT(*) as trading_days
+        FROM bar_coverage
+        WHERE symbol = $1
+        GROUP BY symbol
+    """
+    scan = """
         SELECT
             symbol,
             MIN(timestamp)::date as start_date,
@@ -375,8 +386,11 @@ def get_data_range(symbol: str = "NQ") -> dict[str, Any] | None:
     """
 
     try:
-        with duckdb.connect(config.DATABASE_PATH, read_only=True) as conn:
-            df = conn.execute(sql, [symbol]).df()
+        with get_connection(read_only=True) as conn:
+            try:
+                df = conn.execute(sql, [symbol]).df()
+            except duckdb.CatalogException:
+                df = conn.execute(scan, [symbol]).df()  # Database created before the index
             if len(df) > 0:
                 row = df.iloc[0].to_dict()
                 # Convert to strings
@@ -391,11 +405,14 @@ def get_data_range(symbol: str = "NQ") -> dict[str, Any] | None:
 
 def get_available_symbols() -> list[str]:
     """Get list of symbols with data."""
-    sql = "SELECT DISTINCT symbol FROM ohlcv_1min ORDER BY symbol"
+    sql = "SELECT DISTINCT symbol FROM bar_coverage ORDER BY symbol"
 
     try:
-        with duckdb.connect(config.DATABASE_PATH, read_only=True) as conn:
-            df = conn.execute(sql).df()
+        with get_connection(read_only=True) as conn:
+            try:
+                df = conn.execute(sql).df()
+            except duckdb.CatalogException:
+                df = conn.execute("SELECT DISTINCT symbol FROM ohlcv_1min ORDER BY symbol").df()
             return df['symbol'].tolist()
     except Exception as e:
         logger.error(f"get_available_symbols failed: {e}")
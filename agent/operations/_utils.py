@@ -1,7 +1,9 @@
 """Shared utilities for operations."""
 
+import numpy as np
 import pandas as pd
 
+from agent.data.profiling import stage
 from constants import COLUMN_ORDER
 
 
@@ -38,27 +40,48 @@ def df_to_rows(df: pd.DataFrame) -> list[dict]:
     if df.empty:
         return []
 
-    # Order columns by priority
-    df = _order_columns(df)
-
-    rows = []
-    for _, row in df.iterrows():
-        record = {}
-        for col, val in row.items():
-            if pd.isna(val):
-                continue
-            elif hasattr(val, "isoformat"):
-                record[col] = val.isoformat()
-            elif isinstance(val, float):
-                record[col] = round(val, 3)
-            elif hasattr(val, "item"):
-                record[col] = val.item()
-            else:
-                record[col] = val
-        rows.append(record)
+    with stage("df_to_rows", rows_in=len(df)) as s:
+        # Order columns by priority
+        df = _order_columns(df)
+
+        rows = []
+        for _, row in df.iterrows():
+            record = {}
+            for col, val in row.items():
+                if pd.isna(val):
+                    continue
+                elif hasattr(val, "isoformat"):
+                    record[col] = val.isoformat()
+                elif isinstance(val, (float, np.floating)):
+                    record[col] = round(float(val), 3)
+                elif hasattr(val, "item"):
+                    record[col] = val.item()
+                else:
+                    record[col] = val
+            rows.append(record)
+        s.done(rows=len(rows))
     return rows
 
 
+def to_native(obj):
+    """
+    Numpy scalars → Python types, recursively through dicts/lists.
+
+    Operations round numpy aggregates (float32 with compact frames) into
+    summaries; those are not JSON floats. float32 keeps its shortest repr
+    (0.005, not 0.004999999888).
+    """
+    if isinstance(obj, dict):
+        return {k: to_native(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_native(v) for v in obj]
+    if isinstance(obj, np.floating) and not isinstance(obj, float):
+        return float(str(obj))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
 def find_days_in_streak(df: pd.DataFrame, f: dict) -> pd.DataFrame:
     """
     Find days where N+ consecutive days condition is met.
@@ -95,3 +95,18 @@ def calculate_cost(
     cost = (regular_input_cost + cached_input_cost + output_cost) / 1_000_000
 
     return cost
+
+
+def calculate_cache_savings(cached_tokens: int, model: str | None = None) -> float:
+    """Calculate USD saved by serving tokens from cache instead of full input rate.
+
+    Args:
+        cached_tokens: Number of tokens served from cache
+        model: Model name for pricing lookup
+
+    Returns:
+        Savings in USD
+    """
+    pricing = get_pricing(model)
+    discount = pricing["input"] - pricing.get("cached_input", pricing["input"])
+    return cached_tokens * discount / 1_000_000
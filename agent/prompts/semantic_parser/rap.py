@@ -13,8 +13,12 @@ Also injects instrument-specific market config (sessions, trading day, etc.)
 
 from __future__ import annotations
 
-import json
 import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import numpy as np
@@ -22,6 +26,7 @@ from google import genai
 
 import config
 from agent.config.market.instruments import get_instrument
+from agent.logging import metrics
 from agent.config.market.events import get_event_types_for_instrument
 
 logger = logging.getLogger(__name__)
@@ -33,7 +38,8 @@ CHUNK_DIRS = [
     PARSER_DIR / "filters",
 ]
 BASE_PROMPT_PATH = PARSER_DIR / "base.md"
-EMBEDDINGS_CACHE = PARSER_DIR / "embeddings.json"
+EMBEDDINGS_CACHE = PARSER_DIR / "embeddings.npy"
+EMBEDDINGS_IDS = PARSER_DIR / "embedding_ids.npy"
 
 
 class ChunkLoader:
@@ -68,74 +74,186 @@ class ChunkLoader:
         return list(self.chunks.keys())
 
 
+def normalize_query(query: str) -> str:
+    """Normalize query for embedding cache key (case, whitespace, trailing punctuation)."""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (dot product == cosine similarity)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+class QueryEmbeddingCache:
+    """
+    Query embeddings: in-memory LRU + persistent SQLite store.
+
+    Keyed by (model, normalized query). Repeated questions skip the
+    embedding API call, also across restarts and workers.
+    """
+
+    def __init__(self, path: Path | None, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.path = path
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                        "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                    )
+                finally:
+                    conn.close()
+            except Exception as e:
+                logger.warning(f"Query embedding store unavailable, using memory only: {e}")
+                self.path = None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Get cached embedding (LRU first, then persistent store)."""
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                metrics.record_cache_lookup("query_embedding", hit=True)
+                return vector
+
+        vector = self._load(key)
+        metrics.record_cache_lookup("query_embedding", hit=vector is not None)
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, vector)
+        return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        """Store embedding in LRU and persistent store."""
+        with self._lock:
+            self._remember(key, vector)
+        if self.path is None:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (key, vector.astype(np.float32).tobytes(), time.time()),
+                )
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.debug(f"Failed to persist query embedding: {e}")
+
+    def _load(self, key: str) -> np.ndarray | None:
+        if self.path is None:
+            return None
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.debug(f"Failed to read query embedding: {e}")
+            return None
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._lru), "hits": self.hits, "misses": self.misses}
+
+
 class ChunkEmbedder:
-    """Compute and cache embeddings for chunks."""
+    """
+    Compute and cache embeddings for chunks.
+
+    Chunk embeddings are stored as L2-normalized float32 matrix (.npy)
+    plus chunk ids (.npy), memory-mapped at startup — no JSON parsing.
+    """
 
     MODEL = "text-embedding-004"
 
-    def __init__(self, chunks: dict[str, str], cache_path: Path = EMBEDDINGS_CACHE):
+    def __init__(
+        self,
+        chunks: dict[str, str],
+        cache_path: Path = EMBEDDINGS_CACHE,
+        ids_path: Path = EMBEDDINGS_IDS,
+        query_cache: QueryEmbeddingCache | None = None,
+    ):
         self.client = genai.Client(api_key=config.GOOGLE_API_KEY)
         self.chunks = chunks
         self.cache_path = cache_path
-        self.embeddings: dict[str, list[float]] = {}
+        self.ids_path = ids_path
+        self.chunk_ids: list[str] = []
+        self.matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self.query_cache = query_cache or QueryEmbeddingCache(Path(config.QUERY_EMBEDDINGS_PATH))
         self._load_or_compute()
 
     def _load_or_compute(self):
         """Load from cache or compute embeddings."""
         if self._cache_valid():
             self._load_cache()
-            logger.info(f"Loaded {len(self.embeddings)} embeddings from cache")
+            logger.info(f"Loaded {len(self.chunk_ids)} embeddings from cache")
         else:
             self._compute_all()
             self._save_cache()
-            logger.info(f"Computed and cached {len(self.embeddings)} embeddings")
+            logger.info(f"Computed and cached {len(self.chunk_ids)} embeddings")
 
     # Cache TTL in seconds (7 days)
     CACHE_TTL = 7 * 24 * 60 * 60
 
     def _cache_valid(self) -> bool:
         """Check if cache exists, has all chunks, and is not expired."""
-        if not self.cache_path.exists():
+        if not self.cache_path.exists() or not self.ids_path.exists():
             return False
 
         try:
-            with open(self.cache_path, "r") as f:
-                cached = json.load(f)
-
             # Check chunk_ids match
-            if set(cached.get("chunk_ids", [])) != set(self.chunks.keys()):
+            ids = np.load(self.ids_path)
+            if set(ids.tolist()) != set(self.chunks.keys()):
                 return False
 
-            # Check TTL (if created_at exists)
-            created_at = cached.get("created_at")
-            if created_at:
-                from datetime import datetime
-                created = datetime.fromisoformat(created_at)
-                age_seconds = (datetime.now() - created).total_seconds()
-                if age_seconds > self.CACHE_TTL:
-                    logger.info(f"Cache expired (age: {age_seconds/3600:.1f}h)")
-                    return False
+            # Check TTL (by file modification time)
+            age_seconds = time.time() - self.cache_path.stat().st_mtime
+            if age_seconds > self.CACHE_TTL:
+                logger.info(f"Cache expired (age: {age_seconds/3600:.1f}h)")
+                return False
 
             return True
         except Exception:
             return False
 
     def _load_cache(self):
-        """Load embeddings from cache."""
-        with open(self.cache_path, "r") as f:
-            data = json.load(f)
-        self.embeddings = data.get("embeddings", {})
+        """Memory-map embeddings matrix from cache."""
+        self.chunk_ids = np.load(self.ids_path).tolist()
+        self.matrix = np.load(self.cache_path, mmap_mode="r")
 
     def _save_cache(self):
-        """Save embeddings to cache with timestamp."""
-        from datetime import datetime
-        data = {
-            "chunk_ids": list(self.chunks.keys()),
-            "embeddings": self.embeddings,
-            "created_at": datetime.now().isoformat(),
-        }
-        with open(self.cache_path, "w") as f:
-            json.dump(data, f)
+        """Save embeddings matrix and ids (written to temp file, then renamed)."""
+        for path, array in ((self.cache_path, self.matrix), (self.ids_path, np.array(self.chunk_ids))):
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, path)
         logger.debug(f"Saved embeddings cache to {self.cache_path}")
 
     def _embed(self, text: str) -> list[float]:
@@ -148,15 +266,23 @@ class ChunkEmbedder:
 
     def _compute_all(self):
         """Compute embeddings for all chunks."""
-        for chunk_id, content in self.chunks.items():
+        vectors = []
+        self.chunk_ids = list(self.chunks.keys())
+        for chunk_id in self.chunk_ids:
             # Use first 1000 chars for embedding (includes description + key examples)
-            embed_text = content[:1000]
-            self.embeddings[chunk_id] = self._embed(embed_text)
+            embed_text = self.chunks[chunk_id][:1000]
+            vectors.append(self._embed(embed_text))
             logger.debug(f"Embedded chunk: {chunk_id}")
+        self.matrix = _normalize(np.array(vectors, dtype=np.float32)) if vectors else self.matrix
 
-    def embed_query(self, query: str) -> list[float]:
-        """Embed user query (not cached)."""
-        return self._embed(query)
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed user query (normalized float32, cached by normalized query)."""
+        key = f"{self.MODEL}:{normalize_query(query)}"
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = _normalize(np.array(self._embed(query), dtype=np.float32))
+            self.query_cache.put(key, vector)
+        return vector
 
 
 class ChunkRetriever:
@@ -164,28 +290,22 @@ class ChunkRetriever:
 
     def __init__(self, embedder: ChunkEmbedder):
         self.embedder = embedder
-        self._build_index()
-
-    def _build_index(self):
-        """Build numpy matrix for fast search."""
-        self.chunk_ids = list(self.embedder.embeddings.keys())
-        if not self.chunk_ids:
-            self.matrix = np.array([])
-            return
-        self.matrix = np.array([
-            self.embedder.embeddings[cid]
-            for cid in self.chunk_ids
-        ])
+        self.chunk_ids = embedder.chunk_ids
+        self.matrix = embedder.matrix
         logger.debug(f"Built index with {len(self.chunk_ids)} chunks")
 
     def search(self, query: str, top_k: int = 3) -> list[tuple[str, float]]:
-        """Find top-k relevant chunks."""
+        """Find top-k relevant chunks (cosine similarity)."""
         if len(self.chunk_ids) == 0:
             return []
 
-        q_emb = np.array(self.embedder.embed_query(query))
-        scores = np.dot(self.matrix, q_emb)
-        top_indices = np.argsort(scores)[-top_k:][::-1]
+        q_emb = self.embedder.embed_query(query)
+        scores = self.matrix @ q_emb
+
+        # Partial selection of top-k, then sort only those
+        k = min(top_k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top_indices = top[np.argsort(scores[top])[::-1]]
 
         results = [
             (self.chunk_ids[i], float(scores[i]))
@@ -295,7 +415,43 @@ class SemanticParserRAP:
 
         return "\n".join(lines)
 
-    def build(self, question: str, top_k: int = 3, instrument: str = "NQ") -> tuple[str, list[str]]:
+    def build_static(self, instrument: str = "NQ") -> str:
+        """
+        Build static part of prompt (same for every question).
+
+        Base prompt + instrument, patterns and holidays contexts.
+        """
+        instrument_context = self._build_instrument_context(instrument)
+        patterns_context = self._build_patterns_context()
+        holidays_context = self._build_holidays_context()
+
+        return f"{self.base_prompt}\n\n{instrument_context}\n\n{patterns_context}\n\n{holidays_context}"
+
+    def build_examples(self, chunk_ids: list[str]) -> str:
+        """Build dynamic part of prompt from retrieved chunks."""
+        chunks_text = "\n\n".join([
+            self.loader.get(cid) for cid in chunk_ids
+        ])
+        return f"<relevant_examples>\n{chunks_text}\n</relevant_examples>"
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int = 3,
+        results: list[tuple[str, float]] | None = None,
+    ) -> list[str]:
+        """Get relevant chunk IDs (uses prefetched results if given)."""
+        if results is None:
+            results = self.retriever.search(question, top_k=top_k)
+        return [r[0] for r in results]
+
+    def build(
+        self,
+        question: str,
+        top_k: int = 3,
+        instrument: str = "NQ",
+        results: list[tuple[str, float]] | None = None,
+    ) -> tuple[str, list[str]]:
         """
         Build prompt with relevant chunks and instrument context.
 
@@ -303,22 +459,14 @@ class SemanticParserRAP:
             question: User question (in English)
             top_k: Number of chunks to retrieve
             instrument: Trading instrument symbol (default: NQ)
+            results: Already retrieved (chunk_id, score) pairs (speculative prefetch)
 
         Returns:
             (prompt, chunk_ids) - built prompt and list of used chunk IDs
         """
-        results = self.retriever.search(question, top_k=top_k)
-        chunk_ids = [r[0] for r in results]
-
-        chunks_text = "\n\n".join([
-            self.loader.get(cid) for cid in chunk_ids
-        ])
+        chunk_ids = self.retrieve(question, top_k=top_k, results=results)
 
-        instrument_context = self._build_instrument_context(instrument)
-        patterns_context = self._build_patterns_context()
-        holidays_context = self._build_holidays_context()
-
-        prompt = f"{self.base_prompt}\n\n{instrument_context}\n\n{patterns_context}\n\n{holidays_context}\n\n<relevant_examples>\n{chunks_text}\n</relevant_examples>"
+        prompt = f"{self.build_static(instrument)}\n\n{self.build_examples(chunk_ids)}"
 
         logger.info(f"Built prompt with chunks: {chunk_ids}, instrument: {instrument}")
         return prompt, chunk_ids
@@ -329,12 +477,11 @@ class SemanticParserRAP:
             "total_chunks": len(self.loader.chunks),
             "chunk_ids": self.loader.get_all_ids(),
             "embeddings_cached": self.embedder.cache_path.exists(),
+            "query_cache": self.embedder.query_cache.get_stats(),
         }
 
 
 # Singleton with thread-safe initialization
-import threading
-
 _rap_instance: SemanticParserRAP | None = None
 _rap_lock = threading.Lock()
 
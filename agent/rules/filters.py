@@ -12,6 +12,7 @@ If neither always_where nor always_event, semantics depends on operation.
 See semantics.py for operation-specific rules.
 """
 
+from functools import lru_cache
 from typing import TypedDict
 import re
 
@@ -97,13 +98,14 @@ FILTER_TYPES: dict[str, FilterTypeDef] = {
 # Dynamic pattern list from config (single source of truth)
 # =============================================================================
 
-def _get_all_pattern_names() -> set[str]:
-    """Get all pattern names from config + legacy aliases."""
+@lru_cache(maxsize=1)
+def _get_all_pattern_names() -> frozenset[str]:
+    """Get all pattern names from config + legacy aliases (built once)."""
     from agent.config.patterns import list_all_patterns
     patterns = set(list_all_patterns())
     patterns.update({"green", "red", "gap_fill", "gap_filled"})  # legacy
     patterns.update(PATTERN_ALIASES.keys())  # accept aliases too
-    return patterns
+    return frozenset(patterns)
 
 
 # =============================================================================
@@ -0,0 +1,118 @@
+"""
+Request coalescing (singleflight) for identical concurrent work.
+
+When the same question arrives from several users at once, only the first
+caller (leader) runs the parse / DuckDB work; concurrent callers with the
+same key wait and get a copy of its result.
+
+Safeguards against cross-user leakage:
+- Keys are built only from inputs that fully determine the output
+  (model + normalized query for Parser, the execution plan for Executor) —
+  never user_id, chat_id or conversation memory
+- Stages that see conversation context (Understander, Presenter, Responder)
+  are not coalesced
+- Nothing is retained: the key is dropped when the leader finishes,
+  a later request runs the work again
+- Every follower gets its own deep copy — mutations stay in its request
+- Traces stay per request (own request_id), followers are marked coalesced
+
+Usage:
+    result, shared = PARSER_FLIGHTS.do(flight_key(model, query), lambda: parse(query))
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import config
+from agent.logging import metrics
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of query text."""
+    return " ".join((text or "").split()).casefold()
+
+
+def flight_key(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts (dict key order ignored)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    waiters: int = 0
+    result: Any = None
+    error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Shares in-flight calls with equal key between threads.
+
+    Args:
+        name: Flight name for metrics ("parser", "executor")
+        enabled: False runs every call independently
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run fn, or wait for the identical call already in flight.
+
+        Returns:
+            (result, shared) — shared is True for followers (result is a copy).
+            Leader's exception is raised in followers too.
+        """
+        if not self.enabled:
+            return fn(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            metrics.COALESCED_CALLS.inc(flight=self.name)
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        result = None
+        try:
+            result = fn()
+            return result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            # Snapshot before leader's caller can mutate its result
+            if waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+PARSER_FLIGHTS = SingleFlight("parser", enabled=config.COALESCE_REQUESTS)
+EXECUTOR_FLIGHTS = SingleFlight("executor", enabled=config.COALESCE_REQUESTS)
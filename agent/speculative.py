@@ -0,0 +1,415 @@
+"""
+Speculative execution — run Understander in parallel with Intent.
+
+For most data questions the Understander input (internal_query) is almost
+identical to the raw question. Instead of waiting for Intent, we start the
+Understander (and RAP retrieval for Parser) on the raw question right away,
+then commit or discard the result once Intent is known.
+
+Commit rules:
+- intent == "data" (chitchat/concept go to Responder → discard)
+- detected lang matches the lang we guessed (acknowledge is in user's language)
+- internal_query differs from the raw question by at most SPECULATIVE_MAX_DRIFT
+
+Every decision records latency saved vs wasted cost (agent/pricing.py).
+A discarded LLM call can't be aborted: if it is still running, the decision
+is marked wasted_pending and its cost goes to the stats and metrics when the
+call finishes.
+
+Usage:
+    start_speculation(request_id, question, needs_title=True)
+    ...
+    run, decision = take_understander(request_id, intent, lang, internal_query)
+    if decision.committed:
+        result = run.understander_result()
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+import config
+from agent.logging import metrics
+from agent.pricing import calculate_cost
+from agent.types import Usage
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# Query drift
+# =============================================================================
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> list[str]:
+    """Lowercase word tokens (punctuation and extra spaces ignored)."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def query_drift(raw: str, rewritten: str) -> float:
+    """
+    How much rewritten query differs from raw question.
+
+    Returns 0.0 for identical token sequences, 1.0 for completely different.
+    """
+    a, b = _tokens(raw), _tokens(rewritten)
+    if not a and not b:
+        return 0.0
+    return 1.0 - SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def guess_lang(question: str) -> str | None:
+    """
+    Cheap language guess before Intent runs.
+
+    Only English is detected — for other languages internal_query is a
+    translation, so the raw question would never pass the drift check.
+    """
+    letters = [c for c in question if c.isalpha()]
+    if letters and all(c.isascii() for c in letters):
+        return "en"
+    return None
+
+
+# =============================================================================
+# Speculative run
+# =============================================================================
+
+@dataclass
+class SpeculativeRun:
+    """In-flight speculative work for one request."""
+    request_id: str
+    question: str
+    lang: str
+    needs_title: bool
+    started_at: float = field(default_factory=time.time)
+    understander: Future | None = None
+    retrieval: Future | None = None
+    understander_done_at: float | None = None
+    model: str | None = None
+    committed: bool = False  # Understander result used (only retrieval left)
+
+    def understander_result(self):
+        """Wait for speculative UnderstanderResult."""
+        return self.understander.result()
+
+    def retrieval_result(self) -> list[tuple[str, float]] | None:
+        """Get prefetched RAP results, None if unavailable or failed."""
+        if self.retrieval is None:
+            return None
+        try:
+            return self.retrieval.result()
+        except Exception as e:
+            logger.warning(f"Speculative retrieval failed: {e}")
+            return None
+
+
+@dataclass
+class SpeculationDecision:
+    """Commit/discard decision with cost accounting (for traces)."""
+    committed: bool
+    reason: str
+    drift: float | None = None
+    latency_saved_ms: int = 0
+    wasted_tokens: int = 0
+    wasted_cost_usd: float = 0.0
+    wasted_pending: bool = False  # Discarded call still running, cost not known yet
+
+    def to_dict(self) -> dict:
+        return {
+            "committed": self.committed,
+            "reason": self.reason,
+            "drift": round(self.drift, 3) if self.drift is not None else None,
+            "latency_saved_ms": self.latency_saved_ms,
+            "wasted_tokens": None if self.wasted_pending else self.wasted_tokens,
+            "wasted_cost_usd": None if self.wasted_pending else self.wasted_cost_usd,
+            "wasted_pending": self.wasted_pending,
+        }
+
+
+class SpeculationStats:
+    """Process-wide counters: commits, discards, saved latency, wasted cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.committed = 0
+        self.discarded = 0
+        self.latency_saved_ms = 0
+        self.wasted_tokens = 0
+        self.wasted_cost_usd = 0.0
+
+    def record_started(self):
+        with self._lock:
+            self.started += 1
+
+    def record(self, decision: SpeculationDecision):
+        with self._lock:
+            if decision.committed:
+                self.committed += 1
+                self.latency_saved_ms += decision.latency_saved_ms
+            else:
+                self.discarded += 1
+        metrics.SPECULATIONS.inc(result="committed" if decision.committed else "discarded")
+
+    def record_waste(self, tokens: int, cost_usd: float):
+        """Usage of a discarded call (when it finishes — may be after the decision)."""
+        with self._lock:
+            self.wasted_tokens += tokens
+            self.wasted_cost_usd += cost_usd
+        metrics.SPECULATION_WASTED_TOKENS.inc(tokens)
+        metrics.SPECULATION_WASTED_COST.inc(cost_usd)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started,
+                "committed": self.committed,
+                "discarded": self.discarded,
+                "commit_rate": self.committed / self.started if self.started else 0.0,
+                "latency_saved_ms": self.latency_saved_ms,
+                "wasted_tokens": self.wasted_tokens,
+                "wasted_cost_usd": self.wasted_cost_usd,
+            }
+
+
+_stats = SpeculationStats()
+_runs: dict[str, SpeculativeRun] = {}
+_runs_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get shared thread pool (thread-safe)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.SPECULATIVE_WORKERS,
+                    thread_name_prefix="speculative",
+                )
+    return _executor
+
+
+def get_speculation_stats() -> dict:
+    """Aggregated speculation stats for this process."""
+    return _stats.to_dict()
+
+
+# =============================================================================
+# Public API
+# =============================================================================
+
+def start_speculation(
+    request_id: str,
+    question: str,
+    needs_title: bool = False,
+) -> SpeculativeRun | None:
+    """
+    Start Understander (and RAP retrieval) on the raw question.
+
+    Returns None if speculation is disabled or not worth it
+    (non-English question — internal_query will be a translation).
+    """
+    if not config.SPECULATIVE_MODE or not request_id:
+        return None
+
+    lang = guess_lang(question)
+    if lang is None:
+        return None
+
+    from agent.agents.understander import Understander
+
+    understander = Understander()
+    run = SpeculativeRun(
+        request_id=request_id,
+        question=question,
+        lang=lang,
+        needs_title=needs_title,
+        model=understander.model,
+    )
+
+    def _understand():
+        try:
+            return understander.understand(question, lang=lang, needs_title=needs_title)
+        finally:
+            run.understander_done_at = time.time()
+
+    pool = _get_executor()
+    run.understander = pool.submit(_understand)
+
+    if config.SPECULATIVE_RAP:
+        from agent.agents.parser import Parser
+        from agent.prompts.semantic_parser.rap import get_rap
+        run.retrieval = pool.submit(lambda: get_rap().retriever.search(question, top_k=Parser.TOP_K))
+
+    with _runs_lock:
+        _runs[request_id] = run
+    _stats.record_started()
+
+    logger.debug(f"Speculation started for {request_id} (lang={lang})")
+    return run
+
+
+def take_understander(
+    request_id: str | None,
+    intent: str | None,
+    lang: str | None,
+    internal_query: str | None,
+    needs_title: bool = False,
+) -> tuple[SpeculativeRun | None, SpeculationDecision | None]:
+    """
+    Decide whether speculative Understander result can be used.
+
+    Call from Understander node. On commit, waits for the speculative
+    result (usually already done). On discard, cost is accounted in the
+    background when the call finishes.
+
+    Returns:
+        (run, decision) — (None, None) if no speculation was started
+    """
+    run = _pop(request_id)
+    if run is None:
+        return None, None
+
+    reason = _reject_reason(run, intent, lang, needs_title)
+    drift = None
+    if reason is None:
+        drift = query_drift(run.question, internal_query or "")
+        if drift > config.SPECULATIVE_MAX_DRIFT:
+            reason = "query_drift"
+
+    if reason:
+        return None, _discard(run, reason, drift)
+
+    node_started = time.time()
+    try:
+        run.understander_result()
+    except Exception as e:
+        logger.warning(f"Speculative understander failed: {e}")
+        return None, _discard(run, "error", drift)
+
+    # Sequential run would cost D starting now; we only waited for the remainder
+    duration = run.understander_done_at - run.started_at
+    waited = max(0.0, run.understander_done_at - node_started)
+    decision = SpeculationDecision(
+        committed=True,
+        reason="committed",
+        drift=drift,
+        latency_saved_ms=int((duration - waited) * 1000),
+    )
+    _stats.record(decision)
+    run.committed = True
+
+    # Retrieval is decided later by Parser — keep run available
+    if run.retrieval is not None:
+        with _runs_lock:
+            _runs[run.request_id] = run
+
+    return run, decision
+
+
+def take_retrieval(request_id: str | None, parser_query: str) -> list[tuple[str, float]] | None:
+    """
+    Get prefetched RAP results if Parser query is close to the raw question.
+
+    Returns None if nothing usable (Parser does its own retrieval).
+    """
+    run = _pop(request_id)
+    if run is None or run.retrieval is None:
+        return None
+
+    if query_drift(run.question, parser_query) > config.SPECULATIVE_MAX_DRIFT:
+        run.retrieval.cancel()
+        return None
+
+    return run.retrieval_result()
+
+
+def discard_speculation(request_id: str | None, reason: str = "not_used") -> SpeculationDecision | None:
+    """Discard any speculative work for request (Responder path, errors, end of stream)."""
+    run = _pop(request_id)
+    if run is None:
+        return None
+    if run.committed:
+        if run.retrieval is not None:
+            run.retrieval.cancel()
+        return None
+    return _discard(run, reason, None)
+
+
+# =============================================================================
+# Internal
+# =============================================================================
+
+def _pop(request_id: str | None) -> SpeculativeRun | None:
+    if not request_id:
+        return None
+    with _runs_lock:
+        return _runs.pop(request_id, None)
+
+
+def _reject_reason(
+    run: SpeculativeRun,
+    intent: str | None,
+    lang: str | None,
+    needs_title: bool,
+) -> str | None:
+    if intent != "data":
+        return "intent"
+    if lang != run.lang:
+        return "lang"
+    if needs_title != run.needs_title:
+        return "needs_title"
+    return None
+
+
+def _discard(run: SpeculativeRun, reason: str, drift: float | None) -> SpeculationDecision:
+    """
+    Discard speculative run.
+
+    The LLM call can't be aborted once sent. If it already finished, its
+    cost is in the decision; otherwise the decision is wasted_pending and
+    the cost is recorded in stats/metrics by a done callback.
+    """
+    if run.retrieval is not None:
+        run.retrieval.cancel()
+
+    decision = SpeculationDecision(committed=False, reason=reason, drift=drift)
+    _stats.record(decision)
+
+    def _account(future: Future) -> tuple[int, float]:
+        usage = Usage()
+        if not future.cancelled() and future.exception() is None:
+            usage = future.result().usage
+        tokens = usage.input_tokens + usage.output_tokens + usage.thinking_tokens
+        cost = calculate_cost(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            thinking_tokens=usage.thinking_tokens,
+            cached_tokens=usage.cached_tokens,
+            model=run.model,
+        )
+        _stats.record_waste(tokens, cost)
+        logger.debug(f"Speculation discarded for {run.request_id}: {reason}, wasted ${cost:.6f}")
+        return tokens, cost
+
+    if run.understander is None or run.understander.cancel():
+        return decision
+    if run.understander.done():
+        decision.wasted_tokens, decision.wasted_cost_usd = _account(run.understander)
+    else:
+        decision.wasted_pending = True
+        run.understander.add_done_callback(_account)
+
+    return decision
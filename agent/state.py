@@ -80,6 +80,7 @@ class TradingState(MessagesState):
     need_clarification: dict | None  # {reason, question} if understood=false
     suggested_title: str | None  # Short chat title (2-3 words) from Understander
     needs_title: bool  # True if chat session needs a title
+    speculation: dict | None  # Speculative Understander decision (committed, latency_saved_ms, wasted_cost_usd or wasted_pending)
 
     # Parser output
     parsed_query: list[StepDict] | None  # Serialized Steps from Parser
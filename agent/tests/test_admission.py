@@ -0,0 +1,194 @@
+"""Tests for admission control: token buckets, queue, per-model slots."""
+
+import asyncio
+import threading
+
+import pytest
+
+from agent.admission import AdmissionController, ModelLimiter, Overloaded, TokenBucket
+
+
+def controller(**kwargs) -> AdmissionController:
+    defaults = dict(
+        max_concurrent=1, max_queue=2, queue_timeout=5.0,
+        user_rate=100.0, user_burst=100, global_rate=100.0, global_burst=100,
+        update_interval=0.05,
+    )
+    return AdmissionController(**{**defaults, **kwargs})
+
+
+async def collect(ticket) -> list[dict]:
+    return [event async for event in ticket.wait()]
+
+
+class TestTokenBucket:
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=1.0, burst=2)
+        for _ in range(2):
+            assert bucket.wait_time(bucket.updated) == 0
+            bucket.take()
+        assert bucket.wait_time(bucket.updated) == pytest.approx(1.0)
+
+
+class TestAdmission:
+    def test_user_rate_limited_others_not(self):
+        admission = controller(max_concurrent=10, user_rate=0.001, user_burst=1)
+        admission.check("user-1").release()
+
+        with pytest.raises(Overloaded) as exc:
+            admission.check("user-1")
+        assert exc.value.code == "rate_limited"
+        assert exc.value.retry_after > 0
+        admission.check("user-2").release()
+
+    def test_global_rate_limited(self):
+        admission = controller(max_concurrent=10, global_rate=0.001, global_burst=2)
+        admission.check("a").release()
+        admission.check("b").release()
+
+        with pytest.raises(Overloaded) as exc:
+            admission.check("c")
+        assert exc.value.code == "rate_limited"
+
+    def test_queue_full_shed(self):
+        admission = controller(max_queue=1)
+        admission.check("a")
+        admission.check("b")
+
+        with pytest.raises(Overloaded) as exc:
+            admission.check("c")
+        assert exc.value.to_event()["code"] == "queue_full"
+
+    def test_queued_events_and_handoff(self):
+        async def scenario():
+            admission = controller()
+            running = admission.check("a")
+            queued = admission.check("b")
+            assert running.admitted and not queued.admitted
+
+            waiter = asyncio.create_task(collect(queued))
+            await asyncio.sleep(0.01)
+            running.release()
+            events = await asyncio.wait_for(waiter, timeout=2)
+
+            assert events[0]["type"] == "queued"
+            assert events[0]["position"] == 1
+            assert events[0]["eta_seconds"] > 0
+            assert queued.admitted
+            assert admission.get_stats()["running"] == 1
+            queued.release()
+            assert admission.get_stats()["running"] == 0
+
+        asyncio.run(scenario())
+
+    def test_queue_timeout_frees_position(self):
+        async def scenario():
+            admission = controller(queue_timeout=0.1)
+            admission.check("a")
+            queued = admission.check("b")
+
+            with pytest.raises(Overloaded) as exc:
+                await collect(queued)
+            assert exc.value.code == "queue_timeout"
+            assert admission.get_stats()["queued"] == 0
+
+        asyncio.run(scenario())
+
+    def test_release_before_start_leaves_queue(self):
+        admission = controller()
+        admission.check("a")
+        queued = admission.check("b")
+
+        queued.release()  # client disconnected while queued
+        queued.release()
+        assert admission.get_stats()["queued"] == 0
+
+
+class TestModelLimiter:
+    def test_slots_per_model(self):
+        limiter = ModelLimiter(limits={"lite": 1}, default=2, timeout=0.05)
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with limiter.slot("lite"):
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait(5)
+        try:
+            with pytest.raises(Overloaded) as exc:
+                with limiter.slot("lite"):
+                    pass
+            assert exc.value.code == "model_busy"
+
+            # Other model has its own slots
+            with limiter.slot("flash"):
+                pass
+        finally:
+            release.set()
+            thread.join()
+
+        with limiter.slot("lite"):
+            pass
+
+
+class TestChatStream:
+    """The sync graph runs off the event loop — admission sees concurrent streams."""
+
+    def _stream(self, monkeypatch, admission, stream_sse):
+        import api
+        from agent.trading_graph import trading_graph
+
+        monkeypatch.setattr(api, "get_admission", lambda: admission)
+        monkeypatch.setattr(api, "get_or_create_chat_session", lambda user_id, chat_id: ("chat-1", None))
+        monkeypatch.setattr(api, "check_needs_title", lambda chat_id: False)
+        monkeypatch.setattr(api, "get_clarification_state", lambda chat_id, user_id: None)
+        monkeypatch.setattr(trading_graph, "stream_sse", stream_sse)
+
+        async def run(user_id: str) -> list[str]:
+            response = await api.chat_stream(api.ChatRequest(message="hi"), user_id=user_id)
+            return [chunk async for chunk in response.body_iterator]
+
+        return run
+
+    def test_two_streams_run_concurrently(self, monkeypatch):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def stream_sse(**kwargs):
+            barrier.wait()  # Both graphs must be running at once
+            yield {"type": "done"}
+
+        run = self._stream(monkeypatch, controller(max_concurrent=2), stream_sse)
+
+        async def main():
+            return await asyncio.gather(run("user-1"), run("user-2"))
+
+        for chunks in asyncio.run(main()):
+            assert '"done"' in chunks[0]
+
+    def test_queued_stream_gets_events_while_graph_runs(self, monkeypatch):
+        release = threading.Event()
+
+        def stream_sse(**kwargs):
+            release.wait(5)
+            yield {"type": "done"}
+
+        run = self._stream(monkeypatch, controller(max_concurrent=1), stream_sse)
+
+        async def main():
+            first = asyncio.create_task(run("user-1"))
+            await asyncio.sleep(0.05)
+            second = asyncio.create_task(run("user-2"))
+            await asyncio.sleep(0.2)  # First graph still running: loop must stay free
+            queued_while_blocked = not second.done()
+            release.set()
+            return queued_while_blocked, await first, await second
+
+        queued_while_blocked, first, second = asyncio.run(main())
+
+        assert queued_while_blocked
+        assert '"queued"' in second[0]
+        assert '"done"' in first[0] and any('"done"' in chunk for chunk in second)
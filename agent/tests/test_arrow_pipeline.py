@@ -0,0 +1,112 @@
+"""Tests for the Arrow data path (enrich_arrow, executor selection masks)."""
+
+import math
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from agent.agents.executor import _Selection, _apply_where_filters
+from agent.data.enrich import enrich, enrich_arrow
+
+
+@pytest.fixture
+def minute_table():
+    return pa.table({
+        "timestamp": pd.to_datetime(["2024-01-02 09:29", "2024-01-02 09:30", "2024-01-02 09:31", "2024-01-02 09:32"]),
+        "open": [100.0, 101.0, 99.0, 100.0],
+        "high": [102.0, 103.0, 101.0, 102.0],
+        "low": [99.0, 98.0, 97.0, 99.5],
+        "close": [101.0, 100.0, 100.5, 101.5],
+        "volume": [10, 20, 30, 40],
+    })
+
+
+class TestEnrichArrow:
+    def test_columns(self, minute_table):
+        table = enrich_arrow(minute_table)
+        rows = table.to_pylist()
+
+        assert rows[0]["change"] == pytest.approx(1.0)
+        assert rows[0]["gap"] is None
+        assert rows[1]["gap"] == pytest.approx(0.0)
+        assert [r["is_green"] for r in rows] == [True, False, True, True]
+        assert [r["prev_change"] is None for r in rows] == [True, False, False, False]
+        assert rows[-1]["next_change"] is None
+        assert [r["time"] for r in rows] == ["09:29", "09:30", "09:31", "09:32"]
+        assert rows[0]["weekday"] == 1 and rows[0]["month"] == 1 and rows[0]["year"] == 2024
+
+    def test_gap_filled(self, minute_table):
+        # 09:30 opens at prev close (no gap); 09:31 and 09:32 gap down and trade back to prev close
+        rows = enrich_arrow(minute_table).to_pylist()
+        assert [r["gap_filled"] for r in rows] == [False, False, True, True]
+
+    def test_ohlcv_buffers_shared(self, minute_table):
+        table = enrich_arrow(minute_table)
+
+        for name in ("open", "high", "low", "close", "volume"):
+            before = minute_table.column(name).chunk(0).buffers()[1]
+            after = table.column(name).chunk(0).buffers()[1]
+            assert after.address == before.address
+
+    def test_pandas_wrapper_matches(self, minute_table):
+        df = enrich(minute_table.to_pandas())
+
+        assert math.isnan(df["gap"].iloc[0])
+        assert df["weekday"].dtype == "int32"
+        assert df["is_green"].tolist() == [True, False, True, True]
+
+    def test_integer_prices(self):
+        df = enrich(pd.DataFrame({
+            "date": pd.to_datetime(["2024-01-02", "2024-01-03"]),
+            "open": [100, 100], "high": [102, 104], "low": [99, 99], "close": [101, 103], "volume": [1, 1],
+        }))
+
+        assert df["change"].tolist() == pytest.approx([1.0, 3.0])
+        assert df["gap"].iloc[1] == pytest.approx(-100 / 101)
+        assert df["is_green"].tolist() == [True, True]
+        assert df["change"].dtype == "float64"
+
+    def test_daily_dates(self):
+        table = pa.table({
+            "date": pa.array([pd.Timestamp("2024-01-05").date()], type=pa.date32()),
+            "open": [1.0], "high": [2.0], "low": [0.5], "close": [1.5], "volume": [1.0],
+        })
+        enriched = enrich_arrow(table)
+
+        assert "time" not in enriched.column_names
+        assert enriched.column("weekday").to_pylist() == [4]
+
+
+class TestSelection:
+    def test_filters_combine_into_one_mask(self, minute_table):
+        selection = _Selection(enrich_arrow(minute_table))
+        _apply_where_filters(selection, [
+            {"type": "time", "op": ">=", "value": "09:30"},
+            {"type": "comparison", "metric": "change", "op": ">", "value": 0},
+        ], "NQ")
+
+        assert len(selection) == 2
+        assert selection.table.num_rows == 4  # not copied until materialize
+        assert selection.materialize().column("time").to_pylist() == ["09:31", "09:32"]
+
+    def test_null_comparison_not_selected(self, minute_table):
+        selection = _Selection(enrich_arrow(minute_table))
+        _apply_where_filters(selection, [{"type": "comparison", "metric": "gap", "op": "<", "value": 1}], "NQ")
+
+        assert selection.materialize().column("time").to_pylist() == ["09:30", "09:31", "09:32"]
+
+    def test_consecutive_runs_over_selected_rows(self, minute_table):
+        selection = _Selection(enrich_arrow(minute_table))
+        _apply_where_filters(selection, [
+            {"type": "time", "op": ">=", "value": "09:30"},
+            {"type": "consecutive", "color": "green", "op": ">=", "length": 2},
+        ], "NQ")
+
+        assert selection.materialize().column("time").to_pylist() == ["09:31", "09:32"]
+
+    def test_unknown_filter_keeps_rows(self, minute_table):
+        selection = _Selection(enrich_arrow(minute_table))
+        _apply_where_filters(selection, [{"type": "pattern", "pattern": "doji"}], "NQ")
+
+        assert len(selection) == 4
@@ -0,0 +1,76 @@
+"""Tests for batched multi-symbol bar loading (get_bars_multi)."""
+
+import math
+
+import pytest
+
+import config
+from agent.config.market import instruments
+from agent.data import get_bars_multi
+from agent.data.bars import get_bars
+from data.ingest import ingest_csv
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+BARS = (
+    "2024-11-26 18:30:00,10,11,9,10.5,1\n"
+    "2024-11-27 10:00:00,20,22,19,21,2\n"
+    "2024-11-28 10:00:00,30,31,29,30.5,3\n"   # Thanksgiving: NQ closed
+    "2024-11-29 10:00:00,40,41,39,40.5,4\n"
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    # ES: trading day starts at 19:00, no holiday calendar
+    es = {**instruments.INSTRUMENTS["NQ"], "trading_day": {"start": "19:00", "end": "17:00"}, "holidays": {}}
+    monkeypatch.setitem(instruments.INSTRUMENTS, "ES", es)
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+    ingest_csv(tmp_path / "bars.csv", "ES", progress=None)
+
+
+def _dates(df, symbol):
+    return df[df["symbol"] == symbol]["date"].astype(str).tolist()
+
+
+class TestBarsMulti:
+    def test_own_trading_day_boundaries(self, db):
+        df = get_bars_multi(["NQ", "ES"], "2024", "1D", how="outer")
+
+        # 18:30 bar: next trading day for NQ (18:00), same day for ES (19:00)
+        assert _dates(df, "NQ") == ["2024-11-27", "2024-11-29"]
+        assert _dates(df, "ES") == ["2024-11-26", "2024-11-27", "2024-11-28", "2024-11-29"]
+
+    def test_same_bars_as_get_bars(self, db):
+        df = get_bars_multi(["NQ", "ES"], "2024", "1D", how="outer")
+
+        for symbol in ("NQ", "ES"):
+            rows = df[df["symbol"] == symbol].drop(columns="symbol").reset_index(drop=True)
+            assert rows.to_dict("records") == get_bars(symbol, "2024", "1D").to_dict("records")
+
+    def test_inner_intersects_calendars(self, db):
+        df = get_bars_multi(["NQ", "ES"], "2024", "1D")
+
+        assert df["date"].astype(str).tolist() == ["2024-11-27"] * 2 + ["2024-11-29"] * 2
+        assert df["symbol"].tolist() == ["NQ", "ES", "NQ", "ES"]
+
+    def test_wide(self, db):
+        df = get_bars_multi(["NQ", "ES"], "2024", "1D", wide=True, how="outer")
+
+        assert list(df.columns[:3]) == ["date", "NQ_open", "NQ_high"]
+        assert df["date"].astype(str).tolist() == ["2024-11-26", "2024-11-27", "2024-11-28", "2024-11-29"]
+        assert df["ES_volume"].tolist() == [1, 2, 3, 4]
+        assert math.isnan(df["NQ_close"].iloc[0]) and df["NQ_close"].iloc[1] == 21
+
+    def test_intraday_key(self, db):
+        df = get_bars_multi(["NQ", "ES"], "2024", "1H", wide=True)
+
+        assert len(df) == 4 and "timestamp" in df.columns
+
+    def test_invalid_arguments(self, db):
+        with pytest.raises(ValueError):
+            get_bars_multi([], "2024")
+        with pytest.raises(ValueError):
+            get_bars_multi(["NQ"], "2024", how="left")
@@ -0,0 +1,242 @@
+"""Tests for shared Gemini cache registry and CacheManager reuse across workers."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent.memory.cache import CacheManager
+from agent.memory.cache_registry import CacheRegistry
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    return tmp_path / "gemini_caches.sqlite"
+
+
+def _manager(registry_path) -> CacheManager:
+    """CacheManager with mocked Gemini client (one per simulated worker)."""
+    with patch("agent.memory.cache.genai.Client"):
+        manager = CacheManager(model="model-a", registry=CacheRegistry(registry_path))
+    manager._ensure_refresher = MagicMock()
+    return manager
+
+
+class TestCacheRegistry:
+    """Atomic create-or-reuse across registry instances."""
+
+    def test_reuse_across_instances(self, registry_path):
+        create = MagicMock(return_value=("cachedContents/1", time.time() + 3600))
+
+        first = CacheRegistry(registry_path).create_or_reuse("k", create, ttl_seconds=3600)
+        second = CacheRegistry(registry_path).create_or_reuse("k", create, ttl_seconds=3600)
+
+        assert first.name == second.name == "cachedContents/1"
+        create.assert_called_once()
+
+    def test_expiring_entry_is_replaced(self, registry_path):
+        registry = CacheRegistry(registry_path)
+        registry.create_or_reuse("k", lambda: ("old", time.time() + 60), ttl_seconds=60)
+
+        entry = registry.create_or_reuse("k", lambda: ("new", time.time() + 3600), ttl_seconds=3600)
+
+        assert entry.name == "new"
+        assert registry.names() == {"new"}
+
+    def test_failed_create_registers_nothing(self, registry_path):
+        registry = CacheRegistry(registry_path)
+
+        def fail():
+            raise RuntimeError("quota")
+
+        with pytest.raises(RuntimeError):
+            registry.create_or_reuse("k", fail, ttl_seconds=3600)
+        assert registry.get("k") is None
+
+    def test_slow_create_blocks_only_its_key(self, registry_path):
+        creating, release = threading.Event(), threading.Event()
+
+        def slow():
+            creating.set()
+            release.wait(5)
+            return "cachedContents/slow", time.time() + 3600
+
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(CacheRegistry(registry_path).create_or_reuse, "k", slow, ttl_seconds=3600)
+            assert creating.wait(5)
+
+            # Other keys are created while "k" is in flight
+            other = CacheRegistry(registry_path).create_or_reuse(
+                "other", lambda: ("cachedContents/other", time.time() + 3600), ttl_seconds=3600,
+            )
+            assert other.name == "cachedContents/other"
+
+            # Same key waits for the creator and reuses its cache
+            create = MagicMock()
+            second = pool.submit(CacheRegistry(registry_path).create_or_reuse, "k", create, ttl_seconds=3600)
+            release.set()
+            assert first.result().name == second.result().name == "cachedContents/slow"
+            create.assert_not_called()
+
+    def test_wait_for_other_worker_is_bounded(self, registry_path):
+        creating, release = threading.Event(), threading.Event()
+
+        def hung():
+            creating.set()
+            release.wait(5)
+            return "cachedContents/slow", time.time() + 3600
+
+        with ThreadPoolExecutor(1) as pool:
+            first = pool.submit(CacheRegistry(registry_path).create_or_reuse, "k", hung, ttl_seconds=3600)
+            assert creating.wait(5)
+
+            waiter = CacheRegistry(registry_path, wait_timeout=0.2)
+            started = time.monotonic()
+            assert waiter.create_or_reuse("k", MagicMock(), ttl_seconds=3600) is None
+            assert time.monotonic() - started < 2
+
+            release.set()
+            first.result()
+        assert waiter.create_or_reuse("k", MagicMock(), ttl_seconds=3600).name == "cachedContents/slow"
+
+    def test_dead_claim_taken_over(self, registry_path):
+        dead = CacheRegistry(registry_path)
+        with dead._write_lock() as conn:  # Worker died after claiming "k"
+            conn.execute(
+                "INSERT INTO gemini_cache_claims (key, owner_pid, claimed_at) VALUES (?, ?, ?)",
+                ("k", 0, time.time() - 10),
+            )
+
+        registry = CacheRegistry(registry_path, claim_timeout=5)
+        entry = registry.create_or_reuse("k", lambda: ("cachedContents/new", time.time() + 3600), ttl_seconds=3600)
+
+        assert entry.name == "cachedContents/new"
+
+    def test_failed_create_releases_claim(self, registry_path):
+        registry = CacheRegistry(registry_path)
+
+        with pytest.raises(RuntimeError):
+            registry.create_or_reuse("k", MagicMock(side_effect=RuntimeError("quota")), ttl_seconds=3600)
+        entry = registry.create_or_reuse("k", lambda: ("cachedContents/2", time.time() + 3600), ttl_seconds=3600)
+
+        assert entry.name == "cachedContents/2"
+
+    def test_due_for_refresh_only_used(self, registry_path):
+        registry = CacheRegistry(registry_path)
+        now = time.time()
+        registry.create_or_reuse("used", lambda: ("a", now + 400), ttl_seconds=3600, min_remaining=0)
+        registry.create_or_reuse("far", lambda: ("b", now + 3000), ttl_seconds=3600)
+
+        due = registry.due_for_refresh(within=600, used_since=now - 60)
+
+        assert [e.key for e in due] == ["used"]
+
+    def test_purge_expired(self, registry_path):
+        registry = CacheRegistry(registry_path)
+        registry.create_or_reuse("gone", lambda: ("a", time.time() - 1), ttl_seconds=1, min_remaining=0)
+
+        purged = registry.purge_expired()
+
+        assert [e.name for e in purged] == ["a"]
+        assert registry.get("gone") is None
+
+
+class TestCacheManagerShared:
+    """Two workers share one cache per content key."""
+
+    def test_second_worker_reuses_cache(self, registry_path):
+        worker1, worker2 = _manager(registry_path), _manager(registry_path)
+        worker1.client.caches.create.return_value = SimpleNamespace(name="cachedContents/1")
+
+        assert worker1.get_or_create("parser:abc", "prompt") == "cachedContents/1"
+        assert worker2.get_or_create("parser:abc", "prompt") == "cachedContents/1"
+
+        worker2.client.caches.create.assert_not_called()
+
+    def test_inline_prompt_while_other_worker_creates(self, registry_path):
+        worker1, worker2 = _manager(registry_path), _manager(registry_path)
+        worker2.registry.wait_timeout = 0.1
+        creating, release = threading.Event(), threading.Event()
+
+        def slow_create(**kwargs):
+            creating.set()
+            release.wait(5)
+            return SimpleNamespace(name="cachedContents/1")
+
+        worker1.client.caches.create.side_effect = slow_create
+        with ThreadPoolExecutor(1) as pool:
+            first = pool.submit(worker1.get_or_create, "k", "prompt")
+            assert creating.wait(5)
+
+            assert worker2.get_or_create("k", "prompt") is None  # No cache, no stall
+            release.set()
+            assert first.result() == "cachedContents/1"
+
+        # Not treated as a failure: picked up as soon as it's registered
+        assert worker2.get_or_create("k", "prompt") == "cachedContents/1"
+        worker2.client.caches.create.assert_not_called()
+
+    def test_failure_backs_off(self, registry_path):
+        worker = _manager(registry_path)
+        worker.client.caches.create.side_effect = RuntimeError("too few tokens")
+
+        assert worker.get_or_create("k", "short") is None
+        assert worker.get_or_create("k", "short") is None
+
+        worker.client.caches.create.assert_called_once()
+
+    def test_refresh_extends_ttl(self, registry_path):
+        worker = _manager(registry_path)
+        worker.registry.create_or_reuse(
+            "model-a:k", lambda: ("cachedContents/1", time.time() + 120), ttl_seconds=3600, min_remaining=0,
+        )
+
+        assert worker.refresh_expiring() == 1
+
+        worker.client.caches.update.assert_called_once()
+        assert worker.registry.get("model-a:k").expires_in > 3000
+
+    def test_cleanup_deletes_only_old_unregistered_own_caches(self, registry_path):
+        worker = _manager(registry_path)
+        worker.registry.create_or_reuse(
+            "model-a:k", lambda: ("registered", time.time() + 3600), ttl_seconds=3600,
+        )
+        old = datetime.now(timezone.utc) - timedelta(hours=1)
+        worker.client.caches.list.return_value = [
+            SimpleNamespace(name="registered", display_name="trading-agent:model-a:k", create_time=old),
+            SimpleNamespace(name="orphan", display_name="trading-agent:model-a:x", create_time=old),
+            SimpleNamespace(name="fresh", display_name="trading-agent:model-a:y",
+                            create_time=datetime.now(timezone.utc)),
+            SimpleNamespace(name="foreign", display_name="other-app", create_time=old),
+        ]
+
+        assert worker.cleanup_orphans() == 1
+        worker.client.caches.delete.assert_called_once_with(name="orphan")
+
+    def test_slow_create_does_not_block_ready_caches(self, registry_path):
+        worker = _manager(registry_path)
+        worker.client.caches.create.return_value = SimpleNamespace(name="cachedContents/ready")
+        assert worker.get_or_create("ready", "prompt") == "cachedContents/ready"
+
+        creating, release = threading.Event(), threading.Event()
+
+        def slow_create(**kwargs):
+            creating.set()
+            release.wait(5)
+            return SimpleNamespace(name="cachedContents/slow")
+
+        worker.client.caches.create.side_effect = slow_create
+        with ThreadPoolExecutor(3) as pool:
+            slow = [pool.submit(worker.get_or_create, "slow", "prompt") for _ in range(2)]
+            assert creating.wait(5)
+
+            assert worker.get_or_create("ready", "prompt") == "cachedContents/ready"
+            release.set()
+            assert [f.result() for f in slow] == ["cachedContents/slow"] * 2
+
+        # One create for "ready", one for both "slow" callers
+        assert worker.client.caches.create.call_count == 2
@@ -0,0 +1,112 @@
+"""Tests for per-chat clarification checkpoints."""
+
+from unittest.mock import patch
+
+import pytest
+
+from agent.memory.checkpoints import ChatCheckpoints, strip_rows
+
+
+@pytest.fixture
+def checkpoints():
+    return ChatCheckpoints(None)
+
+
+def clarify_state(**overrides) -> dict:
+    state = {
+        "user_id": "u1",
+        "request_id": "r1",
+        "route": "clarify",
+        "lang": "en",
+        "awaiting_clarification": True,
+        "original_question": "how did NQ do",
+        "clarification_history": [{"role": "assistant", "content": "Which period?"}],
+        "messages": ["not persisted"],
+        "response": "Which period?",
+    }
+    state.update(overrides)
+    return state
+
+
+class TestChatCheckpoints:
+    def test_roundtrip(self, checkpoints):
+        checkpoints.save("chat-1", clarify_state())
+        state = checkpoints.load("chat-1", "u1")
+
+        assert state["awaiting_clarification"] is True
+        assert state["original_question"] == "how did NQ do"
+        assert state["clarification_history"][0]["content"] == "Which period?"
+        # Per-request fields are not carried over
+        assert "messages" not in state
+        assert "response" not in state
+
+    def test_unknown_chat(self, checkpoints):
+        assert checkpoints.load("missing") is None
+
+    def test_other_user_gets_nothing(self, checkpoints):
+        checkpoints.save("chat-1", clarify_state())
+        assert checkpoints.load("chat-1", "u2") is None
+
+    def test_only_latest_checkpoint_kept(self, checkpoints):
+        checkpoints.save("chat-1", clarify_state())
+        checkpoints.save("chat-1", clarify_state(request_id="r2", route="data", awaiting_clarification=False))
+
+        config = checkpoints._config("chat-1")
+        assert len(list(checkpoints.saver.list(config))) == 1
+        state = checkpoints.load("chat-1", "u1")
+        assert state["request_id"] == "r2"
+        assert state["awaiting_clarification"] is False
+
+    def test_chats_isolated(self, checkpoints):
+        checkpoints.save("chat-1", clarify_state())
+        checkpoints.save("chat-2", clarify_state(original_question="volume of ES"))
+        checkpoints.delete("chat-1")
+
+        assert checkpoints.load("chat-1") is None
+        assert checkpoints.load("chat-2")["original_question"] == "volume of ES"
+
+    def test_rows_stripped(self, checkpoints):
+        data = [{"step_id": "s1", "summary": {"count": 2}, "rows": [{"close": 1}, {"close": 2}], "timings": {"total_ms": 5}}]
+        checkpoints.save("chat-1", clarify_state(data=data))
+
+        saved = checkpoints.load("chat-1")["data"]
+        assert saved == [{"step_id": "s1", "summary": {"count": 2}, "row_count": 2}]
+        assert data[0]["rows"]  # caller's state untouched
+
+    def test_strip_rows_handles_none(self):
+        assert strip_rows(None) == []
+
+
+class TestClarificationState:
+    """api.get_clarification_state reads checkpoints before Supabase."""
+
+    def test_checkpoint_answers_without_supabase_queries(self, checkpoints):
+        import api
+
+        checkpoints.save("chat-1", clarify_state())
+        supabase = object()  # any table() call would fail
+        with patch.object(api, "get_supabase", return_value=supabase), \
+             patch.object(api, "get_chat_checkpoints", return_value=checkpoints):
+            state = api.get_clarification_state("chat-1", "u1")
+
+        assert state == {
+            "awaiting_clarification": True,
+            "original_question": "how did NQ do",
+            "clarification_history": [{"role": "assistant", "content": "Which period?"}],
+        }
+
+    def test_answered_clarification_not_awaiting(self, checkpoints):
+        import api
+
+        checkpoints.save("chat-1", clarify_state(route="data", awaiting_clarification=False))
+        with patch.object(api, "get_supabase", return_value=object()), \
+             patch.object(api, "get_chat_checkpoints", return_value=checkpoints):
+            assert api.get_clarification_state("chat-1", "u1") is None
+
+    def test_shared_default_chat_ignored(self, checkpoints):
+        import api
+
+        checkpoints.save("default", clarify_state())
+        with patch.object(api, "get_supabase", return_value=None), \
+             patch.object(api, "get_chat_checkpoints", return_value=checkpoints):
+            assert api.get_clarification_state("default", "u1") is None
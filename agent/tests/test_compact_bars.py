@@ -0,0 +1,95 @@
+"""Tests for the compact in-memory bar schema (get_bars/enrich compact=True)."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from agent.agents import executor
+from agent.agents.planner import DataRequest, ExecutionPlan
+from agent.data import enrich, get_bars
+from data.ingest import ingest_csv
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+BARS = (
+    "2024-01-02 09:29:00,16800.25,16801.0,16799.5,16800.75,120\n"
+    "2024-01-02 09:30:00,16800.75,16810.5,16795.0,16809.25,3400\n"
+    "2024-01-02 09:31:00,16809.25,16812.0,16805.75,16806.0,2100\n"
+    "2024-01-03 09:30:00,16750.5,16760.0,16740.25,16755.1000001,1800\n"
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+
+
+class TestCompactBars:
+    def test_dtypes(self, db):
+        df = get_bars("NQ", "2024", "1m", compact=True)
+
+        assert {str(df[c].dtype) for c in ("open", "high", "low", "close")} == {"float32"}
+        assert df["volume"].dtype == np.uint32
+
+    def test_prices_on_tick_grid(self, db):
+        full = get_bars("NQ", "2024", "1m", compact=False)
+        compact = get_bars("NQ", "2024", "1m", compact=True)
+
+        # Tick prices are exact in float32; off-grid noise is snapped to 0.25
+        assert compact["close"].tolist() == [16800.75, 16809.25, 16806.0, 16755.0]
+        assert compact["open"].tolist() == full["open"].tolist()
+        assert compact["volume"].tolist() == full["volume"].tolist()
+
+    def test_aggregates(self, db):
+        full = get_bars("NQ", "2024", "1D", compact=False)
+        compact = get_bars("NQ", "2024", "1D", compact=True)
+
+        assert compact["date"].tolist() == full["date"].tolist()
+        assert compact["volume"].tolist() == [5620, 1800]
+
+    def test_default_from_config(self, db, monkeypatch):
+        monkeypatch.setattr(config, "BARS_COMPACT", True)
+        assert get_bars("NQ", "2024", "5m")["close"].dtype == np.float32
+
+
+class TestCompactEnrich:
+    def test_dtypes(self, db):
+        df = enrich(get_bars("NQ", "2024", "1m", compact=True))
+
+        assert df["change"].dtype == np.float32
+        assert (df["weekday"].dtype, df["month"].dtype, df["year"].dtype) == (np.int8, np.int8, np.int16)
+        assert isinstance(df["time"].dtype, pd.CategoricalDtype) and df["time"].cat.ordered
+        assert df["time"].tolist() == ["09:29", "09:30", "09:31", "09:30"]
+
+    def test_within_tolerance(self, db):
+        full = enrich(get_bars("NQ", "2024", "1m", compact=False))
+        compact = enrich(get_bars("NQ", "2024", "1m", compact=True))
+
+        for col in ("change", "gap", "range", "prev_change"):
+            np.testing.assert_allclose(compact[col].iloc[:3], full[col].iloc[:3], rtol=1e-6, atol=1e-6)
+        assert compact["is_green"].tolist() == full["is_green"].tolist()
+
+    def test_session_filter_on_categorical_time(self, db):
+        df = enrich(get_bars("NQ", "2024", "1m", compact=True))
+        assert executor._apply_session_filter(df, "RTH", "NQ")["time"].tolist() == ["09:30", "09:31", "09:30"]
+
+    def test_results_are_json_floats(self, db, monkeypatch):
+        monkeypatch.setattr(config, "BARS_COMPACT", True)
+        plan = ExecutionPlan(
+            mode="single",
+            operation="count",
+            requests=[DataRequest(period=("2024-01-01", "2024-02-01"), timeframe="1m",
+                                  filters=["time >= 09:30"], label="2024")],
+            metrics=["change"],
+        )
+
+        result = executor.execute_plan(plan)
+
+        assert result["summary"]["count"] == 3
+        assert type(result["summary"]["avg"]) is float
+        json.dumps(result)
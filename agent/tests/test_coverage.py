@@ -0,0 +1,168 @@
+"""Tests for the per-day bar coverage index (data/coverage.py)."""
+
+from datetime import date
+
+import duckdb
+import pytest
+
+import config
+from agent.agents import executor
+from agent.agents.planner import DataRequest, ExecutionPlan
+from agent.modules.sql import get_data_range
+from data.coverage import coverage_summary, partial_days, rebuild_coverage, window_minutes
+from data.database import get_connection, init_database
+from data.ingest import append_csv, ingest_csv
+from data.loader import get_data_info
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+
+
+def _minutes(day: str, start: str, end: str, price: float = 100.0) -> str:
+    """One bar per minute in [start, end) of day (HH:MM, same calendar day)."""
+    h, m = map(int, start.split(":"))
+    end_h, end_m = map(int, end.split(":"))
+    rows = []
+    while (h, m) < (end_h, end_m):
+        rows.append(f"{day} {h:02d}:{m:02d}:00,{price},{price + 1},{price - 1},{price},1\n")
+        h, m = (h + 1, 0) if m == 59 else (h, m + 1)
+    return "".join(rows)
+
+
+def _full_day(previous: str, day: str, close: str = "17:00", price: float = 100.0) -> str:
+    """NQ trading day: previous evening 18:00 to close."""
+    return _minutes(previous, "18:00", "24:00", price) + _minutes(day, "00:00", close, price)
+
+
+# 11-26 full, 11-27 RTH gap after 12:00, 11-29 early close (13:15) in full
+BARS = (
+    _full_day("2024-11-25", "2024-11-26", price=100)
+    + _minutes("2024-11-26", "18:00", "24:00", 110)
+    + _minutes("2024-11-27", "00:00", "12:00", 110)
+    + _full_day("2024-11-28", "2024-11-29", close="13:15", price=120)
+)
+
+
+def _rows(symbol: str = "NQ") -> dict:
+    with get_connection(read_only=True) as conn:
+        rows = conn.execute(
+            "SELECT date, bars, expected_bars, session_bars, expected_session_bars, partial "
+            "FROM bar_coverage WHERE symbol = ? ORDER BY date", [symbol]
+        ).fetchall()
+    return {str(d): tuple(rest) for d, *rest in rows}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    monkeypatch.setattr(config, "COVERAGE_EXCLUDE_PARTIAL", False)
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+    return tmp_path
+
+
+class TestWindowMinutes:
+    def test_regular(self):
+        assert window_minutes("09:30", "17:00") == 450
+        assert window_minutes("09:30", "17:00", "13:15") == 225
+        assert window_minutes("16:00", "17:00", "13:15") == 0
+
+    def test_cross_midnight_cut_on_trading_date(self):
+        assert window_minutes("18:00", "17:00") == 1380
+        assert window_minutes("18:00", "17:00", "13:15") == 1155
+
+
+class TestCoverageIndex:
+    def test_expected_vs_actual(self, db):
+        rows = _rows()
+
+        assert rows["2024-11-26"] == (1380, 1380, 450, 450, False)
+        assert rows["2024-11-27"] == (1080, 1380, 150, 450, True)
+        assert rows["2024-11-29"] == (1155, 1155, 225, 225, False)  # early close
+        assert "2024-11-28" not in rows  # Thanksgiving: no bars
+
+    def test_partial_days(self, db):
+        assert partial_days("NQ", "2024-01-01", "2025-01-01") == [date(2024, 11, 27)]
+        assert partial_days("NQ", "2024-11-28", "2025-01-01") == []
+        assert partial_days("ES") == []
+
+    def test_ingest_updates_affected_days(self, db):
+        # Gap filled later (not incremental: older than the watermark)
+        (db / "rest.csv").write_text(HEADER + _minutes("2024-11-27", "12:00", "17:00", 110))
+        stats = ingest_csv(db / "rest.csv", "NQ", progress=None)
+
+        assert stats.affected_start == stats.affected_end == date(2024, 11, 27)
+        assert _rows()["2024-11-27"] == (1380, 1380, 450, 450, False)
+        assert partial_days("NQ") == []
+
+    def test_replace_drops_old_days(self, db):
+        (db / "one.csv").write_text(HEADER + _full_day("2024-11-25", "2024-11-26"))
+        ingest_csv(db / "one.csv", "NQ", replace=True, progress=None)
+
+        assert list(_rows()) == ["2024-11-26"]
+
+    def test_summary_and_data_info(self, db):
+        summary = coverage_summary()["NQ"]
+        info = get_data_info().iloc[0]
+
+        assert summary["bars"] == info["bars"] == len(BARS.splitlines())
+        assert summary["trading_days"] == info["trading_days"] == 3
+        assert summary["partial_days"] == 1
+        assert str(info["start_date"]) == "2024-11-25 18:00:00"
+        assert get_data_range("NQ") == {
+            "symbol": "NQ", "start_date": "2024-11-25", "end_date": "2024-11-29", "trading_days": 3,
+        }
+
+    def test_backfilled_when_index_is_created(self, db):
+        with duckdb.connect(config.DATABASE_PATH) as conn:
+            conn.execute("DROP TABLE bar_coverage")
+        assert get_data_info().iloc[0]["bars"] == len(BARS.splitlines())  # Fallback scan
+
+        init_database()
+        assert partial_days("NQ") == [date(2024, 11, 27)]
+
+    def test_append(self, db):
+        (db / "next.csv").write_text(HEADER + _full_day("2024-11-29", "2024-12-02", close="09:00"))
+        append_csv(db / "next.csv", "NQ", progress=None)
+
+        assert partial_days("NQ") == [date(2024, 11, 27), date(2024, 12, 2)]
+
+    def test_rebuild(self, db):
+        with get_connection() as conn:
+            conn.execute("DELETE FROM bar_coverage")
+
+        assert rebuild_coverage() == {"NQ": 3}
+        assert len(_rows()) == 3
+
+
+class TestExecutor:
+    def _plan(self, timeframe: str = "1D"):
+        return ExecutionPlan(
+            mode="single",
+            operation="count",
+            requests=[DataRequest(period=("2024-11-01", "2024-12-01"), timeframe=timeframe,
+                                  filters=[], label="Nov")],
+            metrics=["change"],
+        )
+
+    def test_warns_about_partial_days(self, db):
+        result = executor.execute_plan(self._plan())
+
+        assert result["coverage"] == {"partial_days": ["2024-11-27"], "excluded": False}
+        assert result["summary"]["count"] == 3
+        assert "coverage" in [s["stage"] for s in result["timings"]["stages"]]
+
+    def test_excludes_partial_days(self, db, monkeypatch):
+        monkeypatch.setattr(config, "COVERAGE_EXCLUDE_PARTIAL", True)
+        result = executor.execute_plan(self._plan())
+
+        assert result["coverage"]["excluded"] is True
+        assert result["summary"]["count"] == 2
+        # 1W/1M bars are reported, not filtered by day
+        assert executor.execute_plan(self._plan("1W"))["summary"]["count"] == 1
+
+    def test_complete_data_has_no_coverage_key(self, db):
+        (db / "rest.csv").write_text(HEADER + _minutes("2024-11-27", "12:00", "17:00", 110))
+        ingest_csv(db / "rest.csv", "NQ", progress=None)
+
+        assert "coverage" not in executor.execute_plan(self._plan())
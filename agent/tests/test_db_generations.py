@@ -0,0 +1,135 @@
+"""Tests for DuckDB generations (data/database.py, DB_GENERATIONS)."""
+
+import subprocess
+import sys
+
+import pytest
+
+import config
+from data.database import (
+    current_database,
+    get_connection,
+    init_database,
+    list_database_generations,
+    pin_database,
+)
+from data.ingest import append_csv, ingest_csv
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+BARS = (
+    "2024-01-02 09:30:00,16800.25,16801.0,16799.5,16800.75,120\n"
+    "2024-01-02 09:31:00,16800.75,16810.5,16795.0,16809.25,3400\n"
+)
+
+
+def _update(tmp_path, day: int):
+    path = tmp_path / f"update_{day}.csv"
+    path.write_text(HEADER + f"2024-01-{day:02d} 09:30:00,16600.0,16610.0,16590.0,16605.0,700\n")
+    return path
+
+
+def _count() -> int:
+    with get_connection(read_only=True) as conn:
+        return conn.execute("SELECT COUNT(*) FROM ohlcv_1min").fetchone()[0]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "DB_GENERATIONS_DIR", str(tmp_path / "generations"))
+    monkeypatch.setattr(config, "DB_GENERATIONS", True)
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+    return tmp_path
+
+
+class TestGenerations:
+    def test_ingest_publishes_generation(self, db):
+        current = current_database()
+
+        assert current.startswith(str(db / "generations" / "g")) and current.endswith(".duckdb")
+        assert list_database_generations() == [current]
+        assert _count() == 2
+        assert not (db / "test.duckdb").exists()
+
+    def test_open_reader_does_not_block_ingest(self, db):
+        reader = get_connection(read_only=True)
+        append_csv(_update(db, 3), "NQ", progress=None)
+
+        # Open connection keeps its generation, new connections see the new one
+        assert reader.execute("SELECT COUNT(*) FROM ohlcv_1min").fetchone()[0] == 2
+        assert _count() == 3
+        reader.close()
+
+    def test_reader_in_other_process(self, db):
+        code = (
+            "import duckdb, sys, time\n"
+            "conn = duckdb.connect(sys.argv[1], read_only=True)\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(30)\n"
+        )
+        child = subprocess.Popen([sys.executable, "-c", code, current_database()],
+                                 stdout=subprocess.PIPE, text=True)
+        try:
+            assert child.stdout.readline().strip() == "ready"
+            stats = append_csv(_update(db, 3), "NQ", progress=None)
+        finally:
+            child.kill()
+            child.wait()
+
+        assert stats.rows_inserted == 1
+        assert _count() == 3
+
+    def test_pinned_request_keeps_generation(self, db):
+        with pin_database() as pinned:
+            append_csv(_update(db, 3), "NQ", progress=None)
+            assert current_database() == pinned
+            assert _count() == 2
+        assert _count() == 3
+
+    def test_old_generations_removed(self, db, monkeypatch):
+        monkeypatch.setattr(config, "DB_KEEP_GENERATIONS", 2)
+        for day in (3, 4, 5):
+            append_csv(_update(db, day), "NQ", progress=None)
+
+        generations = list_database_generations()
+        assert len(generations) == 2 and generations[-1] == current_database()
+        assert sorted(p.name for p in (db / "generations").iterdir()) == sorted(
+            ["CURRENT", "LOCK", *(g.rsplit("/", 1)[-1] for g in generations)]
+        )
+
+    def test_failed_ingest_not_published(self, db):
+        before = current_database()
+        bad = db / "bad.csv"
+        bad.write_text(HEADER + "not a timestamp,1,2,3,4,5\n")
+
+        with pytest.raises(Exception):
+            append_csv(bad, "NQ", progress=None)
+
+        assert current_database() == before
+        assert not list((db / "generations").glob("*.tmp*"))
+
+    def test_init_is_noop_when_schema_exists(self, db):
+        before = current_database()
+        init_database()
+        assert current_database() == before
+
+    def test_bootstrap_from_database_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+        monkeypatch.setattr(config, "DB_GENERATIONS_DIR", str(tmp_path / "generations"))
+        monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+        (tmp_path / "bars.csv").write_text(HEADER + BARS)
+        ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+
+        monkeypatch.setattr(config, "DB_GENERATIONS", True)
+        assert current_database() == str(tmp_path / "test.duckdb")
+        append_csv(_update(tmp_path, 3), "NQ", progress=None)
+
+        assert current_database() != str(tmp_path / "test.duckdb")
+        assert _count() == 3
+
+    def test_disabled_writes_in_place(self, db, monkeypatch):
+        monkeypatch.setattr(config, "DB_GENERATIONS", False)
+        assert current_database() == config.DATABASE_PATH
+        assert current_database("other.duckdb") == "other.duckdb"
@@ -0,0 +1,113 @@
+"""Tests for executor per-stage timings and sampled profiling."""
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from agent.agents import executor
+from agent.agents.planner import DataRequest, ExecutionPlan
+from agent.data.profiling import maybe_profile, stage, stage_timer
+
+
+def _daily_bars(n: int = 30) -> pd.DataFrame:
+    dates = pd.bdate_range("2024-01-02", periods=n)
+    close = [100.0 + i for i in range(n)]
+    return pd.DataFrame({
+        "date": dates.date,
+        "open": [c - 0.5 for c in close],
+        "high": [c + 1.0 for c in close],
+        "low": [c - 1.0 for c in close],
+        "close": close,
+        "volume": [1000] * n,
+    })
+
+
+class TestStageTimer:
+    """Stages record into the active timer only."""
+
+    def test_no_timer_is_noop(self):
+        with stage("duckdb") as s:
+            s.done(rows=5)
+        assert s.rows_out == 5
+
+    def test_records_rows_and_bytes(self):
+        df = _daily_bars(10)
+        with stage_timer() as timer:
+            with stage("duckdb") as s:
+                s.done(df)
+
+        stats = timer.to_dict()["stages"][0]
+        assert stats["stage"] == "duckdb"
+        assert stats["rows_out"] == 10
+        assert stats["bytes"] > 0
+
+    def test_nested_self_time(self):
+        with stage_timer() as timer:
+            with stage("operation"):
+                with stage("df_to_rows"):
+                    sum(range(100_000))
+
+        stages = {s["stage"]: s for s in timer.to_dict()["stages"]}
+        op = stages["operation"]
+        assert op["ms"] >= stages["df_to_rows"]["ms"]
+        assert op["self_ms"] == pytest.approx(op["ms"] - stages["df_to_rows"]["ms"], abs=0.05)
+
+    def test_repeated_stage_aggregates(self):
+        with stage_timer() as timer:
+            for n in (3, 4):
+                with stage("filters", rows_in=n) as s:
+                    s.done(rows=n - 1)
+
+        stats = timer.to_dict()["stages"][0]
+        assert stats["calls"] == 2
+        assert stats["rows_in"] == 7
+        assert stats["rows_out"] == 5
+
+
+class TestExecutePlanTimings:
+    """execute_plan attaches per-stage timings to result."""
+
+    @pytest.fixture(autouse=True)
+    def bars(self, monkeypatch):
+        monkeypatch.setattr(executor, "get_bars_arrow",
+                            lambda symbol, period, timeframe: pa.Table.from_pandas(_daily_bars()))
+
+    def _plan(self, filters: list[str]) -> ExecutionPlan:
+        return ExecutionPlan(
+            mode="single",
+            operation="list",
+            requests=[DataRequest(period=("2024-01-01", "2024-03-01"), timeframe="1D", filters=filters, label="2024")],
+            metrics=["change"],
+            params={"n": 5},
+        )
+
+    def test_stages_present(self):
+        result = executor.execute_plan(self._plan(["change > 0"]))
+
+        timings = result["timings"]
+        names = [s["stage"] for s in timings["stages"]]
+        for name in ("enrich", "scan_patterns", "filters", "operation", "df_to_rows"):
+            assert name in names
+        assert timings["total_ms"] > 0
+
+        stages = {s["stage"]: s for s in timings["stages"]}
+        assert stages["enrich"]["rows_in"] == 30
+        assert stages["filters"]["rows_out"] <= stages["filters"]["rows_in"]
+        assert stages["operation"]["rows_out"] == len(result["rows"])
+
+
+class TestMaybeProfile:
+    def test_not_sampled(self):
+        with maybe_profile(0.0) as profile:
+            pass
+        assert not profile.sampled
+        assert profile.report == {}
+
+    def test_sampled_report(self):
+        with maybe_profile(1.0, top=5) as profile:
+            _ = [bytes(1000) for _ in range(100)]
+
+        assert profile.sampled
+        assert "cumulative" in profile.report["cprofile"]
+        assert profile.report["peak_memory_bytes"] > 0
+        assert len(profile.report["top_allocations"]) <= 5
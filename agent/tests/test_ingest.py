@@ -0,0 +1,176 @@
+"""Tests for streaming CSV ingest (data/ingest.py)."""
+
+import gzip
+
+import duckdb
+import pytest
+
+from data.ingest import (
+    append_csv,
+    expand_paths,
+    has_header,
+    ingest_csv,
+    register_refresher,
+    unregister_refresher,
+)
+from data.loader import load_csv
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+
+
+def bar(minute: int, close: float = 1.5) -> str:
+    return f"2025-01-02 10:{minute:02d}:00,1.0,2.0,0.5,{close},10\n"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "test.duckdb")
+
+
+def read_bars(db_path: str, symbol: str = "NQ") -> list[tuple]:
+    with duckdb.connect(db_path, read_only=True) as conn:
+        return conn.execute(
+            "SELECT strftime(timestamp, '%H:%M'), close, volume FROM ohlcv_1min WHERE symbol = ? ORDER BY timestamp",
+            [symbol],
+        ).fetchall()
+
+
+class TestIngestCsv:
+    def test_header_and_headerless_files(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1))
+        (tmp_path / "b.csv").write_text(bar(2))
+
+        stats = ingest_csv(str(tmp_path / "*.csv"), "NQ", db_path=db_path, progress=None)
+
+        assert stats.files == 2
+        assert stats.rows_inserted == 3
+        assert [b[0] for b in read_bars(db_path)] == ["10:00", "10:01", "10:02"]
+
+    def test_gzip_input(self, tmp_path, db_path):
+        path = tmp_path / "a.csv.gz"
+        with gzip.open(path, "wt") as f:
+            f.write(HEADER + bar(0))
+
+        assert has_header(str(path))
+        assert ingest_csv(path, "NQ", db_path=db_path, progress=None).rows_inserted == 1
+
+    def test_duplicates_skipped(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1) + bar(1))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+
+        # Overlapping file: existing bars win, only the new one is added
+        (tmp_path / "b.csv").write_text(HEADER + bar(1, close=9.0) + bar(2))
+        stats = ingest_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None)
+
+        assert stats.rows_inserted == 1
+        assert stats.rows_skipped == 1
+        assert read_bars(db_path) == [("10:00", 1.5, 10), ("10:01", 1.5, 10), ("10:02", 1.5, 10)]
+
+    def test_replace_overwrites_symbol_only(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+        ingest_csv(tmp_path / "a.csv", "ES", db_path=db_path, progress=None)
+
+        (tmp_path / "b.csv").write_text(HEADER + bar(1, close=9.0))
+        ingest_csv(tmp_path / "b.csv", "NQ", db_path=db_path, replace=True, progress=None)
+
+        assert read_bars(db_path, "NQ") == [("10:01", 9.0, 10)]
+        assert len(read_bars(db_path, "ES")) == 2
+
+    def test_chunks_report_progress(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + "".join(bar(m) for m in range(5)))
+        calls = []
+
+        stats = ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, chunk_rows=2,
+                           progress=lambda done, total: calls.append((done, total)))
+
+        assert calls == [(2, 5), (4, 5), (5, 5)]
+        assert stats.rows_inserted == 5
+        assert stats.rows_per_sec > 0
+
+    def test_no_files(self, tmp_path, db_path):
+        with pytest.raises(FileNotFoundError):
+            expand_paths(str(tmp_path / "*.csv"))
+
+    def test_load_csv_returns_symbol_count(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1))
+        assert load_csv(str(tmp_path / "a.csv"), "NQ", db_path=db_path) == 2
+
+
+class TestIncrementalIngest:
+    @pytest.fixture
+    def refreshed(self):
+        calls = []
+
+        def refresher(symbol, start, end, db_path):
+            calls.append((symbol, str(start), str(end)))
+
+        register_refresher(refresher)
+        yield calls
+        unregister_refresher(refresher)
+
+    def test_appends_only_newer_bars(self, tmp_path, db_path, refreshed):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+
+        # Update overlaps the watermark: 10:01 (older/equal) is ignored even if different
+        (tmp_path / "b.csv").write_text(HEADER + bar(1, close=9.0) + bar(2) + bar(3))
+        stats = append_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None)
+
+        assert stats.rows_inserted == 2
+        assert stats.rows_skipped == 1
+        assert stats.watermark.strftime("%H:%M") == "10:03"
+        assert read_bars(db_path)[1] == ("10:01", 1.5, 10)
+        assert refreshed[-1] == ("NQ", "2025-01-02", "2025-01-02")
+
+    def test_bars_before_watermark_gap_ignored(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(5))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+
+        # Backfill of a missing earlier bar is not an append
+        (tmp_path / "b.csv").write_text(HEADER + bar(0))
+        assert append_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None).rows_inserted == 0
+        assert ingest_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None).rows_inserted == 1
+
+    def test_evening_bars_belong_to_next_trading_day(self, tmp_path, db_path, refreshed):
+        (tmp_path / "a.csv").write_text(HEADER + "2025-01-02 16:59:00,1,2,0.5,1.5,10\n")
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+
+        (tmp_path / "b.csv").write_text(HEADER + "2025-01-02 18:00:00,1,2,0.5,1.5,10\n2025-01-03 09:30:00,1,2,0.5,1.5,10\n")
+        stats = append_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None)
+
+        assert (str(stats.affected_start), str(stats.affected_end)) == ("2025-01-03", "2025-01-03")
+
+    def test_nothing_new_skips_refresh(self, tmp_path, db_path, refreshed):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+        refreshed.clear()
+
+        stats = append_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+
+        assert stats.rows_inserted == 0
+        assert stats.affected_start is None
+        assert refreshed == []
+
+    def test_failing_refresher_reported(self, tmp_path, db_path):
+        def broken(symbol, start, end, db_path):
+            raise RuntimeError("index down")
+
+        register_refresher(broken)
+        try:
+            (tmp_path / "a.csv").write_text(HEADER + bar(0))
+            stats = append_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+        finally:
+            unregister_refresher(broken)
+
+        assert stats.rows_inserted == 1
+        assert list(stats.refresh_errors.values()) == ["index down"]
+
+    def test_watermark_bootstraps_from_existing_bars(self, tmp_path, db_path):
+        (tmp_path / "a.csv").write_text(HEADER + bar(0) + bar(1))
+        ingest_csv(tmp_path / "a.csv", "NQ", db_path=db_path, progress=None)
+        with duckdb.connect(db_path) as conn:
+            conn.execute("DELETE FROM ingest_watermarks")
+
+        (tmp_path / "b.csv").write_text(HEADER + bar(0, close=9.0) + bar(2))
+        assert append_csv(tmp_path / "b.csv", "NQ", db_path=db_path, progress=None).rows_inserted == 1
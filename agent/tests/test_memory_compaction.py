@@ -0,0 +1,131 @@
+"""Tests for background memory compaction."""
+
+import threading
+import time
+
+import pytest
+
+from agent.memory.compaction import MemoryCompactor
+from agent.memory.conversation import ConversationMemory
+
+
+@pytest.fixture
+def summarize(monkeypatch):
+    """Fake LLM summarizer; set `gate` to hold it until released."""
+    state = {"calls": 0, "gate": None}
+
+    def fake(self, messages):
+        state["calls"] += 1
+        if state["gate"] is not None:
+            state["gate"].wait(timeout=5)
+        return f"summary of {len(messages)}"
+
+    monkeypatch.setattr(ConversationMemory, "_summarize_chunk", fake)
+    monkeypatch.setattr(ConversationMemory, "_merge_summaries", lambda self, s: "merged")
+    monkeypatch.setattr(ConversationMemory, "save_memory_state_sync", lambda self: None)
+    return state
+
+
+def make_memory(messages: int) -> ConversationMemory:
+    memory = ConversationMemory(chat_id="chat-1", recent_limit=4, summary_chunk_size=2)
+    for i in range(messages):
+        memory.add_message("user", f"m{i}", compact=False)
+    return memory
+
+
+class TestConversationCompaction:
+    def test_append_without_compact_does_not_summarize(self, summarize):
+        memory = make_memory(10)
+
+        assert summarize["calls"] == 0
+        assert memory.needs_compaction()
+
+    def test_apply_conflicts_after_clear(self, summarize):
+        memory = make_memory(8)
+        plan = memory.plan_compaction()
+        summaries = memory.build_compaction(plan)
+
+        memory.clear()
+
+        assert memory.apply_compaction(plan, summaries) is False
+        assert memory.summaries == []
+
+    def test_appends_during_build_do_not_conflict(self, summarize):
+        memory = make_memory(8)
+        plan = memory.plan_compaction()
+        summaries = memory.build_compaction(plan)
+
+        memory.add_message("user", "late", compact=False)
+
+        assert memory.apply_compaction(plan, summaries) is True
+        assert [m.content for m in memory.recent][-1] == "late"
+        assert len(memory.recent) == 7
+
+
+class TestMemoryCompactor:
+    def test_compacts_until_under_limit(self, summarize):
+        applied = []
+        compactor = MemoryCompactor(on_applied=applied.append)
+        memory = make_memory(12)
+
+        compactor.submit(memory)
+        assert compactor.flush(timeout=5)
+
+        assert not memory.needs_compaction()
+        assert len(applied) == compactor.get_stats()["applied"] >= 1
+        assert all(s["content"].startswith("summary") for s in memory.summaries)
+
+    def test_same_chat_deduplicated(self, summarize):
+        summarize["gate"] = threading.Event()
+        compactor = MemoryCompactor()
+        memory = make_memory(8)
+
+        assert compactor.submit(memory) is True
+        assert compactor.submit(memory) is False
+        summarize["gate"].set()
+        compactor.flush(timeout=5)
+
+        assert compactor.get_stats()["deduplicated"] == 1
+
+    def test_readers_not_blocked_and_consistent(self, summarize):
+        summarize["gate"] = threading.Event()
+        compactor = MemoryCompactor()
+        memory = make_memory(8)
+        compactor.submit(memory)
+
+        # Summarization is in flight — reads and appends return immediately
+        start = time.perf_counter()
+        context = memory.get_context()
+        memory.add_message("user", "while compacting", compact=False)
+        assert time.perf_counter() - start < 0.5
+        assert "<history_summary>" not in context
+
+        summarize["gate"].set()
+        compactor.flush(timeout=5)
+
+        context = memory.get_context()
+        assert "<history_summary>" in context
+        assert "while compacting" in context
+
+    def test_conflict_replans(self, summarize, monkeypatch):
+        compactor = MemoryCompactor()
+        memory = make_memory(8)
+        original = ConversationMemory.build_compaction
+        raced = []
+
+        def racing_build(self, plan):
+            result = original(self, plan)
+            if not raced:
+                raced.append(True)
+                with self._lock:
+                    self.revision += 1  # e.g. reload by another request
+            return result
+
+        monkeypatch.setattr(ConversationMemory, "build_compaction", racing_build)
+        compactor.submit(memory)
+        compactor.flush(timeout=5)
+
+        stats = compactor.get_stats()
+        assert stats["conflicts"] == 1
+        assert stats["applied"] >= 1
+        assert not memory.needs_compaction()
@@ -0,0 +1,186 @@
+"""Tests for per-chat conversation memory cache."""
+
+import time
+
+import pytest
+
+from agent.memory.conversation import ConversationMemory
+from agent.memory.manager import MemoryManager
+
+
+class FakeSupabase:
+    """Records bump_memory_version RPC calls, returns incrementing versions."""
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.calls: list[dict] = []
+
+    def rpc(self, name: str, params: dict):
+        assert name == "bump_memory_version"
+        self.calls.append(params)
+        expected = params.get("p_expected_version")
+        if expected is not None and expected != self.version:
+            version = None
+        else:
+            self.version += 1
+            version = self.version
+        return type("Query", (), {"execute": lambda _: type("Result", (), {"data": version})()})()
+
+
+@pytest.fixture
+def supabase():
+    return FakeSupabase(version=1)
+
+
+@pytest.fixture
+def loads(monkeypatch, supabase):
+    """Count DB loads; every loaded memory gets the fake Supabase client."""
+    calls = []
+
+    def load_sync(self):
+        calls.append(self.chat_id)
+        self._supabase = supabase
+        self.memory_version = supabase.version
+        self._loaded = True
+        return True
+
+    monkeypatch.setattr(ConversationMemory, "load_sync", load_sync)
+    return calls
+
+
+class TestMemoryManager:
+    def test_follow_up_served_from_cache(self, loads):
+        manager = MemoryManager(ttl=60)
+
+        first = manager.get_or_create("chat-1", "user-1", version=1)
+        second = manager.get_or_create("chat-1", "user-1", version=1)
+
+        assert first is second
+        assert loads == ["chat-1"]
+        assert manager.get_stats()["hits"] == 1
+
+    def test_ttl_expiry_reloads(self, loads):
+        manager = MemoryManager(ttl=0.01)
+        manager.get_or_create("chat-1")
+        time.sleep(0.02)
+        manager.get_or_create("chat-1")
+
+        assert loads == ["chat-1", "chat-1"]
+
+    def test_version_change_reloads(self, loads):
+        manager = MemoryManager(ttl=60)
+        manager.get_or_create("chat-1", version=1)
+
+        # Another worker bumped memory_version
+        manager.get_or_create("chat-1", version=2)
+
+        assert loads == ["chat-1", "chat-1"]
+
+    def test_failed_load_not_cached(self, monkeypatch):
+        monkeypatch.setattr(ConversationMemory, "load_sync", lambda self: False)
+        manager = MemoryManager(ttl=60)
+
+        manager.get_or_create("chat-1")
+        assert manager.list_sessions() == []
+
+    def test_lru_bound(self, loads):
+        manager = MemoryManager(ttl=60, max_chats=2)
+        for chat_id in ("a", "b", "c"):
+            manager.get_or_create(chat_id)
+
+        assert manager.list_sessions() == ["b", "c"]
+
+
+class TestWriteThrough:
+    def test_append_visible_immediately_and_persisted(self, loads, supabase):
+        manager = MemoryManager(ttl=60)
+        memory = manager.get_or_create("chat-1", version=1)
+
+        manager.append_exchange(memory, "what about 2024?", "NQ was up 25%")
+        cached = manager.get("chat-1")
+        assert [m.content for m in cached.recent] == ["what about 2024?", "NQ was up 25%"]
+
+        manager.flush()
+        assert supabase.calls[0]["p_chat_id"] == "chat-1"
+        assert supabase.calls[0]["p_expected_version"] == 1
+        assert set(supabase.calls[0]["p_memory"]) == {"summaries", "key_facts"}
+
+    def test_own_bump_keeps_cache_valid(self, loads, supabase):
+        manager = MemoryManager(ttl=60)
+        memory = manager.get_or_create("chat-1", version=1)
+
+        manager.append_exchange(memory, "q", "a")
+        manager.flush()
+
+        # API now reads the bumped version — our copy matches it
+        assert manager.get_or_create("chat-1", version=supabase.version) is memory
+        assert loads == ["chat-1"]
+
+    def test_conflict_reapplies_exchange_to_fresh_memory(self, loads, supabase):
+        manager = MemoryManager(ttl=60)
+        memory = manager.get_or_create("chat-1", version=1)
+        memory.summaries = [{"content": "stale", "up_to_id": 1}]
+        supabase.version = 5  # another worker wrote its summaries meanwhile
+
+        manager.append_exchange(memory, "q", "a")
+        manager.flush()
+
+        # Stale write rejected, retried once on reloaded memory with its version
+        assert [c.get("p_expected_version") for c in supabase.calls] == [1, 5]
+        assert supabase.calls[1]["p_memory"]["summaries"] == []
+        fresh = manager.get_or_create("chat-1", version=supabase.version)
+        assert fresh is not memory
+        assert [m.content for m in fresh.recent] == ["q", "a"]
+        assert loads == ["chat-1", "chat-1"]
+
+    def test_second_conflict_drops_cached_copy(self, loads, supabase, monkeypatch):
+        manager = MemoryManager(ttl=60)
+        memory = manager.get_or_create("chat-1", version=1)
+        supabase.version = 5
+        reload = MemoryManager._reload_with
+
+        def reload_and_race(memory, question, response):
+            fresh = reload(memory, question, response)
+            supabase.version += 1  # yet another write before our retry
+            return fresh
+
+        monkeypatch.setattr(MemoryManager, "_reload_with", staticmethod(reload_and_race))
+        manager.append_exchange(memory, "q", "a")
+        manager.flush()
+
+        assert len(supabase.calls) == 2
+        assert manager.list_sessions() == []
+
+
+class TestBackgroundCompaction:
+    def _long_chat(self, manager, exchanges: int) -> ConversationMemory:
+        memory = manager.get_or_create("chat-1", version=1)
+        memory.recent_limit, memory.summary_chunk_size = 4, 2
+        for i in range(exchanges):
+            manager.append_exchange(memory, f"q{i}", f"a{i}")
+        return memory
+
+    def test_compaction_persisted_with_expected_version(self, monkeypatch, loads, supabase):
+        monkeypatch.setattr(ConversationMemory, "_summarize_chunk", lambda self, m: "summary")
+        manager = MemoryManager(ttl=60)
+        memory = self._long_chat(manager, exchanges=4)
+        manager.flush()
+
+        assert memory.summaries
+        checked = [c for c in supabase.calls if "p_expected_version" in c]
+        assert checked and checked[-1]["p_memory"]["summaries"] == memory.summaries
+        assert manager.get("chat-1") is memory
+
+    def test_version_conflict_drops_cached_copy(self, monkeypatch, loads, supabase):
+        manager = MemoryManager(ttl=60)
+
+        def summarize(self, messages):
+            manager._persist_pool.submit(lambda: None).result()  # our appends saved
+            supabase.version += 1  # another worker wrote while we summarized
+            return "summary"
+
+        monkeypatch.setattr(ConversationMemory, "_summarize_chunk", summarize)
+        self._long_chat(manager, exchanges=4)
+        manager.flush()
+
+        assert manager.list_sessions() == []
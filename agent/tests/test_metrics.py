@@ -0,0 +1,146 @@
+"""Tests for in-process metrics registry and multi-worker aggregation."""
+
+import os
+import time
+
+import pytest
+
+from agent.logging import metrics
+from agent.logging.metrics import MetricsRegistry, MetricsSync, render
+from agent.types import Usage
+
+
+class TestRegistry:
+    def test_counter_render(self):
+        registry = MetricsRegistry()
+        c = registry.counter("requests_total", "Requests", ["route"])
+        c.inc(route="/chat")
+        c.inc(2, route="/chat")
+
+        text = render(registry.snapshot())
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/chat"} 3' in text
+
+    def test_histogram_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        h = registry.histogram("latency_seconds", "Latency", ["node"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            h.observe(value, node="parser")
+
+        text = render(registry.snapshot())
+        assert 'latency_seconds_bucket{node="parser",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{node="parser",le="1"} 2' in text
+        assert 'latency_seconds_bucket{node="parser",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{node="parser"} 3' in text
+
+    def test_gauge_track(self):
+        registry = MetricsRegistry()
+        g = registry.gauge("in_flight", "In flight")
+        with g.track():
+            assert "in_flight 1" in render(registry.snapshot())
+        assert "in_flight 0" in render(registry.snapshot())
+
+    def test_wrong_labels_rejected(self):
+        c = MetricsRegistry().counter("x_total", "X", ["agent"])
+        with pytest.raises(ValueError):
+            c.inc(model="m")
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.counter("x_total", "X", ["q"]).inc(q='say "hi"\n')
+        assert 'x_total{q="say \\"hi\\"\\n"} 1' in render(registry.snapshot())
+
+
+class TestMultiWorker:
+    """Snapshots of all workers are merged by /metrics."""
+
+    def _worker(self, directory) -> tuple[MetricsRegistry, MetricsSync]:
+        registry = MetricsRegistry()
+        registry.counter("llm_requests_total", "LLM calls", ["agent"])
+        registry.gauge("sse_streams_in_flight", "Open streams")
+        registry.histogram("node_seconds", "Node", ["node"], buckets=(1.0,))
+        sync = MetricsSync(registry, directory, interval=60)
+        time.sleep(0.002)  # unique file name per worker
+        return registry, sync
+
+    def test_counters_and_gauges_summed(self, tmp_path):
+        workers = [self._worker(tmp_path) for _ in range(2)]
+        for registry, sync in workers:
+            registry.counter("llm_requests_total", "", ["agent"]).inc(agent="parser")
+            registry.gauge("sse_streams_in_flight", "").inc()
+            registry.histogram("node_seconds", "", ["node"], buckets=(1.0,)).observe(0.5, node="parser")
+            sync.write()
+
+        text = render(workers[0][1].collect())
+        assert 'llm_requests_total{agent="parser"} 2' in text
+        assert "sse_streams_in_flight 2" in text
+        assert 'node_seconds_count{node="parser"} 2' in text
+
+    def test_dead_worker_keeps_counters_drops_gauges(self, tmp_path):
+        (live, live_sync), (dead, dead_sync) = self._worker(tmp_path), self._worker(tmp_path)
+        dead.counter("llm_requests_total", "", ["agent"]).inc(agent="intent")
+        dead.gauge("sse_streams_in_flight", "").inc()
+        dead_sync.write()
+        old = time.time() - 600
+        os.utime(dead_sync.path, (old, old))
+
+        text = render(live_sync.collect())
+        assert 'llm_requests_total{agent="intent"} 1' in text
+        assert "sse_streams_in_flight 0" in text
+
+    def test_stale_files_removed(self, tmp_path):
+        _, sync = self._worker(tmp_path)
+        stale = tmp_path / "metrics-1-1.json"
+        stale.write_text("{}")
+        old = time.time() - 2 * sync.stale_after
+        os.utime(stale, (old, old))
+
+        sync.collect()
+        assert not stale.exists()
+
+
+class TestAppMetrics:
+    def test_llm_usage_tokens_and_cost(self):
+        usage = Usage(input_tokens=1_000_000, output_tokens=0, cached_tokens=0)
+        before = dict(
+            (tuple(labels), value)
+            for labels, value in metrics.LLM_COST.snapshot()["samples"]
+        ).get(("test_agent", "gemini-3-flash-preview"), 0.0)
+
+        metrics.observe_llm_usage("test_agent", "gemini-3-flash-preview", usage)
+
+        samples = {tuple(l): v for l, v in metrics.LLM_COST.snapshot()["samples"]}
+        assert samples[("test_agent", "gemini-3-flash-preview")] - before == pytest.approx(0.50)
+
+    def test_node_timing_wrapper(self):
+        from agent.graph import _timed
+
+        node = _timed("test_node", lambda state: {"ok": True})
+        assert node({}) == {"ok": True}
+
+        samples = {tuple(l): v for l, v in metrics.NODE_SECONDS.snapshot()["samples"]}
+        assert samples[("test_node",)]["count"] >= 1
+
+
+class TestMetricsEndpoint:
+    def test_disabled_without_token(self, monkeypatch):
+        import api
+        from fastapi import HTTPException
+
+        monkeypatch.setattr(api.config, "METRICS_TOKEN", None)
+        with pytest.raises(HTTPException) as e:
+            api.metrics_endpoint(authorization=None)
+        assert e.value.status_code == 404
+
+    def test_requires_bearer_token(self, monkeypatch):
+        import api
+        from fastapi import HTTPException
+
+        monkeypatch.setattr(api.config, "METRICS_TOKEN", "secret")
+        for authorization in (None, "Bearer wrong", "secret"):
+            with pytest.raises(HTTPException) as e:
+                api.metrics_endpoint(authorization=authorization)
+            assert e.value.status_code == 401
+
+        response = api.metrics_endpoint(authorization="Bearer secret")
+        assert response.status_code == 200
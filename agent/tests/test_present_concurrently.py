@@ -0,0 +1,60 @@
+"""Tests for concurrent per-result presentation in graph.present_response."""
+
+import time
+
+from unittest.mock import patch
+
+from agent.agents.presenter import DataResponse, DataResponseType
+from agent.graph import present_response
+from agent.types import Usage
+
+
+def _fake_present(result, question, lang, context_compacted):
+    """Presenter stub: first step is the slowest."""
+    time.sleep(result["delay"])
+    return DataResponse(
+        title=None,
+        summary=f"summary {result['step_id']}",
+        type=DataResponseType.SINGLE,
+        row_count=len(result.get("rows", [])),
+        usage=Usage(input_tokens=100, output_tokens=10),
+    )
+
+
+class TestPresentConcurrently:
+    """Results are presented in parallel but assembled in step order."""
+
+    def test_step_order_and_merged_usage(self):
+        data = [
+            {"step_id": "s1", "rows": [{"x": 1}], "delay": 0.3},
+            {"step_id": "s2", "rows": [{"x": 2}], "delay": 0.0},
+            {"step_id": "s3", "rows": [{"x": 3}], "delay": 0.1},
+        ]
+        state = {"data": data, "lang": "en", "internal_query": "q"}
+
+        with patch("agent.graph._present_one", side_effect=_fake_present):
+            start = time.time()
+            output = present_response(state)
+            elapsed = time.time() - start
+
+        assert output["response"] == "summary s1\n\nsummary s2\n\nsummary s3"
+        assert output["presenter_type"] == "multi"
+        assert output["presenter_row_count"] == 3
+        assert output["usage"]["input_tokens"] == 300
+        # Parallel: bounded by slowest call, not the sum
+        assert elapsed < 0.35
+
+    def test_partial_events_in_completion_order(self):
+        data = [
+            {"step_id": "s1", "rows": [], "delay": 0.2},
+            {"step_id": "s2", "rows": [], "delay": 0.0},
+        ]
+        state = {"data": data, "lang": "en", "internal_query": "q"}
+        events = []
+
+        with patch("agent.graph._present_one", side_effect=_fake_present), \
+             patch("agent.graph._get_stream_writer", return_value=events.append):
+            present_response(state)
+
+        assert [e["step_id"] for e in events] == ["s2", "s1"]
+        assert all(e["type"] == "presenter_partial" for e in events)
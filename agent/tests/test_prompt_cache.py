@@ -0,0 +1,86 @@
+"""Tests for static prompt prefix caching."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from agent.memory.prompt_cache import PromptAssembler, config_hash
+from agent.types import Usage
+
+
+LONG_STATIC = "x" * 8000  # ~2000 tokens — above explicit cache minimum
+SHORT_STATIC = "short system prompt"
+
+
+@pytest.fixture
+def cache_manager():
+    manager = MagicMock()
+    manager.get_or_create.return_value = "cachedContents/abc"
+    return manager
+
+
+class TestPromptAssembler:
+    """Static prefix built once, sent via cache when long enough."""
+
+    def test_static_built_once(self, cache_manager):
+        assembler = PromptAssembler(cache_manager)
+        build = MagicMock(return_value=LONG_STATIC)
+
+        assembler.assemble("understander:NQ", build, "q1", "model-a")
+        assembler.assemble("understander:NQ", build, "q2", "model-a")
+
+        build.assert_called_once()
+
+    def test_long_prefix_sends_only_dynamic(self, cache_manager):
+        assembler = PromptAssembler(cache_manager)
+
+        prompt = assembler.assemble("parser:NQ", lambda: LONG_STATIC, "Question: q", "model-a")
+
+        assert prompt.contents == "Question: q"
+        assert prompt.cached_content == "cachedContents/abc"
+        kwargs = cache_manager.get_or_create.call_args.kwargs
+        assert kwargs["content"] == LONG_STATIC
+        assert kwargs["model"] == "model-a"
+        assert kwargs["key"].startswith("parser:NQ:")
+
+    def test_short_prefix_sent_inline(self, cache_manager):
+        assembler = PromptAssembler(cache_manager)
+
+        prompt = assembler.assemble("intent", lambda: SHORT_STATIC, "q", "model-a")
+
+        assert prompt.contents == f"{SHORT_STATIC}\n\nq"
+        assert prompt.cached_content is None
+        cache_manager.get_or_create.assert_not_called()
+
+    def test_cache_failure_falls_back_to_inline(self, cache_manager):
+        cache_manager.get_or_create.return_value = None
+        assembler = PromptAssembler(cache_manager)
+
+        prompt = assembler.assemble("parser:NQ", lambda: LONG_STATIC, "q", "model-a")
+
+        assert prompt.contents == f"{LONG_STATIC}\n\nq"
+        assert prompt.cached_content is None
+
+    def test_record_usage(self, cache_manager):
+        assembler = PromptAssembler(cache_manager)
+        prompt = assembler.assemble("parser:NQ", lambda: LONG_STATIC, "q", "gemini-3-flash-preview")
+
+        assembler.record_usage(prompt, Usage(input_tokens=2500, cached_tokens=2000))
+
+        stats = assembler.get_stats()["parser:NQ"]
+        assert stats["cached_requests"] == 1
+        assert stats["cached_ratio"] == 0.8
+        assert stats["savings_usd"] > 0
+
+
+class TestConfigHash:
+    def test_stable(self):
+        assert config_hash() == config_hash()
+
+
+class TestUsageCachedRatio:
+    def test_ratio(self):
+        assert Usage(input_tokens=1000, cached_tokens=250).cached_ratio == 0.25
+
+    def test_empty(self):
+        assert Usage().cached_ratio == 0.0
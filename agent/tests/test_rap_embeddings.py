@@ -0,0 +1,117 @@
+"""Tests for RAP chunk embeddings (memory-mapped .npy) and query embedding cache."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from agent.prompts.semantic_parser.rap import (
+    ChunkEmbedder,
+    ChunkRetriever,
+    QueryEmbeddingCache,
+    normalize_query,
+)
+
+
+CHUNKS = {"list": "top N", "count": "how many", "compare": "a vs b"}
+VECTORS = {"list": [1, 0, 0], "count": [0, 2, 0], "compare": [0, 0, 3]}
+
+
+class FakeEmbedder(ChunkEmbedder):
+    """ChunkEmbedder with deterministic local embeddings instead of API calls."""
+
+    calls: list[str]
+
+    def _embed(self, text: str) -> list[float]:
+        self.calls.append(text)
+        for chunk_id, content in CHUNKS.items():
+            if text.startswith(content):
+                return VECTORS[chunk_id]
+        return [0.1, 1.0, 0.5]  # closest to "count", then "compare"
+
+
+@pytest.fixture
+def embedder(tmp_path):
+    FakeEmbedder.calls = []
+    with patch("agent.prompts.semantic_parser.rap.genai.Client"):
+        return FakeEmbedder(
+            CHUNKS,
+            cache_path=tmp_path / "embeddings.npy",
+            ids_path=tmp_path / "embedding_ids.npy",
+            query_cache=QueryEmbeddingCache(tmp_path / "queries.sqlite"),
+        )
+
+
+class TestChunkEmbeddings:
+    """Chunk embeddings stored as normalized float32 and memory-mapped."""
+
+    def test_saved_normalized_float32(self, embedder):
+        matrix = np.load(embedder.cache_path)
+        assert matrix.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-6)
+
+    def test_reload_is_mmap_without_api_calls(self, embedder, tmp_path):
+        FakeEmbedder.calls = []
+        with patch("agent.prompts.semantic_parser.rap.genai.Client"):
+            reloaded = FakeEmbedder(
+                CHUNKS,
+                cache_path=embedder.cache_path,
+                ids_path=embedder.ids_path,
+                query_cache=QueryEmbeddingCache(None),
+            )
+
+        assert FakeEmbedder.calls == []
+        assert isinstance(reloaded.matrix, np.memmap)
+        assert reloaded.chunk_ids == embedder.chunk_ids
+
+    def test_changed_chunks_recompute(self, embedder):
+        FakeEmbedder.calls = []
+        chunks = {**CHUNKS, "streak": "in a row"}
+        with patch("agent.prompts.semantic_parser.rap.genai.Client"):
+            FakeEmbedder(chunks, cache_path=embedder.cache_path, ids_path=embedder.ids_path,
+                         query_cache=QueryEmbeddingCache(None))
+
+        assert len(FakeEmbedder.calls) == 4
+
+
+class TestChunkRetriever:
+    def test_top_k_order(self, embedder):
+        results = ChunkRetriever(embedder).search("how often?", top_k=2)
+
+        assert [r[0] for r in results] == ["count", "compare"]
+        assert results[0][1] > results[1][1]
+
+    def test_top_k_larger_than_chunks(self, embedder):
+        results = ChunkRetriever(embedder).search("x", top_k=10)
+
+        assert len(results) == 3
+
+
+class TestQueryEmbeddingCache:
+    def test_normalize_query(self):
+        assert normalize_query("  Top 10   days?") == normalize_query("top 10 days")
+
+    def test_repeated_query_skips_api(self, embedder):
+        FakeEmbedder.calls = []
+
+        embedder.embed_query("Top 10 days?")
+        embedder.embed_query("top 10 days")
+
+        assert FakeEmbedder.calls == ["Top 10 days?"]
+        assert embedder.query_cache.get_stats()["hits"] == 1
+
+    def test_persistent_across_instances(self, tmp_path):
+        path = tmp_path / "queries.sqlite"
+        QueryEmbeddingCache(path).put("k", np.array([0.6, 0.8], dtype=np.float32))
+
+        vector = QueryEmbeddingCache(path).get("k")
+
+        np.testing.assert_allclose(vector, [0.6, 0.8])
+
+    def test_lru_eviction(self):
+        cache = QueryEmbeddingCache(None, maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, np.zeros(2, dtype=np.float32))
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
@@ -0,0 +1,124 @@
+"""Tests for session (RTH, ETH...) and weekly/monthly timeframes in get_bars."""
+
+import numpy as np
+import pytest
+
+import config
+from agent.agents import executor
+from agent.agents.planner import DataRequest, ExecutionPlan
+from agent.data import get_bars
+from data.ingest import ingest_csv
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+# Thanksgiving 2024-11-28 is closed, Black Friday 2024-11-29 closes at 13:15
+BARS = (
+    "2024-11-26 18:00:00,10,11,9,10.5,1\n"      # → 11-27 overnight
+    "2024-11-27 09:30:00,20,22,19,21,2\n"
+    "2024-11-27 16:59:00,21,23,20,22,3\n"
+    "2024-11-28 10:00:00,30,31,29,30.5,4\n"     # holiday
+    "2024-11-28 18:00:00,40,41,39,40.5,5\n"     # → 11-29 overnight
+    "2024-11-29 09:30:00,50,52,49,51,6\n"
+    "2024-11-29 13:14:00,51,53,50,52,7\n"
+    "2024-11-29 14:00:00,60,70,59,65,8\n"       # after early close
+    "2024-12-02 09:30:00,70,72,69,71,9\n"
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+
+
+def _rows(df):
+    df = df.assign(date=df["date"].astype(str))
+    return [tuple(r) for r in df[["date", "open", "high", "low", "close", "volume"]].itertuples(index=False)]
+
+
+class TestSessionBars:
+    def test_rth(self, db):
+        assert _rows(get_bars("NQ", "2024", "RTH")) == [
+            ("2024-11-27", 20, 23, 19, 22, 5),
+            ("2024-11-29", 50, 53, 49, 52, 13),  # cut at 13:15, holiday dropped
+            ("2024-12-02", 70, 72, 69, 71, 9),
+        ]
+
+    def test_cross_midnight(self, db):
+        assert _rows(get_bars("NQ", "2024", "OVERNIGHT")) == [
+            ("2024-11-27", 10, 11, 9, 10.5, 1),
+            ("2024-11-29", 40, 41, 39, 40.5, 5),
+        ]
+
+    def test_early_close_keeps_previous_evening(self, db):
+        eth = _rows(get_bars("NQ", "2024", "eth"))
+        assert eth[1] == ("2024-11-29", 40, 53, 39, 52, 18)
+
+    def test_session_ending_before_close(self, db):
+        # RTH_CLOSE (16:00-17:00) has no bars on the early close day
+        assert [d for d, *_ in _rows(get_bars("NQ", "2024", "RTH_CLOSE"))] == ["2024-11-27"]
+
+    def test_compact(self, db):
+        df = get_bars("NQ", "2024", "RTH", compact=True)
+        assert df["close"].dtype == np.float32 and df["volume"].dtype == np.uint32
+
+    def test_unknown_timeframe(self, db):
+        with pytest.raises(ValueError, match="RTH"):
+            get_bars("NQ", "2024", "2D")
+
+
+class TestPeriodBars:
+    def test_weekly(self, db):
+        assert _rows(get_bars("NQ", "2024", "1W")) == [
+            ("2024-11-25", 10, 70, 9, 65, 32),  # 1D bars of 11-27 and 11-29
+            ("2024-12-02", 70, 72, 69, 71, 9),
+        ]
+
+    def test_monthly(self, db):
+        assert [(d, v) for d, *_, v in _rows(get_bars("NQ", "2024", "1M"))] == [
+            ("2024-11-01", 32),
+            ("2024-12-01", 9),
+        ]
+
+    def test_matches_daily(self, db):
+        daily = get_bars("NQ", "2024", "1D")
+        weekly = get_bars("NQ", "2024", "1W")
+
+        assert weekly["volume"].sum() == daily["volume"].sum()
+        assert weekly["high"].max() == daily["high"].max()
+
+
+class TestExecutor:
+    def test_plan_on_session_bars(self, db):
+        plan = ExecutionPlan(
+            mode="single",
+            operation="count",
+            requests=[DataRequest(period=("2024-01-01", "2025-01-01"), timeframe="RTH",
+                                  filters=["change > 0"], label="2024")],
+            metrics=["change"],
+        )
+
+        assert executor.execute_plan(plan)["summary"]["count"] == 3
+
+
+class TestHolidayAtPeriodEnd:
+    """Evening bars before the period end belong to a closed trading date."""
+
+    @pytest.fixture
+    def new_year(self, db, tmp_path):
+        (tmp_path / "new_year.csv").write_text(
+            HEADER
+            + "2024-12-31 10:00:00,80,81,79,80.5,1\n"
+            + "2024-12-31 18:00:00,90,91,89,90.5,2\n"   # → 2025-01-01, closed
+        )
+        ingest_csv(tmp_path / "new_year.csv", "NQ", progress=None)
+
+    def test_daily(self, new_year):
+        assert [d for d, *_ in _rows(get_bars("NQ", "2024", "1D"))][-1] == "2024-12-31"
+
+    def test_weekly(self, new_year):
+        assert _rows(get_bars("NQ", "2024", "1W"))[-1] == ("2024-12-30", 80, 81, 79, 80.5, 1)
+
+    def test_cross_midnight_session(self, new_year):
+        assert [d for d, *_ in _rows(get_bars("NQ", "2024", "OVERNIGHT"))][-1] == "2024-11-29"
@@ -0,0 +1,93 @@
+"""Tests for request coalescing of identical concurrent work."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent.singleflight import SingleFlight, flight_key, normalize_query
+
+
+def run_concurrently(flight: SingleFlight, key: str, fn, callers: int) -> list:
+    """Start `callers` threads on the same key while fn is held."""
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [pool.submit(flight.do, key, fn) for _ in range(callers)]
+        return [f.result(timeout=5) for f in futures]
+
+
+def held_until_joined(flight: SingleFlight, followers: int, calls: list):
+    """Leader fn that returns only once `followers` callers wait on it."""
+    def fn():
+        calls.append(1)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with flight._lock:
+                if sum(c.waiters for c in flight._calls.values()) >= followers:
+                    break
+            time.sleep(0.001)
+        return {"rows": [{"close": 1.0}]}
+    return fn
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        calls = []
+        results = run_concurrently(flight, "k", held_until_joined(flight, 3, calls), 4)
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True, True]
+        assert flight.in_flight() == 0
+
+    def test_followers_get_independent_copies(self):
+        flight = SingleFlight("test")
+        results = run_concurrently(flight, "k", held_until_joined(flight, 2, []), 3)
+
+        values = [value for value, _ in results]
+        values[0]["rows"].append("mutated")
+        assert all(v["rows"] == [{"close": 1.0}] for v in values[1:])
+
+    def test_sequential_calls_not_cached(self):
+        flight = SingleFlight("test")
+        calls = []
+        flight.do("k", lambda: calls.append(1))
+        flight.do("k", lambda: calls.append(1))
+
+        assert len(calls) == 2
+
+    def test_leader_error_raised_in_followers(self):
+        flight = SingleFlight("test")
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("duckdb down")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "k", failing)
+            started.wait(5)
+            follower = pool.submit(flight.do, "k", lambda: "never")
+            while next(iter(flight._calls.values())).waiters < 1:
+                time.sleep(0.001)
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=5)
+
+    def test_disabled_runs_every_call(self):
+        flight = SingleFlight("test", enabled=False)
+        assert flight.do("k", lambda: 1) == (1, False)
+
+
+class TestKeys:
+    def test_query_normalization(self):
+        assert normalize_query("  NQ  volatility\n2024 ") == normalize_query("nq volatility 2024")
+
+    def test_plan_key_ignores_dict_order(self):
+        a = {"operation": "stats", "params": {"a": 1, "b": 2}}
+        b = {"params": {"b": 2, "a": 1}, "operation": "stats"}
+        assert flight_key(a) == flight_key(b)
+        assert flight_key(a) != flight_key({**a, "operation": "compare"})
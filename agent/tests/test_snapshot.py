@@ -0,0 +1,113 @@
+"""Tests for memory-mapped 1m snapshots (data/snapshot.py)."""
+
+import numpy as np
+import pytest
+
+import config
+from agent.data import get_bars, get_bars_arrow
+from data.ingest import append_csv, ingest_csv
+from data.snapshot import build_snapshot, get_snapshot
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+BARS = (
+    "2024-01-02 09:30:00,16800.25,16801.0,16799.5,16800.75,120\n"
+    "2024-01-02 09:31:00,16800.75,16810.5,16795.0,16809.25,3400\n"
+    "2024-01-02 18:00:00,16809.25,16812.0,16805.75,16806.0,2100\n"
+    "2024-01-03 09:30:00,16750.5,16760.0,16740.25,16755.1000001,1800\n"
+    "2024-01-05 09:30:00,16700.0,16710.0,16690.0,16705.0,900\n"
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    monkeypatch.setattr(config, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(config, "SNAPSHOT_ENABLED", True)
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+    return tmp_path
+
+
+def _from_duckdb(period, monkeypatch, **kwargs):
+    monkeypatch.setattr(config, "SNAPSHOT_ENABLED", False)
+    df = get_bars("NQ", period, "1m", **kwargs)
+    monkeypatch.setattr(config, "SNAPSHOT_ENABLED", True)
+    return df
+
+
+class TestSnapshot:
+    def test_built_by_ingest(self, db):
+        snapshot = get_snapshot("NQ")
+
+        assert snapshot is not None and len(snapshot) == 5
+        assert snapshot.meta["days"] == 3
+        # 18:00 bar belongs to the next trading day
+        assert snapshot.column("trading_date").astype(str).tolist() == [
+            "2024-01-02", "2024-01-02", "2024-01-03", "2024-01-03", "2024-01-05",
+        ]
+
+    @pytest.mark.parametrize("period", ["all", "2024-01-02:2024-01-03", "2024-01-03:2024-01-05", "2024-01-04:2024-01-05", "2025"])
+    def test_same_bars_as_duckdb(self, db, monkeypatch, period):
+        expected = _from_duckdb(period, monkeypatch)
+        df = get_bars("NQ", period, "1m")
+
+        assert df.to_dict("records") == expected.to_dict("records")
+        assert df.dtypes.tolist() == expected.dtypes.tolist()
+
+    def test_compact(self, db, monkeypatch):
+        expected = _from_duckdb("2024", monkeypatch, compact=True)
+        df = get_bars("NQ", "2024", "1m", compact=True)
+
+        assert df["close"].dtype == np.float32
+        assert df.to_dict("records") == expected.to_dict("records")
+
+    def test_zero_copy(self, db):
+        mapped = get_snapshot("NQ").column("close")
+        table = get_bars_arrow("NQ", "2024-01-03:2024-01-06", "1m", compact=False)
+
+        address = table.column("close").chunk(0).buffers()[1].address
+        assert address == mapped[3:].ctypes.data
+
+    def test_other_timeframes_use_duckdb(self, db, monkeypatch):
+        assert get_bars("NQ", "2024", "1D")["volume"].tolist() == [3520, 3900, 900]
+
+
+class TestGenerations:
+    def test_rebuild_swaps_current(self, db):
+        first = get_snapshot("NQ")
+        meta = build_snapshot("NQ")
+
+        current = get_snapshot("NQ")
+        assert current is not first and current.generation == meta["generation"]
+        assert get_snapshot("NQ") is current
+        # Old instance still reads its own files
+        assert len(first.bars()) == 5
+
+    def test_old_generations_removed(self, db, monkeypatch):
+        monkeypatch.setattr(config, "SNAPSHOT_KEEP_GENERATIONS", 2)
+        for _ in range(3):
+            build_snapshot("NQ")
+
+        generations = sorted(p.name for p in (db / "snapshots" / "NQ").iterdir() if p.is_dir())
+        assert len(generations) == 2
+        assert generations[-1] == get_snapshot("NQ").generation
+
+    def test_append_refreshes(self, db):
+        (db / "update.csv").write_text(HEADER + "2024-01-08 09:30:00,16600.0,16610.0,16590.0,16605.0,700\n")
+        append_csv(db / "update.csv", "NQ", progress=None)
+
+        assert get_bars("NQ", "2024-01-08:2024-01-09", "1m")["volume"].tolist() == [700]
+
+    def test_disabled_is_noop(self, db, monkeypatch):
+        monkeypatch.setattr(config, "SNAPSHOT_ENABLED", False)
+        generation = get_snapshot("NQ").generation
+        (db / "update.csv").write_text(HEADER + "2024-01-08 09:30:00,16600.0,16610.0,16590.0,16605.0,700\n")
+        append_csv(db / "update.csv", "NQ", progress=None)
+
+        assert get_snapshot("NQ").generation == generation
+        assert get_bars("NQ", "2024-01-08:2024-01-09", "1m")["volume"].tolist() == [700]
+
+    def test_invalid_symbol(self, db):
+        with pytest.raises(ValueError):
+            get_snapshot("../NQ")
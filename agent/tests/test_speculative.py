@@ -0,0 +1,166 @@
+"""Tests for speculative Understander execution."""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from agent.agents.understander import UnderstanderResult
+from agent.types import Usage
+from agent import speculative
+from agent.speculative import (
+    query_drift,
+    guess_lang,
+    start_speculation,
+    take_understander,
+    discard_speculation,
+    get_speculation_stats,
+)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+@pytest.fixture
+def understander():
+    """Mock Understander returning fixed result with usage."""
+    result = UnderstanderResult(
+        intent="data",
+        understood=True,
+        expanded_query="list top 10 days by volume in 2024",
+        usage=Usage(input_tokens=1000, output_tokens=100),
+    )
+    instance = MagicMock()
+    instance.model = "gemini-3-flash-preview"
+    instance.understand.return_value = result
+    with patch("agent.agents.understander.Understander", return_value=instance), \
+         patch.object(speculative.config, "SPECULATIVE_MODE", True), \
+         patch.object(speculative.config, "SPECULATIVE_RAP", False):
+        yield instance
+
+
+# =============================================================================
+# Pure helpers
+# =============================================================================
+
+class TestQueryDrift:
+    """Token-level difference between raw and rewritten query."""
+
+    def test_identical(self):
+        assert query_drift("Top 10 days by volume", "top 10 days by volume?") == 0.0
+
+    def test_completely_different(self):
+        assert query_drift("hello there", "volatility in march") == 1.0
+
+    def test_small_rewrite_below_threshold(self):
+        drift = query_drift(
+            "top 10 days by volume in 2024",
+            "top 10 days by volume in 2024 year",
+        )
+        assert 0 < drift < 0.2
+
+
+class TestGuessLang:
+    """Only English questions are worth speculating on."""
+
+    def test_english(self):
+        assert guess_lang("what happened after gap up?") == "en"
+
+    def test_russian(self):
+        assert guess_lang("что было после гэпа?") is None
+
+    def test_no_letters(self):
+        assert guess_lang("???") is None
+
+
+# =============================================================================
+# Commit / discard
+# =============================================================================
+
+class TestSpeculation:
+    """Commit or discard speculative Understander."""
+
+    def test_disabled_by_default(self):
+        with patch.object(speculative.config, "SPECULATIVE_MODE", False):
+            assert start_speculation("r0", "top 10 days by volume") is None
+
+    def test_commit_when_intent_matches(self, understander):
+        question = "top 10 days by volume in 2024"
+        start_speculation("r1", question)
+
+        run, decision = take_understander("r1", "data", "en", question)
+
+        assert decision.committed
+        assert run.understander_result().expanded_query.startswith("list top 10")
+        assert decision.latency_saved_ms >= 0
+        understander.understand.assert_called_once()
+
+    def test_discard_on_chitchat(self, understander):
+        started = start_speculation("r2", "hello there")
+        started.understander.result()  # LLM call already sent — can't be cancelled
+        before = get_speculation_stats()["wasted_tokens"]
+
+        run, decision = take_understander("r2", "chitchat", "en", "hello there")
+
+        assert run is None
+        assert not decision.committed
+        assert decision.reason == "intent"
+
+        assert decision.wasted_tokens == 1100
+        assert decision.wasted_cost_usd > 0
+        assert get_speculation_stats()["wasted_tokens"] == before + 1100
+
+    def test_discard_while_running_is_pending(self, understander):
+        running, release = threading.Event(), threading.Event()
+        result = understander.understand.return_value
+
+        def understand(*args, **kwargs):
+            running.set()
+            release.wait(5)
+            return result
+
+        understander.understand.side_effect = understand
+        started = start_speculation("r6", "hello there")
+        assert running.wait(5)  # LLM call sent — can't be cancelled
+        before = get_speculation_stats()["wasted_tokens"]
+
+        _, decision = take_understander("r6", "chitchat", "en", "hello there")
+
+        # Cost isn't known yet — not claimed in the per-request decision
+        assert decision.wasted_pending
+        assert decision.to_dict()["wasted_cost_usd"] is None
+
+        release.set()
+        started.understander.result()
+        deadline = time.time() + 2
+        while get_speculation_stats()["wasted_tokens"] == before and time.time() < deadline:
+            time.sleep(0.01)
+        assert get_speculation_stats()["wasted_tokens"] == before + 1100
+
+    def test_discard_on_drift(self, understander):
+        start_speculation("r3", "top days")
+
+        run, decision = take_understander(
+            "r3", "data", "en", "list top 10 days by volume for the whole 2024 year",
+        )
+
+        assert run is None
+        assert decision.reason == "query_drift"
+
+    def test_discard_on_lang_mismatch(self, understander):
+        start_speculation("r4", "top 10 days")
+
+        _, decision = take_understander("r4", "data", "es", "top 10 days")
+
+        assert decision.reason == "lang"
+
+    def test_discard_after_commit_is_noop(self, understander):
+        start_speculation("r5", "top 10 days")
+        take_understander("r5", "data", "en", "top 10 days")
+
+        assert discard_speculation("r5") is None
+
+    def test_unknown_request(self):
+        assert take_understander("missing", "data", "en", "x") == (None, None)
@@ -0,0 +1,153 @@
+"""Tests for bar storage backends (data/storage.py)."""
+
+import duckdb
+import pandas as pd
+import pytest
+
+import config
+from agent.data.bars import get_bars
+from data import ingest
+from data.ingest import append_csv, ingest_csv
+from data.loader import get_data_info
+from data.storage import bars_relation, migrate_table, partition_dir, storage_bytes, symbol_dir
+
+HEADER = "timestamp,open,high,low,close,volume\n"
+BARS = (
+    "2023-12-29 10:00:00,1.0,2.0,0.5,1.5,10\n"
+    "2024-01-02 09:30:00,2.0,3.0,1.5,2.5,20\n"
+    "2024-01-02 09:31:00,2.5,3.5,2.0,3.0,30\n"
+    "2024-01-02 18:00:00,3.0,4.0,2.5,3.5,40\n"
+)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """DuckDB file with NQ bars, exported to Parquet."""
+    monkeypatch.setattr(config, "DATABASE_PATH", str(tmp_path / "test.duckdb"))
+    monkeypatch.setattr(config, "PARQUET_DIR", str(tmp_path / "parquet"))
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "duckdb")
+    (tmp_path / "bars.csv").write_text(HEADER + BARS)
+    ingest_csv(tmp_path / "bars.csv", "NQ", progress=None)
+    migrate_table()
+    return tmp_path
+
+
+class TestParquetBackend:
+    @pytest.mark.parametrize("timeframe,period", [
+        ("1m", "all"),
+        ("5m", "2024"),
+        ("1H", "all"),
+        ("1D", "all"),
+    ])
+    def test_same_bars_as_table(self, storage, monkeypatch, timeframe, period):
+        table = get_bars("NQ", period, timeframe)
+        monkeypatch.setattr(config, "STORAGE_BACKEND", "parquet")
+        parquet = get_bars("NQ", period, timeframe)
+
+        assert len(table) > 0
+        pd.testing.assert_frame_equal(table, parquet, check_dtype=False)
+
+    def test_partitions_pruned_by_year(self, storage):
+        relation, _ = bars_relation("NQ", "2024-01-01", "2024-02-01", backend="parquet")
+
+        assert "year=2024" in relation
+        assert "year=2023" not in relation
+
+    def test_partitions_sorted_and_compressed(self, storage):
+        path = symbol_dir("NQ") / "year=2024" / "data.parquet"
+        with duckdb.connect() as conn:
+            codecs = conn.execute(
+                f"SELECT DISTINCT compression FROM parquet_metadata('{path}')"
+            ).fetchall()
+            stamps = conn.execute(f"SELECT timestamp FROM read_parquet('{path}')").fetchall()
+
+        assert codecs == [("ZSTD",)]
+        assert stamps == sorted(stamps)
+        assert storage_bytes("parquet") > 0
+
+    def test_unknown_symbol_is_empty(self, storage, monkeypatch):
+        monkeypatch.setattr(config, "STORAGE_BACKEND", "parquet")
+        assert get_bars("ES", "all", "1D").empty
+
+    def test_invalid_symbol_rejected(self, storage):
+        with pytest.raises(ValueError):
+            bars_relation("../NQ", backend="parquet")
+
+    def test_append_rewrites_only_new_years(self, storage, monkeypatch):
+        monkeypatch.setattr(config, "STORAGE_BACKEND", "parquet")
+        old_2023 = symbol_dir("NQ") / "year=2023" / "data.parquet"
+        mtime = old_2023.stat().st_mtime_ns
+
+        (storage / "update.csv").write_text(
+            HEADER + "2024-01-02 18:00:00,9,9,9,9,9\n" + "2024-01-03 09:30:00,4.0,5.0,3.5,4.5,50\n"
+        )
+        stats = append_csv(storage / "update.csv", "NQ", progress=None)
+
+        assert stats.rows_inserted == 1
+        assert old_2023.stat().st_mtime_ns == mtime
+        assert len(get_bars("NQ", "2024", "1m")) == 4
+
+    def test_ingest_without_table(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "PARQUET_DIR", str(tmp_path / "parquet"))
+        (tmp_path / "bars.csv").write_text(HEADER + BARS)
+
+        stats = ingest_csv(tmp_path / "bars.csv", "NQ", db_path=str(tmp_path / "meta.duckdb"),
+                           backend="parquet", progress=None)
+
+        assert stats.rows_inserted == 4
+        assert sorted(p.parent.name for p in symbol_dir("NQ").rglob("*.parquet")) == ["year=2023", "year=2024"]
+        with duckdb.connect(str(tmp_path / "meta.duckdb")) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM ohlcv_1min").fetchone()[0] == 0
+
+
+class TestParquetReplace:
+    """replace=True publishes a new generation of partitions, never deletes first."""
+
+    @pytest.fixture
+    def parquet(self, storage, monkeypatch):
+        monkeypatch.setattr(config, "STORAGE_BACKEND", "parquet")
+        (storage / "new.csv").write_text(HEADER + "2025-03-03 09:30:00,7.0,8.0,6.5,7.5,70\n")
+        return storage
+
+    def test_old_bars_served_during_load(self, parquet, monkeypatch):
+        seen = []
+        merge = ingest.merge_into_parquet
+
+        def merge_and_read(conn, symbol, new_rows, root=None):
+            merged = merge(conn, symbol, new_rows, root)
+            relation, params = bars_relation("NQ")  # What workers read now
+            with duckdb.connect() as reader:
+                seen.append(reader.execute(f"SELECT COUNT(*) FROM {relation}", params).fetchone()[0])
+            return merged
+
+        monkeypatch.setattr(ingest, "merge_into_parquet", merge_and_read)
+        stats = ingest_csv(parquet / "new.csv", "NQ", replace=True, progress=None)
+
+        assert stats.rows_inserted == 1
+        assert seen == [4]
+        assert len(get_bars("NQ", "all", "1m")) == 1
+        assert partition_dir("NQ") != symbol_dir("NQ")
+        assert not (symbol_dir("NQ") / "year=2024").exists()
+        assert not any((parquet / "parquet" / ".staging").iterdir())
+
+    def test_failed_load_keeps_old_bars(self, parquet, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(ingest, "update_coverage", fail)
+        with pytest.raises(RuntimeError):
+            ingest_csv(parquet / "new.csv", "NQ", replace=True, progress=None)
+
+        assert len(get_bars("NQ", "all", "1m")) == 4
+        assert partition_dir("NQ") == symbol_dir("NQ")
+
+    def test_append_after_replace(self, parquet):
+        ingest_csv(parquet / "new.csv", "NQ", replace=True, progress=None)
+        (parquet / "next.csv").write_text(HEADER + "2025-03-04 09:30:00,8.0,9.0,7.5,8.5,80\n")
+        ingest_csv(parquet / "new.csv", "NQ", replace=True, progress=None)
+        stats = append_csv(parquet / "next.csv", "NQ", progress=None)
+
+        assert stats.rows_inserted == 1
+        assert len(get_bars("NQ", "all", "1m")) == 2
+        assert get_data_info().iloc[0]["bars"] == 2  # Only the current generation
+        assert len(list(symbol_dir("NQ").glob("g*"))) == config.PARQUET_KEEP_GENERATIONS
@@ -0,0 +1,245 @@
+"""Tests for local durable trace store and payload policy."""
+
+import gzip
+import json
+import time
+
+import pytest
+
+from agent.logging.trace_store import OP_KEY, QUARANTINE, RejectedRows, TraceStore, apply_rows_policy, expand_rows
+from agent.logging.trace_writer import TraceWriter
+
+
+def _rows(n: int, start: int = 0) -> list[dict]:
+    return [{"request_id": "r1", "step_number": i, "agent_name": "executor"} for i in range(start, start + n)]
+
+
+class FlakyInsert:
+    """Insert stub that fails while `down` is True."""
+
+    def __init__(self):
+        self.down = False
+        self.rows: list[dict] = []
+
+    def __call__(self, rows: list[dict]):
+        if self.down:
+            raise ConnectionError("supabase unavailable")
+        self.rows.extend(rows)
+
+
+class ForeignKeyInsert(FlakyInsert):
+    """Supabase stub: request_traces rows need their chat_logs row (FK)."""
+
+    def __init__(self):
+        super().__init__()
+        self.chat_logs: set[str] = set()
+
+    def __call__(self, rows: list[dict]):
+        if self.down:
+            raise ConnectionError("supabase unavailable")
+        for row in rows:
+            if row.get(OP_KEY) == "chat_log_init":
+                self.chat_logs.add(row["request_id"])
+            elif not row.get(OP_KEY) and row["request_id"] not in self.chat_logs:
+                raise RejectedRows("23503: violates foreign key constraint")
+        self.rows.extend(rows)
+
+
+def _request(request_id: str, steps: int) -> list[dict]:
+    """chat_logs init, traces and complete of one request, as queued."""
+    return (
+        [{OP_KEY: "chat_log_init", "request_id": request_id}]
+        + [{"request_id": request_id, "step_number": i} for i in range(steps)]
+        + [{OP_KEY: "chat_log_complete", "request_id": request_id}]
+    )
+
+
+@pytest.fixture
+def insert():
+    return FlakyInsert()
+
+
+class TestTraceStore:
+    """Rows are stored locally first and shipped in order."""
+
+    def test_ship_when_available(self, tmp_path, insert):
+        store = TraceStore(tmp_path)
+
+        store.append(_rows(3))
+        assert store.ship(insert) == 3
+
+        assert [r["step_number"] for r in insert.rows] == [0, 1, 2]
+
+    def test_outage_keeps_rows_and_replays_in_order(self, tmp_path, insert):
+        store = TraceStore(tmp_path, retry_interval=0)
+        insert.down = True
+
+        store.append(_rows(2))
+        assert store.ship(insert) == 0
+        store.append(_rows(2, start=2))
+
+        insert.down = False
+        assert store.ship(insert) == 4
+        assert [r["step_number"] for r in insert.rows] == [0, 1, 2, 3]
+
+    def test_backoff_after_failure(self, tmp_path, insert):
+        store = TraceStore(tmp_path, retry_interval=60)
+        insert.down = True
+        store.append(_rows(1))
+        store.ship(insert)
+
+        insert.down = False
+        assert store.ship(insert) == 0  # still backing off
+        assert store.ship(insert, force=True) == 1
+
+    def test_rotation_compresses_unshipped(self, tmp_path, insert):
+        store = TraceStore(tmp_path, segment_max_bytes=200)
+        insert.down = True
+
+        store.append(_rows(5))
+
+        segments = list(tmp_path.glob("*.jsonl.gz"))
+        assert len(segments) == 1
+        assert len(gzip.decompress(segments[0].read_bytes()).splitlines()) == 5
+
+        insert.down = False
+        assert store.ship(insert, force=True) == 5
+        assert not list(tmp_path.glob("*.jsonl*"))
+
+    def test_rotation_deletes_shipped(self, tmp_path, insert):
+        store = TraceStore(tmp_path, segment_max_bytes=200)
+        store.append(_rows(1))
+        store.ship(insert)
+
+        store.append(_rows(5, start=1))  # rotates; first row already shipped
+        store.ship(insert, force=True)
+
+        assert [r["step_number"] for r in insert.rows] == list(range(6))
+
+    def test_new_process_replays_leftover_segment(self, tmp_path, insert):
+        insert.down = True
+        crashed = TraceStore(tmp_path)
+        crashed.append(_rows(3))
+        crashed.ship(insert)
+        crashed.close()
+
+        insert.down = False
+        replayer = TraceStore(tmp_path)
+        assert replayer.ship(insert) == 3
+
+    def test_retention_drops_oldest(self, tmp_path, insert):
+        store = TraceStore(tmp_path, segment_max_bytes=100, max_total_bytes=1)
+
+        store.append(_rows(3))
+        time.sleep(0.002)
+        store.append(_rows(3, start=3))
+
+        assert store.get_stats()["dropped_segments"] >= 1
+
+
+class TestChatLogsReplay:
+    """chat_logs writes are stored with traces; rejected rows don't block the rest."""
+
+    def test_parent_row_replayed_before_traces(self, tmp_path):
+        insert = ForeignKeyInsert()
+        store = TraceStore(tmp_path, retry_interval=0)
+        insert.down = True
+        store.append(_request("r1", 2))
+        store.ship(insert)
+
+        insert.down = False
+        assert store.ship(insert) == 4
+
+        assert [r.get(OP_KEY) or r["step_number"] for r in insert.rows] == [
+            "chat_log_init", 0, 1, "chat_log_complete",
+        ]
+        assert store.get_stats()["quarantined"] == 0
+
+    def test_trace_with_missing_parent_is_quarantined(self, tmp_path):
+        insert = ForeignKeyInsert()
+        insert.down = True
+        crashed = TraceStore(tmp_path)
+        # Parent chat_logs row never made it (e.g. lost before it was stored)
+        crashed.append([{"request_id": "r0", "step_number": 0}] + _request("r1", 1))
+        crashed.ship(insert)
+        crashed.close()
+
+        insert.down = False
+        replayer = TraceStore(tmp_path)
+        assert replayer.ship(insert) == 3
+        assert replayer.ship(insert, force=True) == 0  # not retried
+
+        assert [r["request_id"] for r in insert.rows] == ["r1"] * 3
+        quarantined = [json.loads(line) for line in (tmp_path / QUARANTINE).read_text().splitlines()]
+        assert [q["row"]["request_id"] for q in quarantined] == ["r0"]
+        assert "23503" in quarantined[0]["error"]
+        assert not list(tmp_path.glob("traces-*"))
+
+    def test_bad_row_in_bulk_chunk_does_not_drop_others(self, tmp_path):
+        insert = ForeignKeyInsert()
+        insert.chat_logs.add("r1")
+        store = TraceStore(tmp_path)
+
+        store.append(_rows(2) + [{"request_id": "r0", "step_number": 9}] + _rows(1, start=2))
+        assert store.ship(insert) == 3
+
+        assert [r["step_number"] for r in insert.rows] == [0, 1, 2]
+        assert store.get_stats()["quarantined"] == 1
+
+
+class TestRowsPolicy:
+    """Large executor rows are bounded in output_data."""
+
+    def _output(self, n: int) -> dict:
+        return {"data": [{"step_id": "s1", "rows": [{"x": i} for i in range(n)]}]}
+
+    def test_small_rows_untouched(self):
+        output = self._output(5)
+        assert apply_rows_policy(output, inline_max=10) == output
+
+    def test_compress_roundtrip(self):
+        packed = apply_rows_policy(self._output(50), policy="compress", inline_max=10)
+        result = packed["data"][0]
+
+        assert result["rows"] == []
+        assert result["row_count"] == 50
+        assert not result["rows_truncated"]
+        assert expand_rows(result) == [{"x": i} for i in range(50)]
+        assert len(json.dumps(packed)) < len(json.dumps(self._output(50)))
+
+    def test_compress_caps_rows(self):
+        result = apply_rows_policy(self._output(50), inline_max=10, rows_max=20)["data"][0]
+
+        assert len(expand_rows(result)) == 20
+        assert result["rows_total"] == 50
+        assert result["rows_truncated"]
+
+    def test_truncate(self):
+        result = apply_rows_policy(self._output(50), policy="truncate", inline_max=10)["data"][0]
+
+        assert len(result["rows"]) == 10
+        assert result["rows_total"] == 50
+
+    def test_input_not_modified(self):
+        output = self._output(50)
+        apply_rows_policy(output, inline_max=10)
+        assert len(output["data"][0]["rows"]) == 50
+
+
+class TestWriterWithStore:
+    def test_writes_go_to_store_first(self, tmp_path, insert):
+        insert.down = True
+        store = TraceStore(tmp_path, retry_interval=0)
+        writer = TraceWriter(insert, store=store, flush_interval=0.01)
+
+        writer.enqueue(_rows(1)[0])
+        writer.flush(timeout=2)
+        assert writer.get_stats()["stored"] == 1
+        assert insert.rows == []
+
+        insert.down = False
+        writer.enqueue(_rows(1, start=1)[0])
+        writer.flush(timeout=2)
+        writer.close()
+
+        assert [r["step_number"] for r in insert.rows] == [0, 1]
@@ -0,0 +1,221 @@
+"""Tests for background batched trace writer."""
+
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from postgrest.exceptions import APIError
+
+import config
+from agent.logging import supabase, trace_writer
+from agent.logging.trace_store import OP_KEY, RejectedRows
+from agent.logging.trace_writer import TraceWriter, ship_rows
+
+
+def _row(i: int, **extra) -> dict:
+    return {"request_id": "r1", "step_number": i, "agent_name": "executor", **extra}
+
+
+class SlowInsert:
+    """Insert stub recording batches, optionally blocked until released."""
+
+    def __init__(self, delay: float = 0.0, fail_times: int = 0):
+        self.batches: list[list[dict]] = []
+        self.delay = delay
+        self.fail_times = fail_times
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, rows: list[dict]):
+        self.release.wait()
+        time.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("supabase down")
+        self.batches.append(rows)
+
+
+class TestTraceWriter:
+    """Rows are batched off the request path."""
+
+    def test_enqueue_does_not_wait_for_insert(self):
+        insert = SlowInsert(delay=0.5)
+        writer = TraceWriter(insert, flush_interval=0.01)
+
+        start = time.monotonic()
+        writer.enqueue(_row(1))
+        assert time.monotonic() - start < 0.05
+
+        assert writer.flush(timeout=2)
+        assert writer.get_stats()["written"] == 1
+        writer.close()
+
+    def test_rows_are_batched(self):
+        insert = SlowInsert()
+        insert.release.clear()
+        writer = TraceWriter(insert, batch_size=10, flush_interval=0.05)
+
+        for i in range(25):
+            writer.enqueue(_row(i))
+        insert.release.set()
+        writer.flush(timeout=2)
+
+        assert sum(len(b) for b in insert.batches) == 25
+        assert all(len(b) <= 10 for b in insert.batches)
+        assert len(insert.batches) < 25
+        writer.close()
+
+    def test_serialization_in_background(self):
+        insert = SlowInsert()
+        writer = TraceWriter(insert, flush_interval=0.01)
+
+        writer.enqueue(_row(1, output_data={"date": pd.Timestamp("2024-01-02"), "at": datetime(2024, 1, 2)}))
+        writer.flush(timeout=2)
+
+        output = insert.batches[0][0]["output_data"]
+        assert output == {"date": "2024-01-02 00:00:00", "at": "2024-01-02 00:00:00"}
+        writer.close()
+
+    def test_drop_oldest_when_full(self):
+        insert = SlowInsert()
+        insert.release.clear()
+        writer = TraceWriter(insert, max_queue=3, batch_size=1, flush_interval=0.01)
+
+        writer.enqueue(_row(0))
+        time.sleep(0.05)  # flusher holds row 0, blocked in insert
+        for i in range(1, 6):
+            assert writer.enqueue(_row(i))
+        insert.release.set()
+        writer.flush(timeout=2)
+
+        written = [b[0]["step_number"] for b in insert.batches]
+        assert written == [0, 3, 4, 5]
+        assert writer.get_stats()["dropped"] == 2
+        writer.close()
+
+    def test_drop_oldest_keeps_chat_log_writes(self):
+        insert = SlowInsert()
+        insert.release.clear()
+        writer = TraceWriter(insert, max_queue=2, batch_size=1, flush_interval=0.01)
+
+        writer.enqueue(_row(0))
+        time.sleep(0.05)  # flusher holds row 0, blocked in insert
+        writer.enqueue({OP_KEY: "chat_log_init", "request_id": "r2"})
+        for i in range(1, 4):
+            assert writer.enqueue(_row(i))
+        assert writer.enqueue({OP_KEY: "chat_log_complete", "request_id": "r2"})  # Queue full: still queued
+        insert.release.set()
+        writer.flush(timeout=2)
+
+        written = [b[0].get(OP_KEY) or b[0]["step_number"] for b in insert.batches]
+        assert written == [0, "chat_log_init", 3, "chat_log_complete"]
+        assert writer.get_stats()["dropped"] == 2
+        writer.close()
+
+    def test_drop_newest_when_full(self):
+        insert = SlowInsert()
+        insert.release.clear()
+        writer = TraceWriter(insert, max_queue=2, batch_size=1, flush_interval=0.01, drop_policy="drop_newest")
+
+        writer.enqueue(_row(0))
+        time.sleep(0.05)
+        results = [writer.enqueue(_row(i)) for i in range(1, 4)]
+        insert.release.set()
+        writer.flush(timeout=2)
+
+        assert results == [True, True, False]
+        assert [b[0]["step_number"] for b in insert.batches] == [0, 1, 2]
+        writer.close()
+
+    def test_retry_then_succeed(self):
+        insert = SlowInsert(fail_times=1)
+        writer = TraceWriter(insert, flush_interval=0.01)
+
+        writer.enqueue(_row(1))
+        writer.flush(timeout=3)
+
+        stats = writer.get_stats()
+        assert stats["written"] == 1
+        assert stats["failed"] == 0
+        writer.close()
+
+    def test_close_flushes_queue(self):
+        insert = SlowInsert()
+        writer = TraceWriter(insert, flush_interval=10)
+
+        for i in range(5):
+            writer.enqueue(_row(i))
+        writer.close(timeout=2)
+
+        assert sum(len(b) for b in insert.batches) == 5
+        assert not writer.enqueue(_row(99))
+
+    def test_chat_log_write_shipped_alone(self):
+        insert = SlowInsert()
+        insert.release.clear()
+        writer = TraceWriter(insert, batch_size=10, flush_interval=0.05)
+
+        writer.enqueue({OP_KEY: "chat_log_init", "request_id": "r1"})
+        for i in range(3):
+            writer.enqueue(_row(i))
+        insert.release.set()
+        writer.flush(timeout=2)
+
+        assert [len(b) for b in insert.batches] == [1, 3]
+        assert insert.batches[0][0][OP_KEY] == "chat_log_init"
+        writer.close()
+
+
+class TestChatLogs:
+    """chat_logs writes are queued with traces, not sent from the request."""
+
+    def test_sync_writes_are_enqueued(self, monkeypatch):
+        queued = []
+        monkeypatch.setattr(config, "SUPABASE_URL", "https://example.supabase.co")
+        monkeypatch.setattr(trace_writer, "get_trace_writer", lambda: SimpleNamespace(enqueue=queued.append))
+        monkeypatch.setattr(supabase, "get_supabase", lambda: pytest.fail("request path called Supabase"))
+
+        supabase.init_chat_log_sync("r1", "u1", "c1", "question")
+        supabase.complete_chat_log_sync("r1", "c1", response="answer", route="data")
+
+        assert [row[OP_KEY] for row in queued] == ["chat_log_init", "chat_log_complete"]
+        assert queued[1]["response"] == "answer"
+
+
+class TestShipRows:
+    """Permanent Supabase errors are reported as RejectedRows, the rest re-raised."""
+
+    def _fail_with(self, monkeypatch, error):
+        def insert(rows):
+            raise error
+        monkeypatch.setattr(trace_writer, "_insert_request_traces", insert)
+
+    def test_foreign_key_violation_is_rejected(self, monkeypatch):
+        self._fail_with(monkeypatch, APIError({"code": "23503", "message": "violates foreign key constraint"}))
+
+        with pytest.raises(RejectedRows, match="23503"):
+            ship_rows([_row(1)])
+
+    def test_outage_is_retried(self, monkeypatch):
+        self._fail_with(monkeypatch, ConnectionError("supabase down"))
+
+        with pytest.raises(ConnectionError):
+            ship_rows([_row(1)])
+
+    def test_rejected_rows_not_retried_without_store(self):
+        calls = []
+
+        def insert(rows):
+            calls.append(rows)
+            raise RejectedRows("23503")
+
+        writer = TraceWriter(insert, flush_interval=0.01)
+        writer.enqueue(_row(1))
+        writer.flush(timeout=2)
+
+        assert len(calls) == 1
+        assert writer.get_stats()["failed"] == 1
+        writer.close()
@@ -0,0 +1,30 @@
+"""Tests for startup warm-up."""
+
+from agent import warmup
+from agent.rules.filters import parse_filters
+
+
+class TestWarmUp:
+    def test_failing_step_does_not_stop_others(self, monkeypatch):
+        ran = []
+
+        def broken():
+            raise RuntimeError("no database")
+
+        monkeypatch.setattr(warmup, "STEPS", [
+            ("duckdb", broken),
+            ("rules", lambda: ran.append("rules")),
+        ])
+
+        result = warmup.warm_up()
+
+        assert ran == ["rules"]
+        assert result["errors"] == {"duckdb": "no database"}
+        assert set(result["steps"]) == {"duckdb", "rules"}
+
+    def test_rules_step_parses_all_examples(self):
+        warmup._build_rules()
+        assert parse_filters("monday, change > 0") == [
+            {"type": "categorical", "weekday": "monday"},
+            {"type": "comparison", "metric": "change", "op": ">", "value": 0.0},
+        ]
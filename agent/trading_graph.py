@@ -6,6 +6,7 @@ Wraps LangGraph execution with SSE events for API consumption.
 
 from __future__ import annotations
 
+import logging
 import time
 from dataclasses import dataclass, field
 from typing import Generator, Any
@@ -17,7 +18,11 @@ from agent.graph import get_graph
 from agent.state import AgentState
 from agent.types import Usage
 from agent.logging.supabase import init_chat_log_sync, complete_chat_log_sync
-from agent.memory.conversation import ConversationMemory
+from agent.memory import get_memory_manager
+from agent.memory.checkpoints import get_chat_checkpoints
+from agent.speculative import discard_speculation
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -29,12 +34,20 @@ class AgentUsage:
     cached_tokens: int = 0
     cost_usd: float = 0.0
 
+    @property
+    def cached_ratio(self) -> float:
+        """Share of input tokens served from context cache."""
+        if not self.input_tokens:
+            return 0.0
+        return round(self.cached_tokens / self.input_tokens, 3)
+
     def to_dict(self) -> dict:
         return {
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
             "thinking_tokens": self.thinking_tokens,
             "cached_tokens": self.cached_tokens,
+            "cached_ratio": self.cached_ratio,
             "cost_usd": self.cost_usd,
         }
 
@@ -71,6 +84,7 @@ class TradingGraph:
     Yields SSE events:
     - step_start: agent starting work
     - step_end: agent finished with output
+    - presenter_partial: one result presented (multi-step questions, arrives before step_end)
     - text_delta: streaming text (for response)
     - usage: token usage summary
     - done: completion with total duration
@@ -97,6 +111,7 @@ class TradingGraph:
         original_question: str | None = None,
         clarification_history: list[dict] | None = None,
         needs_title: bool = False,
+        memory_version: int | None = None,
     ) -> Generator[dict, None, None]:
         """
         Stream SSE events for question processing.
@@ -111,6 +126,7 @@ class TradingGraph:
             original_question: Original question (for clarification)
             clarification_history: Previous clarification turns
             needs_title: True if chat session needs a title (first message)
+            memory_version: chat_sessions.memory_version (validates cached memory)
 
         Yields:
             SSE events: step_start, step_end, text_delta, usage, done
@@ -126,21 +142,19 @@ class TradingGraph:
             clarification_history=clarification_history,
         )
 
-        # Load conversation memory (for context)
+        # Conversation memory (for context) — cached per chat, loaded on miss/stale version
         memory_context = None
         context_compacted = False
 
         if chat_id:
             try:
-                memory = ConversationMemory(chat_id=chat_id, user_id=user_id)
-                if memory.load_sync():
-                    memory_context = memory.get_context() if (memory.recent or memory.summaries or memory.key_facts) else None
-                    context_compacted = len(memory.summaries) > 0
-                    ctx.memory = memory
+                memory = get_memory_manager().get_or_create(chat_id, user_id, version=memory_version)
+                memory_context = memory.get_context() if (memory.recent or memory.summaries or memory.key_facts) else None
+                context_compacted = len(memory.summaries) > 0
+                ctx.memory = memory
             except Exception as e:
                 # Memory load failed - continue without context
-                import logging
-                logging.getLogger(__name__).warning(f"Failed to load memory: {e}")
+                logger.warning(f"Failed to load memory: {e}")
 
         # Initialize chat log at the START of request
         init_chat_log_sync(
@@ -166,7 +180,11 @@ class TradingGraph:
         }
 
         # Run graph and yield events
-        yield from self._run_graph(state, ctx)
+        try:
+            yield from self._run_graph(state, ctx)
+        finally:
+            # Drop leftover speculative work (clarify path, errors, client disconnect)
+            discard_speculation(ctx.request_id, reason="not_used")
 
     def _run_graph(
         self,
@@ -179,8 +197,13 @@ class TradingGraph:
         agents_seen = set()
         last_state = state
 
-        # Use stream to get node-by-node updates
-        for event in self.graph.stream(state, stream_mode="updates"):
+        # Use stream to get node-by-node updates (+ custom events from nodes)
+        for mode, event in self.graph.stream(state, stream_mode=["updates", "custom"]):
+            # Custom events are already SSE-shaped (e.g. presenter_partial)
+            if mode == "custom":
+                yield event
+                continue
+
             # event is dict: {node_name: node_output}
             for node_name, output in event.items():
                 # Skip if we've already processed this agent in this run
@@ -283,6 +306,7 @@ class TradingGraph:
             "output_tokens": total_usage.output_tokens,
             "thinking_tokens": total_usage.thinking_tokens,
             "cached_tokens": total_usage.cached_tokens,
+            "cached_ratio": total_usage.cached_ratio,
             "cost": total_usage.cost_usd,
         }
 
@@ -311,15 +335,25 @@ class TradingGraph:
             usage=usage_for_log,
         )
 
-        # Update conversation memory with this exchange
+        # Checkpoint chat state (clarification, plan) — next message reads it locally
+        if ctx.chat_id:
+            try:
+                get_chat_checkpoints().save(ctx.chat_id, {
+                    **last_state,
+                    "user_id": ctx.user_id,
+                    "route": route,
+                    # Only a clarifier question in THIS request awaits an answer
+                    "awaiting_clarification": "clarify" in agents_seen,
+                })
+            except Exception as e:
+                logger.warning(f"Failed to save chat checkpoint: {e}")
+
+        # Update conversation memory with this exchange (persisted in background)
         if ctx.memory and response:
             try:
-                ctx.memory.add_message("user", ctx.question)
-                ctx.memory.add_message("assistant", response)
-                # Note: compaction and save happen automatically in add_message if needed
+                get_memory_manager().append_exchange(ctx.memory, ctx.question, response)
             except Exception as e:
-                import logging
-                logging.getLogger(__name__).warning(f"Failed to update memory: {e}")
+                logger.warning(f"Failed to update memory: {e}")
 
     def _build_input_data(self, agent_name: str, state: dict) -> dict:
         """Build input_data for logging based on agent type."""
@@ -387,6 +387,14 @@ class Usage(BaseModel):
             + (self.cached_tokens / 1_000_000) * prices["cached"]
         )
 
+    @computed_field
+    @property
+    def cached_ratio(self) -> float:
+        """Share of input tokens served from context cache."""
+        if not self.input_tokens:
+            return 0.0
+        return round(self.cached_tokens / self.input_tokens, 3)
+
     def __add__(self, other: "Usage") -> "Usage":
         """Aggregate usage from multiple calls."""
         return Usage(
@@ -0,0 +1,120 @@
+"""
+Startup warm-up — pay cold-start costs before the first request.
+
+Without it the first request after deploy compiles the LangGraph, loads
+RAP chunks + embeddings, builds filter regexes, imports google-genai and
+supabase, and reads DuckDB pages from disk. Called from the FastAPI
+lifespan (api.py), so uvicorn accepts requests only once this is done.
+
+Each step is timed and isolated: a failing step is logged, the rest runs.
+No network calls to Gemini (query embeddings, context caches) — those
+stay lazy.
+
+Usage:
+    timings = warm_up()  # {"total_ms": ..., "steps": {"graph": 412, ...}}
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date, timedelta
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _import_clients():
+    """Heavy client libraries imported lazily elsewhere."""
+    import jwt  # noqa: F401 — API auth
+    from google import genai  # noqa: F401
+    from google.genai import types  # noqa: F401
+    import agent.memory.prompt_cache  # noqa: F401 — Gemini context caches
+
+    from agent.logging.supabase import get_supabase
+    get_supabase()
+
+
+def _compile_graph():
+    from agent.graph import get_graph
+    get_graph()
+
+
+def _load_rap():
+    """RAP chunks, embeddings matrix (paged in) and static parser prompt."""
+    import numpy as np
+    from agent.prompts.semantic_parser.rap import get_rap
+
+    rap = get_rap()
+    matrix = rap.embedder.matrix
+    if matrix.size:
+        np.asarray(matrix).sum()  # touch memory-mapped pages
+    for instrument in config.WARMUP_SYMBOLS:
+        rap.build_static(instrument)
+
+
+def _build_rules():
+    """Filter regexes and pattern names (exercised on prompt examples)."""
+    from agent.rules.filters import get_examples_for_prompt, parse_filters
+
+    for example in get_examples_for_prompt():
+        parse_filters(example)
+
+
+def _warm_duckdb():
+    """Representative get_bars queries — DuckDB file pages + holiday calendars."""
+    from agent.data.bars import get_bars
+
+    end = date.today() + timedelta(days=1)
+    start = end - timedelta(days=config.WARMUP_DAYS)
+    period = f"{start}:{end}"
+    for symbol in config.WARMUP_SYMBOLS:
+        for timeframe in config.WARMUP_TIMEFRAMES:
+            get_bars(symbol, period, timeframe)
+
+
+def _start_services():
+    """Background services created on first use."""
+    from agent.memory.checkpoints import get_chat_checkpoints
+    from agent.memory.manager import get_memory_manager
+    from agent.logging.trace_writer import get_trace_writer
+
+    get_memory_manager()
+    get_chat_checkpoints()
+    get_trace_writer()
+
+
+STEPS = [
+    ("imports", _import_clients),
+    ("graph", _compile_graph),
+    ("rap", _load_rap),
+    ("rules", _build_rules),
+    ("duckdb", _warm_duckdb),
+    ("services", _start_services),
+]
+
+
+def warm_up() -> dict:
+    """
+    Run all warm-up steps.
+
+    Returns:
+        {"total_ms": int, "steps": {name: ms}, "errors": {name: str}}
+    """
+    start = time.perf_counter()
+    steps: dict[str, int] = {}
+    errors: dict[str, str] = {}
+
+    for name, step in STEPS:
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            errors[name] = str(e)
+            logger.warning(f"Warm-up step '{name}' failed: {e}")
+        steps[name] = int((time.perf_counter() - step_start) * 1000)
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    logger.info(f"Warm-up done in {total_ms}ms: {steps}")
+    return {"total_ms": total_ms, "steps": steps, "errors": errors}
@@ -11,23 +11,34 @@ Endpoints:
     POST /chat/stream - SSE streaming chat with agents
     GET  /chat/history - Get user's chat history with traces
     GET  /data        - Get available trading data info
+    GET  /metrics     - Prometheus metrics (all workers, needs METRICS_TOKEN)
 
 Run:
     uvicorn api:app --reload
 """
 
+import hmac
 import json
 import math
-import jwt
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from typing import Optional
-from supabase import create_client
 
 from data import get_data_info, init_database
 import config
+from agent.admission import Overloaded, get_admission
+from agent.logging import metrics
+from agent.logging.supabase import get_supabase
+from agent.logging.trace_writer import shutdown_trace_writer
+from agent.memory.checkpoints import get_chat_checkpoints
+from agent.memory.manager import shutdown_memory_manager
+from agent.logging.trace_store import expand_rows
 from constants import COLUMN_ORDER
 
 
@@ -54,16 +65,30 @@ def clean_for_json(obj):
     return obj
 
 
-# Initialize Supabase client
-supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY) if config.SUPABASE_URL else None
+# Initialize database on startup (current generation with DB_GENERATIONS)
+init_database()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App lifecycle: warm up and start metrics sync; flush memory, traces and metrics on shutdown."""
+    import asyncio
+    from agent.warmup import warm_up
+
+    if config.WARMUP_ENABLED:
+        # Before accepting requests: first user doesn't pay for cold start
+        await asyncio.to_thread(warm_up)
+    metrics.start_metrics_sync()
+    yield
+    shutdown_memory_manager()
+    shutdown_trace_writer()
+    metrics.stop_metrics_sync()
 
-# Initialize database on startup
-init_database(config.DATABASE_PATH)
 
 app = FastAPI(
     title="Trading Analytics Agent",
     description="AI-powered trading data analysis with multi-agent architecture",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -82,6 +107,8 @@ def get_user_id(authorization: Optional[str] = Header(None)) -> Optional[str]:
     if not authorization or not authorization.startswith("Bearer "):
         return None
 
+    import jwt  # lazy: heavy crypto imports, preloaded by warm-up
+
     token = authorization.split(" ")[1]
     try:
         # Verify JWT signature with Supabase secret
@@ -157,6 +184,17 @@ def root():
     return {"status": "ok", "service": "Trading Analytics Agent", "version": "2.0"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics, merged across uvicorn workers (404 unless METRICS_TOKEN is set)."""
+    if not config.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {config.METRICS_TOKEN}".encode()
+    if not hmac.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # =============================================================================
 # Chat Sessions API
 # =============================================================================
@@ -164,6 +202,7 @@ def root():
 @app.get("/chats", response_model=list[ChatSession])
 async def list_chats(user_id: str = Depends(require_auth)):
     """Get all active chat sessions for the authenticated user."""
+    supabase = get_supabase()
     if not supabase:
         return []
 
@@ -199,6 +238,7 @@ async def create_chat(
     user_id: str = Depends(require_auth)
 ):
     """Create a new chat session."""
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
 
@@ -227,6 +267,7 @@ async def update_chat(
     user_id: str = Depends(require_auth)
 ):
     """Update chat session title."""
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
 
@@ -257,6 +298,7 @@ async def update_chat(
 @app.delete("/chats/{chat_id}")
 async def delete_chat(chat_id: str, user_id: str = Depends(require_auth)):
     """Soft delete a chat session (keeps data for analytics, hides from UI)."""
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
 
@@ -291,6 +333,7 @@ async def get_chat_messages(
     limit: int = 100
 ):
     """Get messages for a specific chat session with traces."""
+    supabase = get_supabase()
     if not supabase:
         return []
 
@@ -367,6 +410,7 @@ async def get_request_data(
     user_id: str = Depends(require_auth),
 ):
     """Get full data for a specific request from executor trace."""
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not available")
 
@@ -399,7 +443,7 @@ async def get_request_data(
             data = output_data.get("data", [])
             all_rows = []
             for result in data:
-                all_rows.extend(result.get("rows", []))
+                all_rows.extend(expand_rows(result))
 
             # Order columns by priority (JSONB doesn't preserve key order)
             columns = _order_columns(list(all_rows[0].keys())) if all_rows else []
@@ -437,6 +481,7 @@ async def update_message_feedback(
     user_id: str = Depends(require_auth),
 ):
     """Update feedback for a message."""
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -474,21 +519,25 @@ async def update_message_feedback(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def get_or_create_chat_session(user_id: str, chat_id: str | None) -> str:
+def get_or_create_chat_session(user_id: str, chat_id: str | None) -> tuple[str, int | None]:
     """
     Get existing chat session or create new one.
 
     Logic:
     - If chat_id provided and valid → use it
     - If chat_id not provided → create new session
+
+    Returns:
+        (chat_id, memory_version) — version validates cached conversation memory
     """
+    supabase = get_supabase()
     if not supabase:
-        return chat_id or "default"
+        return chat_id or "default", None
 
     # If chat_id provided, verify and use it
     if chat_id:
         result = supabase.table("chat_sessions") \
-            .select("id") \
+            .select("id, memory_version") \
             .eq("id", chat_id) \
             .eq("user_id", user_id) \
             .eq("status", "active") \
@@ -499,7 +548,7 @@ def get_or_create_chat_session(user_id: str, chat_id: str | None) -> str:
                 .update({"updated_at": "now()"}) \
                 .eq("id", chat_id) \
                 .execute()
-            return chat_id
+            return chat_id, result.data[0].get("memory_version")
 
     # No chat_id provided → create new session
     result = supabase.table("chat_sessions").insert({
@@ -509,11 +558,12 @@ def get_or_create_chat_session(user_id: str, chat_id: str | None) -> str:
 
     new_chat_id = result.data[0]["id"]
     print(f"[API] Created new chat session: {new_chat_id}")
-    return new_chat_id
+    return new_chat_id, result.data[0].get("memory_version")
 
 
 def check_needs_title(chat_id: str) -> bool:
     """Check if chat session needs a title (title is NULL)."""
+    supabase = get_supabase()
     if not supabase:
         return False
 
@@ -535,6 +585,7 @@ def check_needs_title(chat_id: str) -> bool:
 
 async def save_chat_title(chat_id: str, title: str) -> str | None:
     """Save suggested title to chat session. Returns title if saved."""
+    supabase = get_supabase()
     if not supabase or not title:
         return None
 
@@ -553,17 +604,38 @@ async def save_chat_title(chat_id: str, title: str) -> str | None:
         return None
 
 
-def get_clarification_state(chat_id: str) -> dict | None:
+def get_clarification_state(chat_id: str, user_id: str) -> dict | None:
     """
     Check if last message was a clarification request.
 
+    Reads the chat's local checkpoint (saved by TradingGraph after each
+    request); falls back to Supabase only for chats without a checkpoint
+    (e.g. last message before checkpoints were introduced).
+
     Returns dict with clarification data if awaiting response, None otherwise.
     """
-    if not supabase or not chat_id:
+    supabase = get_supabase()
+    # Without Supabase all users share chat "default" — no clarification state
+    if not supabase or not chat_id or chat_id == "default":
         return None
 
     try:
-        # Get last chat_log for this chat
+        state = get_chat_checkpoints().load(chat_id, user_id)
+    except Exception as e:
+        print(f"Failed to load chat checkpoint: {e}")
+        state = None
+
+    if state is not None:
+        if not state.get("awaiting_clarification"):
+            return None
+        return {
+            "awaiting_clarification": True,
+            "original_question": state.get("original_question"),
+            "clarification_history": state.get("clarification_history") or [],
+        }
+
+    try:
+        # No checkpoint — get last chat_log for this chat
         result = supabase.table("chat_logs") \
             .select("request_id, route, question") \
             .eq("chat_id", chat_id) \
@@ -610,6 +682,7 @@ def get_clarification_state(chat_id: str) -> dict | None:
 
 def get_recent_chat_history(user_id: str, limit: int = config.CHAT_HISTORY_LIMIT) -> list[dict]:
     """Fetch recent chat history from Supabase for context."""
+    supabase = get_supabase()
     if not supabase:
         return []
 
@@ -650,36 +723,59 @@ async def chat_stream(request: ChatRequest, user_id: str = Depends(require_auth)
     - usage: token usage
     - done: completion (includes chat_id for frontend)
 
+    - queued: waiting for a free slot (position, eta_seconds)
+    - error: failure; shed requests also carry code + retry_after
+
     Logging is handled by TradingGraph (init_chat_log, log_trace_step, complete_chat_log).
     """
     import asyncio
     from agent.trading_graph import trading_graph
 
-    # Get or create chat session
-    chat_id = get_or_create_chat_session(user_id, request.chat_id)
-    print(f"[API] chat_stream: request.chat_id={request.chat_id}, resolved chat_id={chat_id}")
-
-    # Check if chat needs a title (first message)
-    needs_title = check_needs_title(chat_id)
-    print(f"[API] needs_title={needs_title} for chat_id={chat_id}")
+    # Admission before any DB/LLM work: over the rate or queue full → shed now
+    try:
+        ticket = get_admission().check(user_id)
+    except Overloaded as e:
+        return _shed_response(e)
 
-    # Check if we're awaiting clarification response
-    clarification_state = get_clarification_state(chat_id)
+    # Sync Supabase / graph calls run in the threadpool — the event loop keeps
+    # admitting, queueing and streaming other requests meanwhile
+    try:
+        # Get or create chat session
+        chat_id, memory_version = await run_in_threadpool(get_or_create_chat_session, user_id, request.chat_id)
+        print(f"[API] chat_stream: request.chat_id={request.chat_id}, resolved chat_id={chat_id}")
+
+        # Check if chat needs a title (first message)
+        needs_title = await run_in_threadpool(check_needs_title, chat_id)
+        print(f"[API] needs_title={needs_title} for chat_id={chat_id}")
+
+        # Check if we're awaiting clarification response
+        clarification_state = await run_in_threadpool(get_clarification_state, chat_id, user_id)
+    except BaseException:
+        ticket.release()
+        raise
 
     async def generate():
         suggested_title = None
+        status = "ok"
+        metrics.SSE_IN_FLIGHT.inc()
 
         try:
-            for event in trading_graph.stream_sse(
+            async for event in ticket.wait():
+                yield f"data: {json.dumps(event)}\n\n"
+
+            events = trading_graph.stream_sse(
                 question=request.message,
                 user_id=user_id,
                 session_id=chat_id,
                 chat_id=chat_id,
+                memory_version=memory_version,
                 needs_title=needs_title,
                 awaiting_clarification=clarification_state.get("awaiting_clarification", False) if clarification_state else False,
                 original_question=clarification_state.get("original_question") if clarification_state else None,
                 clarification_history=clarification_state.get("clarification_history") if clarification_state else None,
-            ):
+            )
+            # Each step of the sync graph (LLM calls, llm_slot waits) runs in a worker thread
+            async for event in iterate_in_threadpool(events):
                 yield f"data: {json.dumps(clean_for_json(event), default=str)}\n\n"
                 await asyncio.sleep(0)  # Force flush
 
@@ -704,21 +800,56 @@ async def chat_stream(request: ChatRequest, user_id: str = Depends(require_auth)
                     # Include chat_id in done event for frontend
                     yield f"data: {json.dumps({'type': 'chat_id', 'chat_id': chat_id})}\n\n"
 
+        except GeneratorExit:
+            status = "disconnected"
+            raise
+        except Overloaded as e:
+            # Queue timeout or model slots busy — clean error, client may retry
+            status = "shed"
+            yield f"data: {json.dumps(e.to_event())}\n\n"
         except Exception as e:
+            status = "error"
             print(f"[CHAT] Error: {e}")
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        finally:
+            ticket.release()
+            metrics.SSE_IN_FLIGHT.dec()
+            metrics.SSE_STREAMS.inc(status=status)
 
     return StreamingResponse(
         generate(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        headers=SSE_HEADERS,
+        # Frees the slot even if client disconnected before the stream started
+        background=BackgroundTask(_release_ticket, ticket),
     )
 
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+async def _release_ticket(ticket):
+    """Async so it runs on the event loop (admission queue is loop-bound)."""
+    ticket.release()
+
+
+def _shed_response(error: Overloaded) -> StreamingResponse:
+    """429 with a single SSE error event (frontend reads the stream as usual)."""
+    metrics.SSE_STREAMS.inc(status="shed")
+    headers = dict(SSE_HEADERS)
+    if error.retry_after is not None:
+        headers["Retry-After"] = str(max(1, math.ceil(error.retry_after)))
+
+    async def body():
+        yield f"data: {json.dumps(error.to_event())}\n\n"
+
+    return StreamingResponse(body(), status_code=429, media_type="text/event-stream", headers=headers)
+
+
 # Keep v2 endpoint as alias for backward compatibility during transition
 @app.post("/chat/v2/stream")
 async def chat_stream_v2(request: ChatRequest, user_id: str = Depends(require_auth)):
@@ -729,6 +860,7 @@ async def chat_stream_v2(request: ChatRequest, user_id: str = Depends(require_au
 @app.get("/chat/history")
 async def chat_history(user_id: str = Depends(require_auth), limit: int = 50):
     """Get chat history for the authenticated user with agent traces."""
+    supabase = get_supabase()
     if not supabase:
         return []
 
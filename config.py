@@ -38,12 +38,33 @@ class Settings(BaseSettings):
 
     # Database
     database_path: str = Field(default="data/trading.duckdb")
+    storage_backend: str = Field(default="duckdb")  # Minute bars: "duckdb" | "parquet"
+    bars_compact: bool = Field(default=False)  # float32/uint32/int8 frames (see agent/data/bars.py)
+    snapshot_enabled: bool = Field(default=False)  # 1m bars from memory-mapped snapshots (data/snapshot.py)
+    db_generations: bool = Field(default=False)  # Ingest publishes new DuckDB files, workers swap (data/database.py)
+    coverage_exclude_partial: bool = Field(default=False)  # Executor drops partial days instead of warning
 
     # Supabase (optional - for logging and persistence)
     supabase_url: str | None = Field(default=None)
     supabase_service_key: str | None = Field(default=None)
     supabase_jwt_secret: str | None = Field(default=None)
 
+    # Speculative execution (run Understander in parallel with Intent)
+    speculative_mode: bool = Field(default=False)
+
+    # Executor profiling (fraction of requests captured with cProfile/tracemalloc)
+    executor_profile_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+
+    # /metrics endpoint (Bearer token; None = endpoint disabled, 404)
+    metrics_token: str | None = Field(default=None)
+
+    # Startup warm-up (see agent/warmup.py); off for fast dev reloads
+    warmup_enabled: bool = Field(default=True)
+
+    # Admission control (per worker)
+    admission_max_concurrent: int = Field(default=8, ge=1)
+    admission_global_rate: float = Field(default=5.0, gt=0)
+
     # CORS
     allowed_origins: str = Field(
         default="https://askbar.ai,https://www.askbar.ai,http://localhost:3000"
@@ -59,6 +80,13 @@ class Settings(BaseSettings):
             )
         return v
 
+    @field_validator("storage_backend")
+    @classmethod
+    def validate_storage_backend(cls, v: str) -> str:
+        if v not in ("duckdb", "parquet"):
+            raise ValueError("STORAGE_BACKEND must be 'duckdb' or 'parquet'")
+        return v
+
     @field_validator("llm_provider")
     @classmethod
     def validate_llm_provider(cls, v: str) -> str:
@@ -79,6 +107,33 @@ ROOT_DIR = Path(__file__).parent
 DATA_DIR = ROOT_DIR / "data"
 DATABASE_PATH = settings.database_path
 
+# Minute bar storage (see data/storage.py)
+STORAGE_BACKEND = settings.storage_backend  # "duckdb" (ohlcv_1min table) | "parquet"
+PARQUET_DIR = str(Path(DATABASE_PATH).parent / "parquet")  # symbol=/year= partitions
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_SIZE = 122_880  # Rows per row group (DuckDB default)
+PARQUET_KEEP_GENERATIONS = 2  # Per symbol: current + previous (readers between CURRENT read and open)
+
+# Immutable DuckDB generations: ingest writes a copy and swaps CURRENT, so
+# read-only workers never contend with the writer (see data/database.py)
+DB_GENERATIONS = settings.db_generations
+DB_GENERATIONS_DIR = str(Path(DATABASE_PATH).parent / "generations")  # CURRENT + g<ns>.duckdb
+DB_KEEP_GENERATIONS = 2  # Current + previous (readers between CURRENT read and open)
+
+# Memory-mapped per-symbol 1m snapshots (see data/snapshot.py)
+SNAPSHOT_ENABLED = settings.snapshot_enabled  # get_bars("1m") reads snapshot, ingest rebuilds it
+SNAPSHOT_DIR = str(Path(DATABASE_PATH).parent / "snapshots")  # <symbol>/CURRENT + generations
+SNAPSHOT_KEEP_GENERATIONS = 2  # Current + previous (readers between CURRENT read and open)
+
+# Per-day bar coverage index (see data/coverage.py): a trading day with fewer
+# bars than this share of the calendar's expectation is partial
+COVERAGE_PARTIAL_RATIO = 0.9
+COVERAGE_EXCLUDE_PARTIAL = settings.coverage_exclude_partial  # False: result["coverage"] warning only
+
+# In-memory bar schema: float32 prices on the tick grid, uint32 volume,
+# int8 date parts, categorical time (see agent/data/bars.py, enrich.py)
+BARS_COMPACT = settings.bars_compact
+
 # LLM Provider
 LLM_PROVIDER = settings.llm_provider
 
@@ -106,3 +161,86 @@ CHAT_HISTORY_LIMIT = 20
 MEMORY_RECENT_LIMIT = 10  # 5 pairs of (question, response)
 MEMORY_SUMMARY_CHUNK_SIZE = 6  # 3 pairs per summary
 MEMORY_MAX_SUMMARIES = 3
+MEMORY_CACHE_TTL = 600  # Seconds a chat's memory is served from process cache
+MEMORY_CACHE_MAX_CHATS = 500  # LRU bound of cached chats per worker
+MEMORY_COMPACTION_WORKERS = 1  # Background threads summarizing old messages
+CHECKPOINTS_PATH = str(Path(DATABASE_PATH).parent / "chat_checkpoints.sqlite")  # Per-chat LangGraph checkpoints (all workers)
+
+# Data ingest (see data/ingest.py)
+INGEST_CHUNK_ROWS = 1_000_000  # Rows per INSERT transaction
+INGEST_MEMORY_LIMIT = "1GB"  # DuckDB memory_limit during ingest (staging spills to disk); None = DuckDB default
+
+# Gemini context cache settings
+CACHE_REGISTRY_PATH = str(Path(DATABASE_PATH).parent / "gemini_caches.sqlite")  # Shared by all workers
+CACHE_CREATE_WAIT = 5.0  # Max seconds to wait for another worker's cache create (then no cache)
+CACHE_REFRESH_INTERVAL = 60  # Seconds between background refresh passes
+CACHE_REFRESH_BEFORE = 600  # Extend TTL of used caches expiring within this many seconds
+CACHE_CLEANUP_INTERVAL = 3600  # Seconds between orphaned cache cleanups
+
+# RAP settings
+QUERY_EMBEDDINGS_PATH = str(Path(DATABASE_PATH).parent / "query_embeddings.sqlite")  # Persistent query embedding cache
+
+# Trace writer settings (background batched inserts into request_traces)
+TRACE_QUEUE_SIZE = 1000  # Max queued rows before drop policy applies
+TRACE_BATCH_SIZE = 50  # Rows per bulk insert
+TRACE_FLUSH_INTERVAL = 0.5  # Max seconds a row waits in queue
+TRACE_DROP_POLICY = "drop_oldest"  # "drop_oldest" | "drop_newest" | "block"
+TRACE_ENQUEUE_TIMEOUT = 0.05  # Max seconds a node waits with "block" policy
+TRACE_SHUTDOWN_TIMEOUT = 5.0  # Seconds to flush on shutdown
+
+# Local trace store (all traces written here first, then shipped to Supabase)
+TRACE_LOCAL_STORE = True
+TRACE_LOCAL_DIR = "logs/traces"
+TRACE_SEGMENT_MAX_BYTES = 8 * 1024 * 1024  # Rotate (and gzip) segment at this size
+TRACE_LOCAL_MAX_BYTES = 512 * 1024 * 1024  # Drop oldest unshipped segments above this
+TRACE_REPLAY_INTERVAL = 30.0  # Seconds between shipping retries when Supabase is down
+TRACE_ROWS_POLICY = "compress"  # Large executor rows: "compress" | "truncate" | "keep"
+TRACE_ROWS_INLINE_MAX = 100  # Rows kept inline as JSON
+TRACE_ROWS_MAX = 5000  # Rows kept at all (rows_total has the real count)
+
+# Executor profiling (per-stage timings are always on, see agent/data/profiling.py)
+EXECUTOR_PROFILE_RATE = settings.executor_profile_rate  # 0.0 = off, 0.01 = 1% of requests
+EXECUTOR_PROFILE_TOP = 15  # Functions / allocation sites kept in profile report
+
+# Metrics (/metrics endpoint, see agent/logging/metrics.py)
+METRICS_DIR = "logs/metrics"  # Per-worker snapshots merged by /metrics (None = this worker only)
+METRICS_SYNC_INTERVAL = 1.0  # Seconds between snapshot writes
+METRICS_STALE_AFTER = 86400  # Delete snapshots of workers gone for this long
+METRICS_TOKEN = settings.metrics_token
+
+# Startup warm-up (FastAPI lifespan, see agent/warmup.py)
+WARMUP_ENABLED = settings.warmup_enabled
+WARMUP_SYMBOLS = ["NQ"]  # Instruments for RAP static prompt + DuckDB warm queries
+WARMUP_TIMEFRAMES = ["1D", "1H", "5m"]  # get_bars timeframes pre-run at startup
+WARMUP_DAYS = 30  # Most recent days queried (the range most questions hit)
+
+# Admission control (per worker, see agent/admission.py)
+ADMISSION_MAX_CONCURRENT = settings.admission_max_concurrent  # Requests running the graph at once
+ADMISSION_MAX_QUEUE = 32  # Requests waiting for a slot; more → shed with "queue_full"
+ADMISSION_QUEUE_TIMEOUT = 30.0  # Max seconds in queue before shedding
+ADMISSION_QUEUE_UPDATE_INTERVAL = 2.0  # Seconds between repeated SSE "queued" events
+ADMISSION_INITIAL_DURATION = 8.0  # Request duration assumed for ETA until measured
+ADMISSION_USER_RATE = 0.2  # Requests/sec per user (12/min) ...
+ADMISSION_USER_BURST = 5  # ... with bursts up to this many
+ADMISSION_GLOBAL_RATE = settings.admission_global_rate  # Requests/sec per worker
+ADMISSION_GLOBAL_BURST = 20
+
+# Concurrent LLM calls per model (per worker); waiting longer than timeout fails the call
+LLM_MAX_CONCURRENCY = {
+    GEMINI_MODEL: 8,
+    GEMINI_LITE_MODEL: 16,
+}
+LLM_DEFAULT_CONCURRENCY = 8
+LLM_SLOT_TIMEOUT = 20.0
+
+# Request coalescing (see agent/singleflight.py)
+COALESCE_REQUESTS = True  # Share in-flight Parser/Executor work for identical concurrent questions
+
+# Presenter settings
+PRESENTER_MAX_WORKERS = 4  # Parallel Presenter calls for multi-step questions
+
+# Speculative execution settings
+SPECULATIVE_MODE = settings.speculative_mode
+SPECULATIVE_MAX_DRIFT = 0.2  # Max token-level difference between raw question and internal_query
+SPECULATIVE_RAP = True  # Also prefetch RAP chunks for Parser on the raw question
+SPECULATIVE_WORKERS = 4
@@ -1,11 +1,23 @@
 """Data management"""
 
+from .coverage import coverage_summary, partial_days, rebuild_coverage
 from .database import init_database, get_connection
+from .ingest import IngestStats, append_csv, ingest_csv, register_refresher
 from .loader import load_csv, get_data_info
+from .snapshot import build_snapshot, get_snapshot
 
 __all__ = [
     "init_database",
     "get_connection",
+    "ingest_csv",
+    "append_csv",
+    "register_refresher",
+    "IngestStats",
+    "rebuild_coverage",
+    "partial_days",
+    "coverage_summary",
+    "build_snapshot",
+    "get_snapshot",
     "load_csv",
     "get_data_info",
 ]
@@ -0,0 +1,280 @@
+"""
+Coverage index: per symbol and trading date, how many minute bars there are
+vs how many the instrument's calendar expects.
+
+    bar_coverage (symbol, date)  — date is the trading date (18:00 bars →
+                                   next day, as in get_bars 1D)
+        first_bar, last_bar      first / last bar of the trading day
+        bars, expected_bars      minutes in the trading day window
+                                 (trading_day start..end, cut at early close)
+        session_bars,            same for the default session (RTH)
+        expected_session_bars
+        partial                  bars or session_bars below
+                                 COVERAGE_PARTIAL_RATIO of expected
+
+Weekends and full-close holidays expect 0 bars and are never partial.
+Instruments without a trading day config have NULL expectations.
+
+Ingest updates the affected trading dates in the same connection (and
+database generation) as the bars. Databases loaded before the index existed
+are backfilled when init_database creates the table; rebuild_coverage()
+(scripts/build_coverage.py) recomputes it after calendar changes. Lookups
+are by primary key — O(days), not a scan of ohlcv_1min:
+
+    partial_days("NQ", "2024-01-01", "2025-01-01")   # [date(2024, 3, 8), ...]
+    coverage_summary()                               # bars/first/last per symbol
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+
+from .database import get_connection, new_generation
+from .storage import all_bars_relation, bars_relation
+
+logger = logging.getLogger(__name__)
+
+TABLE = "bar_coverage"
+DAY_MINUTES = 24 * 60
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def window_minutes(start: str, end: str, close: str | None = None) -> int:
+    """
+    Minutes in [start, end) of a trading day (ET "HH:MM"), cut at an early close.
+
+    Cross-midnight windows (18:00-17:00) are cut only in their part on the
+    trading date itself — the previous evening is not affected by the close.
+    """
+    s, e = _minutes(start), _minutes(end)
+    c = _minutes(close) if close else None
+    if s < e:
+        return max(0, min(e, c) - s) if c is not None else e - s
+    return (DAY_MINUTES - s) + (min(e, c) if c is not None else e)
+
+
+def expected_minutes(symbol: str, close: str | None = None) -> tuple[int, int] | None:
+    """(trading day, default session) minutes expected on a day (None if not configured)."""
+    from agent.config.market.instruments import (
+        get_default_session,
+        get_session_times,
+        get_trading_day_boundaries,
+    )
+
+    boundaries = get_trading_day_boundaries(symbol)
+    session = get_session_times(symbol, get_default_session(symbol))
+    if not boundaries or not session:
+        return None
+    return window_minutes(*boundaries, close), window_minutes(*session, close)
+
+
+def update_coverage(
+    conn,
+    symbol: str,
+    start: date | None = None,
+    end: date | None = None,
+    backend: str | None = None,
+    root: str | Path | None = None,
+) -> int:
+    """
+    Recompute coverage of symbol's trading dates in [start, end] (None =
+    all) on an open read-write connection. Returns rows written.
+
+    root: Parquet root to read bars from (e.g. replace_symbol staging)
+    """
+    import config
+    from agent.config.market.holidays import get_closures
+    from agent.config.market.instruments import (
+        get_default_session,
+        get_session_times,
+        get_trading_day_boundaries,
+    )
+
+    # Source bars: trading dates start the previous evening
+    relation, params = bars_relation(
+        symbol,
+        str(start - timedelta(days=1)) if start else None,
+        str(end + timedelta(days=1)) if end else None,
+        backend=backend,
+        root=root,
+    )
+    first, last = conn.execute(
+        f"SELECT MIN(timestamp), MAX(timestamp) FROM {relation}", params
+    ).fetchone()
+
+    where, where_params = ["symbol = ?"], [symbol]
+    if start:
+        where.append("date >= ?")
+        where_params.append(start)
+    if end:
+        where.append("date <= ?")
+        where_params.append(end)
+    conn.execute(f"DELETE FROM {TABLE} WHERE {' AND '.join(where)}", where_params)
+    if first is None:
+        return 0
+
+    boundaries = get_trading_day_boundaries(symbol)
+    start_hour = int(boundaries[0].split(":")[0]) if boundaries else 24
+    session = get_session_times(symbol, get_default_session(symbol)) or ("00:00", "00:00")
+    if session[0] < session[1]:
+        in_session = f"t >= TIME '{session[0]}' AND t < TIME '{session[1]}'"
+    else:
+        in_session = f"(t >= TIME '{session[0]}' OR t < TIME '{session[1]}')"
+
+    # Calendar exceptions: closed days expect nothing, early closes less
+    regular = expected_minutes(symbol)
+    calendar: dict[date, tuple] = {}
+    if regular:
+        closed, early = get_closures(symbol, first.date(), last.date() + timedelta(days=2))
+        calendar = {d: (None, 0, 0) for d in closed}
+        for d, close in early.items():
+            calendar.setdefault(d, (close, *expected_minutes(symbol, close)))
+    day_expected, session_expected = regular or ("NULL", "NULL")
+
+    dates, dates_params = [], []
+    if start:
+        dates.append("minutes.date >= ?")
+        dates_params.append(start)
+    if end:
+        dates.append("minutes.date <= ?")
+        dates_params.append(end)
+
+    ratio = float(config.COVERAGE_PARTIAL_RATIO)
+    conn.execute(
+        f"""
+        INSERT INTO {TABLE}
+        WITH minutes AS (
+            SELECT timestamp,
+                CAST(timestamp AS DATE)
+                    + CASE WHEN hour(timestamp) >= {start_hour} THEN 1 ELSE 0 END AS date,
+                CAST(timestamp AS TIME) AS t
+            FROM {relation}
+        ),
+        calendar AS (
+            SELECT unnest(?::DATE[]) AS date, unnest(?::TIME[]) AS close_time,
+                unnest(?::INTEGER[]) AS expected_bars, unnest(?::INTEGER[]) AS expected_session_bars
+        ),
+        days AS (
+            SELECT
+                minutes.date AS date,
+                MIN(timestamp) AS first_bar,
+                MAX(timestamp) AS last_bar,
+                COUNT(*)::INTEGER AS bars,
+                CASE WHEN isodow(minutes.date) > 5 THEN 0
+                     ELSE coalesce(ANY_VALUE(calendar.expected_bars), {day_expected}) END AS expected_bars,
+                COUNT(*) FILTER (WHERE {in_session} AND (calendar.close_time IS NULL
+                    OR CAST(timestamp AS DATE) < minutes.date
+                    OR t < calendar.close_time))::INTEGER AS session_bars,
+                CASE WHEN isodow(minutes.date) > 5 THEN 0
+                     ELSE coalesce(ANY_VALUE(calendar.expected_session_bars), {session_expected}) END
+                    AS expected_session_bars
+            FROM minutes
+            LEFT JOIN calendar ON calendar.date = minutes.date
+            {"WHERE " + " AND ".join(dates) if dates else ""}
+            GROUP BY minutes.date
+        )
+        SELECT ?, *,
+            coalesce(expected_bars > 0 AND (bars < expected_bars * {ratio}
+                OR session_bars < expected_session_bars * {ratio}), false) AS partial
+        FROM days
+        """,
+        [
+            *params,
+            list(calendar),
+            *([row[k] for row in calendar.values()] for k in range(3)),
+            *dates_params,
+            symbol,
+        ],
+    )
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {TABLE} WHERE {' AND '.join(where)}", where_params
+    ).fetchone()[0]
+
+
+def rebuild_coverage(symbols: list[str] | None = None, db_path: str | None = None) -> dict[str, int]:
+    """
+    Recompute the whole index of symbols (None = all with bars), e.g. after
+    a holiday calendar change. Returns {symbol: trading days}.
+    """
+    from .database import init_database
+
+    with new_generation(db_path) as target:
+        init_database(target)
+        with get_connection(target) as conn:
+            days = rebuild(conn, symbols)
+    logger.info(f"Coverage rebuilt: {days}")
+    return days
+
+
+def rebuild(conn, symbols: list[str] | None = None) -> dict[str, int]:
+    """rebuild_coverage on an open read-write connection."""
+    if not symbols:
+        symbols = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT symbol FROM {all_bars_relation()} ORDER BY symbol"
+        ).fetchall()]
+    return {symbol: update_coverage(conn, symbol) for symbol in symbols}
+
+
+def partial_days(
+    symbol: str,
+    start: str | date | None = None,
+    end: str | date | None = None,
+    db_path: str | None = None,
+) -> list[date]:
+    """
+    Trading dates in [start, end) with partial coverage. Empty if the index
+    is missing (old database) — callers treat it as "nothing known".
+    """
+    where, params = ["symbol = ?", "partial"], [symbol]
+    if start is not None:
+        where.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        where.append("date < ?")
+        params.append(end)
+    try:
+        with get_connection(db_path, read_only=True) as conn:
+            rows = conn.execute(
+                f"SELECT date FROM {TABLE} WHERE {' AND '.join(where)} ORDER BY date", params
+            ).fetchall()
+    except duckdb.Error as e:
+        logger.debug(f"Coverage lookup failed for {symbol}: {e}")
+        return []
+    return [row[0] for row in rows]
+
+
+def coverage_summary(db_path: str | None = None) -> dict[str, dict]:
+    """
+    Per symbol: bars, first/last bar, trading days and partial days — from
+    the index only. Empty dict if the index is missing or empty.
+    """
+    try:
+        with get_connection(db_path, read_only=True) as conn:
+            rows = conn.execute(f"""
+                SELECT symbol, SUM(bars), MIN(first_bar), MAX(last_bar),
+                    COUNT(*), COUNT(*) FILTER (WHERE partial)
+                FROM {TABLE}
+                GROUP BY symbol
+                ORDER BY symbol
+            """).fetchall()
+    except duckdb.Error as e:
+        logger.debug(f"Coverage summary failed: {e}")
+        return {}
+    return {
+        symbol: {
+            "bars": int(bars),
+            "first_bar": first_bar,
+            "last_bar": last_bar,
+            "trading_days": days,
+            "partial_days": partial,
+        }
+        for symbol, bars, first_bar, last_bar, days, partial in rows
+    }
@@ -1,18 +1,163 @@
-"""Database management"""
+"""
+Database management.
 
-import duckdb
+With DB_GENERATIONS, the DuckDB file is never written while it is served.
+DuckDB allows one read-write process per file, so ingest in one process
+used to fail (or block serving) while uvicorn workers held read-only
+connections. Instead:
+
+    DB_GENERATIONS_DIR/CURRENT                → "g1767888000123456789.duckdb"
+    DB_GENERATIONS_DIR/g1767888000...duckdb   published, read-only from now on
+
+- writers (ingest, schema init) copy the current file to g<ns>.duckdb.tmp,
+  write there, rename it into place and swap CURRENT (new_generation);
+  writers are serialized by an flock on LOCK
+- readers resolve CURRENT on each get_connection(), so every worker picks
+  up a new generation with its next request; execute_plan pins one
+  generation for the whole request (pin_database)
+- the newest DB_KEEP_GENERATIONS files are kept, older ones removed — open
+  connections keep reading unlinked files
+
+Until the first generation is published, config.DATABASE_PATH is served
+(and is the base of that generation). Explicit db_path arguments bypass
+generations.
+"""
+
+import logging
+import shutil
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Iterator
+
+import duckdb
+
+from .generations import collect_garbage, list_generations, new_name, read_current, remove, swap_current
+
+try:
+    import fcntl
+except ImportError:  # Windows — single-process dev only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".duckdb"
+TABLES = ("ohlcv_1min", "symbols", "ingest_watermarks", "bar_coverage")
+
+# Generation pinned for the current request (pin_database)
+_pinned: ContextVar[str | None] = ContextVar("pinned_database", default=None)
+
+
+def generations_dir() -> Path:
+    import config
+    return Path(config.DB_GENERATIONS_DIR)
+
+
+def current_database(db_path: str = None) -> str:
+    """Database file to use: db_path, pinned/current generation or DATABASE_PATH."""
+    import config
+    if db_path is not None:
+        return db_path
+    if not config.DB_GENERATIONS:
+        return config.DATABASE_PATH
+
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned
+    name = read_current(generations_dir())
+    return str(generations_dir() / name) if name else config.DATABASE_PATH
+
+
+@contextmanager
+def pin_database() -> Iterator[str]:
+    """Serve one generation for everything in this context (one request)."""
+    token = _pinned.set(current_database())
+    try:
+        yield _pinned.get()
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def new_generation(db_path: str = None) -> Iterator[str]:
+    """
+    Path to write changes to; published as the new current generation on
+    success, discarded on error.
+
+    Without DB_GENERATIONS (or with explicit db_path) yields the database
+    itself — writes go in place, as before.
+    """
+    import config
+    if db_path is not None or not config.DB_GENERATIONS:
+        yield current_database(db_path)
+        return
+
+    directory = generations_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "LOCK", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+        # Only one writer holds the lock: other .tmp files are from crashed writers
+        for stale in directory.glob("g*.tmp*"):
+            remove(stale)
+
+        name = new_name(SUFFIX)
+        tmp = directory / f"{name}.tmp"
+        base = Path(current_database())
+        if base.exists():
+            shutil.copyfile(base, tmp)
+            if Path(f"{base}.wal").exists():
+                shutil.copyfile(f"{base}.wal", f"{tmp}.wal")
+
+        try:
+            yield str(tmp)
+            # Fold the WAL into the file: published generations are one file
+            with duckdb.connect(str(tmp)) as conn:
+                conn.execute("CHECKPOINT")
+            tmp.replace(directory / name)
+        except BaseException:
+            remove(tmp)
+            Path(f"{tmp}.wal").unlink(missing_ok=True)
+            raise
+
+        swap_current(directory, name)
+        collect_garbage(directory, name, config.DB_KEEP_GENERATIONS, SUFFIX)
+        logger.info(f"Database generation {name} published")
+
+
+def list_database_generations() -> list[str]:
+    """Published generation files, oldest first."""
+    return [str(p) for p in list_generations(generations_dir(), SUFFIX)]
 
 
 def init_database(db_path: str = None) -> None:
     """Initialize database with required tables."""
     import config
-    if db_path is None:
-        db_path = config.DATABASE_PATH
+    if db_path is None and config.DB_GENERATIONS:
+        # Served generations are read-only: publish a new one only if needed
+        current = current_database()
+        if Path(current).exists() and _has_schema(current):
+            return
+        with new_generation() as target:
+            _create_schema(target)
+        return
+
+    _create_schema(current_database(db_path))
+
 
+def _has_schema(db_path: str) -> bool:
+    with duckdb.connect(db_path, read_only=True) as conn:
+        names = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    return set(TABLES) <= names
+
+
+def _create_schema(db_path: str) -> None:
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
     with duckdb.connect(db_path) as conn:
+        existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+
         # OHLCV table
         conn.execute("""
             CREATE TABLE IF NOT EXISTS ohlcv_1min (
@@ -39,16 +184,43 @@ def init_database(db_path: str = None) -> None:
             )
         """)
 
+        # Per-symbol high-water mark of ingested bars (data/ingest.py)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_watermarks (
+                symbol VARCHAR(10) PRIMARY KEY,
+                last_timestamp TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            )
+        """)
+
+        # Per-symbol, per-trading-date bar coverage (data/coverage.py)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bar_coverage (
+                symbol VARCHAR(10) NOT NULL,
+                date DATE NOT NULL,
+                first_bar TIMESTAMP NOT NULL,
+                last_bar TIMESTAMP NOT NULL,
+                bars INTEGER NOT NULL,
+                expected_bars INTEGER,
+                session_bars INTEGER NOT NULL,
+                expected_session_bars INTEGER,
+                partial BOOLEAN NOT NULL,
+                PRIMARY KEY (symbol, date)
+            )
+        """)
+
         # Create index for fast queries
         conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_ohlcv_symbol_time
             ON ohlcv_1min(symbol, timestamp)
         """)
 
+        # Index added to a database with bars: backfill it
+        if "bar_coverage" not in existing and "ohlcv_1min" in existing:
+            from .coverage import rebuild
+            rebuild(conn)
+
 
 def get_connection(db_path: str = None, read_only: bool = False):
-    """Get database connection."""
-    import config
-    if db_path is None:
-        db_path = config.DATABASE_PATH
-    return duckdb.connect(db_path, read_only=read_only)
+    """Get database connection (current generation unless db_path is given)."""
+    return duckdb.connect(current_database(db_path), read_only=read_only)
@@ -0,0 +1,72 @@
+"""
+Generations: immutable versions of derived files behind a CURRENT pointer.
+
+    <directory>/CURRENT          → "g1767888000123456789"
+    <directory>/g1767888000...   a file or directory, never modified
+                                 after it is published
+
+Writers build a new generation under a .tmp name, rename it into place and
+swap CURRENT (temp file + os.replace — readers see the old or the new name,
+never a partial one). Readers resolve CURRENT per request. Unlinked files
+stay readable by processes that already opened them, so collect_garbage can
+drop old generations while the newest few are kept for readers that have
+just read CURRENT.
+
+Used by data/snapshot.py (directories of .npy) and data/database.py
+(DuckDB files).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+CURRENT = "CURRENT"
+
+
+def new_name(suffix: str = "") -> str:
+    """Name of a new generation (sorts by creation time)."""
+    return f"g{time.time_ns()}{suffix}"
+
+
+def read_current(directory: Path) -> str | None:
+    """Name of the current generation (None if nothing published yet)."""
+    try:
+        return (directory / CURRENT).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def swap_current(directory: Path, name: str):
+    """Point CURRENT at generation name (atomic for readers)."""
+    tmp = directory / f"{CURRENT}.tmp"
+    tmp.write_text(name)
+    os.replace(tmp, directory / CURRENT)
+
+
+def list_generations(directory: Path, suffix: str = "") -> list[Path]:
+    """Published generations, oldest first (.tmp and other files skipped)."""
+    pattern = re.compile(rf"^g\d+{re.escape(suffix)}$")
+    if not directory.exists():
+        return []
+    return sorted((p for p in directory.iterdir() if pattern.match(p.name)), key=lambda p: p.name)
+
+
+def collect_garbage(directory: Path, current: str, keep: int, suffix: str = ""):
+    """Remove generations older than the newest `keep` (current always kept)."""
+    generations = list_generations(directory, suffix)
+    retained = {p.name for p in generations[-max(1, keep):]} | {current}
+    for path in generations:
+        if path.name not in retained:
+            remove(path)
+
+
+def remove(path: Path):
+    """Delete a generation (directory or file)."""
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
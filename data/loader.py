@@ -1,11 +1,15 @@
 """Data loading utilities"""
 
-import duckdb
-import pandas as pd
-from pathlib import Path
-from typing import Optional
+from __future__ import annotations
 
-from .database import init_database, get_connection
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from .database import get_connection
+from .ingest import ingest_csv
+from .storage import all_bars_relation, bars_relation
 
 
 def load_csv(
@@ -17,6 +21,9 @@ def load_csv(
     """
     Load CSV file into database.
 
+    Streams through DuckDB (see data/ingest.py); file_path may also be a
+    glob pattern or a .gz file. Bars already in the table are kept.
+
     Args:
         file_path: Path to CSV file
         symbol: Symbol name (e.g. 'CL')
@@ -24,69 +31,50 @@ def load_csv(
         replace: If True, replace existing data for this symbol
 
     Returns:
-        Number of rows loaded
+        Number of rows of symbol in database
 
     Expected CSV format:
         timestamp,open,high,low,close,volume
         2025-11-30 18:00:00,58.96,59.3,58.83,59.21,2181
     """
-    # Initialize database if needed
-    init_database(db_path)
-
-    # Read CSV (with or without headers)
-    # Try to detect if file has headers
-    with open(file_path, 'r') as f:
-        first_line = f.readline()
-
-    if 'timestamp' in first_line.lower() or 'date' in first_line.lower():
-        df = pd.read_csv(file_path)
-    else:
-        # No headers - assume format: timestamp,open,high,low,close,volume
-        df = pd.read_csv(file_path, names=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['symbol'] = symbol
-
-    # Reorder columns
-    df = df[['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']]
-
-    with get_connection(db_path) as conn:
-        if replace:
-            conn.execute(
-                "DELETE FROM ohlcv_1min WHERE symbol = ?",
-                [symbol]
-            )
-
-        # Insert data
-        conn.execute("""
-            INSERT OR REPLACE INTO ohlcv_1min
-            SELECT * FROM df
-        """)
-
-        # Get count
-        result = conn.execute(
-            "SELECT COUNT(*) FROM ohlcv_1min WHERE symbol = ?",
-            [symbol]
-        ).fetchone()
+    ingest_csv(file_path, symbol, db_path=db_path, replace=replace)
+
+    relation, params = bars_relation(symbol)
+    with get_connection(db_path, read_only=True) as conn:
+        result = conn.execute(f"SELECT COUNT(*) FROM {relation}", params).fetchone()
 
     return result[0]
 
 
 def get_data_info(db_path: str = None) -> pd.DataFrame:
-    """Get summary of loaded data."""
-    import config
-    if db_path is None:
-        db_path = config.DATABASE_PATH
+    """Get summary of loaded data (current database unless db_path is given)."""
+    import duckdb
 
     with get_connection(db_path, read_only=True) as conn:
-        return conn.execute("""
+        try:
+            # Coverage index (data/coverage.py): one row per trading day, not per bar
+            return conn.execute("""
+                SELECT
+                    symbol,
+                    SUM(bars)::BIGINT as bars,
+                    MIN(first_bar) as start_date,
+                    MAX(last_bar) as end_date,
+                    COUNT(*) as trading_days
+                FROM bar_coverage
+                GROUP BY symbol
+                ORDER BY symbol
+            """).df()
+        except duckdb.CatalogException:
+            pass  # Database created before the index
+
+        return conn.execute(f"""
             SELECT
                 symbol,
                 COUNT(*) as bars,
                 MIN(timestamp) as start_date,
                 MAX(timestamp) as end_date,
                 COUNT(DISTINCT DATE(timestamp)) as trading_days
-            FROM ohlcv_1min
+            FROM {all_bars_relation()}
             GROUP BY symbol
             ORDER BY symbol
         """).df()
@@ -0,0 +1,224 @@
+"""
+Memory-mapped columnar snapshot of a symbol's minute bars.
+
+One .npy file per column, written once and opened with np.load(mmap_mode="r"):
+
+    snapshots/NQ/CURRENT                 → "g1767888000123456789"
+    snapshots/NQ/g1767888000123456789/
+        timestamp.npy open.npy high.npy low.npy close.npy volume.npy
+        trading_date.npy                 (futures: evening bars → next day)
+        dates.npy offsets.npy            date index: rows of dates[i] are
+                                         offsets[i]:offsets[i + 1]
+        meta.json
+
+get_bars("1m") slices it by binary search on the date index and wraps the
+slices as Arrow arrays without copying (SNAPSHOT_ENABLED). Pages come from
+the OS page cache, shared by every process mapping the same files — all
+uvicorn workers read one copy.
+
+Rebuilds write a new generation directory and swap CURRENT atomically
+(data/generations.py); readers check CURRENT on every call and switch
+between requests. The previous generation is kept (a reader may have just
+read CURRENT), older ones are removed. Ingest rebuilds via the refresher
+hook (data/ingest.py).
+
+Usage:
+    build_snapshot("NQ")                     # or scripts/build_snapshot.py
+    snap = get_snapshot("NQ")                # None if not built
+    table = snap.bars("2024-01-01", "2025-01-01")
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from .generations import collect_garbage, new_name, read_current, swap_current
+from .ingest import register_refresher
+from .storage import check_symbol
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def snapshot_root(root: str | Path | None = None) -> Path:
+    import config
+    return Path(root or config.SNAPSHOT_DIR)
+
+
+def _symbol_dir(symbol: str, root: str | Path | None = None) -> Path:
+    return snapshot_root(root) / check_symbol(symbol)
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+def build_snapshot(
+    symbol: str,
+    db_path: str | None = None,
+    root: str | Path | None = None,
+) -> dict:
+    """
+    Write a new snapshot generation of symbol's bars and make it current.
+
+    Returns:
+        meta dict (generation, rows, days, first/last timestamp, seconds)
+    """
+    import config
+    from agent.config.market.instruments import get_trading_day_boundaries
+    from .database import get_connection
+    from .storage import bars_relation
+
+    start = time.perf_counter()
+    directory = _symbol_dir(symbol, root)
+    generation = new_name()
+    target = directory / generation
+    tmp = directory / f"{generation}.tmp"
+    tmp.mkdir(parents=True)
+
+    # Futures: bars from session start (e.g. 18:00) belong to next trading day
+    boundaries = get_trading_day_boundaries(symbol)
+    start_hour = int(boundaries[0].split(":")[0]) if boundaries else 24
+    relation, params = bars_relation(symbol)
+    try:
+        with get_connection(db_path, read_only=True) as conn:
+            table = conn.execute(
+                f"""
+                SELECT {", ".join(COLUMNS)},
+                    CAST(timestamp AS DATE)
+                        + CASE WHEN hour(timestamp) >= {start_hour} THEN 1 ELSE 0 END AS trading_date
+                FROM {relation}
+                ORDER BY timestamp
+                """,
+                params,
+            ).to_arrow_table()
+
+        arrays = {name: table.column(name).to_numpy() for name in table.column_names}
+        arrays["trading_date"] = arrays["trading_date"].astype("datetime64[D]")
+        del table
+
+        days = arrays["timestamp"].astype("datetime64[D]")
+        dates, starts = np.unique(days, return_index=True)
+        arrays["dates"] = dates
+        arrays["offsets"] = np.append(starts, len(days)).astype(np.int64)
+
+        for name, values in arrays.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(values))
+
+        rows = len(days)
+        meta = {
+            "symbol": symbol,
+            "generation": generation,
+            "rows": rows,
+            "days": len(dates),
+            "first": str(arrays["timestamp"][0]) if rows else None,
+            "last": str(arrays["timestamp"][-1]) if rows else None,
+            "built_at": time.time(),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    swap_current(directory, generation)
+    collect_garbage(directory, generation, config.SNAPSHOT_KEEP_GENERATIONS)
+
+    meta["seconds"] = round(time.perf_counter() - start, 2)
+    logger.info(f"Snapshot {symbol}: {meta['rows']:,} bars, {meta['days']:,} days in {meta['seconds']}s")
+    return meta
+
+
+def delete_snapshot(symbol: str, root: str | Path | None = None):
+    shutil.rmtree(_symbol_dir(symbol, root), ignore_errors=True)
+
+
+@register_refresher
+def refresh_snapshot(symbol: str, start: date, end: date, db_path: str | None):
+    """Ingest refresher: rebuild symbol's snapshot when snapshots are on."""
+    import config
+    if config.SNAPSHOT_ENABLED:
+        build_snapshot(symbol, db_path)
+
+
+# =============================================================================
+# Read
+# =============================================================================
+
+class Snapshot:
+    """Memory-mapped columns of one snapshot generation."""
+
+    def __init__(self, symbol: str, path: Path):
+        self.symbol = symbol
+        self.path = path
+        self.generation = path.name
+        self.meta = json.loads((path / "meta.json").read_text())
+        self.dates = np.load(path / "dates.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        # Mapped up front: files stay readable even if the generation is
+        # garbage-collected later
+        self._columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in (*COLUMNS, "trading_date")
+        }
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def column(self, name: str) -> np.ndarray:
+        """Memory-mapped column (timestamp, OHLCV or trading_date)."""
+        return self._columns[name]
+
+    def rows(self, start: str | date | None = None, end: str | date | None = None) -> slice:
+        """Rows of bars with start <= timestamp < end (dates, like bars_relation)."""
+        lo = 0 if start is None else int(self.offsets[np.searchsorted(self.dates, np.datetime64(start, "D"))])
+        hi = len(self) if end is None else int(self.offsets[np.searchsorted(self.dates, np.datetime64(end, "D"))])
+        return slice(lo, max(lo, hi))
+
+    def bars(self, start: str | date | None = None, end: str | date | None = None):
+        """Bars in [start, end) as Arrow table — zero-copy views of the mapped files."""
+        import pyarrow as pa
+
+        rows = self.rows(start, end)
+        return pa.table({name: pa.array(self.column(name)[rows]) for name in COLUMNS})
+
+
+_snapshots: dict[tuple[str, str], Snapshot] = {}
+_lock = threading.Lock()
+
+
+def get_snapshot(symbol: str, root: str | Path | None = None) -> Snapshot | None:
+    """
+    Current snapshot of symbol (None if never built).
+
+    CURRENT is re-read on every call, so a rebuild by ingest (any process)
+    is picked up by the next request.
+    """
+    directory = _symbol_dir(symbol, root)
+    generation = read_current(directory)
+    if generation is None:
+        return None
+
+    key = (str(directory), generation)
+    snapshot = _snapshots.get(key)
+    if snapshot is None:
+        with _lock:
+            snapshot = _snapshots.get(key)
+            if snapshot is None:
+                snapshot = Snapshot(symbol, directory / generation)
+                # Drop this symbol's older generations (their maps close when
+                # the last table using them is gone)
+                for old in [k for k in _snapshots if k[0] == key[0]]:
+                    del _snapshots[old]
+                _snapshots[key] = snapshot
+    return snapshot
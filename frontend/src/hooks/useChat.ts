@@ -277,6 +277,7 @@ export function useChat({ chatId, onChatCreated, onTitleUpdated }: UseChatOption
         let currentAgentName: string | null = null
         let previewText = ""      // Expert context before data
         let summaryText = ""      // Summary after data
+        const partials: string[] = []  // Early presenter results, by step index
         let isAfterDataReady = false
         let usageData: Usage | undefined
         let route: string | undefined
@@ -373,6 +374,7 @@ export function useChat({ chatId, onChatCreated, onTitleUpdated }: UseChatOption
                   if (event.status === "rewrite") {
                     previewText = ""
                     summaryText = ""
+                    partials.length = 0
                     isAfterDataReady = false
                     setStreamingPreview("")
                     setStreamingText("")
@@ -387,10 +389,20 @@ export function useChat({ chatId, onChatCreated, onTitleUpdated }: UseChatOption
                     summaryText += event.content
                     setStreamingText(summaryText)
                   }
+                } else if (event.type === "queued") {
+                  // Server is busy — request waits for a slot
+                  setStreamingPreview(`В очереди: ${event.position}, ~${Math.ceil(event.eta_seconds)} с`)
                 } else if (event.type === "acknowledge") {
                   // Quick preview from understander
                   previewText = event.content
                   setStreamingPreview(event.content)
+                } else if (event.type === "presenter_partial") {
+                  // One result of a multi-step question is ready - show it
+                  // until the final presenter text replaces it
+                  partials[event.index] = event.title
+                    ? `**${event.title}**\n\n${event.content}`
+                    : event.content
+                  setStreamingText(partials.filter(Boolean).join("\n\n"))
                 } else if (event.type === "data_card") {
                   // Data card from presenter
                   dataCard = { title: event.title, row_count: event.row_count }
@@ -74,6 +74,8 @@ export type SSEEvent =
   | { type: "chat_id"; chat_id: string }
   | { type: "chat_title"; chat_id: string; title: string }
   | { type: "done"; request_id?: string }
-  | { type: "error"; message: string }
+  | { type: "error"; message: string; code?: string; retry_after?: number }
+  | { type: "queued"; position: number; eta_seconds: number }
   | { type: "acknowledge"; content: string }
   | { type: "data_card"; title: string; row_count: number }
+  | { type: "presenter_partial"; index: number; step_id?: string; title: string; content: string; row_count: number }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of executor requests.
+
+Builds a synthetic NQ history (1-minute bars, weekdays) in a temp dir and
+runs typical execute_plan requests, each in its own interpreter. Reported
+per request: peak RSS growth over the warmed-up process (imports and one
+small request done first) and wall time, plus the in-memory size of the
+enriched "all years, 1m" frame. --compact runs with BARS_COMPACT (float32
+prices, int8 date parts, categorical time). Nothing is kept.
+
+Usage:
+    python scripts/bench_executor_memory.py
+    python scripts/bench_executor_memory.py --compact
+    python scripts/bench_executor_memory.py --years 10 --json
+"""
+
+import sys
+import json
+import argparse
+import resource
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_storage import build_history
+
+ALL = ("2000-01-01", "2100-01-01")
+
+# name → (operation, timeframe, period, filters, session, params). Top-10
+# lists keep the result small, so the numbers are the data path itself.
+PLANS = {
+    "1m top 10, filters": ("list", "1m", ALL, ["time >= 09:30", "change > 0"], None, {"n": 10}),
+    "1m top 10, RTH": ("list", "1m", ALL, [], "RTH", {"n": 10}),
+    "5m top 10, monday": ("list", "5m", ALL, ["monday"], None, {"n": 10}),
+    "1D doji": ("list", "1D", ALL, ["doji"], None, {}),
+}
+FRAME = "frame"
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def frame_mb(compact: bool) -> float:
+    """Deep in-memory size of the enriched all-years 1m DataFrame."""
+    from agent.data import enrich, get_bars
+
+    df = enrich(get_bars("NQ", "all", "1m", compact=compact))
+    return round(df.memory_usage(index=True, deep=True).sum() / 2**20)
+
+
+def child(name: str, db_path: str, compact: str):
+    import config
+    config.DATABASE_PATH = db_path
+    config.BARS_COMPACT = compact == "1"
+
+    if name == FRAME:
+        print(json.dumps({"frame_mb": frame_mb(config.BARS_COMPACT)}))
+        return
+
+    from agent.agents.executor import execute_plan
+    from agent.agents.planner import DataRequest, ExecutionPlan
+
+    def plan(operation, timeframe, period, filters, session, params):
+        request = DataRequest(period=period, timeframe=timeframe, filters=filters,
+                              label=name, session=session)
+        return ExecutionPlan(mode="single", operation=operation, requests=[request],
+                             params=params, metrics=["change"])
+
+    # Warm up imports / caches on a one-day request
+    execute_plan(plan("count", "1m", ("2020-01-02", "2020-01-03"), [], None, {}))
+
+    base_kb = _rss_kb()
+    start = time.perf_counter()
+    result = execute_plan(plan(*PLANS[name]))
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+
+    print(json.dumps({
+        "seconds": seconds,
+        "peak_mb": round((peak_kb - base_kb) / 1024),
+        "rows": len(result.get("rows") or []),
+    }))
+
+
+def run_child(name: str, db_path: str, compact: bool) -> dict:
+    args = [sys.executable, __file__, "--child", name, db_path, "1" if compact else "0"]
+    out = subprocess.run(args, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        return child(*sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description="Executor peak memory benchmark")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--compact", action="store_true", help="Compact dtypes (BARS_COMPACT)")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.duckdb")
+        bars = build_history(db_path, args.years)
+        frame = run_child(FRAME, db_path, args.compact)["frame_mb"]
+        results = {name: run_child(name, db_path, args.compact) for name in PLANS}
+
+    if args.json:
+        print(json.dumps({"bars": bars, "compact": args.compact, "frame_mb": frame, **results}, indent=2))
+        return
+
+    print(f"{bars:,} minute bars{' (compact)' if args.compact else ''}, enriched 1m frame {frame:,} MB")
+    print(f"{'request':<24} {'peak MB':>8} {'seconds':>8} {'rows':>9}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['peak_mb']:>8} {r['seconds']:>8.2f} {r['rows']:>9,}")
+
+
+if __name__ == "__main__":
+    main()
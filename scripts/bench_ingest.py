@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark CSV ingest: old pandas path vs DuckDB streaming ingest
+(into the ohlcv_1min table and into Parquet partitions).
+
+Generates a synthetic 1-minute CSV, loads it into a fresh DuckDB file with
+both paths (each in its own interpreter) and prints rows/sec and peak RSS.
+Runs in a temp dir, nothing is kept.
+
+Usage:
+    python scripts/bench_ingest.py
+    python scripts/bench_ingest.py --rows 5000000 --gzip --json
+"""
+
+import sys
+import json
+import argparse
+import gzip
+import resource
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.database import get_connection, init_database
+from data.ingest import ingest_csv
+
+
+def write_csv(path: Path, rows: int, compress: bool):
+    opener = gzip.open if compress else open
+    start = datetime(2020, 1, 1)
+    price = 10000.0
+    with opener(path, "wt") as f:
+        f.write("timestamp,open,high,low,close,volume\n")
+        for i in range(rows):
+            ts = start + timedelta(minutes=i)
+            price += ((i * 7919) % 21 - 10) * 0.25
+            f.write(f"{ts:%Y-%m-%d %H:%M:%S},{price},{price + 1.5},{price - 1.25},{price + 0.5},{100 + i % 900}\n")
+
+
+def load_pandas(path: Path, db_path: str) -> float:
+    """Previous load_csv implementation."""
+    import pandas as pd
+
+    start = time.perf_counter()
+    init_database(db_path)
+    df = pd.read_csv(path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["symbol"] = "NQ"
+    df = df[["timestamp", "symbol", "open", "high", "low", "close", "volume"]]
+    with get_connection(db_path) as conn:
+        conn.execute("INSERT OR REPLACE INTO ohlcv_1min SELECT * FROM df")
+        conn.execute("SELECT COUNT(*) FROM ohlcv_1min WHERE symbol = 'NQ'").fetchone()
+    return time.perf_counter() - start
+
+
+def load_duckdb(path: Path, db_path: str, memory_limit: str | None = None) -> float:
+    return ingest_csv(path, "NQ", db_path=db_path, memory_limit=memory_limit, progress=None).seconds
+
+
+def load_parquet(path: Path, db_path: str) -> float:
+    import config
+    config.PARQUET_DIR = str(Path(db_path).parent / "parquet")
+    return ingest_csv(path, "NQ", db_path=db_path, backend="parquet", progress=None).seconds
+
+
+LOADERS = {
+    "pandas": load_pandas,
+    "duckdb": load_duckdb,
+    "duckdb_512mb": lambda path, db_path: load_duckdb(path, db_path, memory_limit="512MB"),
+    "parquet": load_parquet,
+}
+
+
+def run_child(name: str, csv_path: Path, db_path: str) -> dict:
+    args = [sys.executable, __file__, "--child", name, str(csv_path), db_path]
+    out = subprocess.run(args, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def child(name: str, csv_path: str, db_path: str):
+    seconds = LOADERS[name](Path(csv_path), db_path)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": round(peak_mb)}))
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        return child(*sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description="CSV ingest benchmark")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--gzip", action="store_true", help="Benchmark .csv.gz input")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / ("bars.csv.gz" if args.gzip else "bars.csv")
+        write_csv(csv_path, args.rows, args.gzip)
+
+        results = {}
+        for name in LOADERS:
+            r = run_child(name, csv_path, str(Path(tmp) / f"{name}.duckdb"))
+            results[name] = {
+                "seconds": round(r["seconds"], 2),
+                "rows_per_sec": round(args.rows / r["seconds"]),
+                "peak_rss_mb": r["peak_rss_mb"],
+            }
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "gzip": args.gzip, **results}, indent=2))
+        return
+
+    print(f"{args.rows:,} rows{' (gzip)' if args.gzip else ''}")
+    for name, r in results.items():
+        print(f"  {name:<13} {r['seconds']:>7.2f}s  {r['rows_per_sec']:>12,} rows/s  {r['peak_rss_mb']:>6,} MB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark chat-path latency of memory compaction: inline vs background.
+
+Simulates long chats with a fake LLM summarizer (fixed delay) and measures
+the time each request spends in memory append — what the user waits for.
+
+Usage:
+    python scripts/bench_memory_compaction.py
+    python scripts/bench_memory_compaction.py --chats 20 --turns 40 --llm-ms 800
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memory.compaction import MemoryCompactor
+from agent.memory.conversation import ConversationMemory
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(mode: str, chats: int, turns: int, llm_ms: float) -> list[float]:
+    """Return per-request append latencies (ms)."""
+    compactor = MemoryCompactor() if mode == "background" else None
+    memories = [ConversationMemory(chat_id=f"chat-{i}") for i in range(chats)]
+    latencies = []
+
+    for turn in range(turns):
+        for memory in memories:
+            start = time.perf_counter()
+            if compactor is None:
+                memory.add_message("user", f"question {turn}")
+                memory.add_message("assistant", f"answer {turn}")
+            else:
+                memory.add_message("user", f"question {turn}", compact=False)
+                memory.add_message("assistant", f"answer {turn}", compact=False)
+                if memory.needs_compaction():
+                    compactor.submit(memory)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    if compactor is not None:
+        compactor.flush(timeout=chats * turns * llm_ms / 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory compaction latency benchmark")
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=30, help="Exchanges per chat")
+    parser.add_argument("--llm-ms", type=float, default=500, help="Fake summarizer delay")
+    args = parser.parse_args()
+
+    def fake_summarize(self, messages):
+        time.sleep(args.llm_ms / 1000)
+        return f"Discussed {len(messages)} messages"
+
+    ConversationMemory._summarize_chunk = fake_summarize
+    ConversationMemory._merge_summaries = lambda self, summaries: "Merged history"
+    ConversationMemory.save_memory_state_sync = lambda self: None
+
+    print(f"{args.chats} chats x {args.turns} exchanges, summarizer {args.llm_ms:.0f}ms")
+    print(f"{'mode':<12} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for mode in ("inline", "background"):
+        latencies = run(mode, args.chats, args.turns, args.llm_ms)
+        print(
+            f"{mode:<12} {statistics.median(latencies):>10.3f} "
+            f"{percentile(latencies, 0.99):>10.3f} {max(latencies):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
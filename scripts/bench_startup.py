@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark API cold start: import time and time-to-ready (import + warm-up).
+
+Each run is a fresh interpreter, so nothing is cached in-process.
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 5 --json
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Runs in child interpreter (cwd = repo root)
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import api
+import_ms = (time.perf_counter() - start) * 1000
+result = {"import_ms": import_ms}
+if "--warm" in sys.argv:
+    from agent.warmup import warm_up
+    result["warmup"] = warm_up()
+    result["ready_ms"] = (time.perf_counter() - start) * 1000
+print(json.dumps(result))
+"""
+
+
+def run_child(warm: bool) -> dict:
+    args = [sys.executable, "-c", CHILD] + (["--warm"] if warm else [])
+    out = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API startup benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    imports = [run_child(warm=False)["import_ms"] for _ in range(args.runs)]
+    ready = [run_child(warm=True) for _ in range(args.runs)]
+
+    if args.json:
+        print(json.dumps({"import": imports, "ready": ready}, indent=2))
+        return
+
+    print(f"Runs: {args.runs} (fresh interpreter each)")
+    print(f"  import api       median {statistics.median(imports):8.0f}ms  max {max(imports):8.0f}ms")
+    ready_ms = [r["ready_ms"] for r in ready]
+    print(f"  time-to-ready    median {statistics.median(ready_ms):8.0f}ms  max {max(ready_ms):8.0f}ms")
+
+    print("\nWarm-up steps (median ms):")
+    for name in ready[0]["warmup"]["steps"]:
+        values = [r["warmup"]["steps"][name] for r in ready]
+        print(f"  {name:<10} {statistics.median(values):8.0f}")
+
+    errors = ready[-1]["warmup"]["errors"]
+    if errors:
+        print("\nFailed steps (last run):")
+        for name, error in errors.items():
+            print(f"  {name}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark bar storage: DuckDB ohlcv_1min table vs partitioned Parquet
+vs memory-mapped snapshots (1m only, see data/snapshot.py).
+
+Builds a synthetic NQ history (1-minute bars, weekdays) in a temp dir,
+migrates it to Parquet, builds the snapshot and compares on-disk size and
+get_bars latency for typical requests. Nothing is kept.
+
+Usage:
+    python scripts/bench_storage.py
+    python scripts/bench_storage.py --years 10 --runs 10 --json
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from data.database import get_connection, init_database
+from data.snapshot import build_snapshot
+from data.storage import migrate_table, storage_bytes
+
+# (timeframe, period) — typical executor requests
+QUERIES = [
+    ("1D", "all"),
+    ("1D", "2021"),
+    ("1W", "all"),
+    ("RTH", "all"),
+    ("1H", "2021"),
+    ("5m", "2021-06-01:2021-07-01"),
+    ("1m", "2021-06-15:2021-06-16"),
+    ("1m", "2021"),
+    ("1m", "all"),
+]
+BACKENDS = ("duckdb", "parquet", "snapshot")
+
+
+def build_history(db_path: str, years: int):
+    init_database(db_path)
+    with get_connection(db_path) as conn:
+        conn.execute(f"""
+            INSERT INTO ohlcv_1min
+            SELECT
+                ts, 'NQ',
+                10000 + sin(i / 5000.0) * 500 AS open,
+                10000 + sin(i / 5000.0) * 500 + 2 AS high,
+                10000 + sin(i / 5000.0) * 500 - 2 AS low,
+                10000 + sin(i / 5000.0) * 500 + 0.5 AS close,
+                (100 + i % 900)::INTEGER AS volume
+            FROM (
+                SELECT range AS ts, row_number() OVER () AS i
+                FROM range(TIMESTAMP '2020-01-01', TIMESTAMP '{2020 + years}-01-01', INTERVAL 1 MINUTE)
+                WHERE dayofweek(range) BETWEEN 1 AND 5
+            )
+        """)
+        return conn.execute("SELECT COUNT(*) FROM ohlcv_1min").fetchone()[0]
+
+
+def time_queries(backend: str, runs: int) -> dict:
+    from agent.data.bars import get_bars
+
+    config.STORAGE_BACKEND = "duckdb" if backend == "snapshot" else backend
+    config.SNAPSHOT_ENABLED = backend == "snapshot"
+    result = {}
+    for timeframe, period in QUERIES:
+        if backend == "snapshot" and timeframe != "1m":
+            continue
+        get_bars("NQ", period, timeframe)  # warm OS cache / metadata
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            get_bars("NQ", period, timeframe)
+            samples.append((time.perf_counter() - start) * 1000)
+        result[f"{timeframe} {period}"] = round(statistics.median(samples), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backend benchmark")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DATABASE_PATH = str(Path(tmp) / "bench.duckdb")
+        config.PARQUET_DIR = str(Path(tmp) / "parquet")
+        config.SNAPSHOT_DIR = str(Path(tmp) / "snapshots")
+
+        rows = build_history(config.DATABASE_PATH, args.years)
+        start = time.perf_counter()
+        migrate_table()
+        migrate_s = time.perf_counter() - start
+        snapshot_s = build_snapshot("NQ")["seconds"]
+
+        results = {
+            "rows": rows,
+            "migrate_s": round(migrate_s, 1),
+            "snapshot_s": snapshot_s,
+            "size_mb": {
+                "duckdb": round(storage_bytes("duckdb") / 1e6, 1),
+                "parquet": round(storage_bytes("parquet") / 1e6, 1),
+                "snapshot": round(sum(p.stat().st_size for p in Path(config.SNAPSHOT_DIR).rglob("*.npy")) / 1e6, 1),
+            },
+            "latency_ms": {b: time_queries(b, args.runs) for b in BACKENDS},
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    latency = results["latency_ms"]
+    print(f"{rows:,} rows, migrated in {results['migrate_s']}s, snapshot in {results['snapshot_s']}s")
+    print("Size: " + ", ".join(f"{b} {results['size_mb'][b]} MB" for b in BACKENDS))
+    print(f"{'query':<28} {'duckdb ms':>10} {'parquet ms':>11} {'snapshot ms':>12}")
+    for name in latency["duckdb"]:
+        print(f"{name:<28} {latency['duckdb'][name]:>10} {latency['parquet'][name]:>11} "
+              f"{latency['snapshot'].get(name, '-'):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-day bar coverage index (data/coverage.py).
+
+Ingest keeps bar_coverage up to date and init_database backfills it once on
+databases loaded before it existed; run this after changing an instrument's
+trading hours or holiday calendar. With DB_GENERATIONS the index is written
+to a new generation and published.
+
+Usage:
+    python scripts/build_coverage.py
+    python scripts/build_coverage.py --symbols NQ ES --json
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.coverage import coverage_summary, rebuild_coverage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-day bar coverage index")
+    parser.add_argument("--db", default=None, help="Database path (default: current database)")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Only these symbols (default: all)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    rebuild_coverage(args.symbols, args.db)
+    summary = coverage_summary(args.db)
+    if args.symbols:
+        summary = {symbol: summary[symbol] for symbol in args.symbols if symbol in summary}
+
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+        return
+
+    for symbol, info in summary.items():
+        print(f"{symbol}: {info['trading_days']:,} days, {info['partial_days']:,} partial, "
+              f"{info['bars']:,} bars ({info['first_bar']} .. {info['last_bar']})")
+
+
+if __name__ == "__main__":
+    main()
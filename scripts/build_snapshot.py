@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Build memory-mapped 1m snapshots (data/snapshot.py) for get_bars.
+
+Writes SNAPSHOT_DIR/<symbol>/<generation>/*.npy and swaps CURRENT, so
+running workers switch on their next request. Ingest rebuilds snapshots by
+itself when SNAPSHOT_ENABLED; run this once after enabling it.
+
+Usage:
+    python scripts/build_snapshot.py
+    python scripts/build_snapshot.py --symbols NQ ES --json
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.loader import get_data_info
+from data.snapshot import build_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build memory-mapped 1m snapshots")
+    parser.add_argument("--db", default=None, help="Database path (default: config.DATABASE_PATH)")
+    parser.add_argument("--root", default=None, help="Snapshot root (default: config.SNAPSHOT_DIR)")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Only these symbols (default: all)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    symbols = args.symbols or get_data_info(args.db)["symbol"].tolist()
+    results = {symbol: build_snapshot(symbol, args.db, args.root) for symbol in symbols}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for symbol, meta in results.items():
+        print(f"{symbol}: {meta['rows']:,} bars, {meta['days']:,} days, "
+              f"{meta['generation']} ({meta['seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
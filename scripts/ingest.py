@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Load minute bars from CSV into DuckDB.
+
+Full load streams all files (existing bars kept unless --replace). --append
+is the daily-update mode: only bars newer than the symbol's watermark are
+added and derived data is refreshed for the affected trading dates.
+
+Usage:
+    python scripts/ingest.py NQ "history/NQ_*.csv.gz"
+    python scripts/ingest.py NQ updates/NQ_2026-01-08.csv --append
+    python scripts/ingest.py NQ history/NQ.csv --replace --memory-limit 512MB --json
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.ingest import ingest_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV ingest into ohlcv_1min")
+    parser.add_argument("symbol", help="Instrument symbol, e.g. NQ")
+    parser.add_argument("paths", nargs="+", help="CSV files or glob patterns (.gz ok)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--append", action="store_true", help="Only bars newer than watermark")
+    mode.add_argument("--replace", action="store_true", help="Delete symbol's bars first")
+    parser.add_argument("--db", default=None, help="Database path (default: config.DATABASE_PATH)")
+    parser.add_argument("--memory-limit", default=None, help="DuckDB memory_limit, e.g. 512MB")
+    parser.add_argument("--no-refresh", action="store_true", help="Skip derived data refresh")
+    parser.add_argument("--json", action="store_true", help="Print stats as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    stats = ingest_csv(
+        args.paths,
+        args.symbol.upper(),
+        db_path=args.db,
+        replace=args.replace,
+        incremental=args.append,
+        refresh=not args.no_refresh,
+        memory_limit=args.memory_limit,
+    )
+
+    if args.json:
+        print(json.dumps(stats.to_dict(), indent=2))
+    return 1 if stats.refresh_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
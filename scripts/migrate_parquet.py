@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migrate ohlcv_1min from the DuckDB table to partitioned Parquet.
+
+Writes PARQUET_DIR/symbol=<S>/year=<Y>/data.parquet (zstd, sorted by
+timestamp) and verifies row counts per symbol. The table is left as is;
+switch with STORAGE_BACKEND=parquet once the export looks right.
+
+Usage:
+    python scripts/migrate_parquet.py
+    python scripts/migrate_parquet.py --symbols NQ ES --root /data/parquet
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.storage import migrate_table, storage_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ohlcv_1min to Parquet")
+    parser.add_argument("--db", default=None, help="Database path (default: config.DATABASE_PATH)")
+    parser.add_argument("--root", default=None, help="Parquet root (default: config.PARQUET_DIR)")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Only these symbols")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = migrate_table(args.db, args.root, args.symbols)
+
+    duckdb_mb = storage_bytes("duckdb", db_path=args.db) / 1e6
+    parquet_mb = storage_bytes("parquet", root=args.root) / 1e6
+    print(json.dumps(result, indent=2))
+    print(f"DuckDB file: {duckdb_mb:,.1f} MB, Parquet: {parquet_mb:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+-- Memory version for cross-worker invalidation of cached conversation memory
+-- Every persisted memory change bumps the version; workers holding a copy
+-- with another version reload it from chat_sessions.memory + chat_logs.
+-- Generated: 2026-02-01
+
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS
+  memory_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_memory_version(
+    p_chat_id UUID,
+    p_memory JSONB DEFAULT NULL
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    UPDATE chat_sessions
+    SET
+        memory = COALESCE(p_memory, memory),
+        memory_version = memory_version + 1
+    WHERE id = p_chat_id
+    RETURNING memory_version INTO new_version;
+
+    RETURN new_version;
+END;
+$$;
+
+COMMENT ON COLUMN chat_sessions.memory_version IS 'Incremented on every memory change (cache invalidation across workers)';
+COMMENT ON FUNCTION bump_memory_version(UUID, JSONB) IS 'Atomically save memory (optional) and increment memory_version, returns new version';
@@ -0,0 +1,32 @@
+-- Optimistic check for memory writes from background compaction
+-- p_expected_version: write only if memory_version still equals it,
+-- returns NULL otherwise (another worker changed the chat meanwhile)
+-- Generated: 2026-02-02
+
+DROP FUNCTION IF EXISTS bump_memory_version(UUID, JSONB);
+
+CREATE OR REPLACE FUNCTION bump_memory_version(
+    p_chat_id UUID,
+    p_memory JSONB DEFAULT NULL,
+    p_expected_version BIGINT DEFAULT NULL
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    UPDATE chat_sessions
+    SET
+        memory = COALESCE(p_memory, memory),
+        memory_version = memory_version + 1
+    WHERE id = p_chat_id
+      AND (p_expected_version IS NULL OR memory_version = p_expected_version)
+    RETURNING memory_version INTO new_version;
+
+    RETURN new_version;
+END;
+$$;
+
+COMMENT ON FUNCTION bump_memory_version(UUID, JSONB, BIGINT) IS 'Atomically save memory (optional) and increment memory_version; with p_expected_version only if unchanged (NULL on conflict)';